@@ -0,0 +1,40 @@
+"""add_document_sequences
+
+Revision ID: add_document_sequences
+Revises: add_expiration_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'add_document_sequences'
+down_revision: Union[str, Sequence[str], None] = 'add_expiration_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    # Sequences are created on first use, continuing from the highest existing number
+    if not table_exists('sequences'):
+        op.create_table('sequences',
+            sa.Column('prefix', sa.String(length=30), nullable=False),
+            sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('last_value', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('prefix', 'year')
+        )
+
+
+def downgrade() -> None:
+    if table_exists('sequences'):
+        op.drop_table('sequences')
@@ -0,0 +1,51 @@
+"""add_expiration_indexes
+
+Revision ID: add_expiration_indexes
+Revises: add_scheduled_jobs
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+from sqlalchemy import inspect
+
+
+revision: str = 'add_expiration_indexes'
+down_revision: Union[str, Sequence[str], None] = 'add_scheduled_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Due-date windows scanned by the daily expiration checks
+INDEXES = [
+    ('request_tools', 'ix_request_tools_status_return', ['status', 'expected_return_date']),
+    ('request_epp', 'ix_request_epp_status_return', ['status', 'expected_return_date']),
+    ('assets', 'ix_assets_warranty_expiration', ['warranty_expiration']),
+    ('asset_calibration', 'ix_asset_calibration_status_expiration', ['status', 'expiration_date']),
+    ('product_batches', 'ix_product_batches_expiration', ['expiration_date']),
+]
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def index_exists(table, index):
+    """Check if index exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return any(i['name'] == index for i in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    for table, index, columns in INDEXES:
+        if table_exists(table) and not index_exists(table, index):
+            op.create_index(index, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for table, index, _ in reversed(INDEXES):
+        if table_exists(table) and index_exists(table, index):
+            op.drop_index(index, table_name=table)
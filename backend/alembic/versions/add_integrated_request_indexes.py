@@ -0,0 +1,48 @@
+"""add_integrated_request_indexes
+
+Revision ID: add_integrated_request_indexes
+Revises: add_document_sequences
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+from sqlalchemy import inspect
+
+
+revision: str = 'add_integrated_request_indexes'
+down_revision: Union[str, Sequence[str], None] = 'add_document_sequences'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Integrated request listings: own requests by status and the supervisor inbox
+INDEXES = [
+    ('integrated_requests', 'ix_integrated_requests_requester_status_created', ['requested_by', 'status', 'created_at']),
+    ('integrated_requests', 'ix_integrated_requests_status_created', ['status', 'created_at']),
+]
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def index_exists(table, index):
+    """Check if index exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return any(i['name'] == index for i in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    for table, index, columns in INDEXES:
+        if table_exists(table) and not index_exists(table, index):
+            op.create_index(index, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for table, index, _ in reversed(INDEXES):
+        if table_exists(table) and index_exists(table, index):
+            op.drop_index(index, table_name=table)
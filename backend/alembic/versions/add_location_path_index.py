@@ -0,0 +1,33 @@
+"""add_location_path_index
+
+Revision ID: add_location_path_index
+Revises: add_movement_tracking_enhancements
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+from sqlalchemy import inspect
+
+
+revision: str = 'add_location_path_index'
+down_revision: Union[str, Sequence[str], None] = 'add_movement_tracking_enhancements'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def index_exists(table, index):
+    """Check if index exists on table."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return index in [ix['name'] for ix in inspector.get_indexes(table)]
+
+
+def upgrade() -> None:
+    if not index_exists('storage_locations', 'ix_storage_locations_warehouse_path'):
+        op.create_index('ix_storage_locations_warehouse_path', 'storage_locations', ['warehouse_id', 'path'], unique=False)
+
+
+def downgrade() -> None:
+    if index_exists('storage_locations', 'ix_storage_locations_warehouse_path'):
+        op.drop_index('ix_storage_locations_warehouse_path', table_name='storage_locations')
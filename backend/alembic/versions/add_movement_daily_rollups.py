@@ -0,0 +1,53 @@
+"""add_movement_daily_rollups
+
+Revision ID: add_movement_daily_rollups
+Revises: add_integrated_request_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'add_movement_daily_rollups'
+down_revision: Union[str, Sequence[str], None] = 'add_integrated_request_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    # Fill it from the existing history with scripts/backfill_movement_rollups.py
+    if not table_exists('movement_daily_rollups'):
+        op.create_table('movement_daily_rollups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('type', sa.Enum('IN', 'OUT', 'TRANSFER', 'ADJUSTMENT', name='movementtype'), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=False),
+            sa.Column('warehouse_id', sa.Integer(), nullable=False),
+            sa.Column('movement_count', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+            sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('day', 'type', 'product_id', 'category_id', 'warehouse_id', name='uix_movement_daily_rollups_key')
+        )
+        op.create_index(op.f('ix_movement_daily_rollups_id'), 'movement_daily_rollups', ['id'], unique=False)
+        op.create_index('ix_movement_daily_rollups_day_type', 'movement_daily_rollups', ['day', 'type'], unique=False)
+
+
+def downgrade() -> None:
+    if table_exists('movement_daily_rollups'):
+        op.drop_index('ix_movement_daily_rollups_day_type', table_name='movement_daily_rollups')
+        op.drop_index(op.f('ix_movement_daily_rollups_id'), table_name='movement_daily_rollups')
+        op.drop_table('movement_daily_rollups')
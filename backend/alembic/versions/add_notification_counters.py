@@ -0,0 +1,54 @@
+"""add_notification_counters
+
+Revision ID: add_notification_counters
+Revises: add_push_tokens
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'add_notification_counters'
+down_revision: Union[str, Sequence[str], None] = 'add_push_tokens'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def index_exists(table, index):
+    """Check if index exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return any(i['name'] == index for i in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    if not table_exists('notification_counters'):
+        op.create_table('notification_counters',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('unread', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+
+    if table_exists('notifications') and not index_exists('notifications', 'ix_notifications_user_read_created'):
+        op.create_index(
+            'ix_notifications_user_read_created', 'notifications',
+            ['user_id', 'is_read', 'created_at'], unique=False
+        )
+
+
+def downgrade() -> None:
+    if table_exists('notifications') and index_exists('notifications', 'ix_notifications_user_read_created'):
+        op.drop_index('ix_notifications_user_read_created', table_name='notifications')
+    if table_exists('notification_counters'):
+        op.drop_table('notification_counters')
@@ -0,0 +1,61 @@
+"""add_outbox_events
+
+Revision ID: add_outbox_events
+Revises: add_location_path_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'add_outbox_events'
+down_revision: Union[str, Sequence[str], None] = 'add_location_path_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not table_exists('outbox_events'):
+        op.create_table('outbox_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('event_type', sa.String(length=100), nullable=False),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('status', sa.Enum('PENDING', 'DELIVERED', 'FAILED', name='outboxstatus'), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('available_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('delivered_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_outbox_events_id'), 'outbox_events', ['id'], unique=False)
+        op.create_index('ix_outbox_events_status_available', 'outbox_events', ['status', 'available_at'], unique=False)
+        op.create_index('ix_outbox_events_type_id', 'outbox_events', ['event_type', 'id'], unique=False)
+
+    if not table_exists('service_leases'):
+        op.create_table('service_leases',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('holder', sa.String(length=255), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade() -> None:
+    if table_exists('service_leases'):
+        op.drop_table('service_leases')
+    if table_exists('outbox_events'):
+        op.drop_index('ix_outbox_events_type_id', table_name='outbox_events')
+        op.drop_index('ix_outbox_events_status_available', table_name='outbox_events')
+        op.drop_index(op.f('ix_outbox_events_id'), table_name='outbox_events')
+        op.drop_table('outbox_events')
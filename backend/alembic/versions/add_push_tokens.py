@@ -0,0 +1,60 @@
+"""add_push_tokens
+
+Revision ID: add_push_tokens
+Revises: add_outbox_events
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'add_push_tokens'
+down_revision: Union[str, Sequence[str], None] = 'add_outbox_events'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def index_exists(table, index):
+    """Check if index exists on table."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return index in [ix['name'] for ix in inspector.get_indexes(table)]
+
+
+def upgrade() -> None:
+    if not table_exists('push_tokens'):
+        op.create_table('push_tokens',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('token', sa.String(length=255), nullable=False),
+            sa.Column('platform', sa.String(length=50), nullable=True),
+            sa.Column('device_id', sa.String(length=255), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('token')
+        )
+        op.create_index(op.f('ix_push_tokens_id'), 'push_tokens', ['id'], unique=False)
+    if not index_exists('push_tokens', 'ix_push_tokens_user_id'):
+        op.create_index(op.f('ix_push_tokens_user_id'), 'push_tokens', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    if table_exists('push_tokens'):
+        if index_exists('push_tokens', 'ix_push_tokens_user_id'):
+            op.drop_index(op.f('ix_push_tokens_user_id'), table_name='push_tokens')
+        if index_exists('push_tokens', 'ix_push_tokens_id'):
+            op.drop_index(op.f('ix_push_tokens_id'), table_name='push_tokens')
+        op.drop_table('push_tokens')
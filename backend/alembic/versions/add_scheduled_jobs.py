@@ -0,0 +1,65 @@
+"""add_scheduled_jobs
+
+Revision ID: add_scheduled_jobs
+Revises: add_notification_counters
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = 'add_scheduled_jobs'
+down_revision: Union[str, Sequence[str], None] = 'add_notification_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table):
+    """Check if table exists."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    return table in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not table_exists('scheduled_jobs'):
+        op.create_table('scheduled_jobs',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('schedule', sa.String(length=100), nullable=False),
+            sa.Column('next_run_at', sa.DateTime(), nullable=False),
+            sa.Column('last_started_at', sa.DateTime(), nullable=True),
+            sa.Column('last_status', sa.Enum('RUNNING', 'SUCCESS', 'FAILED', name='jobrunstatus'), nullable=True),
+            sa.Column('last_success_at', sa.DateTime(), nullable=True),
+            sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+            sa.Column('last_rows_touched', sa.Integer(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+    if not table_exists('job_runs'):
+        op.create_table('job_runs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('job_name', sa.String(length=100), nullable=False),
+            sa.Column('holder', sa.String(length=255), nullable=False),
+            sa.Column('status', sa.Enum('RUNNING', 'SUCCESS', 'FAILED', name='jobrunstatus'), nullable=False),
+            sa.Column('started_at', sa.DateTime(), nullable=False),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('duration_ms', sa.Integer(), nullable=True),
+            sa.Column('rows_touched', sa.Integer(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_job_runs_id'), 'job_runs', ['id'], unique=False)
+        op.create_index('ix_job_runs_job_started', 'job_runs', ['job_name', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    if table_exists('job_runs'):
+        op.drop_index('ix_job_runs_job_started', table_name='job_runs')
+        op.drop_index(op.f('ix_job_runs_id'), table_name='job_runs')
+        op.drop_table('job_runs')
+    if table_exists('scheduled_jobs'):
+        op.drop_table('scheduled_jobs')
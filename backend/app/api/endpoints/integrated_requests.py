@@ -1,15 +1,22 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.models.integrated_request import IntegratedRequestStatus
 from app.models.user import User
 from app.schemas.integrated_request import (
-    IntegratedRequestCreate, IntegratedRequestResponse, IntegratedRequestUpdate,
+    IntegratedRequestCreate, IntegratedRequestResponse, IntegratedRequestUpdate, IntegratedRequestSummary,
     RequestItemCreate, RequestToolCreate, RequestEPPCreate, RequestVehicleCreate,
     RequestItemStatusUpdate, RequestToolStatusUpdate, RequestEPPStatusUpdate, RequestVehicleStatusUpdate,
-    RequestItemResponse, RequestToolResponse, RequestEPPResponse, RequestVehicleResponse
+    RequestItemResponse, RequestToolResponse, RequestEPPResponse, RequestVehicleResponse,
+    PickWavePlan, PickWaveApplyRequest, PickWaveApplyResponse,
+    BulkApproveRequest, BulkApproveResponse
 )
+from app.schemas.pick_route import PickRouteResponse
 from app.services.integrated_request_service import IntegratedRequestService
+from app.services.pick_route_service import PickRouteService
+from app.services.pick_wave_service import PickWaveService, DEFAULT_WAVE_WINDOW_MINUTES
 
 router = APIRouter()
 
@@ -24,20 +31,28 @@ def create_integrated_request(
     """
     return IntegratedRequestService.create_request(db, request_in, current_user.id)
 
-@router.get("/", response_model=List[IntegratedRequestResponse])
+@router.get("/", response_model=List[Union[IntegratedRequestSummary, IntegratedRequestResponse]])
 def get_integrated_requests(
     skip: int = 0,
     limit: int = 100,
+    status: Optional[IntegratedRequestStatus] = Query(None),
+    requested_by: Optional[int] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    summary: bool = Query(False, description="Line counts and status histograms instead of the lines"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
-    List integrated requests. 
+    List integrated requests, newest first. 
     Role 4 (Operational) sees only their own.
     Roles 1-3 see all.
     """
-    user_id = current_user.id if current_user.role_id == 4 else None
-    return IntegratedRequestService.get_requests(db, skip, limit, user_id)
+    user_id = current_user.id if current_user.role_id == 4 else requested_by
+    filters = {"status": status, "created_from": created_from, "created_to": created_to}
+    if summary:
+        return IntegratedRequestService.get_request_summaries(db, skip, limit, user_id, **filters)
+    return IntegratedRequestService.get_requests(db, skip, limit, user_id, **filters)
 
 @router.get("/{id}", response_model=IntegratedRequestResponse)
 def get_integrated_request(
@@ -104,6 +119,21 @@ def approve_integrated_request(
         
     return IntegratedRequestService.approve_request(db, id, current_user.id)
 
+@router.post("/bulk-approve", response_model=BulkApproveResponse)
+def bulk_approve_integrated_requests(
+    approve_in: BulkApproveRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Approve several pending requests at once (Roles 1-3). Requests that are missing or
+    not pending are reported as skipped.
+    """
+    if current_user.role_id not in [1, 2, 3]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return IntegratedRequestService.approve_requests(db, approve_in.request_ids, current_user.id)
+
 @router.post("/{id}/reject", response_model=IntegratedRequestResponse)
 def reject_integrated_request(
     id: int,
@@ -118,6 +148,54 @@ def reject_integrated_request(
          raise HTTPException(status_code=403, detail="Not authorized to reject requests")
     return IntegratedRequestService.reject_request(db, id, current_user.id, reason)
 
+@router.get("/{id}/pick-route", response_model=PickRouteResponse)
+def get_integrated_request_pick_route(
+    id: int,
+    warehouse_id: int = Query(...),
+    allocation_policy: Optional[str] = Query(None),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Pending product lines of the request sorted in walking order (Roles 1-3).
+    """
+    if current_user.role_id > 3:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return PickRouteService.route_for_integrated_request(db, id, warehouse_id, allocation_policy=allocation_policy)
+
+@router.get("/waves/plan", response_model=List[PickWavePlan])
+def plan_pick_waves(
+    warehouse_id: int = Query(...),
+    window_minutes: int = Query(DEFAULT_WAVE_WINDOW_MINUTES, gt=0),
+    allocation_policy: Optional[str] = Query(None),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Group approved requests by approval time window into consolidated pick lists (Roles 1-3).
+    """
+    if current_user.role_id > 3:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return PickWaveService.plan_waves(
+        db, warehouse_id, window_minutes=window_minutes, allocation_policy=allocation_policy
+    )
+
+@router.post("/waves/apply", response_model=PickWaveApplyResponse)
+async def apply_pick_wave(
+    wave_in: PickWaveApplyRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Deliver the product lines of several approved requests as one movement (Roles 1-3).
+    """
+    if current_user.role_id > 3:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await PickWaveService.apply_wave(
+        db, wave_in.warehouse_id, wave_in.request_ids, current_user.id,
+        allocation_policy=wave_in.allocation_policy
+    )
+
 # --- Item Management Endpoints ---
 
 @router.post("/{id}/items", response_model=IntegratedRequestResponse)
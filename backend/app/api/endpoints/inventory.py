@@ -6,7 +6,10 @@ from datetime import datetime
 from pydantic import BaseModel
 from app.api import deps
 from app.crud import product as crud_product
+from app.crud import warehouse_layout as crud_layout
 from app.services.stock_service import StockService
+from app.services.putaway_optimizer import putaway_optimizer
+from app.services import location_service, sequence_service
 from app.models.user import User
 from app.models.product import Product, ProductBatch
 from app.models.warehouse import Warehouse
@@ -16,7 +19,8 @@ from app.models.movement import MovementRequest, MovementRequestItem, MovementTy
 from app.schemas.inventory import (
     ScanRequest, ScanResult,
     ReceiveRequest, ReceiveResponse, ReceiveItem,
-    LocationCapacityUpdate, LocationCapacityResponse,
+    LocationCapacityUpdate, LocationCapacityResponse, LocationOccupancyDrift,
+    PutawaySuggestRequest, PutawaySuggestResponse,
     ProductLocationInfo,
     TransferRequest, TransferResponse, TransferItem,
     TransferHistoryResponse, TransferHistoryItem,
@@ -24,7 +28,8 @@ from app.schemas.inventory import (
     CycleCountItemResponse, CycleCountStatus, CycleCountPriority, VarianceApprovalRequest,
     ExpiringProductsResponse, ExpiringProductItem,
     LowStockResponse, LowStockItem,
-    InventorySummaryResponse, InventorySummaryCategory, InventorySummaryWarehouse
+    InventorySummaryResponse, InventorySummaryCategory, InventorySummaryWarehouse,
+    AdjustmentRequest, AdjustmentResponse, AdjustmentHistoryResponse, AdjustmentHistoryItem
 )
 from app.schemas.product_location import ProductLocationAssignmentResponse
 
@@ -175,7 +180,7 @@ async def receive_merchandise(
         raise HTTPException(status_code=400, detail="Warehouse is not active")
     
     # Create movement request
-    request_number = f"IN-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    request_number = sequence_service.next_number(db, "IN", 5, existing=MovementRequest.request_number)
     
     movement_request = MovementRequest(
         request_number=request_number,
@@ -273,26 +278,23 @@ def update_location_capacity(
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
-    # Calculate current occupancy
-    current_occupancy = db.query(func.sum(ProductLocationAssignment.quantity)).filter(
-        ProductLocationAssignment.location_id == location_id
-    ).scalar() or 0
-    
     # Update capacity
     location.capacity = request.capacity
-    location.current_occupancy = current_occupancy
     
     db.add(location)
     db.commit()
     db.refresh(location)
+    putaway_optimizer.invalidate(location.warehouse_id)
+    crud_layout.invalidate_heatmap(warehouse_id=location.warehouse_id, location_ids=[location.id])
+    location_service.invalidate_location_tree(location.warehouse_id)
     
     return LocationCapacityResponse(
         id=location.id,
         code=location.code,
         name=location.name,
         capacity=location.capacity or 0,
-        current_occupancy=location.current_occupancy,
-        available=(location.capacity or 0) - location.current_occupancy
+        current_occupancy=location.current_occupancy or 0,
+        available=(location.capacity or 0) - (location.current_occupancy or 0)
     )
 
 
@@ -309,10 +311,7 @@ def get_location_capacity(
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
-    # Calculate current occupancy
-    current_occupancy = db.query(func.sum(ProductLocationAssignment.quantity)).filter(
-        ProductLocationAssignment.location_id == location_id
-    ).scalar() or 0
+    current_occupancy = location.current_occupancy or 0
     
     return LocationCapacityResponse(
         id=location.id,
@@ -324,6 +323,22 @@ def get_location_capacity(
     )
 
 
+@router.post("/locations/occupancy/reconcile", response_model=List[LocationOccupancyDrift])
+def reconcile_location_occupancy(
+    warehouse_id: Optional[int] = Query(None),
+    fix: bool = Query(True),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Recompute location occupancy from product assignments and report the drift.
+    With fix=false the drift is only reported. Requires roles 1-2.
+    """
+    if current_user.role_id > 2:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return location_service.reconcile_location_occupancy(db, warehouse_id=warehouse_id, fix=fix)
+
+
 @router.get("/product/{product_id}/locations", response_model=List[ProductLocationAssignmentResponse])
 def get_product_locations(
     product_id: int,
@@ -386,10 +401,7 @@ def get_available_locations(
     
     result = []
     for loc in locations:
-        # Calculate current usage
-        current_usage = db.query(func.sum(ProductLocationAssignment.quantity)).filter(
-            ProductLocationAssignment.location_id == loc.id
-        ).scalar() or 0
+        current_usage = loc.current_occupancy or 0
         
         available = (loc.capacity or 999999) - current_usage if loc.capacity else 999999
         
@@ -409,6 +421,30 @@ def get_available_locations(
     return result
 
 
+@router.post("/putaway/suggest", response_model=PutawaySuggestResponse)
+def suggest_putaway(
+    request: PutawaySuggestRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(get_required_roles())
+):
+    """
+    Rank the best storage locations for every line of a receipt.
+    Scores all candidate locations of the warehouse using free capacity, temperature zone,
+    restrictions, distance from the receiving cell and product velocity.
+    """
+    warehouse = db.query(Warehouse).filter(Warehouse.id == request.warehouse_id).first()
+    if not warehouse:
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+
+    lines = putaway_optimizer.suggest_for_receipt(
+        db,
+        request.warehouse_id,
+        [item.model_dump() for item in request.items],
+        limit=request.limit
+    )
+    return PutawaySuggestResponse(warehouse_id=request.warehouse_id, lines=lines)
+
+
 @router.post("/adjust", response_model=AdjustmentResponse)
 async def create_adjustment(
     request: AdjustmentRequest,
@@ -423,7 +459,7 @@ async def create_adjustment(
         raise HTTPException(status_code=400, detail="At least one item is required")
 
     # Create movement request of type ADJUSTMENT
-    request_number = f"ADJ-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    request_number = sequence_service.next_number(db, "ADJ", 5, existing=MovementRequest.request_number)
     
     movement_request = MovementRequest(
         request_number=request_number,
@@ -607,7 +643,7 @@ async def create_transfer(
     if not dest_warehouse:
         raise HTTPException(status_code=404, detail="Destination warehouse not found")
 
-    request_number = f"TR-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    request_number = sequence_service.next_number(db, "TR", 5, existing=MovementRequest.request_number)
 
     movement_request = MovementRequest(
         request_number=request_number,
@@ -1197,7 +1233,7 @@ async def approve_variances(
         try:
             for adj in adjustments_request["items"]:
                 movement_request = MovementRequest(
-                    request_number=f"CC-ADJ-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                    request_number=sequence_service.next_number(db, "CC-ADJ", 5, existing=MovementRequest.request_number),
                     type=MovementType.ADJUSTMENT,
                     status=MovementStatus.PENDING,
                     reason=adj["notes"],
@@ -1,26 +1,32 @@
 import os
+import re
 import time
+import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from io import BytesIO
 
 from app.api import deps
+from app.core.config import settings as app_settings
 from app.models.user import User
 from app.models.label import LabelTemplate, LabelSize
 from app.models.product import Product
 from app.models.location_models import StorageLocation
 from app.schemas.label import (
     LabelTemplateCreate, LabelTemplateUpdate, LabelTemplateResponse,
-    GenerateLabelRequest, BatchLabelRequest, LabelData
+    GenerateLabelRequest, BatchLabelRequest, LabelData, LabelRenderMode, LabelOutputFormat
 )
-from app.services.pdf_generator import generate_label_pdf, generate_batch_labels_pdf
+from app.services.pdf_generator import generate_label_pdf
+from app.services.label_stream import STREAM_RENDER_MODES, stream_batch_labels_pdf, write_batch_labels_pdf
+from app.services.raw_label_generator import RAW_MEDIA_TYPES, generate_label_raw, stream_batch_labels_raw
 import time as time_module
 
 router = APIRouter()
 
-LABELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "uploads", "labels")
+# Private: job PDFs are only downloadable through the authenticated job endpoint
+LABELS_DIR = app_settings.LABEL_JOBS_DIR
 
 
 def get_default_template() -> dict:
@@ -65,6 +71,22 @@ def template_to_dict(template: LabelTemplate) -> dict:
     }
 
 
+def label_response(data: dict, settings: dict, output_format: LabelOutputFormat, filename: str) -> StreamingResponse:
+    """Single label as PDF or as native printer commands (ZPL/EPL), from the same template settings."""
+    if output_format == LabelOutputFormat.PDF:
+        content = generate_label_pdf(data, **settings)
+        media_type = "application/pdf"
+    else:
+        content = generate_label_raw(data, output_format.value, **settings)
+        media_type = RAW_MEDIA_TYPES[output_format.value]
+    
+    return StreamingResponse(
+        BytesIO(content),
+        media_type=media_type,
+        headers={"Content-Disposition": f"inline; filename={filename}.{output_format.value}"}
+    )
+
+
 @router.get("/templates", response_model=List[LabelTemplateResponse])
 def list_templates(
     skip: int = Query(0, ge=0),
@@ -149,6 +171,8 @@ def generate_product_label(
     product_id: int,
     template_id: Optional[int] = Query(None),
     label_type: Optional[str] = Query(None),
+    render_mode: Optional[LabelRenderMode] = Query(None),
+    output_format: LabelOutputFormat = Query(LabelOutputFormat.PDF),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -162,6 +186,9 @@ def generate_product_label(
     
     settings = template_to_dict(template) if template else get_default_template()
     
+    if render_mode:
+        settings['render_mode'] = render_mode.value
+    
     if label_type:
         settings['label_type'] = label_type
     else:
@@ -174,15 +201,8 @@ def generate_product_label(
         'barcode': product.barcode,
     }
     
-    pdf_content = generate_label_pdf(data, **settings)
-    
-    filename = f"label_product_{product.sku}_{int(time_module.time())}.pdf"
-    
-    return StreamingResponse(
-        BytesIO(pdf_content),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={filename}"}
-    )
+    filename = f"label_product_{product.sku}_{int(time_module.time())}"
+    return label_response(data, settings, output_format, filename)
 
 
 @router.get("/location/{location_id}")
@@ -190,6 +210,8 @@ def generate_location_label(
     location_id: int,
     template_id: Optional[int] = Query(None),
     label_type: Optional[str] = Query(None),
+    render_mode: Optional[LabelRenderMode] = Query(None),
+    output_format: LabelOutputFormat = Query(LabelOutputFormat.PDF),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -203,6 +225,9 @@ def generate_location_label(
     
     settings = template_to_dict(template) if template else get_default_template()
     
+    if render_mode:
+        settings['render_mode'] = render_mode.value
+    
     if label_type:
         settings['label_type'] = label_type
     else:
@@ -216,15 +241,8 @@ def generate_location_label(
         'location_name': location.name,
     }
     
-    pdf_content = generate_label_pdf(data, **settings)
-    
-    filename = f"label_location_{location.code}_{int(time_module.time())}.pdf"
-    
-    return StreamingResponse(
-        BytesIO(pdf_content),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={filename}"}
-    )
+    filename = f"label_location_{location.code}_{int(time_module.time())}"
+    return label_response(data, settings, output_format, filename)
 
 
 @router.post("/generate")
@@ -239,6 +257,9 @@ def generate_custom_label(
     
     settings = template_to_dict(template) if template else get_default_template()
     
+    if request.render_mode:
+        settings['render_mode'] = request.render_mode.value
+    
     if request.label_type:
         settings['label_type'] = request.label_type.value if hasattr(request.label_type, 'value') else request.label_type
     else:
@@ -246,20 +267,14 @@ def generate_custom_label(
     
     data = request.data.model_dump()
     
-    pdf_content = generate_label_pdf(data, **settings)
-    
-    filename = f"label_{int(time_module.time())}.pdf"
-    
-    return StreamingResponse(
-        BytesIO(pdf_content),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={filename}"}
-    )
+    filename = f"label_{int(time_module.time())}"
+    return label_response(data, settings, request.output_format, filename)
 
 
 @router.post("/batch-print")
 def batch_print_labels(
     request: BatchLabelRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.require_roles([1, 2, 3]))
 ):
@@ -269,25 +284,99 @@ def batch_print_labels(
     
     settings = template_to_dict(template) if template else get_default_template()
     
+    if request.render_mode:
+        settings['render_mode'] = request.render_mode.value
+    
     if request.label_type:
         settings['label_type'] = request.label_type.value if hasattr(request.label_type, 'value') else request.label_type
     else:
         settings['label_type'] = template.label_type.value if template else 'qr'
     
     items_data = [item.model_dump() for item in request.items]
+    label_count = len(items_data) * request.copies_per_label
     
-    pdf_content = generate_batch_labels_pdf(
-        items_data,
-        copies_per_label=request.copies_per_label,
-        **settings
-    )
+    if request.output_format != LabelOutputFormat.PDF:
+        # Printer commands are a few hundred bytes per label; copies are printed by the printer
+        fmt = request.output_format.value
+        return StreamingResponse(
+            stream_batch_labels_raw(items_data, fmt, copies_per_label=request.copies_per_label, **settings),
+            media_type=RAW_MEDIA_TYPES[fmt],
+            headers={
+                "Content-Disposition": f"attachment; filename=labels_batch_{int(time_module.time())}.{fmt}",
+                "X-Label-Count": str(label_count),
+            }
+        )
+    
+    if settings.get('render_mode', STREAM_RENDER_MODES[0]) not in STREAM_RENDER_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch PDFs only support render modes: {', '.join(STREAM_RENDER_MODES)}"
+        )
+    
+    if request.job:
+        # Very large runs: render to disk in the background and hand back a download URL
+        job_id = uuid.uuid4().hex
+        filename = f"labels_batch_{job_id}.pdf"
+        path = os.path.join(LABELS_DIR, filename)
+        os.makedirs(LABELS_DIR, exist_ok=True)
+        # Mark the job as running right away; the task writes into the same partial file
+        open(f"{path}.part", "wb").close()
+        background_tasks.add_task(
+            write_batch_labels_pdf,
+            path,
+            items_data,
+            copies_per_label=request.copies_per_label,
+            **settings
+        )
+        return {
+            "success": True,
+            "job_id": job_id,
+            "filename": filename,
+            "label_count": label_count,
+            "status_url": f"/inventory/labels/jobs/{job_id}",
+            "download_url": f"/inventory/labels/jobs/{job_id}/download",
+        }
     
-    label_count = len(items_data) * request.copies_per_label
     filename = f"labels_batch_{int(time_module.time())}.pdf"
     
-    return {
-        "success": True,
-        "filename": filename,
-        "label_count": label_count,
-        "pdf": pdf_content.hex() if False else None,
-    }
+    return StreamingResponse(
+        stream_batch_labels_pdf(items_data, copies_per_label=request.copies_per_label, **settings),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Label-Count": str(label_count),
+        }
+    )
+
+
+def label_job_path(job_id: str) -> str:
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id):
+        raise HTTPException(status_code=404, detail="Label job not found")
+    return os.path.join(LABELS_DIR, f"labels_batch_{job_id}.pdf")
+
+
+@router.get("/jobs/{job_id}")
+def get_label_job(
+    job_id: str,
+    current_user: User = Depends(deps.require_roles([1, 2, 3]))
+):
+    path = label_job_path(job_id)
+    if os.path.exists(path):
+        return {"job_id": job_id, "status": "completed", "download_url": f"/inventory/labels/jobs/{job_id}/download"}
+    if os.path.exists(f"{path}.failed"):
+        with open(f"{path}.failed") as f:
+            return {"job_id": job_id, "status": "failed", "error": f.read()}
+    if os.path.exists(f"{path}.part"):
+        return {"job_id": job_id, "status": "running"}
+    raise HTTPException(status_code=404, detail="Label job not found")
+
+
+@router.get("/jobs/{job_id}/download")
+def download_label_job(
+    job_id: str,
+    current_user: User = Depends(deps.require_roles([1, 2, 3]))
+):
+    path = label_job_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Label job not found or not finished")
+    return FileResponse(path, media_type="application/pdf", filename=os.path.basename(path))
@@ -7,6 +7,7 @@ from app.models import location_models, product_location_models, product as prod
 from app.schemas import location as schemas
 from app.schemas import product_location as assignment_schemas
 from app.models.user import User
+from app.services import location_service
 
 router = APIRouter()
 
@@ -111,25 +112,26 @@ def update_location(
         if existing:
             raise HTTPException(status_code=400, detail="Location code already exists in this warehouse")
             
-        # Update path logic would be needed here if code changes
-        # For simplicity, assuming path update logic is handled or we rebuild it
-        parent_path = ""
-        if db_location.parent_location_id:
-             parent = db.query(location_models.StorageLocation).filter(location_models.StorageLocation.id == db_location.parent_location_id).first()
-             parent_path = parent.path if parent and parent.path else ""
-        elif db_location.parent: # fallback if loaded
-             parent_path = db_location.parent.path if db_location.parent.path else ""
-             
-        # Path reconstruction logic should be more robust (recursive update for children)
-        # But for now, basic update
-        pass 
+    moved = (
+        update_data.get("code", db_location.code) != db_location.code
+        or update_data.get("parent_location_id", db_location.parent_location_id) != db_location.parent_location_id
+    )
 
     for key, value in update_data.items():
         setattr(db_location, key, value)
 
+    # Rewrite the path of the location and its whole subtree
+    if moved:
+        parent_path = ""
+        if db_location.parent_location_id:
+            parent = db.query(location_models.StorageLocation).filter(location_models.StorageLocation.id == db_location.parent_location_id).first()
+            parent_path = parent.path if parent and parent.path else ""
+        location_service.move_location_path(db, db_location, parent_path)
+
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
+    location_service.invalidate_location_tree(db_location.warehouse_id)
     return db_location
 
 @router.delete("/{location_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -163,8 +165,10 @@ def delete_location(
     if assignments > 0:
         raise HTTPException(status_code=400, detail="Cannot delete location containing products")
 
+    warehouse_id = db_location.warehouse_id
     db.delete(db_location)
     db.commit()
+    location_service.invalidate_location_tree(warehouse_id)
 
 @router.get("/{location_id}/inventory", response_model=List[assignment_schemas.ProductLocationAssignmentResponse])
 def read_location_inventory(
@@ -11,6 +11,8 @@ from app.crud.movement import movement_request, movement
 from app.models.user import User
 from app.models.movement import MovementStatus, MovementType, MovementPriority
 from app.services.stock_service import StockService
+from app.services.pick_route_service import PickRouteService
+from app.schemas.pick_route import PickRouteResponse
 
 router = APIRouter()
 
@@ -265,12 +267,15 @@ async def apply_movement_request(
     *,
     db: Session = Depends(get_db),
     id: int,
+    allocation_policy: Optional[str] = Query(
+        None, description="Split policy for OUT/TRANSFER lines: fefo, fifo, fewest_picks, smallest_first"
+    ),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     from app.services.stock_service import StockService
     
     try:
-        result = await StockService.apply_movement(db, id, current_user.id)
+        result = await StockService.apply_movement(db, id, current_user.id, allocation_policy=allocation_policy)
         
         request = movement_request.get(db=db, id=id)
         return request
@@ -283,6 +288,22 @@ async def apply_movement_request(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/requests/{id}/pick-route", response_model=PickRouteResponse)
+def get_pick_route(
+    *,
+    db: Session = Depends(get_db),
+    id: int,
+    allocation_policy: Optional[str] = Query(
+        None, description="Split policy for lines without a source location: fefo, fifo, fewest_picks, smallest_first"
+    ),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Lines of an OUT/TRANSFER request sorted in walking order over the warehouse layout.
+    """
+    return PickRouteService.route_for_movement(db, id, allocation_policy=allocation_policy)
+
+
 @router.post("/requests/{id}/tracking", response_model=MovementTrackingEvent)
 def add_tracking_event(
     *,
@@ -9,7 +9,7 @@ from pydantic import BaseModel
 from datetime import datetime
 import time
 
-from app.models.notification_preferences import UserNotificationPreference
+from app.models.notification_preferences import UserNotificationPreference, PushToken
 from app.schemas.notification_preferences import (
     NotificationPreferenceCreate, NotificationPreferenceUpdate,
     NotificationPreferenceResponse, PushTokenRegister, PushTokenResponse
@@ -41,6 +41,14 @@ def get_notifications(
     return NotificationService.get_user_notifications(db, current_user.id, unread_only, limit)
 
 
+@router.get("/unread-count")
+def get_unread_count(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    return {"unread": NotificationService.get_unread_count(db, current_user.id)}
+
+
 @router.post("/{id}/read", response_model=NotificationResponse)
 def mark_notification_read(
     id: int,
@@ -116,24 +124,6 @@ async def register_push_token(
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
-    from app.database import Base
-    from sqlalchemy.orm import relationship
-    
-    class PushToken(Base):
-        __tablename__ = "push_tokens"
-        
-        id = Column(Integer, primary_key=True, index=True)
-        user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-        token = Column(Text, nullable=False, unique=True)
-        platform = Column(String(50), default="expo")
-        device_id = Column(String(255), nullable=True)
-        is_active = Column(Boolean, default=True)
-        created_at = Column(Integer, nullable=False)
-        updated_at = Column(Integer, nullable=True)
-        
-        user = relationship("User", lazy="select")
-    
     existing = db.query(PushToken).filter(
         PushToken.token == token_data.token
     ).first()
@@ -165,24 +155,6 @@ async def unregister_push_token(
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
-    from app.database import Base
-    from sqlalchemy.orm import relationship
-    
-    class PushToken(Base):
-        __tablename__ = "push_tokens"
-        
-        id = Column(Integer, primary_key=True, index=True)
-        user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-        token = Column(Text, nullable=False, unique=True)
-        platform = Column(String(50), default="expo")
-        device_id = Column(String(255), nullable=True)
-        is_active = Column(Boolean, default=True)
-        created_at = Column(Integer, nullable=False)
-        updated_at = Column(Integer, nullable=True)
-        
-        user = relationship("User", lazy="select")
-    
     existing = db.query(PushToken).filter(
         PushToken.token == token,
         PushToken.user_id == current_user.id
@@ -1,10 +1,10 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from decimal import Decimal
 from app.api import deps
 from app.crud import product as crud_product
+from app.crud import warehouse_layout as crud_layout
 from app.utils.file_storage import save_product_image
 from app.crud.movement import movement
 from app.schemas import product as product_schemas
@@ -13,6 +13,8 @@ from app.schemas import inventory_refs as ref_schemas
 from app.models.user import User
 from app.models import product_location_models, location_models, location_audit_models
 from app.schemas import product_location as assignment_schemas
+from app.services import location_service
+from app.services.putaway_optimizer import putaway_optimizer
 
 
 router = APIRouter()
@@ -693,11 +695,7 @@ def assign_product_location(
 
     # Check capacity if defined
     if location.capacity is not None:
-        # Calculate current usage
-        current_usage = db.query(func.sum(product_location_models.ProductLocationAssignment.quantity)).filter(
-            product_location_models.ProductLocationAssignment.location_id == assignment.location_id
-        ).scalar() or 0
-        
+        current_usage = location.current_occupancy or 0
         if current_usage + assignment.quantity > location.capacity:
              raise HTTPException(status_code=400, detail=f"Location capacity exceeded. Available: {location.capacity - current_usage}")
 
@@ -724,14 +722,18 @@ def assign_product_location(
     else:
         # Create assignment
         db_assignment = product_location_models.ProductLocationAssignment(
-            **assignment.model_dump(exclude={"product_id", "assigned_by"}),
+            **assignment.model_dump(exclude={"product_id", "assigned_by", "warehouse_id"}),
             product_id=product_id,
             warehouse_id=location.warehouse_id,
             assigned_by=current_user.id
         )
         db.add(db_assignment)
+    location_service.adjust_location_occupancy(db, location.warehouse_id, location.id, assignment.quantity)
     
     db.commit()
+    location_service.invalidate_location_tree(location.warehouse_id)
+    crud_layout.invalidate_heatmap(warehouse_id=location.warehouse_id, location_ids=[location.id])
+    putaway_optimizer.on_stock_change(location.warehouse_id, location.id, product_id, assignment.quantity)
     db.refresh(db_assignment)
     return db_assignment
 
@@ -757,11 +759,18 @@ def update_product_location_assignment(
         raise HTTPException(status_code=404, detail="Assignment not found")
         
     update_data = assignment_update.model_dump(exclude_unset=True)
+    previous_quantity = db_assignment.quantity or 0
+    warehouse_id, location_id = db_assignment.warehouse_id, db_assignment.location_id
     for key, value in update_data.items():
         setattr(db_assignment, key, value)
         
     db.add(db_assignment)
+    delta = (db_assignment.quantity or 0) - previous_quantity
+    location_service.adjust_location_occupancy(db, warehouse_id, location_id, delta)
     db.commit()
+    location_service.invalidate_location_tree(warehouse_id)
+    crud_layout.invalidate_heatmap(warehouse_id=warehouse_id, location_ids=[location_id])
+    putaway_optimizer.on_stock_change(warehouse_id, location_id, product_id, delta)
     db.refresh(db_assignment)
     return db_assignment
 
@@ -785,8 +794,15 @@ def delete_product_location_assignment(
     if not db_assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
         
+    warehouse_id = db_assignment.warehouse_id
+    location_id = db_assignment.location_id
+    removed = db_assignment.quantity or 0
+    location_service.adjust_location_occupancy(db, warehouse_id, location_id, -removed)
     db.delete(db_assignment)
     db.commit()
+    location_service.invalidate_location_tree(warehouse_id)
+    crud_layout.invalidate_heatmap(warehouse_id=warehouse_id, location_ids=[location_id])
+    putaway_optimizer.on_stock_change(warehouse_id, location_id, product_id, -removed)
     return {"ok": True}
 
 @router.get("/{product_id}/locations/all", response_model=List[assignment_schemas.ProductLocationAssignmentResponse])
@@ -839,9 +855,7 @@ def relocate_product(
 
     # Check capacity at destination
     if dest_loc.capacity is not None:
-         current_usage = db.query(func.sum(product_location_models.ProductLocationAssignment.quantity)).filter(
-            product_location_models.ProductLocationAssignment.location_id == relocation.to_location_id
-         ).scalar() or 0
+         current_usage = dest_loc.current_occupancy or 0
          if current_usage + relocation.quantity > dest_loc.capacity:
               raise HTTPException(status_code=400, detail=f"Destination capacity exceeded. Available: {dest_loc.capacity - current_usage}")
         
@@ -863,6 +877,7 @@ def relocate_product(
         db.delete(source) # Optional: keep with 0 or delete
     else:
         db.add(source)
+    location_service.adjust_location_occupancy(db, source.warehouse_id, relocation.from_location_id, -relocation.quantity)
         
     # 4. Update/Create Destination
     dest = db.query(product_location_models.ProductLocationAssignment).filter(
@@ -897,6 +912,14 @@ def relocate_product(
         user_id=current_user.id
     )
     db.add(audit_in)
+    location_service.adjust_location_occupancy(db, dest_loc.warehouse_id, dest_loc.id, relocation.quantity)
+    source_warehouse_id = source.warehouse_id
     
     db.commit()
+    for warehouse_id in {source_warehouse_id, dest_loc.warehouse_id}:
+        location_service.invalidate_location_tree(warehouse_id)
+    crud_layout.invalidate_heatmap(warehouse_id=source_warehouse_id, location_ids=[relocation.from_location_id])
+    crud_layout.invalidate_heatmap(warehouse_id=dest_loc.warehouse_id, location_ids=[dest_loc.id])
+    putaway_optimizer.on_stock_change(source_warehouse_id, relocation.from_location_id, product_id, -relocation.quantity)
+    putaway_optimizer.on_stock_change(dest_loc.warehouse_id, dest_loc.id, product_id, relocation.quantity)
     return {"message": "Relocation successful"}
@@ -5,6 +5,7 @@ from decimal import Decimal
 
 from app.api import deps
 from app.models.user import User
+from app.services import sequence_service
 from app.models.supplier import Supplier
 from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem, PurchaseOrderStatus as POStatus
 from app.schemas.purchase_order import (
@@ -60,11 +61,7 @@ def create_purchase_order(
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
-    from app.database import engine
-    prefix = "PO"
-    max_id = db.query(PurchaseOrder.id).order_by(PurchaseOrder.id.desc()).first()
-    next_num = (max_id[0] if max_id else 0) + 1
-    order_number = f"{prefix}{next_num:06d}"
+    order_number = sequence_service.next_number(db, "PO", 6, yearly=False, existing=PurchaseOrder.order_number)
     
     order = PurchaseOrder(
         order_number=order_number,
@@ -6,6 +6,7 @@ from decimal import Decimal
 
 from app.api import deps
 from app.models.user import User
+from app.services import sequence_service
 from app.models.supplier import Supplier, SupplierStatus
 from app.models.purchase_order import PurchaseOrder
 from app.schemas.supplier import (
@@ -66,11 +67,7 @@ def create_supplier(
         if existing:
             raise HTTPException(status_code=400, detail="Supplier code already exists")
     else:
-        from app.database import engine
-        prefix = "SUP"
-        max_id = db.query(Supplier.id).order_by(Supplier.id.desc()).first()
-        next_num = (max_id[0] if max_id else 0) + 1
-        supplier_in.code = f"{prefix}{next_num:05d}"
+        supplier_in.code = sequence_service.next_number(db, "SUP", 5, yearly=False, existing=Supplier.code)
     
     supplier = Supplier(
         **supplier_in.model_dump(),
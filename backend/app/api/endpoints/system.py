@@ -5,7 +5,7 @@ from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 
 from app.api import deps
-from app.models.system import SystemConfig
+from app.models.system import SystemConfig, ScheduledJob, JobRun
 from app.models.user import User, UserAudit
 from app.models.product import Product
 from app.models.movement import Movement
@@ -133,3 +133,19 @@ def system_metrics(
         total_products=total_products,
         total_movements=total_movements
     )
+
+@router.get("/jobs", response_model=List[schemas.ScheduledJobOut])
+def list_scheduled_jobs(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(check_super_admin)
+):
+    return db.query(ScheduledJob).order_by(ScheduledJob.name).all()
+
+@router.get("/jobs/{name}/runs", response_model=List[schemas.JobRunOut])
+def list_job_runs(
+    name: str,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(check_super_admin)
+):
+    return db.query(JobRun).filter(JobRun.job_name == name).order_by(JobRun.started_at.desc()).limit(limit).all()
@@ -9,6 +9,7 @@ from app.models import warehouse as models
 from app.models import location_models
 from app.models import product_location_models
 from app.models.user import User
+from app.services import location_service
 
 router = APIRouter()
 
@@ -173,13 +174,8 @@ def read_warehouse_locations_tree(
     if not warehouse:
         raise HTTPException(status_code=404, detail="Warehouse not found")
         
-    # Get only root locations (parent_location_id is None)
-    # The response model will handle recursion for children if configured correctly
-    locations = db.query(location_models.StorageLocation).filter(
-        location_models.StorageLocation.warehouse_id == warehouse_id,
-        location_models.StorageLocation.parent_location_id == None
-    ).all()
-    return locations
+    # Root locations with their nested children, assembled from one query
+    return location_service.get_location_tree(db, warehouse_id)
 
 @router.get("/{warehouse_id}/locations", response_model=List[location_schemas.StorageLocationResponse])
 def read_warehouse_locations(
@@ -195,11 +191,7 @@ def read_warehouse_locations(
     if not warehouse:
         raise HTTPException(status_code=404, detail="Warehouse not found")
         
-    locations = db.query(location_models.StorageLocation).filter(
-        location_models.StorageLocation.warehouse_id == warehouse_id,
-        location_models.StorageLocation.parent_location_id == None
-    ).all()
-    return locations
+    return location_service.get_location_tree(db, warehouse_id)
 
 @router.post("/{warehouse_id}/locations", response_model=location_schemas.StorageLocationResponse)
 def create_location(
@@ -260,6 +252,7 @@ def create_location(
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
+    location_service.invalidate_location_tree(warehouse_id)
     return db_location
 
 @router.put("/{warehouse_id}/locations/{location_id}", response_model=location_schemas.StorageLocationResponse)
@@ -295,24 +288,29 @@ def update_location(
         ).first()
         if existing:
             raise HTTPException(status_code=400, detail="Location code already exists in this warehouse")
-            
-        # Update path if code changes
-        parent_path = ""
-        if db_location.parent_location_id:
-             parent = db_location.parent
-             parent_path = parent.path if parent and parent.path else ""
-        
-        new_path = f"{parent_path}/{update_data['code']}"
-        db_location.path = new_path
-        db_location.code = update_data["code"]
+    
+    moved = (
+        update_data.get("code", db_location.code) != db_location.code
+        or update_data.get("parent_location_id", db_location.parent_location_id) != db_location.parent_location_id
+    )
         
     for key, value in update_data.items():
-        if key != "code": # code already handled
-            setattr(db_location, key, value)
+        setattr(db_location, key, value)
+    
+    # Update the path of the location and its subtree if code or parent changes
+    if moved:
+        parent_path = ""
+        if db_location.parent_location_id:
+            parent = db.query(location_models.StorageLocation).filter(
+                location_models.StorageLocation.id == db_location.parent_location_id
+            ).first()
+            parent_path = parent.path if parent and parent.path else ""
+        location_service.move_location_path(db, db_location, parent_path)
         
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
+    location_service.invalidate_location_tree(warehouse_id)
     return db_location
 
 @router.delete("/{warehouse_id}/locations/{location_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -342,6 +340,7 @@ def delete_location(
          
     db.delete(db_location)
     db.commit()
+    location_service.invalidate_location_tree(warehouse_id)
     return None
 
 
@@ -373,54 +372,66 @@ def create_locations_batch(
             raise HTTPException(status_code=400, detail="Parent location belongs to a different warehouse")
         parent_path = parent.path or ""
     
-    created_locations = []
-    errors = []
-    
+    rows = []
     for i in range(batch_data.count):
         number = batch_data.start_number + i
         code = f"{batch_data.prefix}{number:03d}"
         name = batch_data.name_template.replace("{n}", str(number)).replace("{n:02d}", f"{number:02d}").replace("{n:03d}", f"{number:03d}")
-        barcode = f"{batch_data.barcode_prefix}{number:03d}" if batch_data.barcode_prefix else None
-        position = f"{batch_data.position_prefix}{number}" if batch_data.position_prefix else str(number)
-        
-        existing = db.query(location_models.StorageLocation).filter(
-            location_models.StorageLocation.warehouse_id == warehouse_id,
-            location_models.StorageLocation.code == code
+        rows.append({
+            "parent_location_id": batch_data.parent_location_id,
+            "code": code,
+            "name": name,
+            "location_type": batch_data.location_type,
+            "aisle": batch_data.aisle,
+            "rack": batch_data.rack,
+            "shelf": batch_data.shelf,
+            "position": f"{batch_data.position_prefix}{number}" if batch_data.position_prefix else str(number),
+            "capacity": batch_data.capacity,
+            "barcode": f"{batch_data.barcode_prefix}{number:03d}" if batch_data.barcode_prefix else None,
+            "path": f"{parent_path}/{code}",
+        })
+    
+    created_locations, errors = location_service.bulk_create_locations(db, warehouse_id, rows)
+    db.commit()
+    location_service.invalidate_location_tree(warehouse_id)
+    
+    return location_schemas.BatchLocationResponse(
+        created=len(created_locations),
+        locations=created_locations,
+        errors=errors
+    )
+
+
+@router.post("/{warehouse_id}/locations/matrix", response_model=location_schemas.BatchLocationResponse)
+def create_location_matrix(
+    warehouse_id: int,
+    matrix: location_schemas.LocationMatrixCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Create a whole address grid (aisles x racks x shelves x positions) in one call.
+    With create_hierarchy the aisle, rack and shelf nodes are created as well.
+    """
+    check_write_permissions(current_user)
+    
+    warehouse = db.query(models.Warehouse).filter(models.Warehouse.id == warehouse_id).first()
+    if not warehouse:
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+    
+    parent = None
+    if matrix.parent_location_id:
+        parent = db.query(location_models.StorageLocation).filter(
+            location_models.StorageLocation.id == matrix.parent_location_id
         ).first()
-        
-        if existing:
-            errors.append(f"Code {code} already exists, skipping")
-            continue
-        
-        if barcode:
-            existing_barcode = db.query(location_models.StorageLocation).filter(
-                location_models.StorageLocation.barcode == barcode
-            ).first()
-            if existing_barcode:
-                errors.append(f"Barcode {barcode} already exists, skipping")
-                continue
-        
-        db_location = location_models.StorageLocation(
-            warehouse_id=warehouse_id,
-            parent_location_id=batch_data.parent_location_id,
-            code=code,
-            name=name,
-            location_type=batch_data.location_type,
-            aisle=batch_data.aisle,
-            rack=batch_data.rack,
-            shelf=batch_data.shelf,
-            position=position,
-            capacity=batch_data.capacity,
-            barcode=barcode,
-            path=f"{parent_path}/{code}" if parent_path else code
-        )
-        db.add(db_location)
-        created_locations.append(db_location)
+        if not parent:
+            raise HTTPException(status_code=404, detail="Parent location not found")
+        if parent.warehouse_id != warehouse_id:
+            raise HTTPException(status_code=400, detail="Parent location belongs to a different warehouse")
     
+    created_locations, errors = location_service.create_location_matrix(db, warehouse_id, parent, matrix)
     db.commit()
-    
-    for loc in created_locations:
-        db.refresh(loc)
+    location_service.invalidate_location_tree(warehouse_id)
     
     return location_schemas.BatchLocationResponse(
         created=len(created_locations),
@@ -479,12 +490,13 @@ def duplicate_location(
         dimensions=original.dimensions,
         temperature_zone=original.temperature_zone,
         is_restricted=original.is_restricted,
-        path=f"{parent_path}/{new_code}" if parent_path else new_code
+        path=f"{parent_path}/{new_code}"
     )
     
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
+    location_service.invalidate_location_tree(warehouse_id)
     return db_location
 
 
@@ -505,29 +517,8 @@ def get_location_hierarchy(
     if not warehouse:
         raise HTTPException(status_code=404, detail="Warehouse not found")
     
-    query = db.query(location_models.StorageLocation).filter(
-        location_models.StorageLocation.warehouse_id == warehouse_id
-    )
-    
-    if aisle:
-        query = query.filter(location_models.StorageLocation.aisle == aisle)
-    if rack:
-        query = query.filter(location_models.StorageLocation.rack == rack)
-    if shelf:
-        query = query.filter(location_models.StorageLocation.shelf == shelf)
-    
-    locations = query.all()
-    
-    aisles = sorted(set(loc.aisle for loc in locations if loc.aisle))
-    racks = sorted(set(loc.rack for loc in locations if loc.rack))
-    shelves = sorted(set(loc.shelf for loc in locations if loc.shelf))
-    positions = sorted(set(loc.position for loc in locations if loc.position))
-    
     return location_schemas.LocationHierarchyResponse(
-        aisles=aisles,
-        racks=racks,
-        shelves=shelves,
-        positions=positions
+        **location_service.get_location_hierarchy(db, warehouse_id, aisle=aisle, rack=rack, shelf=shelf)
     )
 
 
@@ -546,16 +537,41 @@ def get_location_children(
     if not warehouse:
         raise HTTPException(status_code=404, detail="Warehouse not found")
     
-    query = db.query(location_models.StorageLocation).filter(
-        location_models.StorageLocation.warehouse_id == warehouse_id
-    )
-    
-    if parent_id is None:
-        query = query.filter(location_models.StorageLocation.parent_location_id == None)
-    else:
-        query = query.filter(location_models.StorageLocation.parent_location_id == parent_id)
+    return location_service.get_location_children(db, warehouse_id, parent_id)
+
+
+@router.get("/{warehouse_id}/locations/stock-summary", response_model=List[location_schemas.LocationStockSummary])
+def get_locations_stock_summary(
+    warehouse_id: int,
+    parent_id: Optional[int] = Query(None, description="Parent location ID (null for root)"),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_roles_with_permission([1, 2, 3], "warehouses:view")),
+):
+    """
+    Stock, SKUs and occupancy rolled up over the subtree of each direct child of a location.
+    Useful for zone/aisle/rack capacity screens at any tree depth.
+    """
+    warehouse = db.query(models.Warehouse).filter(models.Warehouse.id == warehouse_id).first()
+    if not warehouse:
+        raise HTTPException(status_code=404, detail="Warehouse not found")
     
-    return query.all()
+    return location_service.get_children_stock(db, warehouse_id, parent_id)
+
+
+@router.get("/{warehouse_id}/locations/{location_id}/stock-summary", response_model=location_schemas.LocationStockSummary)
+def get_location_stock_summary(
+    warehouse_id: int,
+    location_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_roles_with_permission([1, 2, 3], "warehouses:view")),
+):
+    """
+    Stock, SKUs and occupancy of a location and everything below it.
+    """
+    summary = location_service.get_subtree_stock(db, warehouse_id, location_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Location not found in this warehouse")
+    return summary
 
 
 @router.get("/locations/check-container")
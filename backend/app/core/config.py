@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,6 +10,44 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     ENVIRONMENT: str = "development"
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:8081", "http://127.0.0.1:8081"]
+    # Rendered barcode images kept in memory; the disk tier lives under uploads/barcodes
+    BARCODE_CACHE_SIZE: int = 2048
+    BARCODE_DISK_CACHE: bool = False
+    # Processes rendering batch label sheets (0 = one per CPU)
+    LABEL_RENDER_WORKERS: int = 0
+    # Batch label jobs are written here (not under the public uploads mount) and purged after the retention
+    LABEL_JOBS_DIR: str = "label_jobs"
+    LABEL_JOB_RETENTION_HOURS: int = 24
+    # Outbox dispatcher: one worker holds the lease and delivers side effects in batches
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETENTION_HOURS: int = 72
+    # Email: EMAIL_TRANSPORT is sendgrid, file (JSON files in EMAIL_SINK_DIR) or log;
+    # empty picks sendgrid when an API key is set
+    EMAIL_TRANSPORT: str = ""
+    EMAIL_SINK_DIR: str = "mail_sink"
+    SENDGRID_API_KEY: Optional[str] = None
+    SENDGRID_FROM_EMAIL: str = "noreply@exproof.com"
+    SENDGRID_FROM_NAME: str = "EXPROOF Inventory"
+    # Expo push: the URLs can point to a local stand-in server
+    EXPO_ACCESS_TOKEN: Optional[str] = None
+    EXPO_PUSH_URL: str = "https://exp.host/--/api/v2/push/send"
+    EXPO_RECEIPTS_URL: str = "https://exp.host/--/api/v2/push/getReceipts"
+    EXPO_PUSH_CONCURRENCY: int = 4
+    # Scheduler: cron expressions (minute hour day month weekday, server local time)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_POLL_INTERVAL: float = 30.0
+    SCHEDULER_RUN_RETENTION_DAYS: int = 30
+    SCHEDULE_TRACKING_CHECKS: str = "0 6 * * *"
+    SCHEDULE_ASSET_CHECKS: str = "15 6 * * *"
+    SCHEDULE_BATCH_CHECKS: str = "30 6 * * *"
+    SCHEDULE_SESSION_CLEANUP: str = "0 * * * *"
+    SCHEDULE_OCCUPANCY_RECONCILE: str = "30 3 * * *"
+    SCHEDULE_LABEL_JOB_CLEANUP: str = "45 * * * *"
+    # Document numbers reserved per worker at a time, by prefix (e.g. {"IN": 50}); 1 if unset
+    SEQUENCE_BLOCK_SIZES: dict[str, int] = {}
 
     model_config = SettingsConfigDict(env_file=".env")
 
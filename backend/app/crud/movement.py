@@ -3,16 +3,13 @@ from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.movement import MovementRequest, MovementRequestItem, Movement, MovementStatus, MovementType, MovementPriority
+from app.services import sequence_service
 from app.schemas.movement import MovementRequestCreate, MovementRequestUpdate, MovementRequestItemCreate
 
 
 class CRUDMovementRequest:
     def _generate_request_number(self, db: Session) -> str:
-        year = datetime.now().year
-        count = db.query(MovementRequest).filter(
-            func.strftime('%Y', MovementRequest.created_at) == str(year)
-        ).count()
-        return f"MR-{year}-{(count + 1):05d}"
+        return sequence_service.next_number(db, "MR", 5, existing=MovementRequest.request_number)
 
     def create(self, db: Session, obj_in: MovementRequestCreate, user_id: int) -> MovementRequest:
         request_number = self._generate_request_number(db)
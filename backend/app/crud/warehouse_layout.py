@@ -1,7 +1,10 @@
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import threading
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, insert, update, bindparam
 from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType, OccupancyLevel
+from app.models.location_models import StorageLocation
 from app.models.product_location_models import ProductLocationAssignment
 from app.schemas.warehouse_layout import (
     WarehouseLayoutCreate, WarehouseLayoutUpdate,
@@ -9,6 +12,13 @@ from app.schemas.warehouse_layout import (
 )
 import time
 
+HEATMAP_TTL_SECONDS = 300
+CELL_QUERY_CHUNK = 500
+
+# layout_id -> (heatmap, warehouse_id, linked location ids, built_at)
+_heatmap_cache: Dict[int, Tuple[dict, int, FrozenSet[int], float]] = {}
+_heatmap_lock = threading.Lock()
+
 
 def get_layout(db: Session, layout_id: int) -> Optional[WarehouseLayout]:
     return db.query(WarehouseLayout).filter(WarehouseLayout.id == layout_id).first()
@@ -67,6 +77,7 @@ def delete_layout(db: Session, layout_id: int) -> bool:
     
     db.delete(db_layout)
     db.commit()
+    invalidate_heatmap(layout_id=layout_id)
     return True
 
 
@@ -101,33 +112,62 @@ def create_cell(db: Session, layout_id: int, cell: LayoutCellCreate) -> LayoutCe
     db.add(db_cell)
     db.commit()
     db.refresh(db_cell)
+    invalidate_heatmap(layout_id=layout_id)
     return db_cell
 
 
-def create_cells_batch(db: Session, layout_id: int, cells: List[LayoutCellCreate]) -> List[LayoutCell]:
-    now = int(time.time())
-    db_cells = []
-    
+def _insert_cells(db: Session, layout_id: int, rows: List[dict], now: int) -> List[int]:
+    """
+    Insert cell rows with one executemany INSERT and read their ids back by position
+    (MySQL has no executemany INSERT ... RETURNING). Does not commit.
+    """
+    if not rows:
+        return []
+    for row in rows:
+        row.update(layout_id=layout_id, created_at=now, updated_at=now)
+    db.execute(insert(LayoutCell.__table__), rows)
+    positions = _cell_positions(db, layout_id)
+    return [positions[(row["row"], row["col"])] for row in rows]
+
+
+def _load_cells(db: Session, cell_ids: List[int]) -> List[LayoutCell]:
+    """Load cells by id in a few IN queries instead of one refresh per cell."""
+    cells = []
+    for i in range(0, len(cell_ids), CELL_QUERY_CHUNK):
+        cells.extend(db.query(LayoutCell).filter(LayoutCell.id.in_(cell_ids[i:i + CELL_QUERY_CHUNK])).all())
+    return sorted(cells, key=lambda c: (c.row, c.col))
+
+
+def _cell_positions(db: Session, layout_id: int) -> Dict[Tuple[int, int], int]:
+    return {
+        (r.row, r.col): r.id
+        for r in db.query(LayoutCell.id, LayoutCell.row, LayoutCell.col).filter(LayoutCell.layout_id == layout_id)
+    }
+
+
+def _insert_new_cells(db: Session, layout_id: int, cells: List[LayoutCellCreate]) -> List[int]:
+    """Bulk insert the cells whose (row, col) is still free. Does not commit."""
+    taken = set(_cell_positions(db, layout_id))
+    rows = []
     for cell in cells:
-        existing = get_cell_by_position(db, layout_id, cell.row, cell.col)
-        if existing:
+        if (cell.row, cell.col) in taken:
             continue
-        
-        db_cell = LayoutCell(
-            **cell.model_dump(),
-            layout_id=layout_id,
-            created_at=now,
-            updated_at=now
-        )
-        db_cells.append(db_cell)
-    
-    if db_cells:
-        db.add_all(db_cells)
-        db.commit()
-        for cell in db_cells:
-            db.refresh(cell)
-    
-    return db_cells
+        taken.add((cell.row, cell.col))
+        rows.append(cell.model_dump())
+    return _insert_cells(db, layout_id, rows, int(time.time()))
+
+
+def create_cells_batch(db: Session, layout_id: int, cells: List[LayoutCellCreate]) -> List[LayoutCell]:
+    """
+    Create the cells whose (row, col) is still free; cells on taken positions are skipped.
+    """
+    cell_ids = _insert_new_cells(db, layout_id, cells)
+    if not cell_ids:
+        return []
+
+    db.commit()
+    invalidate_heatmap(layout_id=layout_id)
+    return _load_cells(db, cell_ids)
 
 
 def update_cell(db: Session, cell_id: int, cell_in: LayoutCellUpdate) -> Optional[LayoutCell]:
@@ -144,35 +184,44 @@ def update_cell(db: Session, cell_id: int, cell_in: LayoutCellUpdate) -> Optiona
     db.add(db_cell)
     db.commit()
     db.refresh(db_cell)
+    invalidate_heatmap(layout_id=db_cell.layout_id)
     return db_cell
 
 
 def update_cells_batch(db: Session, layout_id: int, updates: List[LayoutCellUpdate]) -> List[LayoutCell]:
-    updated_cells = []
-    
+    """
+    Update cells addressed by (row, col) with one executemany UPDATE keyed by id per
+    set of updated fields. Updates without row/col or for missing cells are skipped.
+    """
+    positions = _cell_positions(db, layout_id)
+    now = int(time.time())
+    params: Dict[FrozenSet[str], List[dict]] = {}
+    cell_ids = []
+
     for cell_update in updates:
-        if cell_update.row is not None and cell_update.col is not None:
-            db_cell = get_cell_by_position(db, layout_id, cell_update.row, cell_update.col)
-        else:
+        if cell_update.row is None or cell_update.col is None:
             continue
-        
-        if not db_cell:
+        cell_id = positions.get((cell_update.row, cell_update.col))
+        if cell_id is None:
             continue
-        
+
         update_data = cell_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_cell, field, value)
-        
-        db_cell.updated_at = int(time.time())
-        updated_cells.append(db_cell)
-    
-    if updated_cells:
-        db.add_all(updated_cells)
-        db.commit()
-        for cell in updated_cells:
-            db.refresh(cell)
-    
-    return updated_cells
+        update_data["updated_at"] = now
+        params.setdefault(frozenset(update_data), []).append({"cell_id": cell_id, **update_data})
+        cell_ids.append(cell_id)
+
+    if not cell_ids:
+        return []
+
+    table = LayoutCell.__table__
+    for fields, rows in params.items():
+        stmt = update(table).where(table.c.id == bindparam("cell_id")).values(
+            {field: bindparam(field) for field in fields}
+        )
+        db.execute(stmt, rows)
+    db.commit()
+    invalidate_heatmap(layout_id=layout_id)
+    return _load_cells(db, list(dict.fromkeys(cell_ids)))
 
 
 def delete_cell(db: Session, cell_id: int) -> bool:
@@ -182,12 +231,14 @@ def delete_cell(db: Session, cell_id: int) -> bool:
     
     db.delete(db_cell)
     db.commit()
+    invalidate_heatmap(layout_id=db_cell.layout_id)
     return True
 
 
 def delete_cells_by_layout(db: Session, layout_id: int) -> int:
     count = db.query(LayoutCell).filter(LayoutCell.layout_id == layout_id).delete()
     db.commit()
+    invalidate_heatmap(layout_id=layout_id)
     return count
 
 
@@ -196,31 +247,23 @@ def generate_empty_layout(db: Session, layout_id: int, rows: int, cols: int, cel
     if not db_layout:
         raise ValueError("Layout not found")
     
-    delete_cells_by_layout(db, layout_id)
-    
-    now = int(time.time())
-    cells = []
-    
-    for row in range(rows):
-        for col in range(cols):
-            cell = LayoutCell(
-                layout_id=layout_id,
-                row=row,
-                col=col,
-                x=col * cell_width,
-                y=row * cell_height,
-                width=cell_width,
-                height=cell_height,
-                cell_type=CellType.EMPTY,
-                created_at=now,
-                updated_at=now
-            )
-            cells.append(cell)
-    
-    db.add_all(cells)
-    db.commit()
-    for cell in cells:
-        db.refresh(cell)
+    # Replace the grid in a single transaction
+    db.query(LayoutCell).filter(LayoutCell.layout_id == layout_id).delete()
+    
+    cells = [
+        {
+            "row": row,
+            "col": col,
+            "x": col * cell_width,
+            "y": row * cell_height,
+            "width": cell_width,
+            "height": cell_height,
+            "cell_type": CellType.EMPTY,
+        }
+        for row in range(rows)
+        for col in range(cols)
+    ]
+    _insert_cells(db, layout_id, cells, int(time.time()))
     
     db_layout.grid_rows = rows
     db_layout.grid_cols = cols
@@ -228,62 +271,117 @@ def generate_empty_layout(db: Session, layout_id: int, rows: int, cols: int, cel
     db_layout.cell_height = cell_height
     db.add(db_layout)
     db.commit()
+    invalidate_heatmap(layout_id=layout_id)
     
-    return cells
+    return get_cells_by_layout(db, layout_id)
+
+
+def _occupancy_levels(percentage: np.ndarray) -> np.ndarray:
+    return np.select(
+        [percentage <= 0, percentage < 40, percentage < 70, percentage < 90],
+        [OccupancyLevel.EMPTY.value, OccupancyLevel.LOW.value, OccupancyLevel.MEDIUM.value, OccupancyLevel.HIGH.value],
+        default=OccupancyLevel.FULL.value
+    )
+
+
+def invalidate_heatmap(layout_id: Optional[int] = None, warehouse_id: Optional[int] = None,
+                       location_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Drop cached heatmaps. With warehouse_id/location_ids only the heatmaps of that
+    warehouse that link one of the locations are dropped; with no arguments, all of them.
+    """
+    locations = set(location_ids) if location_ids is not None else None
+    with _heatmap_lock:
+        for key, (_, cached_warehouse_id, linked, _) in list(_heatmap_cache.items()):
+            if layout_id is not None and key != layout_id:
+                continue
+            if warehouse_id is not None and cached_warehouse_id != warehouse_id:
+                continue
+            if locations is not None and not (locations & linked):
+                continue
+            del _heatmap_cache[key]
 
 
 def get_heatmap_data(db: Session, layout_id: int) -> dict:
+    with _heatmap_lock:
+        cached = _heatmap_cache.get(layout_id)
+        if cached and time.time() - cached[3] < HEATMAP_TTL_SECONDS:
+            return cached[0]
+
     layout = get_layout(db, layout_id)
     if not layout:
         raise ValueError("Layout not found")
-    
-    cells = get_cells_by_layout(db, layout_id)
-    cell_data = []
-    total_occupancy = 0
-    total_capacity = len(cells) * 100
-    
-    for cell in cells:
-        product_count = 0
-        
-        if cell.linked_location_id:
-            count = db.query(func.count(ProductLocationAssignment.id)).filter(
-                ProductLocationAssignment.location_id == cell.linked_location_id,
-                ProductLocationAssignment.quantity > 0
-            ).scalar() or 0
-            product_count = count
-        
-        occupancy_pct = cell.occupancy_percentage
-        if cell.linked_location_id and cell.occupancy_percentage == 0:
-            assignment = db.query(
-                func.sum(ProductLocationAssignment.quantity)
-            ).filter(
-                ProductLocationAssignment.location_id == cell.linked_location_id
-            ).scalar() or 0
-            
-            location = db.query(layout).first()
-            if location:
-                linked_loc = db.query(layout).first()
-        
-        total_occupancy += occupancy_pct
-        
-        cell_data.append({
-            "row": cell.row,
-            "col": cell.col,
-            "occupancy_percentage": occupancy_pct,
-            "occupancy_level": cell.occupancy_level.value if cell.occupancy_level else OccupancyLevel.EMPTY.value,
-            "product_count": product_count
-        })
-    
-    average_occupancy = total_occupancy / len(cells) if cells else 0
-    
-    return {
+
+    cells = db.query(
+        LayoutCell.row, LayoutCell.col, LayoutCell.occupancy_percentage,
+        LayoutCell.occupancy_level, LayoutCell.linked_location_id, StorageLocation.capacity
+    ).outerjoin(
+        StorageLocation, StorageLocation.id == LayoutCell.linked_location_id
+    ).filter(LayoutCell.layout_id == layout_id).order_by(LayoutCell.row, LayoutCell.col).all()
+
+    linked_ids = db.query(LayoutCell.linked_location_id).filter(
+        LayoutCell.layout_id == layout_id, LayoutCell.linked_location_id.isnot(None)
+    )
+    stock = db.query(
+        ProductLocationAssignment.location_id,
+        func.count(case((ProductLocationAssignment.quantity > 0, 1))).label("product_count"),
+        func.coalesce(func.sum(ProductLocationAssignment.quantity), 0).label("quantity")
+    ).filter(
+        ProductLocationAssignment.location_id.in_(linked_ids)
+    ).group_by(ProductLocationAssignment.location_id).all()
+
+    size = len(cells)
+    location = np.array([c.linked_location_id or 0 for c in cells], dtype=np.int64)
+    capacity = np.array([c.capacity or 0 for c in cells], dtype=float)
+    stored = np.array([c.occupancy_percentage or 0 for c in cells], dtype=float)
+    stored_level = np.array([
+        c.occupancy_level.value if c.occupancy_level else OccupancyLevel.EMPTY.value for c in cells
+    ], dtype=object)
+
+    # Map the grouped per-location stock onto the cells linked to each location
+    product_count = np.zeros(size, dtype=np.int64)
+    quantity = np.zeros(size)
+    if stock and size:
+        stock_ids = np.array([r.location_id for r in stock], dtype=np.int64)
+        order = np.argsort(stock_ids)
+        stock_ids = stock_ids[order]
+        pos = np.clip(np.searchsorted(stock_ids, location), 0, len(stock_ids) - 1)
+        found = (location > 0) & (stock_ids[pos] == location)
+        product_count[found] = np.array([r.product_count for r in stock], dtype=np.int64)[order][pos[found]]
+        quantity[found] = np.array([r.quantity for r in stock], dtype=float)[order][pos[found]]
+
+    # Cells linked to a location with a known capacity show live occupancy; the rest keep
+    # the occupancy stored on the cell
+    live = (location > 0) & (capacity > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = np.where(live, np.minimum(quantity / np.where(live, capacity, 1) * 100, 100), stored)
+    percentage = np.round(percentage, 2)
+    level = np.where(live, _occupancy_levels(percentage), stored_level)
+
+    total_occupancy = float(percentage.sum())
+    cell_data = [
+        {
+            "row": c.row,
+            "col": c.col,
+            "occupancy_percentage": float(percentage[i]),
+            "occupancy_level": level[i],
+            "product_count": int(product_count[i])
+        }
+        for i, c in enumerate(cells)
+    ]
+
+    heatmap = {
         "layout_id": layout_id,
         "warehouse_id": layout.warehouse_id,
         "cells": cell_data,
-        "average_occupancy": round(average_occupancy, 2),
-        "total_capacity": total_capacity,
-        "total_occupancy": total_occupancy
+        "average_occupancy": round(total_occupancy / size, 2) if size else 0,
+        "total_capacity": size * 100,
+        "total_occupancy": int(round(total_occupancy))
     }
+    linked = frozenset(int(x) for x in location[location > 0])
+    with _heatmap_lock:
+        _heatmap_cache[layout_id] = (heatmap, layout.warehouse_id, linked, time.time())
+    return heatmap
 
 
 def export_layout(db: Session, layout_id: int) -> dict:
@@ -361,6 +459,8 @@ def import_layout(db: Session, warehouse_id: int, data: dict, user_id: int) -> W
             )
             for c in cells_data
         ]
-        create_cells_batch(db, layout.id, cell_creates)
+        _insert_new_cells(db, layout.id, cell_creates)
+        db.commit()
+        invalidate_heatmap(layout_id=layout.id)
     
     return layout
@@ -5,6 +5,10 @@ from app.core.config import settings
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Registers the flush listener that keeps the movement rollups up to date, so every
+# session (API, scripts, seeds) maintains them
+from app.services import rollup_service  # noqa: E402,F401
+
 def test_db_connection():
     try:
         # Try to connect
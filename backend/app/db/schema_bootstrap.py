@@ -18,10 +18,19 @@ def ensure_schema() -> None:
         "ALTER TABLE storage_locations ADD COLUMN current_occupancy INT DEFAULT 0;",
         "ALTER TABLE storage_locations ADD COLUMN barcode VARCHAR(100) NULL;",
         "CREATE UNIQUE INDEX ix_storage_locations_barcode ON storage_locations(barcode);",
+        "CREATE INDEX ix_storage_locations_warehouse_path ON storage_locations(warehouse_id, path);",
         "ALTER TABLE movement_request_items ADD COLUMN source_location_id INT NULL;",
         "ALTER TABLE movement_request_items ADD COLUMN destination_location_id INT NULL;",
         "CREATE INDEX ix_movement_request_items_source_location_id ON movement_request_items(source_location_id);",
         "CREATE INDEX ix_movement_request_items_destination_location_id ON movement_request_items(destination_location_id);",
+        "CREATE INDEX ix_notifications_user_read_created ON notifications(user_id, is_read, created_at);",
+        "CREATE INDEX ix_request_tools_status_return ON request_tools(status, expected_return_date);",
+        "CREATE INDEX ix_request_epp_status_return ON request_epp(status, expected_return_date);",
+        "CREATE INDEX ix_assets_warranty_expiration ON assets(warranty_expiration);",
+        "CREATE INDEX ix_asset_calibration_status_expiration ON asset_calibration(status, expiration_date);",
+        "CREATE INDEX ix_product_batches_expiration ON product_batches(expiration_date);",
+        "CREATE INDEX ix_integrated_requests_requester_status_created ON integrated_requests(requested_by, status, created_at);",
+        "CREATE INDEX ix_integrated_requests_status_created ON integrated_requests(status, created_at);",
     ]
     with engine.connect() as conn:
         for stmt in statements:
@@ -8,7 +8,7 @@ from app.models.location_models import StorageLocation
 from app.models.product_location_models import ProductLocationAssignment
 from app.models.location_audit_models import LocationAuditLog
 from app.models.movement import (
-    MovementRequest, MovementRequestItem, Movement, MovementType, MovementStatus,
+    MovementRequest, MovementRequestItem, Movement, MovementDailyRollup, MovementType, MovementStatus,
     MovementPurpose, MovementPriority, ItemPriority, QualityStatus, StorageCondition
 )
 from app.models.tracking_models import (
@@ -17,7 +17,7 @@ from app.models.tracking_models import (
 )
 from app.models.tool import Tool, ToolHistory, ToolStatus
 from app.models.epp import EPP, EPPInspection, EPPStatus
-from app.models.system import SystemConfig
+from app.models.system import SystemConfig, ServiceLease, ScheduledJob, JobRun, JobRunStatus, DocumentSequence
 from app.models.vehicle import Vehicle, VehicleStatus, VehicleDocument, VehicleMaintenance
 from app.models.vehicle_maintenance import VehicleMaintenanceType, VehicleMaintenanceRecord, VehicleMaintenanceAttachment, VehicleMaintenancePart
 from app.models.ledger import LedgerEntry, LedgerEntryType
@@ -26,7 +26,7 @@ from app.models.integrated_request import (
 )
 from app.models.tracking import ItemTracking, Penalization, PenalizationReason, PenalizationStatus
 from app.models.purchase import PurchaseAlert
-from app.models.notification import Notification, NotificationType
+from app.models.notification import Notification, NotificationCounter, NotificationType
 from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType, OccupancyLevel
 from app.models.label import LabelTemplate, LabelType, LabelSize
 from app.models.assets import (
@@ -38,4 +38,5 @@ from app.models.assets import (
 )
 from app.models.supplier import Supplier, SupplierStatus, SupplierCategory
 from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem, PurchaseOrderStatus, PurchaseOrderPriority
-from app.models.notification_preferences import UserNotificationPreference, NotificationChannel, NotificationEvent
+from app.models.notification_preferences import UserNotificationPreference, PushToken, NotificationChannel, NotificationEvent
+from app.models.outbox import OutboxEvent, OutboxStatus
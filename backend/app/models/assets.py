@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey, Enum, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey, Enum, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -128,6 +128,10 @@ class Asset(Base):
     assignments = relationship("AssetAssignment", back_populates="asset", cascade="all, delete-orphan")
     audit_logs = relationship("AssetAuditLog", back_populates="asset", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_assets_warranty_expiration", "warranty_expiration"),
+    )
+
 class AssetAttribute(Base):
     __tablename__ = "asset_attributes"
 
@@ -205,6 +209,10 @@ class AssetCalibration(Base):
     asset = relationship("Asset", back_populates="calibration_records")
     performer = relationship("User", backref="performed_calibrations")
 
+    __table_args__ = (
+        Index("ix_asset_calibration_status_expiration", "status", "expiration_date"),
+    )
+
 class AssetAssignment(Base):
     __tablename__ = "asset_assignments"
 
@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -59,6 +59,12 @@ class IntegratedRequest(Base):
     vehicles = relationship("RequestVehicle", back_populates="request", cascade="all, delete-orphan")
     tracking = relationship("RequestTracking", back_populates="request", cascade="all, delete-orphan")
 
+    # Own requests by status (role 4) and the supervisor inbox, both newest first
+    __table_args__ = (
+        Index("ix_integrated_requests_requester_status_created", "requested_by", "status", "created_at"),
+        Index("ix_integrated_requests_status_created", "status", "created_at"),
+    )
+
 
 class RequestItemStatus(str, enum.Enum):
     PENDIENTE = 'pendiente'
@@ -123,6 +129,10 @@ class RequestTool(Base):
     tool = relationship("Tool")
     assignee = relationship("User", foreign_keys=[assigned_to])
 
+    __table_args__ = (
+        Index("ix_request_tools_status_return", "status", "expected_return_date"),
+    )
+
 
 class RequestEPPStatus(str, enum.Enum):
     PENDIENTE = 'pendiente'
@@ -155,6 +165,10 @@ class RequestEPP(Base):
     epp = relationship("EPP")
     assignee = relationship("User", foreign_keys=[assigned_to])
 
+    __table_args__ = (
+        Index("ix_request_epp_status_return", "status", "expected_return_date"),
+    )
+
 
 class FuelLevel(str, enum.Enum):
     LEVEL_0_25 = '0-25%'
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, BigI
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from datetime import datetime, timezone
 from app.database import Base
 
 class LedgerEntryType(str, enum.Enum):
@@ -25,7 +26,10 @@ class LedgerEntry(Base):
     previous_balance = Column(Integer, nullable=False)
     new_balance = Column(Integer, nullable=False)
     
-    applied_at = Column(DateTime(timezone=True), server_default=func.current_timestamp(), index=True)
+    applied_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        server_default=func.current_timestamp(), index=True
+    )
     applied_by = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     movement_request = relationship("MovementRequest")
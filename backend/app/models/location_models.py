@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint, JSON, Enum
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint, Index, JSON, Enum
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -47,4 +47,6 @@ class StorageLocation(Base):
 
     __table_args__ = (
         UniqueConstraint('warehouse_id', 'code', name='uix_warehouse_location_code'),
+        # Subtree lookups by materialized path prefix
+        Index('ix_storage_locations_warehouse_path', 'warehouse_id', 'path'),
     )
@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, DateTime, Float, Boolean, Date
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, DateTime, Float, Boolean, Date, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -171,3 +171,27 @@ class Movement(Base):
     product = relationship("Product")
     warehouse = relationship("Warehouse")
     location = relationship("StorageLocation")
+
+
+class MovementDailyRollup(Base):
+    """
+    Movements of one day (UTC) per type, product, category and warehouse: the number of
+    movement rows and ledger entries and their net signed quantity. Kept up to date by
+    app.services.rollup_service as they are written; the reports read from here.
+    """
+    __tablename__ = "movement_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    type = Column(Enum(MovementType), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+
+    movement_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "type", "product_id", "category_id", "warehouse_id", name="uix_movement_daily_rollups_key"),
+        Index("ix_movement_daily_rollups_day_type", "day", "type"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -27,3 +27,15 @@ class Notification(Base):
 
     user = relationship("User", back_populates="notifications")
     related_request = relationship("IntegratedRequest")
+
+    __table_args__ = (
+        # Inbox listing, unread filtering and the "already notified today" lookups
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
+
+class NotificationCounter(Base):
+    """Unread notifications per user, kept in step by NotificationService."""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
@@ -54,3 +54,19 @@ class UserNotificationPreference(Base):
     updated_at = Column(Integer, nullable=True)
 
     user = relationship("User", lazy="select")
+
+
+class PushToken(Base):
+    __tablename__ = "push_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token = Column(String(255), nullable=False, unique=True)
+    platform = Column(String(50), default="expo")
+    device_id = Column(String(255), nullable=True)
+    # Cleared when Expo reports the device as no longer registered
+    is_active = Column(Boolean, default=True)
+    created_at = Column(Integer, nullable=False)
+    updated_at = Column(Integer, nullable=True)
+
+    user = relationship("User", lazy="select")
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Text, Index
+from datetime import datetime
+import enum
+from app.database import Base
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
+
+class OutboxEvent(Base):
+    """
+    Side effect recorded in the same transaction as the change that caused it and
+    delivered afterwards by the background dispatcher (see app.services.outbox_service).
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    delivered_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_events_status_available", "status", "available_at"),
+        Index("ix_outbox_events_type_id", "event_type", "id"),
+    )
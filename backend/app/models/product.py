@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, Float, Date, Numeric
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, Float, Date, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import datetime
@@ -43,3 +43,7 @@ class ProductBatch(Base):
 
     # Relationships
     product = relationship("Product", back_populates="batches")
+
+    __table_args__ = (
+        Index("ix_product_batches_expiration", "expiration_date"),
+    )
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from datetime import datetime
+import enum
 from app.database import Base
 
 class SystemConfig(Base):
@@ -7,3 +9,66 @@ class SystemConfig(Base):
     key = Column(String(100), primary_key=True, index=True)
     value = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
+
+class ServiceLease(Base):
+    """
+    Named lease held by one process at a time, used to elect a single leader among
+    the gunicorn workers for background work (see app.services.lease_service).
+    """
+    __tablename__ = "service_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class JobRunStatus(str, enum.Enum):
+    RUNNING = "RUNNING"
+    SUCCESS = "SUCCESS"
+    FAILED = "FAILED"
+
+class ScheduledJob(Base):
+    """
+    State of a job run by the in-process scheduler (see app.services.scheduler_service).
+    next_run_at is advanced with a conditional UPDATE when a worker claims a run, so each
+    scheduled run is executed by exactly one worker.
+    """
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String(100), primary_key=True)
+    schedule = Column(String(100), nullable=False)
+    next_run_at = Column(DateTime, nullable=False)
+    last_started_at = Column(DateTime, nullable=True)
+    last_status = Column(Enum(JobRunStatus), nullable=True)
+    last_success_at = Column(DateTime, nullable=True)
+    last_duration_ms = Column(Integer, nullable=True)
+    last_rows_touched = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+class JobRun(Base):
+    """One execution of a scheduled job."""
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(100), nullable=False)
+    holder = Column(String(255), nullable=False)
+    status = Column(Enum(JobRunStatus), nullable=False, default=JobRunStatus.RUNNING)
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    rows_touched = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_runs_job_started", "job_name", "started_at"),
+    )
+
+class DocumentSequence(Base):
+    """
+    Last number handed out for a document prefix and year (year 0 for sequences that
+    never reset). Advanced with atomic UPDATEs by app.services.sequence_service.
+    """
+    __tablename__ = "sequences"
+
+    prefix = Column(String(30), primary_key=True)
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    last_value = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from pydantic import BaseModel, Field
 from app.models.integrated_request import (
@@ -13,6 +13,7 @@ from app.models.integrated_request import (
     RequestTrackingItemType,
     RequestTrackingAction
 )
+from app.schemas.pick_route import PickRouteResponse
 
 # --- Request Item (Consumables) ---
 class RequestItemBase(BaseModel):
@@ -217,3 +218,59 @@ class IntegratedRequestResponse(IntegratedRequestBase):
 
     class Config:
         from_attributes = True
+
+class IntegratedRequestSummary(IntegratedRequestBase):
+    id: int
+    request_number: str
+    requested_by: int
+    status: IntegratedRequestStatus
+    approved_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+    delivered_by: Optional[int] = None
+    delivered_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    # Per collection (items, tools, epp_items, vehicles): line count and lines per status
+    line_counts: Dict[str, int]
+    status_counts: Dict[str, Dict[str, int]]
+
+# --- Bulk Approval ---
+class BulkApproveRequest(BaseModel):
+    request_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+class BulkApproveSkipped(BaseModel):
+    request_id: int
+    reason: str
+
+class BulkApproveResponse(BaseModel):
+    approved: List[int]
+    skipped: List[BulkApproveSkipped] = []
+
+# --- Pick Waves ---
+class PickWaveShortage(BaseModel):
+    product_id: int
+    batch_id: Optional[int] = None
+    quantity: int
+    request_item_ids: List[int] = []
+    reason: str
+
+class PickWavePlan(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    request_ids: List[int]
+    request_numbers: List[str]
+    route: PickRouteResponse
+    shortages: List[PickWaveShortage] = []
+
+class PickWaveApplyRequest(BaseModel):
+    warehouse_id: int
+    request_ids: List[int] = Field(..., min_length=1)
+    allocation_policy: Optional[str] = None
+
+class PickWaveApplyResponse(BaseModel):
+    movement_request_id: int
+    request_number: str
+    request_ids: List[int]
+    lines: int
+    items_delivered: int
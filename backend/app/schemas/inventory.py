@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 from enum import Enum
@@ -59,6 +59,54 @@ class LocationCapacityResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class LocationOccupancyDrift(BaseModel):
+    location_id: int
+    warehouse_id: int
+    code: str
+    recorded: int
+    actual: int
+    drift: int
+
+
+class PutawayLine(BaseModel):
+    product_id: int
+    quantity: int
+    temperature_zone: Optional[str] = None
+
+
+MAX_PUTAWAY_LINES = 500
+MAX_PUTAWAY_SUGGESTIONS = 50
+
+
+class PutawaySuggestRequest(BaseModel):
+    warehouse_id: int
+    items: List[PutawayLine] = Field(..., min_length=1, max_length=MAX_PUTAWAY_LINES)
+    limit: int = Field(3, ge=1, le=MAX_PUTAWAY_SUGGESTIONS)
+
+
+class PutawayCandidate(BaseModel):
+    location_id: int
+    code: str
+    free_capacity: Optional[int] = None
+    distance: Optional[int] = None
+    score: float
+    consolidate: float
+    fit: float
+    proximity: float
+    zone: float
+
+
+class PutawayLineSuggestion(BaseModel):
+    product_id: int
+    quantity: int
+    suggestions: List[PutawayCandidate]
+
+
+class PutawaySuggestResponse(BaseModel):
+    warehouse_id: int
+    lines: List[PutawayLineSuggestion]
+
+
 class ScanRequest(BaseModel):
     code: str
 
@@ -10,6 +10,17 @@ class LabelType(str, Enum):
     EAN13 = "ean13"
 
 
+class LabelRenderMode(str, Enum):
+    VECTOR = "vector"
+    RASTER = "raster"
+
+
+class LabelOutputFormat(str, Enum):
+    PDF = "pdf"
+    ZPL = "zpl"
+    EPL = "epl"
+
+
 class LabelSize(str, Enum):
     SMALL = "small"
     MEDIUM = "medium"
@@ -96,13 +107,19 @@ class GenerateLabelRequest(BaseModel):
     data: LabelData
     template_id: Optional[int] = None
     label_type: Optional[LabelType] = None
+    render_mode: Optional[LabelRenderMode] = None
+    output_format: LabelOutputFormat = LabelOutputFormat.PDF
 
 
 class BatchLabelRequest(BaseModel):
     items: List[LabelData]
     template_id: Optional[int] = None
     label_type: Optional[LabelType] = None
+    render_mode: Optional[LabelRenderMode] = None
+    output_format: LabelOutputFormat = LabelOutputFormat.PDF
     copies_per_label: int = 1
+    # PDF only: render to a file in the background and return a download URL instead of streaming
+    job: bool = False
 
 
 class LabelPrintResponse(BaseModel):
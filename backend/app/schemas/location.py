@@ -1,7 +1,9 @@
 from typing import Optional, List, Any, Dict
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from app.models.location_models import LocationType
 
+MAX_BATCH_LOCATIONS = 5000
+
 
 class StorageLocationBase(BaseModel):
     warehouse_id: Optional[int] = None
@@ -61,7 +63,7 @@ class BatchLocationCreate(BaseModel):
     
     prefix: str = Field(..., description="Prefijo del código, ej: 'C-'")
     start_number: int = Field(..., description="Número inicial, ej: 1")
-    count: int = Field(..., ge=1, le=100, description="Cantidad de ubicaciones a crear (1-100)")
+    count: int = Field(..., ge=1, le=MAX_BATCH_LOCATIONS, description="Cantidad de ubicaciones a crear (1-5000)")
     name_template: str = Field(..., description="Template para nombre, ej: 'Contenedor {n}'")
     
     aisle: Optional[str] = None
@@ -73,6 +75,35 @@ class BatchLocationCreate(BaseModel):
     barcode_prefix: Optional[str] = None
 
 
+class LocationMatrixCreate(BaseModel):
+    parent_location_id: Optional[int] = None
+    location_type: LocationType = LocationType.BIN
+
+    aisles: List[str] = Field(..., min_length=1, description="Pasillos, ej: ['A01', 'A02']")
+    racks: List[str] = Field(..., min_length=1, description="Racks por pasillo, ej: ['R01', 'R02']")
+    shelves: List[str] = Field(..., min_length=1, description="Niveles por rack, ej: ['S1', 'S2']")
+    positions: List[str] = Field(..., min_length=1, description="Posiciones por nivel, ej: ['P01', 'P02']")
+
+    code_prefix: str = ""
+    separator: str = "-"
+    name_template: str = Field("{code}", description="Template para nombre: {code}, {aisle}, {rack}, {shelf}, {position}")
+    create_hierarchy: bool = Field(False, description="Crear también los nodos de pasillo, rack y nivel")
+
+    capacity: int = 0
+    barcode_prefix: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_matrix(self):
+        total = len(self.aisles) * len(self.racks) * len(self.shelves) * len(self.positions)
+        if total > MAX_BATCH_LOCATIONS:
+            raise ValueError(f"Matrix would create {total} locations (max {MAX_BATCH_LOCATIONS})")
+        try:
+            self.name_template.format(code="", aisle="", rack="", shelf="", position="")
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid name_template: {e}")
+        return self
+
+
 class BatchLocationResponse(BaseModel):
     created: int
     locations: List[StorageLocationResponse]
@@ -86,6 +117,19 @@ class LocationHierarchyResponse(BaseModel):
     positions: List[str] = []
 
 
+class LocationStockSummary(BaseModel):
+    location_id: int
+    code: str
+    name: str
+    path: Optional[str] = None
+    location_type: LocationType
+    locations: int
+    capacity: int
+    quantity: int
+    sku_count: int
+    occupancy_percentage: Optional[float] = None
+
+
 class ContainerCheckResponse(BaseModel):
     available: bool
     current_product: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from enum import Enum
 
@@ -80,7 +80,7 @@ class NotificationPreferenceResponse(NotificationPreferenceBase):
 
 
 class PushTokenRegister(BaseModel):
-    token: str
+    token: str = Field(..., min_length=1, max_length=255)
     platform: str = "expo"
     device_id: Optional[str] = None
 
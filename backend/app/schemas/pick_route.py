@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+
+class PickRouteCell(BaseModel):
+    row: int
+    col: int
+
+
+class PickRouteLine(BaseModel):
+    sequence: int
+    item_id: Optional[int] = None
+    request_item_ids: List[int] = []
+    product_id: int
+    location_id: Optional[int] = None
+    batch_id: Optional[int] = None
+    quantity: int
+    row: Optional[int] = None
+    col: Optional[int] = None
+
+
+class PickRouteResponse(BaseModel):
+    warehouse_id: int
+    depot: Optional[PickRouteCell] = None
+    stops: int
+    estimated_distance: int
+    unmapped_lines: int
+    items: List[PickRouteLine]
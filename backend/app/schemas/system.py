@@ -41,3 +41,29 @@ class AuditLogOut(BaseModel):
     actor_email: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+class ScheduledJobOut(BaseModel):
+    name: str
+    schedule: str
+    next_run_at: datetime
+    last_started_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_success_at: Optional[datetime] = None
+    last_duration_ms: Optional[int] = None
+    last_rows_touched: Optional[int] = None
+    last_error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class JobRunOut(BaseModel):
+    id: int
+    job_name: str
+    holder: str
+    status: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    rows_touched: Optional[int] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
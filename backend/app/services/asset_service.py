@@ -12,88 +12,94 @@ from app.schemas.assets import (
     AssetCreate, AssetUpdate, AssetMaintenanceCreate, AssetCalibrationCreate, AssetAssignmentCreate
 )
 from app.models.user import User
+from app.services import expiration_service, sequence_service
 from app.services.notification_service import NotificationService
 from app.models.notification import NotificationType
 
+# Days before expiration at which calibration and warranty alerts are sent
+CALIBRATION_ALERT_DAYS = (30, 15, 7)
+WARRANTY_ALERT_DAYS = 30
+
 class AssetService:
     @staticmethod
-    def run_daily_checks(db: Session):
+    def run_daily_checks(db: Session) -> int:
         """
-        Ejecuta verificaciones diarias y genera alertas/notificaciones
+        Ejecuta verificaciones diarias y genera alertas/notificaciones.
+        Calibraciones y garantías se buscan por ventana de fechas, así que un día sin
+        ejecución se recupera al siguiente; cada alerta se envía una vez por umbral.
+        Devuelve el número de notificaciones creadas.
         """
         today = datetime.now().date()
-        alerts_generated = 0
-        
-        # 1. Check Calibrations Due (30, 15, 7 days)
-        thresholds = [30, 15, 7]
-        for days in thresholds:
-            target_date = today + timedelta(days=days)
-            calibrations = db.query(AssetCalibration).filter(
-                AssetCalibration.expiration_date == target_date,
-                AssetCalibration.status == CalibrationStatus.VIGENTE
-            ).all()
-            
-            for cal in calibrations:
-                # Update status
-                cal.status = CalibrationStatus.PROXIMO_A_VENCER
-                # Create Notification
-                asset = db.query(Asset).filter(Asset.id == cal.asset_id).first()
-                if asset and asset.responsible_user_id:
-                    NotificationService.create_notification(
-                        db=db,
-                        user_id=asset.responsible_user_id,
-                        title=f"Alerta de Calibración: {asset.name}",
-                        message=f"La calibración del activo {asset.asset_tag} vence en {days} días.",
-                        type=NotificationType.WARNING
-                    )
-                alerts_generated += 1
-        
-        # 2. Check Warranties Expiring (30 days)
-        warranties = db.query(Asset).filter(
-            Asset.warranty_expiration == today + timedelta(days=30)
-        ).all()
-        
-        for asset in warranties:
-            # Notify Admins (Assuming Role 1/2, but for now we notify responsible if exists or just log)
-            # Ideally notify a specific role. Here we simplify.
-            if asset.responsible_user_id:
-                 NotificationService.create_notification(
-                    db=db,
-                    user_id=asset.responsible_user_id,
-                    title=f"Garantía por Vencer: {asset.name}",
-                    message=f"La garantía del activo {asset.asset_tag} vence en 30 días.",
-                    type=NotificationType.INFO
-                )
-            alerts_generated += 1
+        notifications = []
+
+        # 1. Calibrations: VIGENTE -> PROXIMO_A_VENCER within 30 days, -> VENCIDO once expired,
+        # with a reminder when each threshold (30, 15, 7 days) is crossed
+        thresholds = sorted(CALIBRATION_ALERT_DAYS)
+        due = expiration_service.calibrations(
+            db, [CalibrationStatus.VIGENTE, CalibrationStatus.PROXIMO_A_VENCER],
+            until=today + timedelta(days=thresholds[-1])
+        )
+        upcoming = [cal for cal in due if cal.due_date >= today]
+        expired = [cal for cal in due if cal.due_date < today]
+        AssetService._set_calibration_status(db, upcoming, CalibrationStatus.PROXIMO_A_VENCER)
+        AssetService._set_calibration_status(db, expired, CalibrationStatus.VENCIDO)
 
+        for cal in upcoming:
+            if not cal.user_id:
+                continue
+            days = (cal.due_date - today).days
+            threshold = next(t for t in thresholds if days <= t)
+            notifications.append({
+                "user_id": cal.user_id,
+                "title": f"Alerta de Calibración: {cal.name} ({cal.reference})",
+                "message": f"La calibración del activo {cal.reference} vence en {days} días.",
+                "type": NotificationType.WARNING,
+                "since": cal.due_date - timedelta(days=threshold)
+            })
+        for cal in expired:
+            if cal.user_id:
+                notifications.append({
+                    "user_id": cal.user_id,
+                    "title": f"Calibración Vencida: {cal.name} ({cal.reference})",
+                    "message": f"La calibración del activo {cal.reference} venció el {cal.due_date}.",
+                    "type": NotificationType.ERROR,
+                    "since": cal.due_date
+                })
+
+        # 2. Check Warranties Expiring (within 30 days, once per expiration)
+        for asset in expiration_service.warranties(
+            db, since=today, until=today + timedelta(days=WARRANTY_ALERT_DAYS)
+        ):
+            if asset.user_id:
+                notifications.append({
+                    "user_id": asset.user_id,
+                    "title": f"Garantía por Vencer: {asset.name} ({asset.reference})",
+                    "message": f"La garantía del activo {asset.reference} vence en {(asset.due_date - today).days} días.",
+                    "type": NotificationType.INFO,
+                    "since": asset.due_date - timedelta(days=WARRANTY_ALERT_DAYS)
+                })
+
+        # Inserted with the status changes in one commit, skipping alerts already sent.
+        # Titles carry the asset tag so same-named assets are not deduplicated together
+        created = NotificationService.create_notifications(db, notifications, commit=False)
         db.commit()
-        return alerts_generated
+        return created
+
+    @staticmethod
+    def _set_calibration_status(db: Session, calibrations: list, status: CalibrationStatus) -> None:
+        ids = [cal.item_id for cal in calibrations]
+        if ids:
+            db.query(AssetCalibration).filter(
+                AssetCalibration.id.in_(ids), AssetCalibration.status != status
+            ).update(
+                {AssetCalibration.status: status}, synchronize_session=False
+            )
 
     @staticmethod
     def generate_asset_tag(db: Session, category_code: str) -> str:
         # Format: ACT-YEAR-SEQUENTIAL
         # Use a more generic prefix based on category if needed, but requirements say "ACT-AÑO-SECUENCIAL"
-        year = datetime.now().year
-        prefix = f"ACT-{year}-"
-        
-        # Find last asset tag for this year
-        last_asset = db.query(Asset).filter(Asset.asset_tag.like(f"{prefix}%")).order_by(Asset.id.desc()).first()
-        
-        if last_asset:
-            try:
-                # Extract sequence
-                parts = last_asset.asset_tag.split('-')
-                if len(parts) >= 3:
-                    last_seq = int(parts[-1])
-                    new_seq = last_seq + 1
-                else:
-                    new_seq = 1
-            except ValueError:
-                new_seq = 1
-        else:
-            new_seq = 1
-            
-        return f"{prefix}{new_seq:04d}"
+        return sequence_service.next_number(db, "ACT", 4, existing=Asset.asset_tag)
 
     @staticmethod
     def create_asset(db: Session, asset_in: AssetCreate, user_id: int) -> Asset:
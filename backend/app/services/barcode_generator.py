@@ -1,9 +1,120 @@
 import io
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
 import qrcode
 import barcode
 from barcode.writer import ImageWriter
 from PIL import Image
-from typing import Optional
+from reportlab.lib.utils import ImageReader
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.file_storage import UPLOAD_DIR
+
+SYMBOLOGIES = ('qr', 'code128', 'code39', 'ean13')
+
+# Vector barcode: (columns, rows, dark runs as (x, y, width, height)) in module units, y growing downwards
+BarcodeModules = Tuple[int, int, Tuple[Tuple[int, int, int, int], ...]]
+BARCODE_CACHE_DIR = UPLOAD_DIR / "barcodes"
+
+
+class BarcodeImage:
+    """Rendered barcode PNG plus its pixel size, read from the PNG header."""
+
+    def __init__(self, png: bytes):
+        self.png = png
+        self.width, self.height = struct.unpack(">II", png[16:24])
+        self._reader: Optional[ImageReader] = None
+
+    @property
+    def reader(self) -> ImageReader:
+        """reportlab image built once per cached barcode and shared by every label that draws it."""
+        if self._reader is None:
+            self._reader = ImageReader(io.BytesIO(self.png))
+        return self._reader
+
+
+class BarcodeImageCache:
+    """
+    Bounded LRU cache of rendered barcodes, content-addressed by a hash of
+    (data, symbology, size, height). With a disk_dir, rendered PNGs are also kept
+    on disk so they survive restarts and are shared between worker processes.
+    """
+
+    def __init__(self, max_entries: int = 2048, disk_dir: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._store: "OrderedDict[str, BarcodeImage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data: str, label_type: str, size: int, height: int) -> str:
+        return hashlib.sha256(f"{label_type}|{size}|{height}|{data}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Optional[BarcodeImage]:
+        with self._lock:
+            image = self._store.get(key)
+            if image is not None:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return image
+
+        if self.disk_dir is not None:
+            try:
+                image = BarcodeImage(self._disk_path(key).read_bytes())
+            except (OSError, struct.error):
+                image = None
+            if image is not None:
+                self._remember(key, image)
+                with self._lock:
+                    self.hits += 1
+                return image
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, image: BarcodeImage) -> None:
+        self._remember(key, image)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Write then rename so concurrent readers never see a partial file
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(image.png)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+
+    def _remember(self, key: str, image: BarcodeImage) -> None:
+        with self._lock:
+            self._store[key] = image
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+barcode_cache = BarcodeImageCache(
+    max_entries=settings.BARCODE_CACHE_SIZE,
+    disk_dir=BARCODE_CACHE_DIR if settings.BARCODE_DISK_CACHE else None,
+)
 
 
 class BarcodeGenerator:
@@ -54,14 +165,14 @@ class BarcodeGenerator:
         rv.seek(0)
         return rv.getvalue()
 
+    @staticmethod
+    def ean13_digits(data: str) -> str:
+        """The 12 digits an EAN-13 is built from (the check digit is computed)."""
+        return ''.join(filter(str.isdigit, data))[:12].zfill(12)
+
     @staticmethod
     def generate_ean13(data: str, height: int = 60) -> bytes:
-        clean_data = ''.join(filter(str.isdigit, data))[:12]
-        
-        if len(clean_data) < 12:
-            clean_data = clean_data.zfill(12)
-        elif len(clean_data) > 12:
-            clean_data = clean_data[:12]
+        clean_data = BarcodeGenerator.ean13_digits(data)
         
         try:
             ean13 = barcode.get_barcode_class('ean13')
@@ -75,9 +186,45 @@ class BarcodeGenerator:
         except Exception:
             return BarcodeGenerator.generate_code128(clean_data, height)
 
+    @staticmethod
+    def _cache_params(label_type: str, size: int, height: int) -> Tuple[str, int, int]:
+        """Normalize the cache key: QR codes ignore height and linear barcodes ignore size."""
+        label_type = (label_type or 'qr').lower()
+        if label_type not in SYMBOLOGIES:
+            label_type = 'qr'
+        if label_type == 'qr':
+            return label_type, size, 0
+        return label_type, 0, height
+
+    @staticmethod
+    def generate_image(data: str, label_type: str = 'qr', size: int = 100, height: int = 60) -> BarcodeImage:
+        """Rendered barcode from the shared cache, rendering it on a miss."""
+        key = BarcodeImageCache.make_key(data, *BarcodeGenerator._cache_params(label_type, size, height))
+        image = barcode_cache.get(key)
+        if image is None:
+            image = BarcodeImage(BarcodeGenerator.render(data, label_type, size, height))
+            barcode_cache.set(key, image)
+        return image
+
     @staticmethod
     def generate(data: str, label_type: str = 'qr', size: int = 100, height: int = 60) -> bytes:
-        label_type = label_type.lower()
+        return BarcodeGenerator.generate_image(data, label_type, size, height).png
+
+    @staticmethod
+    def vector_modules(data: str, label_type: str = 'qr') -> BarcodeModules:
+        """
+        Module grid of a barcode, encoded with the same libraries as the raster path, for
+        drawing it as vector rectangles. Adjacent dark modules of a row are merged into one
+        run. Results are cached and shared between labels.
+        """
+        label_type = (label_type or 'qr').lower()
+        if label_type not in SYMBOLOGIES:
+            label_type = 'qr'
+        return _vector_modules(data, label_type)
+
+    @staticmethod
+    def render(data: str, label_type: str = 'qr', size: int = 100, height: int = 60) -> bytes:
+        label_type = (label_type or 'qr').lower()
         
         if label_type == 'qr':
             return BarcodeGenerator.generate_qr(data, size)
@@ -89,3 +236,44 @@ class BarcodeGenerator:
             return BarcodeGenerator.generate_ean13(data, height)
         else:
             return BarcodeGenerator.generate_qr(data, size)
+
+
+def _dark_runs(row: List[bool], y: int) -> List[Tuple[int, int, int, int]]:
+    runs = []
+    start = None
+    for x, dark in enumerate(list(row) + [False]):
+        if dark and start is None:
+            start = x
+        elif not dark and start is not None:
+            runs.append((start, y, x - start, 1))
+            start = None
+    return runs
+
+
+@lru_cache(maxsize=4096)
+def _vector_modules(data: str, label_type: str) -> BarcodeModules:
+    if label_type == 'qr':
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            border=0,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        matrix = qr.get_matrix()
+    else:
+        if label_type == 'ean13':
+            symbol = barcode.get_barcode_class('ean13')(BarcodeGenerator.ean13_digits(data))
+        elif label_type == 'code39':
+            symbol = barcode.get_barcode_class('code39')(data)
+        else:
+            try:
+                symbol = barcode.get_barcode_class('code128')(data)
+            except Exception:
+                symbol = barcode.get_barcode_class('code39')(data)
+        matrix = [[bit == '1' for bit in symbol.build()[0]]]
+
+    runs = []
+    for y, row in enumerate(matrix):
+        runs.extend(_dark_runs(row, y))
+    return len(matrix[0]), len(matrix), tuple(runs)
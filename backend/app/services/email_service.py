@@ -1,17 +1,117 @@
-from typing import List, Optional
-from app.config import settings
+import asyncio
+import json
 import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import outbox_service
 
 logger = logging.getLogger(__name__)
 
+EMAIL_EVENT = "email.send"
+# SendGrid accepts up to 1000 personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+
+class EmailTransport:
+    """
+    Sends one message to many recipients, each receiving their own copy. Transports are
+    synchronous and raise on failure; EmailService runs them off the event loop.
+    """
+    name = "base"
+
+    def send(
+        self, recipients: List[str], subject: str, html_content: str, text_content: Optional[str] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class LogTransport(EmailTransport):
+    """Used when no provider is configured: only logs what would be sent."""
+    name = "log"
+
+    def send(self, recipients, subject, html_content, text_content=None):
+        logger.info(f"Email would be sent to {len(recipients)} recipient(s): {subject}")
+        return {"message": "Email service disabled (no API key)"}
+
+
+class FileTransport(EmailTransport):
+    """Writes every message as a JSON file into a directory (development and tests)."""
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def send(self, recipients, subject, html_content, text_content=None):
+        os.makedirs(self.directory, exist_ok=True)
+        message_id = uuid.uuid4().hex
+        path = os.path.join(self.directory, f"{datetime.now():%Y%m%d%H%M%S}-{message_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "message_id": message_id,
+                "to": recipients,
+                "subject": subject,
+                "html_content": html_content,
+                "text_content": text_content
+            }, f, ensure_ascii=False)
+        return {"message_id": message_id, "path": path}
+
+
+class SendGridTransport(EmailTransport):
+    """One API call per message, one personalization per recipient."""
+    name = "sendgrid"
+
+    def __init__(self, api_key: str, from_email: str, from_name: str):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.from_name = from_name
+
+    def send(self, recipients, subject, html_content, text_content=None):
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail, Email, Personalization, To
+
+        message = Mail(
+            from_email=Email(self.from_email, self.from_name),
+            subject=subject,
+            html_content=html_content,
+            plain_text_content=text_content
+        )
+        for recipient in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(recipient))
+            message.add_personalization(personalization)
+
+        response = SendGridAPIClient(self.api_key).send(message)
+        if response.status_code >= 400:
+            raise RuntimeError(f"SendGrid HTTP {response.status_code}: {response.body}")
+        return {"message_id": response.headers.get('X-Message-Id', ''), "status_code": response.status_code}
+
+
+def build_transport() -> EmailTransport:
+    """EMAIL_TRANSPORT selects the transport; by default SendGrid when an API key is set."""
+    transport = (settings.EMAIL_TRANSPORT or ("sendgrid" if settings.SENDGRID_API_KEY else "log")).lower()
+    if transport == "sendgrid":
+        return SendGridTransport(settings.SENDGRID_API_KEY, settings.SENDGRID_FROM_EMAIL, settings.SENDGRID_FROM_NAME)
+    if transport == "file":
+        return FileTransport(settings.EMAIL_SINK_DIR)
+    if transport == "log":
+        return LogTransport()
+    raise ValueError(f"Unknown email transport: {transport}")
+
 
 class EmailService:
-    def __init__(self):
-        self.api_key = getattr(settings, 'SENDGRID_API_KEY', None)
-        self.from_email = getattr(settings, 'SENDGRID_FROM_EMAIL', 'noreply@exproof.com')
-        self.from_name = getattr(settings, 'SENDGRID_FROM_NAME', 'EXPROOF Inventory')
-        self.enabled = bool(self.api_key)
-    
+    def __init__(self, transport: Optional[EmailTransport] = None):
+        self.transport = transport or build_transport()
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.transport, LogTransport)
+
     async def send_email(
         self,
         to_email: str,
@@ -19,43 +119,77 @@ class EmailService:
         html_content: str,
         text_content: Optional[str] = None
     ) -> dict:
-        if not self.enabled:
-            logger.info(f"Email would be sent to {to_email}: {subject}")
-            return {"success": True, "message": "Email service disabled (no API key)"}
-        
+        """Send immediately, off the event loop. Prefer queue_email from request handlers."""
         try:
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail, Email, To, Content
-            
-            message = Mail(
-                from_email=Email(self.from_email, self.from_name),
-                to_emails=To(to_email),
-                subject=subject,
-                html_content=Content("text/html", html_content)
-            )
-            
-            if text_content:
-                message.content = Content("text/plain", text_content)
-            
-            sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
-            
-            return {
-                "success": True,
-                "message_id": response.headers.get('X-Message-Id', ''),
-                "status_code": response.status_code
-            }
+            result = await asyncio.to_thread(self.transport.send, [to_email], subject, html_content, text_content)
+            return {"success": True, **result}
         except Exception as e:
             logger.error(f"Failed to send email: {str(e)}")
             return {"success": False, "error": str(e)}
-    
-    async def send_purchase_order_notification(
+
+    def queue_email(
+        self,
+        db: Session,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> None:
+        """
+        Record the email in the caller's transaction; the outbox dispatcher sends the
+        queued emails in batches after it commits, retrying with backoff.
+        """
+        outbox_service.enqueue(db, EMAIL_EVENT, {
+            "to_email": to_email,
+            "subject": subject,
+            "html_content": html_content,
+            "text_content": text_content
+        })
+
+    async def send_batch(self, payloads: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Send queued emails, grouping recipients of identical messages into one transport
+        call (one SendGrid request with a personalization per recipient). A failed call
+        does not stop the others. Returns the number of successful transport calls and
+        one payload per recipient whose call failed, to be queued again.
+        """
+        groups: Dict[Tuple[str, str, Optional[str]], List[str]] = {}
+        attempts: Dict[Tuple[str, str, Optional[str]], int] = {}
+        for payload in payloads:
+            key = (payload["subject"], payload["html_content"], payload.get("text_content"))
+            recipients = groups.setdefault(key, [])
+            if payload["to_email"] not in recipients:
+                recipients.append(payload["to_email"])
+            attempts[key] = max(attempts.get(key, 0), payload.get("attempt", 0))
+
+        calls = 0
+        failed: List[Dict[str, Any]] = []
+        for key, recipients in groups.items():
+            subject, html_content, text_content = key
+            for i in range(0, len(recipients), MAX_PERSONALIZATIONS):
+                chunk = recipients[i:i + MAX_PERSONALIZATIONS]
+                try:
+                    await asyncio.to_thread(self.transport.send, chunk, subject, html_content, text_content)
+                    calls += 1
+                except Exception as e:
+                    logger.error(f"Failed to send email '{subject}' to {len(chunk)} recipient(s): {str(e)}")
+                    failed.extend({
+                        "to_email": to_email,
+                        "subject": subject,
+                        "html_content": html_content,
+                        "text_content": text_content,
+                        "attempt": attempts[key]
+                    } for to_email in chunk)
+        return calls, failed
+
+    def queue_purchase_order_notification(
         self,
+        db: Session,
         to_email: str,
         order_number: str,
         status: str,
         event: str
-    ) -> dict:
+    ) -> None:
         status_messages = {
             "created": "ha sido creada",
             "approved": "ha sido aprobada",
@@ -109,16 +243,17 @@ class EmailService:
         </html>
         """
         
-        return await self.send_email(to_email, subject, html_content)
+        self.queue_email(db, to_email, subject, html_content)
     
-    async def send_low_stock_alert(
+    def queue_low_stock_alert(
         self,
+        db: Session,
         to_email: str,
         product_name: str,
         sku: str,
         current_stock: float,
         min_stock: float
-    ) -> dict:
+    ) -> None:
         subject = f"Alerta: Stock Bajo - {product_name}"
         
         html_content = f"""
@@ -157,7 +292,7 @@ class EmailService:
         </html>
         """
         
-        return await self.send_email(to_email, subject, html_content)
+        self.queue_email(db, to_email, subject, html_content)
 
 
 email_service = EmailService()
@@ -0,0 +1,157 @@
+"""
+Expiration queries shared by the daily checks. Each item type is found with one joined
+query over a due-date window and returned as flat rows, so the checks never lazy-load
+requests, tools or assets per item. Checks select windows rather than exact dates, so a
+day without a run is caught up by the next one instead of skipping its alerts.
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import null, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.assets import Asset, AssetCalibration, CalibrationStatus
+from app.models.epp import EPP
+from app.models.notification import NotificationType
+from app.models.integrated_request import (
+    IntegratedRequest, RequestEPP, RequestEPPStatus, RequestTool, RequestToolStatus,
+    RequestVehicle, RequestVehicleStatus
+)
+from app.models.notification_preferences import UserNotificationPreference
+from app.models.product import Product, ProductBatch
+from app.models.tool import Tool
+from app.models.user import User
+from app.models.vehicle import Vehicle
+from app.services.notification_service import NotificationService
+
+# Roles alerted about stock that is not loaned to anyone (expiring batches)
+INVENTORY_ADMIN_ROLES = (1, 2)
+BATCH_ALERT_DAYS = 30
+
+
+class DueItem(NamedTuple):
+    item_id: int
+    due_date: date
+    user_id: Optional[int]
+    request_id: Optional[int]
+    name: str
+    reference: Optional[str] = None
+
+
+def _in_window(column, since: Optional[date], until: Optional[date]) -> list:
+    conditions = [column.isnot(None)]
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column <= until)
+    return conditions
+
+
+def _due_items(db: Session, query) -> List[DueItem]:
+    return [DueItem(*row) for row in db.execute(query)]
+
+
+def loaned_tools(
+    db: Session, statuses: Iterable[RequestToolStatus], since: Optional[date] = None, until: Optional[date] = None
+) -> List[DueItem]:
+    """Loaned tools whose expected return date falls in [since, until]."""
+    return _due_items(db, select(
+        RequestTool.id, RequestTool.expected_return_date, IntegratedRequest.requested_by,
+        RequestTool.request_id, Product.name, Tool.serial_number
+    ).join(IntegratedRequest, IntegratedRequest.id == RequestTool.request_id)
+     .join(Tool, Tool.id == RequestTool.tool_id)
+     .join(Product, Product.id == Tool.product_id)
+     .where(RequestTool.status.in_(list(statuses)), *_in_window(RequestTool.expected_return_date, since, until)))
+
+
+def loaned_epp(
+    db: Session, statuses: Iterable[RequestEPPStatus], since: Optional[date] = None, until: Optional[date] = None
+) -> List[DueItem]:
+    """EPP assignments whose expected return date falls in [since, until]."""
+    return _due_items(db, select(
+        RequestEPP.id, RequestEPP.expected_return_date, IntegratedRequest.requested_by,
+        RequestEPP.request_id, Product.name, EPP.serial_number
+    ).join(IntegratedRequest, IntegratedRequest.id == RequestEPP.request_id)
+     .join(EPP, EPP.id == RequestEPP.epp_id)
+     .join(Product, Product.id == EPP.product_id)
+     .where(RequestEPP.status.in_(list(statuses)), *_in_window(RequestEPP.expected_return_date, since, until)))
+
+
+def loaned_vehicles(
+    db: Session, statuses: Iterable[RequestVehicleStatus], since: Optional[date] = None, until: Optional[date] = None
+) -> List[DueItem]:
+    """Loaned vehicles whose request's expected return date falls in [since, until]."""
+    return _due_items(db, select(
+        RequestVehicle.id, IntegratedRequest.expected_return_date, IntegratedRequest.requested_by,
+        RequestVehicle.request_id, Vehicle.brand + " " + Vehicle.model, Vehicle.license_plate
+    ).join(IntegratedRequest, IntegratedRequest.id == RequestVehicle.request_id)
+     .join(Vehicle, Vehicle.id == RequestVehicle.vehicle_id)
+     .where(RequestVehicle.status.in_(list(statuses)), *_in_window(IntegratedRequest.expected_return_date, since, until)))
+
+
+def calibrations(
+    db: Session, statuses: Iterable[CalibrationStatus], since: Optional[date] = None, until: Optional[date] = None
+) -> List[DueItem]:
+    """Calibrations in the given statuses expiring in [since, until], with their asset."""
+    return _due_items(db, select(
+        AssetCalibration.id, AssetCalibration.expiration_date, Asset.responsible_user_id,
+        null(), Asset.name, Asset.asset_tag
+    ).join(Asset, Asset.id == AssetCalibration.asset_id)
+     .where(AssetCalibration.status.in_(list(statuses)), *_in_window(AssetCalibration.expiration_date, since, until)))
+
+
+def warranties(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> List[DueItem]:
+    """Assets whose warranty expires in [since, until]."""
+    return _due_items(db, select(
+        Asset.id, Asset.warranty_expiration, Asset.responsible_user_id, null(), Asset.name, Asset.asset_tag
+    ).where(*_in_window(Asset.warranty_expiration, since, until)))
+
+
+def batches(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> List[DueItem]:
+    """Product batches with stock left expiring in [since, until] (no user: nobody holds them)."""
+    return _due_items(db, select(
+        ProductBatch.id, ProductBatch.expiration_date, null(), null(), Product.name, ProductBatch.batch_number
+    ).join(Product, Product.id == ProductBatch.product_id)
+     .where(ProductBatch.quantity > 0, *_in_window(ProductBatch.expiration_date, since, until)))
+
+
+def expiration_recipients(db: Session) -> List[int]:
+    """Active inventory admins who have not turned expiration warnings off."""
+    return list(db.scalars(
+        select(User.id)
+        .outerjoin(UserNotificationPreference, UserNotificationPreference.user_id == User.id)
+        .where(
+            User.role_id.in_(INVENTORY_ADMIN_ROLES),
+            User.is_active == True,
+            or_(UserNotificationPreference.id.is_(None), UserNotificationPreference.expiration_warning == True)
+        )
+    ))
+
+
+def check_expiring_batches(db: Session, commit: bool = True) -> int:
+    """
+    Alert inventory admins about batches with stock expiring within BATCH_ALERT_DAYS,
+    once while upcoming and once after they expire. Returns the notifications created.
+    """
+    today = date.today()
+    due = batches(db, until=today + timedelta(days=BATCH_ALERT_DAYS))
+    recipients = expiration_recipients(db) if due else []
+    notifications = []
+    for batch in due:
+        days = (batch.due_date - today).days
+        if days >= 0:
+            alert = {
+                "title": f"Lote por Vencer: {batch.name} ({batch.reference})",
+                "message": f"El lote {batch.reference} de {batch.name} vence en {days} días ({batch.due_date}).",
+                "type": NotificationType.WARNING,
+                "since": batch.due_date - timedelta(days=BATCH_ALERT_DAYS),
+            }
+        else:
+            alert = {
+                "title": f"Lote Vencido: {batch.name} ({batch.reference})",
+                "message": f"El lote {batch.reference} de {batch.name} venció el {batch.due_date} y aún tiene existencias.",
+                "type": NotificationType.ERROR,
+                "since": batch.due_date,
+            }
+        notifications.extend({**alert, "user_id": user_id} for user_id in recipients)
+    return NotificationService.create_notifications(db, notifications, commit=commit)
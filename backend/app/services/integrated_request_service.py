@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import desc, func, insert
 from fastapi import HTTPException
 
 from app.models.integrated_request import (
@@ -19,31 +19,25 @@ from app.schemas.integrated_request import (
     IntegratedRequestCreate, IntegratedRequestUpdate, 
     RequestItemCreate, RequestToolCreate, RequestEPPCreate, RequestVehicleCreate
 )
+from app.services import sequence_service
 from app.services.stock_service import StockService
 from app.services.tracking_service import TrackingService
 from app.services.purchase_service import PurchaseService
 from app.models.purchase import PurchaseAlertReason
 
+# Line collections of a request, by relationship name
+LINE_MODELS = {
+    "items": RequestItem,
+    "tools": RequestTool,
+    "epp_items": RequestEPP,
+    "vehicles": RequestVehicle,
+}
+
 class IntegratedRequestService:
     @staticmethod
     def generate_request_number(db: Session) -> str:
-        year = datetime.now().year
-        # Find last request number for this year
-        prefix = f"SOL-{year}-"
-        last_req = db.query(IntegratedRequest).filter(
-            IntegratedRequest.request_number.like(f"{prefix}%")
-        ).order_by(desc(IntegratedRequest.id)).first()
-        
-        if last_req:
-            try:
-                last_seq = int(last_req.request_number.split('-')[-1])
-                new_seq = last_seq + 1
-            except ValueError:
-                new_seq = 1
-        else:
-            new_seq = 1
-            
-        return f"{prefix}{new_seq:03d}"
+        # SOL-YEAR-SEQUENTIAL
+        return sequence_service.next_number(db, "SOL", 3, existing=IntegratedRequest.request_number)
 
     @staticmethod
     def create_request(db: Session, request_in: IntegratedRequestCreate, user_id: int) -> IntegratedRequest:
@@ -94,11 +88,63 @@ class IntegratedRequestService:
         return db.query(IntegratedRequest).filter(IntegratedRequest.id == request_id).first()
 
     @staticmethod
-    def get_requests(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[IntegratedRequest]:
+    def _list_query(
+        db: Session,
+        user_id: Optional[int] = None,
+        status: Optional[IntegratedRequestStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ):
         query = db.query(IntegratedRequest)
         if user_id:
             query = query.filter(IntegratedRequest.requested_by == user_id)
-        return query.order_by(desc(IntegratedRequest.created_at)).offset(skip).limit(limit).all()
+        if status:
+            query = query.filter(IntegratedRequest.status == status)
+        if created_from:
+            query = query.filter(IntegratedRequest.created_at >= created_from)
+        if created_to:
+            query = query.filter(IntegratedRequest.created_at < created_to)
+        return query.order_by(desc(IntegratedRequest.created_at), desc(IntegratedRequest.id))
+
+    @staticmethod
+    def get_requests(
+        db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, **filters
+    ) -> List[IntegratedRequest]:
+        # Every collection of the response is loaded with one IN query for the whole page
+        return IntegratedRequestService._list_query(db, user_id, **filters).options(
+            selectinload(IntegratedRequest.items),
+            selectinload(IntegratedRequest.tools),
+            selectinload(IntegratedRequest.epp_items),
+            selectinload(IntegratedRequest.vehicles),
+            selectinload(IntegratedRequest.tracking)
+        ).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def get_request_summaries(
+        db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, **filters
+    ) -> List[Dict[str, Any]]:
+        """
+        The page of requests without their lines: per collection, the number of lines and
+        a histogram of their statuses, counted by one grouped query per line type.
+        """
+        requests = IntegratedRequestService._list_query(db, user_id, **filters).offset(skip).limit(limit).all()
+        ids = [request.id for request in requests]
+        histograms = {request_id: {name: {} for name in LINE_MODELS} for request_id in ids}
+        for name, model in LINE_MODELS.items():
+            if not ids:
+                break
+            rows = db.query(model.request_id, model.status, func.count(model.id)).filter(
+                model.request_id.in_(ids)
+            ).group_by(model.request_id, model.status).all()
+            for request_id, status, count in rows:
+                histograms[request_id][name][getattr(status, "value", status)] = count
+
+        columns = [column.key for column in IntegratedRequest.__table__.columns]
+        return [{
+            **{column: getattr(request, column) for column in columns},
+            "line_counts": {name: sum(counts.values()) for name, counts in histograms[request.id].items()},
+            "status_counts": histograms[request.id],
+        } for request in requests]
 
     @staticmethod
     def update_request(db: Session, request_id: int, request_in: IntegratedRequestUpdate) -> IntegratedRequest:
@@ -140,67 +186,114 @@ class IntegratedRequestService:
 
     @staticmethod
     def approve_request(db: Session, request_id: int, user_id: int) -> IntegratedRequest:
-        db_request = IntegratedRequestService.get_request(db, request_id)
+        db_request = IntegratedRequestService._load_for_approval(db, [request_id]).get(request_id)
         if not db_request:
             raise HTTPException(status_code=404, detail="Request not found")
             
         if db_request.status != IntegratedRequestStatus.PENDIENTE:
             raise HTTPException(status_code=400, detail="Request is not pending")
 
-        # Validation Logic
-        # 1. Check Products Stock
-        for item in db_request.items:
-            current_stock = StockService.calculate_current_stock(db, item.product_id)
-            if current_stock < item.quantity_requested:
-                # Approve only available amount? Or reject?
-                # Per requirements: "Solo aprobar cantidad disponible en stock"
-                item.quantity_approved = current_stock
-            else:
-                item.quantity_approved = item.quantity_requested
-            
-            item.status = RequestItemStatus.APROBADO
-            db.add(item)
+        IntegratedRequestService._approve_loaded(db, [db_request], user_id)
+        db.commit()
+        db.refresh(db_request)
+        return db_request
 
-        # 2. Check Tools Availability
-        for req_tool in db_request.tools:
-            tool = db.query(Tool).get(req_tool.tool_id)
-            if tool.status != ToolStatus.AVAILABLE:
-                # Can't approve this tool
-                # Option: Reject item or whole request? 
-                # We'll mark item as REJECTED (logic not in enum yet, so maybe set status to PENDIENTE or create logic?)
-                # Requirement: "Verificar que estén disponibles"
-                # If not available, we assume we cannot approve assignment.
-                # For now, let's assume valid tools are selected or we fail.
-                # Or we simply don't change status to APPROVED/PRESTADA yet.
-                pass 
+    @staticmethod
+    def approve_requests(db: Session, request_ids: List[int], user_id: int) -> Dict[str, Any]:
+        """
+        Approve several pending requests in one transaction. Requests that are missing or
+        not pending are skipped and reported instead of failing the batch.
+        """
+        requests = IntegratedRequestService._load_for_approval(db, request_ids)
+        pending = []
+        skipped = []
+        for request_id in dict.fromkeys(request_ids):
+            request = requests.get(request_id)
+            if not request:
+                skipped.append({"request_id": request_id, "reason": "Request not found"})
+            elif request.status != IntegratedRequestStatus.PENDIENTE:
+                skipped.append({"request_id": request_id, "reason": "Request is not pending"})
             else:
-                # Reserve?
-                pass
-                
-        # 3. Check EPP
-        for req_epp in db_request.epp_items:
-            epp = db.query(EPP).get(req_epp.epp_id)
-            if epp.status != EPPStatus.AVAILABLE:
-                pass # Similar logic
+                pending.append(request)
 
-        # 4. Check Vehicles
-        for req_vehicle in db_request.vehicles:
-            vehicle = db.query(Vehicle).get(req_vehicle.vehicle_id)
-            if vehicle.status != VehicleStatus.AVAILABLE:
-                pass
+        IntegratedRequestService._approve_loaded(db, pending, user_id)
+        db.commit()
+        return {"approved": [request.id for request in pending], "skipped": skipped}
 
-        db_request.status = IntegratedRequestStatus.APROBADA
-        db_request.approved_by = user_id
-        db_request.approved_at = datetime.now()
-        
-        IntegratedRequestService.log_tracking(
-            db, request_id, RequestTrackingItemType.PRODUCTO, 0, 
-            RequestTrackingAction.APROBADO, user_id, "Solicitud Aprobada"
-        )
+    @staticmethod
+    def _load_for_approval(db: Session, request_ids: List[int]) -> Dict[int, IntegratedRequest]:
+        requests = db.query(IntegratedRequest).options(
+            selectinload(IntegratedRequest.items),
+            selectinload(IntegratedRequest.tools),
+            selectinload(IntegratedRequest.epp_items),
+            selectinload(IntegratedRequest.vehicles)
+        ).filter(IntegratedRequest.id.in_(request_ids)).with_for_update().all()
+        return {request.id: request for request in requests}
 
-        db.commit()
-        db.refresh(db_request)
-        return db_request
+    @staticmethod
+    def _statuses(db: Session, model, ids) -> Dict[int, str]:
+        ids = set(ids)
+        if not ids:
+            return {}
+        rows = db.query(model.id, model.status).filter(model.id.in_(ids)).all()
+        # Tools store an Enum, EPP and vehicles a plain string
+        return {id: getattr(status, "value", status) for id, status in rows}
+
+    @staticmethod
+    def _approve_loaded(db: Session, requests: List[IntegratedRequest], user_id: int) -> None:
+        """
+        Approve loaded pending requests with one query per referenced entity type. Product
+        lines are approved up to the stock left after the earlier lines of the batch
+        (per requirements: "Solo aprobar cantidad disponible en stock"); tools, EPP and
+        vehicles that are not available are kept and noted on the request's tracking.
+        """
+        if not requests:
+            return
+        stock = StockService.current_stock_map(db, {item.product_id for r in requests for item in r.items})
+        tools = IntegratedRequestService._statuses(db, Tool, {t.tool_id for r in requests for t in r.tools})
+        epp = IntegratedRequestService._statuses(db, EPP, {e.epp_id for r in requests for e in r.epp_items})
+        vehicles = IntegratedRequestService._statuses(db, Vehicle, {v.vehicle_id for r in requests for v in r.vehicles})
+
+        now = datetime.now()
+        tracking = []
+
+        def track(request, item_type, item_id, notes):
+            tracking.append({
+                "request_id": request.id,
+                "item_type": item_type,
+                "item_id": item_id,
+                "action": RequestTrackingAction.APROBADO,
+                "performed_by": user_id,
+                "notes": notes
+            })
+
+        for request in requests:
+            for item in request.items:
+                available = max(stock.get(item.product_id, 0), 0)
+                item.quantity_approved = min(item.quantity_requested, available)
+                item.status = RequestItemStatus.APROBADO
+                stock[item.product_id] = available - item.quantity_approved
+                if item.quantity_approved < item.quantity_requested:
+                    track(request, RequestTrackingItemType.PRODUCTO, item.product_id,
+                          f"Aprobado {item.quantity_approved} de {item.quantity_requested} (stock insuficiente)")
+
+            for item_type, lines, attr, statuses, available in (
+                (RequestTrackingItemType.HERRAMIENTA, request.tools, "tool_id", tools, ToolStatus.AVAILABLE),
+                (RequestTrackingItemType.EPP, request.epp_items, "epp_id", epp, EPPStatus.AVAILABLE),
+                (RequestTrackingItemType.VEHICULO, request.vehicles, "vehicle_id", vehicles, VehicleStatus.AVAILABLE),
+            ):
+                for line in lines:
+                    status = statuses.get(getattr(line, attr))
+                    if status != available:
+                        track(request, item_type, getattr(line, attr), f"No disponible ({status or 'no encontrado'})")
+
+            request.status = IntegratedRequestStatus.APROBADA
+            request.approved_by = user_id
+            request.approved_at = now
+            track(request, RequestTrackingItemType.PRODUCTO, 0, "Solicitud Aprobada")
+
+        db.flush()
+        db.execute(insert(RequestTracking), tracking)
 
     @staticmethod
     def reject_request(db: Session, request_id: int, user_id: int, reason: str) -> IntegratedRequest:
@@ -331,7 +424,7 @@ class IntegratedRequestService:
                 RequestTrackingAction.DEVUELTO, user_id, "Totalmente consumido"
             )
             # Create Purchase Alert for Consumed Item
-            PurchaseService.create_alert(
+            PurchaseService.queue_alert(
                 db, 
                 reason=PurchaseAlertReason.CONSUMED, 
                 product_id=item.product_id, 
@@ -391,7 +484,7 @@ class IntegratedRequestService:
             tool.status = ToolStatus.MAINTENANCE
             
             # Create Purchase/Maintenance Alert
-            PurchaseService.create_alert(
+            PurchaseService.queue_alert(
                 db, 
                 reason=PurchaseAlertReason.DAMAGED, 
                 tool_id=item.tool_id, 
@@ -403,7 +496,7 @@ class IntegratedRequestService:
             tool.status = ToolStatus.LOST
             
             # Create Purchase Alert
-            PurchaseService.create_alert(
+            PurchaseService.queue_alert(
                 db, 
                 reason=PurchaseAlertReason.LOST, 
                 tool_id=item.tool_id, 
@@ -460,7 +553,7 @@ class IntegratedRequestService:
                 epp.status = EPPStatus.DISPOSED
                 
                 # Create Purchase Alert for Disposed EPP
-                PurchaseService.create_alert(
+                PurchaseService.queue_alert(
                     db, 
                     reason=PurchaseAlertReason.DISPOSED, 
                     epp_id=item.epp_id, 
@@ -484,7 +577,7 @@ class IntegratedRequestService:
             item.status = status
             epp.status = EPPStatus.DISPOSED # Assuming damaged EPP is disposed
             
-            PurchaseService.create_alert(
+            PurchaseService.queue_alert(
                 db, 
                 reason=PurchaseAlertReason.DAMAGED, 
                 epp_id=item.epp_id, 
@@ -0,0 +1,342 @@
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import standardFonts
+
+from app.core.config import settings as app_settings
+from app.services.pdf_generator import PDFLabelGenerator
+
+# Sheets rendered per worker task; bounds both IPC overhead and memory held per task
+PAGES_PER_TASK = 4
+DEFAULT_FONT = 'Helvetica'
+# Streamed sheets are written as raw PDF operators, so barcodes can only be vectors
+STREAM_RENDER_MODES = ('vector',)
+
+# A page of a batch sheet: the labels it holds and their lower-left corners
+PageLabels = List[Tuple[Dict[str, Any], float, float]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def label_pool_workers() -> int:
+    return app_settings.LABEL_RENDER_WORKERS or os.cpu_count() or 1
+
+
+def get_label_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by every batch print of this worker, created on first use.
+    Workers are spawned rather than forked: by then this process runs the dispatcher,
+    the scheduler and the request threadpool, and a forked child could inherit a lock
+    held by one of those threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=label_pool_workers(), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _num(value: float) -> str:
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class PagePath:
+    def __init__(self):
+        self.ops: List[str] = []
+
+    def rect(self, x: float, y: float, width: float, height: float) -> None:
+        self.ops.append(f"{_num(x)} {_num(y)} {_num(width)} {_num(height)} re")
+
+
+class PageCanvas:
+    """
+    The subset of the reportlab canvas API PDFLabelGenerator.draw_label uses in vector
+    mode, writing raw PDF page operators so a page can be rendered in a worker process
+    and appended to a PDF that is being streamed. Only the standard 14 fonts are used.
+    """
+
+    def __init__(self):
+        self.ops: List[bytes] = []
+        self.fonts: set = set()
+        self._font = (DEFAULT_FONT, 10)
+
+    def _op(self, op: str) -> None:
+        self.ops.append(op.encode('latin-1'))
+
+    @staticmethod
+    def _rgb(color) -> str:
+        return f"{_num(color.red)} {_num(color.green)} {_num(color.blue)}"
+
+    def setFillColor(self, color) -> None:
+        self._op(f"{self._rgb(color)} rg")
+
+    def setStrokeColor(self, color) -> None:
+        self._op(f"{self._rgb(color)} RG")
+
+    def setLineWidth(self, width: float) -> None:
+        self._op(f"{_num(width)} w")
+
+    def rect(self, x: float, y: float, width: float, height: float, stroke: int = 1, fill: int = 0) -> None:
+        self.drawPath(self._rect_path(x, y, width, height), stroke=stroke, fill=fill)
+
+    @staticmethod
+    def _rect_path(x: float, y: float, width: float, height: float) -> PagePath:
+        path = PagePath()
+        path.rect(x, y, width, height)
+        return path
+
+    def beginPath(self) -> PagePath:
+        return PagePath()
+
+    def drawPath(self, path: PagePath, stroke: int = 1, fill: int = 0) -> None:
+        paint = {(1, 1): 'B', (0, 1): 'f', (1, 0): 'S'}.get((int(bool(stroke)), int(bool(fill))), 'n')
+        self._op("\n".join(path.ops + [paint]))
+
+    def setFont(self, name: str, size: float) -> None:
+        self._font = (name if name in standardFonts else DEFAULT_FONT, size)
+
+    def drawString(self, x: float, y: float, text: str) -> None:
+        name, size = self._font
+        self.fonts.add(name)
+        self.ops.append(
+            f"BT /F{standardFonts.index(name) + 1} {_num(size)} Tf {_num(x)} {_num(y)} Td ".encode('latin-1')
+            + _pdf_string(text) + b" Tj ET"
+        )
+
+    def saveState(self) -> None:
+        self._op("q")
+
+    def restoreState(self) -> None:
+        self._op("Q")
+
+    def translate(self, dx: float, dy: float) -> None:
+        self._op(f"1 0 0 1 {_num(dx)} {_num(dy)} cm")
+
+    def content(self) -> bytes:
+        return zlib.compress(b"\n".join(self.ops))
+
+
+def render_pages(
+    width_mm: float, height_mm: float, label_type: str, label_settings: Dict[str, Any], pages: List[PageLabels]
+) -> List[Tuple[bytes, List[str]]]:
+    """
+    Worker task: render whole label sheets into compressed PDF content streams.
+    Returns one (content, fonts used) pair per page.
+    """
+    generator = PDFLabelGenerator(width_mm=width_mm, height_mm=height_mm, render_mode='vector')
+    rendered = []
+    for labels in pages:
+        page = PageCanvas()
+        for item, x, y in labels:
+            page.saveState()
+            page.translate(x, y)
+            generator.draw_label(page, item, label_type, **label_settings)
+            page.restoreState()
+        rendered.append((page.content(), sorted(page.fonts)))
+    return rendered
+
+
+class StreamingPDFWriter:
+    """
+    Writes a PDF incrementally: pages are emitted as soon as they are rendered and only
+    byte offsets and page ids are kept, so memory stays flat whatever the page count.
+    Object 1 is the catalog, 2 the page tree and 3 the shared resources; they are written
+    last since they reference every page and font.
+    """
+
+    CATALOG, PAGES, RESOURCES = 1, 2, 3
+
+    def __init__(self, page_width: float, page_height: float):
+        self.page_width = page_width
+        self.page_height = page_height
+        self.offsets: Dict[int, int] = {}
+        self.position = 0
+        self.next_id = 4
+        self.page_ids: List[int] = []
+        self.fonts: set = set()
+
+    def _emit(self, data: bytes) -> bytes:
+        self.position += len(data)
+        return data
+
+    def _object(self, obj_id: int, body: bytes) -> bytes:
+        self.offsets[obj_id] = self.position
+        return self._emit(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def _new_id(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def header(self) -> bytes:
+        return self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def page(self, content: bytes, fonts: List[str]) -> bytes:
+        self.fonts.update(fonts)
+        content_id = self._new_id()
+        page_id = self._new_id()
+        self.page_ids.append(page_id)
+        stream = (
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        page = (
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /Resources {self.RESOURCES} 0 R "
+            f"/MediaBox [0 0 {_num(self.page_width)} {_num(self.page_height)}] /Contents {content_id} 0 R >>"
+        ).encode('latin-1')
+        return self._object(content_id, stream) + self._object(page_id, page)
+
+    def trailer(self) -> bytes:
+        chunks = []
+        font_refs = []
+        for name in sorted(self.fonts):
+            font_id = self._new_id()
+            font_refs.append(f"/F{standardFonts.index(name) + 1} {font_id} 0 R")
+            chunks.append(self._object(
+                font_id,
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} /Encoding /WinAnsiEncoding >>".encode('latin-1')
+            ))
+        chunks.append(self._object(
+            self.RESOURCES, f"<< /ProcSet [/PDF /Text] /Font << {' '.join(font_refs)} >> >>".encode('latin-1')
+        ))
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        chunks.append(self._object(
+            self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode('latin-1')
+        ))
+        chunks.append(self._object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>".encode('latin-1')))
+
+        xref_offset = self.position
+        size = self.next_id
+        xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self.offsets[obj_id])
+        xref.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self.CATALOG, xref_offset))
+        chunks.append(self._emit(b"".join(xref)))
+        return b"".join(chunks)
+
+
+def _page_tasks(
+    generator: PDFLabelGenerator, items: List[Dict[str, Any]], copies_per_label: int
+) -> Iterator[List[PageLabels]]:
+    """Lay labels out on A4 sheets lazily and group the sheets into worker tasks."""
+    per_page = generator.labels_per_page()
+    task: List[PageLabels] = []
+    page: PageLabels = []
+    for index in range(len(items) * copies_per_label):
+        x, y = generator.sheet_position(index % per_page)
+        page.append((items[index // copies_per_label], x, y))
+        if len(page) == per_page:
+            task.append(page)
+            page = []
+            if len(task) == PAGES_PER_TASK:
+                yield task
+                task = []
+    if page:
+        task.append(page)
+    if task:
+        yield task
+
+
+def stream_batch_labels_pdf(
+    items: List[Dict[str, Any]],
+    label_type: str = 'qr',
+    width_mm: float = 50,
+    height_mm: float = 25,
+    copies_per_label: int = 1,
+    executor: Optional[Executor] = None,
+    workers: Optional[int] = None,
+    render_mode: Optional[str] = None,
+    **kwargs
+) -> Iterator[bytes]:
+    """
+    Batch label sheets as a stream of PDF chunks. Sheets are rendered in a process pool
+    (the shared one, or `executor` running `workers` tasks at a time) with a bounded
+    number of tasks in flight and written out in order as they complete. Barcodes are
+    drawn as vectors; any other render_mode raises ValueError before streaming starts.
+    """
+    if render_mode not in (None, *STREAM_RENDER_MODES):
+        raise ValueError(f"Render mode '{render_mode}' is not supported for batch label sheets")
+    if executor is None:
+        executor, workers = get_label_pool(), label_pool_workers()
+    return _stream_pages(items, label_type, width_mm, height_mm, copies_per_label, executor, workers or 1, kwargs)
+
+
+def _stream_pages(
+    items: List[Dict[str, Any]],
+    label_type: str,
+    width_mm: float,
+    height_mm: float,
+    copies_per_label: int,
+    executor: Executor,
+    workers: int,
+    kwargs: Dict[str, Any]
+) -> Iterator[bytes]:
+    generator = PDFLabelGenerator(width_mm=width_mm, height_mm=height_mm, render_mode='vector')
+    writer = StreamingPDFWriter(*A4)
+    max_in_flight = 2 * workers
+
+    yield writer.header()
+    pending = deque()
+    for task in _page_tasks(generator, items, copies_per_label):
+        pending.append(executor.submit(render_pages, width_mm, height_mm, label_type, kwargs, task))
+        if len(pending) >= max_in_flight:
+            for content, fonts in pending.popleft().result():
+                yield writer.page(content, fonts)
+    while pending:
+        for content, fonts in pending.popleft().result():
+            yield writer.page(content, fonts)
+    if not writer.page_ids:
+        yield writer.page(zlib.compress(b""), [])
+    yield writer.trailer()
+
+
+def write_batch_labels_pdf(path: str, items: List[Dict[str, Any]], **kwargs) -> None:
+    """
+    Job mode: stream the batch PDF into `path`. The file is written under a temporary
+    name and renamed once complete, so it only becomes downloadable when it is whole;
+    on failure a `<path>.failed` marker holds the error.
+    """
+    partial = f"{path}.part"
+    try:
+        with open(partial, "wb") as f:
+            for chunk in stream_batch_labels_pdf(items, **kwargs):
+                f.write(chunk)
+        os.replace(partial, path)
+    except Exception as e:
+        with open(f"{path}.failed", "w") as f:
+            f.write(str(e))
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def purge_label_jobs(directory: str, max_age_seconds: float) -> int:
+    """
+    Delete job files (finished PDFs, failure markers and abandoned partial files) last
+    written more than max_age_seconds ago. Returns the number of files removed.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.startswith("labels_batch_") and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
@@ -0,0 +1,60 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.system import ServiceLease
+
+
+def make_holder_id() -> str:
+    """Identity of this process as a lease holder (host, pid and a random suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire_lease(db: Session, name: str, holder: str, ttl_seconds: float) -> bool:
+    """
+    Take or renew the lease `name` for `ttl_seconds`. Succeeds when the lease is free,
+    expired or already held by `holder`; the check and the takeover are one UPDATE, so
+    two workers can never both win. Commits.
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    result = db.execute(
+        update(ServiceLease)
+        .where(
+            ServiceLease.name == name,
+            or_(ServiceLease.holder == holder, ServiceLease.expires_at < now)
+        )
+        .values(holder=holder, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        db.commit()
+        return True
+    if db.query(ServiceLease.name).filter(ServiceLease.name == name).first():
+        db.rollback()
+        return False
+
+    # First use of the lease: the primary key decides the race
+    db.add(ServiceLease(name=name, holder=holder, expires_at=expires_at))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def release_lease(db: Session, name: str, holder: str) -> None:
+    """Give the lease up early (on shutdown) so another worker can take over at once."""
+    db.execute(
+        update(ServiceLease)
+        .where(ServiceLease.name == name, ServiceLease.holder == holder)
+        .values(expires_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
@@ -1,10 +1,17 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+import threading
+import time
+from itertools import product as cartesian
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import String, and_, case, distinct, insert, or_, select, update, func, literal
+from sqlalchemy.orm import Session, aliased
 from fastapi import HTTPException
-from app.models.location_models import StorageLocation
+from app.models.location_models import StorageLocation, LocationType
 from app.models.product import Product
 from app.models.product_location_models import ProductLocationAssignment, AssignmentType
 from app.models.location_audit_models import LocationAuditLog
+from app.crud import warehouse_layout as crud_layout
+from app.schemas.location import LocationMatrixCreate
+from app.services.putaway_optimizer import putaway_optimizer
 
 async def assign_product_to_location(
     db: Session,
@@ -46,12 +53,8 @@ async def assign_product_to_location(
             
     # Check capacity (if adding)
     if quantity > 0:
-        # Calculate current total occupancy of the location
-        # This assumes location.current_occupancy is maintained correctly, 
-        # or we can recalculate it from assignments if needed.
-        # Let's rely on location.current_occupancy but verify it matches assignments sum if possible,
-        # or just add to it.
-        if location.capacity > 0 and (location.current_occupancy + quantity) > location.capacity:
+        # current_occupancy is maintained on every assignment change (see adjust_location_occupancy)
+        if location.capacity > 0 and ((location.current_occupancy or 0) + quantity) > location.capacity:
              raise HTTPException(status_code=400, detail="Location capacity exceeded")
 
     # 4. Crear/actualizar asignación
@@ -88,13 +91,7 @@ async def assign_product_to_location(
         db.add(assignment)
     
     # 5. Actualizar current_occupancy
-    # Re-calculate total occupancy to be safe or just add delta
-    location.current_occupancy += quantity
-    # Ensure it doesn't go below 0
-    if location.current_occupancy < 0:
-        location.current_occupancy = 0
-    
-    db.add(location)
+    adjust_location_occupancy(db, location.warehouse_id, location_id, quantity)
     
     # 6. Registrar auditoría
     action = "stock_in" if quantity > 0 else "stock_out"
@@ -110,5 +107,437 @@ async def assign_product_to_location(
     
     db.commit()
     db.refresh(assignment) if assignment in db else None
+
+    putaway_optimizer.on_stock_change(location.warehouse_id, location_id, product_id, quantity)
+    crud_layout.invalidate_heatmap(warehouse_id=location.warehouse_id, location_ids=[location_id])
+    invalidate_location_tree(location.warehouse_id)
     
     return assignment
+
+
+# --- Occupancy ---
+
+def adjust_location_occupancy(db: Session, warehouse_id: int, location_id: Optional[int], delta: int) -> None:
+    """
+    Add delta to a location's current_occupancy inside the caller's transaction.
+    The increment is done in SQL so concurrent writers cannot lose updates, and it is
+    clamped at 0. Call it next to every change of an assignment quantity, and
+    invalidate the warehouse's location tree once the transaction has committed.
+    """
+    if not location_id or not delta:
+        return
+    table = StorageLocation.__table__
+    occupancy = func.coalesce(table.c.current_occupancy, 0) + delta
+    db.execute(
+        update(table).where(table.c.id == location_id).values(
+            current_occupancy=case((occupancy < 0, 0), else_=occupancy)
+        )
+    )
+    # Loaded instances re-read the column instead of keeping a stale value
+    location = db.identity_map.get(db.identity_key(StorageLocation, location_id))
+    if location is not None:
+        db.expire(location, ["current_occupancy"])
+
+
+def reconcile_location_occupancy(db: Session, warehouse_id: Optional[int] = None, fix: bool = True) -> List[Dict[str, Any]]:
+    """
+    Recompute current_occupancy of every location from its assignments with one grouped
+    query and return the locations whose stored value drifted. With fix=True the drifted
+    rows are corrected and committed by one UPDATE that recomputes the sum in a correlated
+    subquery, so increments committed after the report was read are not overwritten.
+    """
+    totals = select(
+        ProductLocationAssignment.location_id,
+        func.sum(ProductLocationAssignment.quantity).label("quantity")
+    ).group_by(ProductLocationAssignment.location_id).subquery()
+    actual = func.coalesce(totals.c.quantity, 0)
+    recorded = func.coalesce(StorageLocation.current_occupancy, 0)
+
+    query = select(
+        StorageLocation.id, StorageLocation.warehouse_id, StorageLocation.code,
+        recorded.label("recorded"), actual.label("actual")
+    ).outerjoin(totals, totals.c.location_id == StorageLocation.id).where(recorded != actual)
+    if warehouse_id is not None:
+        query = query.where(StorageLocation.warehouse_id == warehouse_id)
+
+    drift = [
+        {
+            "location_id": row.id,
+            "warehouse_id": row.warehouse_id,
+            "code": row.code,
+            "recorded": int(row.recorded),
+            "actual": int(row.actual),
+            "drift": int(row.recorded) - int(row.actual),
+        }
+        for row in db.execute(query.order_by(StorageLocation.id))
+    ]
+
+    if fix and drift:
+        table = StorageLocation.__table__
+        assigned = select(
+            func.coalesce(func.sum(ProductLocationAssignment.quantity), 0)
+        ).where(ProductLocationAssignment.location_id == table.c.id).scalar_subquery()
+        correction = update(table).where(
+            func.coalesce(table.c.current_occupancy, 0) != assigned
+        ).values(current_occupancy=assigned)
+        if warehouse_id is not None:
+            correction = correction.where(table.c.warehouse_id == warehouse_id)
+        db.execute(correction)
+        db.commit()
+        for wh_id in {d["warehouse_id"] for d in drift}:
+            invalidate_location_tree(wh_id)
+    return drift
+
+
+# Intermediate nodes created by matrix mode, from the outermost level in
+MATRIX_LEVELS = (
+    (LocationType.AISLE, "aisle", "Pasillo"),
+    (LocationType.RACK, "rack", "Rack"),
+    (LocationType.SHELF, "shelf", "Nivel"),
+)
+
+
+def bulk_create_locations(
+    db: Session,
+    warehouse_id: int,
+    rows: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Insert many locations at once. Code (per warehouse) and barcode collisions are
+    checked with one IN query each and the colliding rows are skipped with an error
+    message. The survivors are inserted with a single executemany INSERT and read back
+    with one query by code (MySQL has no executemany INSERT ... RETURNING), so the
+    created rows come back without refreshing each location. Does not commit.
+    All rows must have the same keys.
+    """
+    codes = [row["code"] for row in rows]
+    taken_codes = {
+        code for (code,) in db.query(StorageLocation.code).filter(
+            StorageLocation.warehouse_id == warehouse_id,
+            StorageLocation.code.in_(codes)
+        )
+    } if codes else set()
+
+    barcodes = [row["barcode"] for row in rows if row.get("barcode")]
+    taken_barcodes = {
+        barcode for (barcode,) in db.query(StorageLocation.barcode).filter(StorageLocation.barcode.in_(barcodes))
+    } if barcodes else set()
+
+    survivors = []
+    errors = []
+    for row in rows:
+        if row["code"] in taken_codes:
+            errors.append(f"Code {row['code']} already exists, skipping")
+            continue
+        barcode = row.get("barcode")
+        if barcode and barcode in taken_barcodes:
+            errors.append(f"Barcode {barcode} already exists, skipping")
+            continue
+        taken_codes.add(row["code"])
+        if barcode:
+            taken_barcodes.add(barcode)
+        survivors.append({**row, "warehouse_id": warehouse_id})
+
+    if not survivors:
+        return [], errors
+
+    table = StorageLocation.__table__
+    db.execute(insert(table), survivors)
+    inserted = {
+        r.code: dict(r._mapping) for r in db.execute(
+            select(table).where(
+                table.c.warehouse_id == warehouse_id,
+                table.c.code.in_([row["code"] for row in survivors])
+            )
+        )
+    }
+    return [inserted[row["code"]] for row in survivors], errors
+
+
+def create_location_matrix(
+    db: Session,
+    warehouse_id: int,
+    parent: Optional[StorageLocation],
+    matrix: LocationMatrixCreate,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Create the aisles x racks x shelves x positions address grid of a LocationMatrixCreate.
+    Bin codes join the coordinates (e.g. A01-R02-S3-P04). With create_hierarchy the
+    aisle, rack and shelf nodes are created too (existing nodes with the same code are
+    reused) and each bin hangs from its shelf, so location paths follow the address.
+    One collision check and one INSERT per level. Does not commit.
+    """
+    def code_for(parts: Tuple[str, ...]) -> str:
+        return matrix.code_prefix + matrix.separator.join(parts)
+
+    # coordinates so far -> (location id, path)
+    parents: Dict[Tuple[str, ...], Tuple[Optional[int], str]] = {
+        (): (parent.id if parent else None, parent.path or "" if parent else "")
+    }
+    created: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    if matrix.create_hierarchy:
+        for depth, (location_type, field, label) in enumerate(MATRIX_LEVELS):
+            values = (matrix.aisles, matrix.racks, matrix.shelves)[depth]
+            nodes = {}
+            for key, value in cartesian(list(parents), values):
+                parts = key + (value,)
+                parent_id, parent_path = parents[key]
+                code = code_for(parts)
+                nodes[parts] = {
+                    "parent_location_id": parent_id,
+                    "code": code,
+                    "name": f"{label} {code}",
+                    "path": f"{parent_path}/{code}",
+                    "location_type": location_type,
+                    "aisle": parts[0],
+                    "rack": parts[1] if len(parts) > 1 else None,
+                    "shelf": parts[2] if len(parts) > 2 else None,
+                }
+
+            existing = {
+                r.code: (r.id, r.path) for r in db.query(
+                    StorageLocation.id, StorageLocation.code, StorageLocation.path
+                ).filter(
+                    StorageLocation.warehouse_id == warehouse_id,
+                    StorageLocation.code.in_([n["code"] for n in nodes.values()])
+                )
+            }
+            new_rows, level_errors = bulk_create_locations(
+                db, warehouse_id, [n for n in nodes.values() if n["code"] not in existing]
+            )
+            errors.extend(level_errors)
+            created.extend(new_rows)
+            existing.update({r["code"]: (r["id"], r["path"]) for r in new_rows})
+            parents = {parts: existing[n["code"]] for parts, n in nodes.items() if n["code"] in existing}
+
+    rows = []
+    for aisle, rack, shelf, position in cartesian(matrix.aisles, matrix.racks, matrix.shelves, matrix.positions):
+        parts = (aisle, rack, shelf, position)
+        key = parts[:3] if matrix.create_hierarchy else ()
+        if key not in parents:
+            continue
+        parent_id, parent_path = parents[key]
+        code = code_for(parts)
+        rows.append({
+            "parent_location_id": parent_id,
+            "code": code,
+            "name": matrix.name_template.format(code=code, aisle=aisle, rack=rack, shelf=shelf, position=position),
+            "path": f"{parent_path}/{code}",
+            "location_type": matrix.location_type,
+            "aisle": aisle,
+            "rack": rack,
+            "shelf": shelf,
+            "position": position,
+            "capacity": matrix.capacity,
+            "barcode": f"{matrix.barcode_prefix}{code}" if matrix.barcode_prefix else None,
+        })
+
+    new_rows, leaf_errors = bulk_create_locations(db, warehouse_id, rows)
+    created.extend(new_rows)
+    errors.extend(leaf_errors)
+    return created, errors
+
+
+# --- Location tree ---
+
+LOCATION_TREE_TTL_SECONDS = 300
+
+# warehouse_id -> (root nodes, nodes by id, built_at)
+_tree_cache: Dict[int, Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]], float]] = {}
+_tree_lock = threading.Lock()
+
+
+def invalidate_location_tree(warehouse_id: Optional[int] = None) -> None:
+    with _tree_lock:
+        if warehouse_id is None:
+            _tree_cache.clear()
+        else:
+            _tree_cache.pop(warehouse_id, None)
+
+
+def _load_location_tree(db: Session, warehouse_id: int) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    with _tree_lock:
+        cached = _tree_cache.get(warehouse_id)
+        if cached and time.time() - cached[2] < LOCATION_TREE_TTL_SECONDS:
+            return cached[0], cached[1]
+
+    table = StorageLocation.__table__
+    rows = db.execute(
+        table.select().where(table.c.warehouse_id == warehouse_id).order_by(table.c.path, table.c.code)
+    ).mappings().all()
+
+    nodes = {row["id"]: {**row, "children": []} for row in rows}
+    roots = []
+    for node in nodes.values():
+        parent_id = node["parent_location_id"]
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in nodes:
+            nodes[parent_id]["children"].append(node)
+
+    with _tree_lock:
+        _tree_cache[warehouse_id] = (roots, nodes, time.time())
+    return roots, nodes
+
+
+def get_location_tree(db: Session, warehouse_id: int) -> List[Dict[str, Any]]:
+    """
+    Root locations of a warehouse with their nested children, built from a single
+    query ordered by materialized path and cached per warehouse until a location
+    of the warehouse is written.
+    """
+    roots, _ = _load_location_tree(db, warehouse_id)
+    return roots
+
+
+def get_location_children(db: Session, warehouse_id: int, parent_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Direct children (with their subtrees) of a location, or the roots when parent_id is None."""
+    roots, nodes = _load_location_tree(db, warehouse_id)
+    if parent_id is None:
+        return roots
+    parent = nodes.get(parent_id)
+    return parent["children"] if parent else []
+
+
+def get_location_hierarchy(
+    db: Session,
+    warehouse_id: int,
+    aisle: Optional[str] = None,
+    rack: Optional[str] = None,
+    shelf: Optional[str] = None,
+) -> Dict[str, List[str]]:
+    """
+    Distinct aisle/rack/shelf/position values of a warehouse, filtered by the parent
+    selections. One DISTINCT query per level; no location rows are loaded.
+    """
+    filters = [StorageLocation.warehouse_id == warehouse_id]
+    if aisle:
+        filters.append(StorageLocation.aisle == aisle)
+    if rack:
+        filters.append(StorageLocation.rack == rack)
+    if shelf:
+        filters.append(StorageLocation.shelf == shelf)
+
+    def distinct(column) -> List[str]:
+        return [value for (value,) in db.query(column).filter(
+            *filters, column.isnot(None), column != ""
+        ).distinct().order_by(column)]
+
+    return {
+        "aisles": distinct(StorageLocation.aisle),
+        "racks": distinct(StorageLocation.rack),
+        "shelves": distinct(StorageLocation.shelf),
+        "positions": distinct(StorageLocation.position),
+    }
+
+
+def path_prefix_pattern(path: str) -> str:
+    """LIKE pattern matching every location below `path`."""
+    escaped = path.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}/%"
+
+
+def move_location_path(db: Session, location: StorageLocation, parent_path: str) -> None:
+    """
+    Recompute the materialized path of a location after its code or parent changed and
+    rewrite the paths of its whole subtree with one prefix UPDATE. Does not commit.
+    """
+    old_path = location.path
+    new_path = f"{parent_path}/{location.code}"
+    location.path = new_path
+    if not old_path or old_path == new_path:
+        return
+
+    db.execute(
+        update(StorageLocation).where(
+            StorageLocation.warehouse_id == location.warehouse_id,
+            StorageLocation.path.like(path_prefix_pattern(old_path), escape="\\")
+        ).values(
+            path=literal(new_path, String).concat(func.substr(StorageLocation.path, len(old_path) + 1))
+        ).execution_options(synchronize_session=False)
+    )
+
+
+# --- Subtree stock aggregation ---
+
+def _subtree_stock(db: Session, warehouse_id: int, root_filter: Callable[[Any], Any]) -> List[Dict[str, Any]]:
+    """
+    Roll up capacity, stock and SKUs over the subtree (the node plus every location whose
+    path starts with the node path) of each location matching root_filter, in one query.
+    Capacity and stock are aggregated in separate subqueries so assignment rows do not
+    multiply location capacities.
+    """
+    root = aliased(StorageLocation)
+    node = aliased(StorageLocation)
+    # Descendant paths sort between "<path>/" and "<path>0" ("0" follows "/"), a range the
+    # (warehouse_id, path) index can seek per root, unlike a LIKE pattern built from a
+    # column. The prefix comparison keeps the match exact under any collation.
+    in_subtree = and_(
+        node.warehouse_id == root.warehouse_id,
+        or_(
+            node.id == root.id,
+            and_(
+                node.path >= root.path.concat("/"),
+                node.path < root.path.concat("0"),
+                func.substr(node.path, 1, func.length(root.path) + 1) == root.path.concat("/")
+            )
+        )
+    )
+    where = [root.warehouse_id == warehouse_id, root_filter(root)]
+
+    capacity = select(
+        root.id.label("id"),
+        func.count(node.id).label("locations"),
+        func.coalesce(func.sum(node.capacity), 0).label("capacity")
+    ).select_from(root).join(node, in_subtree).where(*where).group_by(root.id).subquery()
+
+    stock = select(
+        root.id.label("id"),
+        func.coalesce(func.sum(ProductLocationAssignment.quantity), 0).label("quantity"),
+        func.count(distinct(case(
+            (ProductLocationAssignment.quantity > 0, ProductLocationAssignment.product_id)
+        ))).label("sku_count")
+    ).select_from(root).join(node, in_subtree).join(
+        ProductLocationAssignment, ProductLocationAssignment.location_id == node.id
+    ).where(*where).group_by(root.id).subquery()
+
+    rows = db.execute(
+        select(
+            root.id, root.code, root.name, root.path, root.location_type,
+            capacity.c.locations, capacity.c.capacity,
+            func.coalesce(stock.c.quantity, 0).label("quantity"),
+            func.coalesce(stock.c.sku_count, 0).label("sku_count")
+        ).select_from(root).join(capacity, capacity.c.id == root.id).outerjoin(
+            stock, stock.c.id == root.id
+        ).order_by(root.path, root.code)
+    ).all()
+
+    return [
+        {
+            "location_id": r.id,
+            "code": r.code,
+            "name": r.name,
+            "path": r.path,
+            "location_type": r.location_type,
+            "locations": r.locations,
+            "capacity": r.capacity,
+            "quantity": r.quantity,
+            "sku_count": r.sku_count,
+            "occupancy_percentage": round(r.quantity / r.capacity * 100, 2) if r.capacity else None,
+        }
+        for r in rows
+    ]
+
+
+def get_subtree_stock(db: Session, warehouse_id: int, location_id: int) -> Optional[Dict[str, Any]]:
+    """Stock totals of one location and everything below it."""
+    rows = _subtree_stock(db, warehouse_id, lambda root: root.id == location_id)
+    return rows[0] if rows else None
+
+
+def get_children_stock(db: Session, warehouse_id: int, parent_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Subtree stock totals of each direct child of a location (or of each root)."""
+    return _subtree_stock(db, warehouse_id, lambda root: root.parent_location_id == parent_id)
+
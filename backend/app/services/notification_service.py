@@ -1,9 +1,14 @@
+from collections import Counter
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
-from typing import List, Optional
-from app.models.notification import Notification, NotificationType
+from sqlalchemy import func, insert, update, case
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, date, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.notification import Notification, NotificationCounter, NotificationType
 from app.models.user import User
+from app.services import outbox_service
+
+NOTIFICATION_EVENT = "notification.create"
 
 class NotificationService:
     @staticmethod
@@ -23,10 +28,182 @@ class NotificationService:
             related_request_id=related_request_id
         )
         db.add(notification)
+        NotificationService._adjust_unread(db, {user_id: 1})
         db.commit()
         db.refresh(notification)
         return notification
 
+    @staticmethod
+    def create_notifications(
+        db: Session,
+        notifications: List[Dict[str, Any]],
+        skip_existing_today: bool = True,
+        commit: bool = True
+    ) -> int:
+        """
+        Insert many notifications in one statement. Each item has user_id, title, message
+        and optionally type, related_request_id and since. With skip_existing_today, items
+        whose (user_id, type, related_request_id, title) was already notified today (or
+        after the item's `since`, for alerts sent once per window), or that repeat within
+        the list, are dropped; earlier notifications are read in a single query.
+        Returns the number of notifications created.
+        """
+        today, _ = NotificationService._today_range()
+
+        def since_of(n: Dict[str, Any]) -> datetime:
+            return NotificationService._as_datetime(n.get("since")) or today
+
+        last_sent = NotificationService._last_notified(
+            db, {n["user_id"] for n in notifications}, min(since_of(n) for n in notifications)
+        ) if skip_existing_today and notifications else {}
+
+        seen = set()
+        rows = []
+        for n in notifications:
+            type = NotificationType(n.get("type") or NotificationType.INFO)
+            if skip_existing_today:
+                key = (n["user_id"], type, n.get("related_request_id"), n["title"])
+                if key in seen or last_sent.get(key, datetime.min) >= since_of(n):
+                    continue
+                seen.add(key)
+            rows.append({
+                "user_id": n["user_id"],
+                "title": n["title"],
+                "message": n["message"],
+                "type": type,
+                "related_request_id": n.get("related_request_id"),
+            })
+
+        if rows:
+            db.execute(insert(Notification), rows)
+            NotificationService._adjust_unread(db, Counter(row["user_id"] for row in rows))
+        if commit:
+            db.commit()
+        return len(rows)
+
+    @staticmethod
+    def _today_range() -> Tuple[datetime, datetime]:
+        start = datetime.combine(date.today(), time.min)
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def _as_datetime(value: Optional[Any]) -> Optional[datetime]:
+        if value is None or isinstance(value, datetime):
+            return value
+        return datetime.combine(value, time.min)
+
+    @staticmethod
+    def _last_notified(db: Session, user_ids: set, since: datetime) -> Dict[tuple, datetime]:
+        """Latest creation time of each notification key of these users since `since`."""
+        key = (Notification.user_id, Notification.type, Notification.related_request_id, Notification.title)
+        rows = db.query(*key, func.max(Notification.created_at)).filter(
+            Notification.user_id.in_(user_ids),
+            Notification.created_at >= since
+        ).group_by(*key).all()
+        return {tuple(row[:4]): row[4] for row in rows}
+
+    @staticmethod
+    def _count_unread(db: Session, user_id: int) -> int:
+        return db.query(func.count(Notification.id)).filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).scalar()
+
+    @staticmethod
+    def _adjust_unread(db: Session, deltas: Dict[int, int]) -> None:
+        """
+        Apply unread deltas to the per-user counters with atomic UPDATEs (one per distinct
+        delta). A user without a counter gets one seeded from a COUNT, which already
+        includes the pending rows, so existing data is picked up on first use.
+        """
+        db.flush()
+        by_delta: Dict[int, List[int]] = {}
+        for user_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(user_id)
+
+        for delta, user_ids in by_delta.items():
+            NotificationService._increment_counters(db, user_ids, delta)
+        missing = set(deltas) - {
+            row.user_id for row in db.query(NotificationCounter.user_id).filter(
+                NotificationCounter.user_id.in_(list(deltas))
+            )
+        }
+        if missing:
+            counts = dict(db.query(Notification.user_id, func.count(Notification.id)).filter(
+                Notification.user_id.in_(missing),
+                Notification.is_read == False
+            ).group_by(Notification.user_id).all())
+            NotificationService._seed_counters(
+                db, {user_id: counts.get(user_id, 0) for user_id in missing}, deltas
+            )
+
+    @staticmethod
+    def _increment_counters(db: Session, user_ids: List[int], delta: int) -> None:
+        new_value = NotificationCounter.unread + delta
+        db.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id.in_(user_ids))
+            .values(unread=case((new_value < 0, 0), else_=new_value))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _seed_counters(db: Session, unread: Dict[int, int], deltas: Dict[int, int]) -> None:
+        try:
+            with db.begin_nested():
+                db.execute(insert(NotificationCounter), [
+                    {"user_id": user_id, "unread": count} for user_id, count in unread.items()
+                ])
+        except IntegrityError:
+            # Some were seeded concurrently; seed the rest one by one
+            for user_id, count in unread.items():
+                NotificationService._seed_counter(db, user_id, count, deltas.get(user_id, 0))
+
+    @staticmethod
+    def _seed_counter(db: Session, user_id: int, unread: int, delta: int = 0) -> None:
+        """
+        Seed a user's counter with ``unread``. If another transaction seeded it first, its
+        COUNT could not see our uncommitted rows, so ``delta`` is applied on top instead.
+        """
+        try:
+            with db.begin_nested():
+                db.add(NotificationCounter(user_id=user_id, unread=unread))
+        except IntegrityError:
+            if delta:
+                NotificationService._increment_counters(db, [user_id], delta)
+
+    @staticmethod
+    def get_unread_count(db: Session, user_id: int) -> int:
+        """Unread notifications of a user, read from the maintained counter."""
+        unread = db.query(NotificationCounter.unread).filter(NotificationCounter.user_id == user_id).scalar()
+        if unread is None:
+            unread = NotificationService._count_unread(db, user_id)
+            NotificationService._seed_counter(db, user_id, unread)
+            db.commit()
+        return unread
+
+    @staticmethod
+    def queue_notification(
+        db: Session,
+        user_id: int,
+        title: str,
+        message: str,
+        type: NotificationType = NotificationType.INFO,
+        related_request_id: Optional[int] = None
+    ) -> None:
+        """
+        Record a notification in the caller's transaction; the outbox dispatcher inserts
+        the queued notifications in batches after it commits.
+        """
+        outbox_service.enqueue(db, NOTIFICATION_EVENT, {
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "type": type.value,
+            "related_request_id": related_request_id
+        })
+
     @staticmethod
     def get_user_notifications(
         db: Session,
@@ -41,15 +218,19 @@ class NotificationService:
 
     @staticmethod
     def mark_as_read(db: Session, notification_id: int, user_id: int) -> Optional[Notification]:
-        notification = db.query(Notification).filter(
+        # Conditional update, so concurrent reads of the same notification decrement once
+        changed = db.query(Notification).filter(
+            Notification.id == notification_id,
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).update({Notification.is_read: True}, synchronize_session="fetch")
+        if changed:
+            NotificationService._adjust_unread(db, {user_id: -1})
+            db.commit()
+        return db.query(Notification).filter(
             Notification.id == notification_id,
             Notification.user_id == user_id
         ).first()
-        if notification:
-            notification.is_read = True
-            db.commit()
-            db.refresh(notification)
-        return notification
 
     @staticmethod
     def mark_all_as_read(db: Session, user_id: int) -> int:
@@ -57,6 +238,11 @@ class NotificationService:
             Notification.user_id == user_id,
             Notification.is_read == False
         ).update({Notification.is_read: True})
+        changed = db.query(NotificationCounter).filter(
+            NotificationCounter.user_id == user_id
+        ).update({NotificationCounter.unread: 0}, synchronize_session=False)
+        if not changed:
+            NotificationService._seed_counter(db, user_id, 0)
         db.commit()
         return count
 
@@ -68,11 +254,12 @@ class NotificationService:
         related_request_id: Optional[int] = None,
         title_contains: Optional[str] = None
     ) -> bool:
-        today = datetime.now().date()
+        start, end = NotificationService._today_range()
         query = db.query(Notification).filter(
             Notification.user_id == user_id,
             Notification.type == type,
-            func.date(Notification.created_at) == today
+            Notification.created_at >= start,
+            Notification.created_at < end
         )
         if related_request_id:
             query = query.filter(Notification.related_request_id == related_request_id)
@@ -0,0 +1,63 @@
+"""
+Outbox event handlers. Imported by the dispatcher when it starts; each handler runs in
+the dispatcher's session and must not commit (the dispatcher commits its writes together
+with the delivered events).
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.models.purchase import PurchaseAlertReason
+from app.services import outbox_service
+from app.services.outbox_service import outbox_handler
+from app.services.email_service import EMAIL_EVENT, email_service
+from app.services.notification_service import NOTIFICATION_EVENT, NotificationService
+from app.services.purchase_service import PurchaseService, PURCHASE_ALERT_EVENT
+from app.services.push_notification_service import PUSH_EVENT, PUSH_RECEIPTS_EVENT, expo_push_service
+from app.services.stock_service import LOW_STOCK_CHECK_EVENT, StockService
+
+
+@outbox_handler(PURCHASE_ALERT_EVENT)
+async def create_purchase_alerts(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    for payload in payloads:
+        PurchaseService.create_alert(
+            db,
+            reason=PurchaseAlertReason(payload["reason"]),
+            product_id=payload.get("product_id"),
+            tool_id=payload.get("tool_id"),
+            epp_id=payload.get("epp_id"),
+            quantity=payload.get("quantity", 1),
+            notes=payload.get("notes"),
+            commit=False
+        )
+
+
+@outbox_handler(LOW_STOCK_CHECK_EVENT)
+async def check_low_stock(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    # min_stock is product-wide: compare it with the committed balance across all warehouses,
+    # read once per product however many decrements the batch holds
+    balances = StockService.current_stock_map(db, {payload["product_id"] for payload in payloads})
+    for product_id, new_balance in balances.items():
+        PurchaseService.check_low_stock(db, product_id, new_balance, commit=False)
+
+
+@outbox_handler(NOTIFICATION_EVENT)
+async def create_notifications(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    NotificationService.create_notifications(db, payloads, skip_existing_today=False, commit=False)
+
+
+@outbox_handler(PUSH_EVENT)
+async def send_push_notifications(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    await expo_push_service.deliver_queued(db, payloads)
+
+
+@outbox_handler(PUSH_RECEIPTS_EVENT)
+async def check_push_receipts(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    await expo_push_service.process_receipts(db, payloads)
+
+
+@outbox_handler(EMAIL_EVENT)
+async def send_emails(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    # Only the recipients of failed sends are queued again; the rest already got their mail
+    _, failed = await email_service.send_batch(payloads)
+    outbox_service.requeue(db, EMAIL_EVENT, failed, "email transport failed")
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.connection import SessionLocal
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.services import lease_service
+from app.services.websocket_service import manager
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_LEASE = "outbox_dispatcher"
+BROADCAST_EVENT = "ws.broadcast"
+# Retry delay doubles per attempt: 5 s, 10 s, 20 s ... capped at one hour
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+PURGE_INTERVAL_SECONDS = 600
+# Ids are assigned at flush, not commit: an id below the broadcast cursor that is not
+# visible yet may still commit. It is re-read for this long before it is given up.
+BROADCAST_GAP_GRACE_SECONDS = 60
+
+OutboxHandler = Callable[[Session, List[Dict[str, Any]]], Awaitable[None]]
+_handlers: Dict[str, OutboxHandler] = {}
+
+
+def outbox_handler(event_type: str):
+    """
+    Register the coroutine delivering `event_type` events. It receives the dispatcher's
+    session and the payloads of a batch; whatever it writes is committed together with
+    the events being marked delivered, and raising makes the batch be retried.
+    """
+    def register(func: OutboxHandler) -> OutboxHandler:
+        _handlers[event_type] = func
+        return func
+    return register
+
+
+def enqueue(db: Session, event_type: str, payload: Dict[str, Any], delay_seconds: float = 0) -> OutboxEvent:
+    """
+    Record a side effect in the caller's transaction; it is only delivered if that
+    transaction commits. Does not commit.
+    """
+    event = OutboxEvent(
+        event_type=event_type,
+        payload=payload,
+        status=OutboxStatus.PENDING,
+        available_at=datetime.now() + timedelta(seconds=delay_seconds),
+    )
+    db.add(event)
+    return event
+
+
+def enqueue_broadcast(db: Session, message: Dict[str, Any]) -> OutboxEvent:
+    """WebSocket message sent to every connected client once the transaction commits."""
+    return enqueue(db, BROADCAST_EVENT, message)
+
+
+@outbox_handler(BROADCAST_EVENT)
+async def _retire_broadcasts(db: Session, payloads: List[Dict[str, Any]]) -> None:
+    # Broadcasts are fanned out by every worker from its own cursor (clients are
+    # connected to all of them); the leader only retires the rows.
+    return None
+
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def requeue(db: Session, event_type: str, payloads: List[Dict[str, Any]], error: str) -> int:
+    """
+    Re-enqueue the part of a batch a handler could not deliver as new events retried with
+    backoff, so the handler can return normally and the part already sent is not sent
+    again by the dispatcher's retry. Each payload carries its attempt count under
+    "attempt"; payloads that reach OUTBOX_MAX_ATTEMPTS are dropped and logged. Returns
+    the number of payloads re-enqueued. Does not commit.
+    """
+    requeued = 0
+    for payload in payloads:
+        attempt = payload.get("attempt", 0) + 1
+        if attempt >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error("Dropping %s payload after %s attempts: %s", event_type, attempt, error)
+            continue
+        enqueue(db, event_type, {**payload, "attempt": attempt}, delay_seconds=retry_delay(attempt))
+        requeued += 1
+    return requeued
+
+
+class OutboxDispatcher:
+    """
+    Background task started in the app lifespan of every worker. Each poll it:
+    - sends new broadcast events to this worker's WebSocket clients, and
+    - if it holds the dispatcher lease, delivers a batch of pending events grouped by
+      type, with exponential backoff on failure and FAILED after OUTBOX_MAX_ATTEMPTS.
+    Delivery is at least once: a handler may see an event again if the worker dies
+    between running it and committing.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        # Long enough to survive a slow batch, short enough for a quick takeover
+        self.lease_ttl = max(30.0, 10 * self.poll_interval)
+        self.holder = lease_service.make_holder_id()
+        # Highest outbox id read, and the lower ids not visible yet (id -> first noticed)
+        self.broadcast_cursor: Optional[int] = None
+        self.broadcast_gaps: Dict[int, float] = {}
+        self._last_purge: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        # Handlers live next to the services they call and register on import
+        import app.services.outbox_handlers  # noqa: F401
+
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        db = self.session_factory()
+        try:
+            lease_service.release_lease(db, OUTBOX_LEASE, self.holder)
+        except Exception:
+            logger.exception("Could not release the outbox lease")
+        finally:
+            db.close()
+
+    def wake(self) -> None:
+        """Poll now instead of at the next interval (safe to call from any thread)."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def run_once(self) -> int:
+        """One poll; returns the number of events delivered by this worker as leader."""
+        db = self.session_factory()
+        try:
+            await self.fan_out_broadcasts(db)
+            if not lease_service.acquire_lease(db, OUTBOX_LEASE, self.holder, self.lease_ttl):
+                return 0
+            delivered = await self.dispatch_pending(db)
+            self._purge_if_due(db)
+            return delivered
+        finally:
+            db.close()
+
+    async def fan_out_broadcasts(self, db: Session) -> int:
+        if self.broadcast_cursor is None:
+            # Start from the current tail: a worker that (re)starts does not replay history
+            self.broadcast_cursor = db.query(func.max(OutboxEvent.id)).scalar() or 0
+            return 0
+
+        # Every event type shares the id sequence, so all rows are read to tell ids of
+        # other events apart from ids whose transaction has not committed yet
+        new_rows = OutboxEvent.id > self.broadcast_cursor
+        if self.broadcast_gaps:
+            new_rows = or_(new_rows, OutboxEvent.id.in_(list(self.broadcast_gaps)))
+        rows = db.query(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.payload).filter(
+            new_rows
+        ).order_by(OutboxEvent.id).limit(self.batch_size).all()
+        db.rollback()
+
+        now = time.monotonic()
+        sent = 0
+        for row in rows:
+            if row.id > self.broadcast_cursor:
+                for missing in range(self.broadcast_cursor + 1, row.id):
+                    self.broadcast_gaps[missing] = now
+                self.broadcast_cursor = row.id
+            else:
+                del self.broadcast_gaps[row.id]
+            if row.event_type == BROADCAST_EVENT:
+                await manager.broadcast(row.payload)
+                sent += 1
+
+        # Rolled back transactions leave gaps that never fill
+        for missing, noticed in list(self.broadcast_gaps.items()):
+            if now - noticed >= BROADCAST_GAP_GRACE_SECONDS:
+                del self.broadcast_gaps[missing]
+        return sent
+
+    async def dispatch_pending(self, db: Session) -> int:
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.status == OutboxStatus.PENDING,
+            OutboxEvent.available_at <= datetime.now()
+        ).order_by(OutboxEvent.id).limit(self.batch_size).all()
+
+        batches = [
+            (event_type, [(e.id, e.payload) for e in group])
+            for event_type, group in groupby(events, key=lambda e: e.event_type)
+        ]
+        delivered = 0
+        for event_type, batch in batches:
+            try:
+                await self._deliver(db, event_type, [payload for _, payload in batch])
+                self._mark_delivered(db, [event_id for event_id, _ in batch])
+                delivered += len(batch)
+                continue
+            except Exception as e:
+                db.rollback()
+                if len(batch) == 1:
+                    self._mark_failed(db, batch[0][0], e)
+                    continue
+
+            # Retry the batch one event at a time so a bad event does not hold back the rest
+            for event_id, payload in batch:
+                try:
+                    await self._deliver(db, event_type, [payload])
+                    self._mark_delivered(db, [event_id])
+                    delivered += 1
+                except Exception as e:
+                    db.rollback()
+                    self._mark_failed(db, event_id, e)
+        return delivered
+
+    async def _deliver(self, db: Session, event_type: str, payloads: List[Dict[str, Any]]) -> None:
+        handler = _handlers.get(event_type)
+        if handler is None:
+            raise LookupError(f"No outbox handler registered for '{event_type}'")
+        await handler(db, payloads)
+
+    def _mark_delivered(self, db: Session, event_ids: List[int]) -> None:
+        db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(event_ids))
+            .values(
+                status=OutboxStatus.DELIVERED,
+                attempts=OutboxEvent.attempts + 1,
+                delivered_at=datetime.now(),
+                last_error=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def _mark_failed(self, db: Session, event_id: int, error: Exception) -> None:
+        event = db.query(OutboxEvent).filter(OutboxEvent.id == event_id).first()
+        event.attempts += 1
+        event.last_error = f"{type(error).__name__}: {error}"[:2000]
+        if event.attempts >= self.max_attempts:
+            event.status = OutboxStatus.FAILED
+            logger.error("Outbox event %s (%s) failed permanently: %s", event.id, event.event_type, event.last_error)
+        else:
+            event.available_at = datetime.now() + timedelta(seconds=retry_delay(event.attempts))
+        db.commit()
+
+    def _purge_if_due(self, db: Session) -> None:
+        now = datetime.now()
+        if self._last_purge and (now - self._last_purge).total_seconds() < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        purge_delivered(db, now - timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+
+
+def purge_delivered(db: Session, before: datetime) -> int:
+    """Delete delivered events older than `before`. Failed events are kept for inspection."""
+    count = db.query(OutboxEvent).filter(
+        OutboxEvent.status == OutboxStatus.DELIVERED,
+        OutboxEvent.delivered_at < before
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -1,39 +1,98 @@
 import io
 import os
 import time
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from io import BytesIO
-from PIL import Image
-from reportlab.lib.pagesizes import mm
+from reportlab.lib.pagesizes import mm, A4
 from reportlab.lib.units import mm as mm_unit
 from reportlab.lib.colors import HexColor
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Image as RLImage
 from reportlab.lib import colors
 
 from app.services.barcode_generator import BarcodeGenerator
 
+# 'vector' draws barcodes as PDF shapes, 'raster' embeds the rendered PNG
+RENDER_MODES = ('vector', 'raster')
+DEFAULT_RENDER_MODE = 'vector'
+# Height/width of linear barcodes drawn as vectors (about the raster PNG proportions)
+LINEAR_BARCODE_ASPECT = 0.3
+
+
+def label_barcode_data(data: Dict[str, Any], include_barcode: bool, include_sku: bool, include_location: bool) -> str:
+    if include_barcode and data.get('barcode'):
+        return data['barcode']
+    if include_sku and data.get('sku'):
+        return data['sku']
+    if include_location and data.get('location_code'):
+        return data['location_code']
+    if data.get('product_name'):
+        return data['product_name'][:20]
+    return 'NO-DATA'
+
+
+def label_text_lines(
+    data: Dict[str, Any],
+    font_size: int,
+    include_product_name: bool,
+    include_sku: bool,
+    include_location: bool,
+    include_batch: bool,
+    include_expiration: bool
+) -> List[Tuple[int, str, int]]:
+    """Text printed under the barcode, top to bottom, as (font size, text, advance to the next baseline) in points."""
+    lines = []
+    if include_product_name and data.get('product_name'):
+        lines.append((font_size, data['product_name'][:25], font_size + 2))
+    if include_sku and data.get('sku'):
+        lines.append((font_size - 1, f"SKU: {data['sku'][:20]}", font_size))
+    if include_location and data.get('location_code'):
+        lines.append((font_size - 1, f"Loc: {data['location_code']}", font_size))
+    if include_batch and data.get('batch_number'):
+        lines.append((font_size - 1, f"Lote: {data['batch_number'][:15]}", font_size))
+    if include_expiration and data.get('expiration_date'):
+        lines.append((font_size - 1, f"Exp: {data['expiration_date']}", font_size))
+    return lines
+
 
 class PDFLabelGenerator:
-    def __init__(self, width_mm: float = 50, height_mm: float = 25):
+    def __init__(self, width_mm: float = 50, height_mm: float = 25, render_mode: str = DEFAULT_RENDER_MODE):
         self.width_mm = width_mm
         self.height_mm = height_mm
         self.width_pt = width_mm * mm_unit
         self.height_pt = height_mm * mm_unit
+        self.render_mode = render_mode if render_mode in RENDER_MODES else DEFAULT_RENDER_MODE
 
     def _get_barcode_data(self, data: Dict[str, Any], include_barcode: bool, include_sku: bool, include_location: bool) -> str:
-        if include_barcode and data.get('barcode'):
-            return data['barcode']
-        if include_sku and data.get('sku'):
-            return data['sku']
-        if include_location and data.get('location_code'):
-            return data['location_code']
-        if data.get('product_name'):
-            return data['product_name'][:20]
-        return 'NO-DATA'
-
-    def generate_single_label(
+        return label_barcode_data(data, include_barcode, include_sku, include_location)
+
+    def _draw_vector_barcode(
+        self, c: canvas.Canvas, data: str, label_type: str, x: float, y: float, width: float, height: float
+    ) -> None:
+        """Draw the barcode modules as one filled path of rectangles in the given box."""
+        cols, rows, runs = BarcodeGenerator.vector_modules(data, label_type)
+        module_w = width / cols
+        module_h = height / rows
+        path = c.beginPath()
+        for run_x, run_y, run_w, run_h in runs:
+            path.rect(
+                x + run_x * module_w,
+                y + height - (run_y + run_h) * module_h,
+                run_w * module_w,
+                run_h * module_h
+            )
+        c.drawPath(path, stroke=0, fill=1)
+
+    def generate_single_label(self, data: Dict[str, Any], label_type: str = 'qr', **kwargs) -> bytes:
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, pagesize=(self.width_pt, self.height_pt))
+        self.draw_label(c, data, label_type, **kwargs)
+        c.save()
+        buffer.seek(0)
+        return buffer.getvalue()
+
+    def draw_label(
         self,
+        c: canvas.Canvas,
         data: Dict[str, Any],
         label_type: str = 'qr',
         qr_size: int = 100,
@@ -50,10 +109,8 @@ class PDFLabelGenerator:
         include_location: bool = False,
         include_batch: bool = False,
         include_expiration: bool = False
-    ) -> bytes:
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=(self.width_pt, self.height_pt))
-        
+    ) -> None:
+        """Draw one label with its lower-left corner at the canvas origin."""
         c.setFillColor(HexColor(background_color))
         c.rect(0, 0, self.width_pt, self.height_pt, fill=True, stroke=False)
         
@@ -71,61 +128,60 @@ class PDFLabelGenerator:
         barcode_data = self._get_barcode_data(data, include_barcode, include_sku, include_location)
         
         try:
-            barcode_image = BarcodeGenerator.generate(
-                barcode_data,
-                label_type=label_type,
-                size=qr_size,
-                height=barcode_height
-            )
-            
-            barcode_buffer = BytesIO(barcode_image)
-            barcode_img = Image.open(barcode_buffer)
-            
             img_width_pt = min(content_width * 0.5, self.height_pt * 0.8)
-            img_height_pt = img_width_pt * (barcode_img.height / barcode_img.width)
-            
-            img_x = (self.width_pt - img_width_pt) / 2
-            img_y = self.height_pt - img_height_pt - 5 * mm_unit
             
-            c.drawImage(
-                RLImage(barcode_buffer),
-                img_x, img_y,
-                width=img_width_pt,
-                height=img_height_pt
-            )
+            if self.render_mode == 'vector':
+                is_qr = (label_type or 'qr').lower() not in ('code128', 'code39', 'ean13')
+                img_height_pt = img_width_pt if is_qr else img_width_pt * LINEAR_BARCODE_ASPECT
+                img_x = (self.width_pt - img_width_pt) / 2
+                img_y = self.height_pt - img_height_pt - 5 * mm_unit
+                self._draw_vector_barcode(c, barcode_data, label_type, img_x, img_y, img_width_pt, img_height_pt)
+            else:
+                barcode_img = BarcodeGenerator.generate_image(
+                    barcode_data,
+                    label_type=label_type,
+                    size=qr_size,
+                    height=barcode_height
+                )
+                img_height_pt = img_width_pt * (barcode_img.height / barcode_img.width)
+                img_x = (self.width_pt - img_width_pt) / 2
+                img_y = self.height_pt - img_height_pt - 5 * mm_unit
+                c.drawImage(
+                    barcode_img.reader,
+                    img_x, img_y,
+                    width=img_width_pt,
+                    height=img_height_pt
+                )
             
             y_offset = img_y - 2 * mm_unit
         except Exception as e:
             pass
         
-        if include_product_name and data.get('product_name'):
-            c.setFont(font_name, font_size)
-            product_name = data['product_name'][:25]
-            c.drawString(x_margin, y_offset, product_name)
-            y_offset -= font_size + 2
-        
-        if include_sku and data.get('sku'):
-            c.setFont(font_name, font_size - 1)
-            c.drawString(x_margin, y_offset, f"SKU: {data['sku'][:20]}")
-            y_offset -= font_size
-        
-        if include_location and data.get('location_code'):
-            c.setFont(font_name, font_size - 1)
-            c.drawString(x_margin, y_offset, f"Loc: {data['location_code']}")
-            y_offset -= font_size
-        
-        if include_batch and data.get('batch_number'):
-            c.setFont(font_name, font_size - 1)
-            c.drawString(x_margin, y_offset, f"Lote: {data['batch_number'][:15]}")
-            y_offset -= font_size
-        
-        if include_expiration and data.get('expiration_date'):
-            c.setFont(font_name, font_size - 1)
-            c.drawString(x_margin, y_offset, f"Exp: {data['expiration_date']}")
-        
-        c.save()
-        buffer.seek(0)
-        return buffer.getvalue()
+        for size, text, advance in label_text_lines(
+            data, font_size, include_product_name, include_sku, include_location, include_batch, include_expiration
+        ):
+            c.setFont(font_name, size)
+            c.drawString(x_margin, y_offset, text)
+            y_offset -= advance
+
+    def sheet_grid(self):
+        """(labels per row, rows per page, column width) of an A4 label sheet."""
+        labels_per_row = max(int(210 * mm_unit / self.width_pt), 1)
+        rows_per_page = max(int(297 * mm_unit / self.height_pt), 1)
+        return labels_per_row, rows_per_page, 210 * mm_unit / labels_per_row
+
+    def labels_per_page(self) -> int:
+        labels_per_row, rows_per_page, _ = self.sheet_grid()
+        return labels_per_row * rows_per_page
+
+    def sheet_position(self, page_offset: int):
+        """Lower-left corner of the label in the given slot of an A4 sheet."""
+        labels_per_row, _, label_width = self.sheet_grid()
+        row = page_offset // labels_per_row
+        col = page_offset % labels_per_row
+        x = col * label_width + (label_width - self.width_pt) / 2
+        y = 297 * mm_unit - (row + 1) * self.height_pt - 10 * mm_unit
+        return x, y
 
     def generate_batch_labels(
         self,
@@ -134,23 +190,11 @@ class PDFLabelGenerator:
         copies_per_label: int = 1,
         **kwargs
     ) -> bytes:
-        labels_per_row = int(210 * mm_unit / self.width_pt)
-        if labels_per_row < 1:
-            labels_per_row = 1
-        
-        label_width = 210 * mm_unit / labels_per_row
-        label_height = self.height_pt
-        
-        rows_per_page = int(297 * mm_unit / label_height)
-        if rows_per_page < 1:
-            rows_per_page = 1
-        
+        labels_per_page = self.labels_per_page()
         total_labels = len(items) * copies_per_label
-        labels_per_page = labels_per_row * rows_per_page
         
-        from reportlab.lib.pagesizes import letter
         buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
+        c = canvas.Canvas(buffer, pagesize=A4)
         
         current_label = 0
         page_num = 0
@@ -160,28 +204,14 @@ class PDFLabelGenerator:
                 c.showPage()
                 page_num += 1
             
-            page_offset = current_label % labels_per_page
-            row = page_offset // labels_per_row
-            col = page_offset % labels_per_row
-            
             item_index = current_label // copies_per_label
             if item_index < len(items):
                 item = items[item_index]
-                
-                x = col * label_width + (label_width - self.width_pt) / 2
-                y = 297 * mm_unit - (row + 1) * label_height - 10 * mm_unit
+                x, y = self.sheet_position(current_label % labels_per_page)
                 
                 c.saveState()
                 c.translate(x, y)
-                
-                label_buffer = BytesIO(self.generate_single_label(item, label_type, **kwargs))
-                c.drawImage(
-                    RLImage(label_buffer),
-                    0, 0,
-                    width=self.width_pt,
-                    height=self.height_pt
-                )
-                
+                self.draw_label(c, item, label_type, **kwargs)
                 c.restoreState()
             
             current_label += 1
@@ -196,9 +226,10 @@ def generate_label_pdf(
     label_type: str = 'qr',
     width_mm: float = 50,
     height_mm: float = 25,
+    render_mode: str = DEFAULT_RENDER_MODE,
     **kwargs
 ) -> bytes:
-    generator = PDFLabelGenerator(width_mm=width_mm, height_mm=height_mm)
+    generator = PDFLabelGenerator(width_mm=width_mm, height_mm=height_mm, render_mode=render_mode)
     return generator.generate_single_label(data, label_type, **kwargs)
 
 
@@ -208,7 +239,8 @@ def generate_batch_labels_pdf(
     width_mm: float = 50,
     height_mm: float = 25,
     copies_per_label: int = 1,
+    render_mode: str = DEFAULT_RENDER_MODE,
     **kwargs
 ) -> bytes:
-    generator = PDFLabelGenerator(width_mm=width_mm, height_mm=height_mm)
+    generator = PDFLabelGenerator(width_mm=width_mm, height_mm=height_mm, render_mode=render_mode)
     return generator.generate_batch_labels(items, label_type, copies_per_label, **kwargs)
@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+
+from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType
+from app.models.movement import MovementRequest, MovementType
+from app.models.integrated_request import IntegratedRequest
+from app.services.stock_service import StockService
+
+# Cells a picker cannot walk through; they are picked from the adjacent aisle
+BLOCKING_CELL_TYPES = {CellType.RACK, CellType.SHELF, CellType.STORAGE}
+# Preferred start/end point of a pick tour
+DEPOT_CELL_TYPES = (CellType.SHIPPING, CellType.STAGING, CellType.RECEIVING)
+
+Cell = Tuple[int, int]
+
+
+class LayoutGrid:
+    """
+    Walking model of a warehouse layout.
+    Pickers move along vertical aisles and can only change aisle on cross-aisle
+    rows (rows without racks/shelves), so the distance between two cells in
+    different aisles is the Manhattan distance through the best cross aisle.
+    """
+
+    def __init__(self, rows: int, cols: int, blocked: Set[Cell], depot: Optional[Cell] = None):
+        self.rows = rows
+        self.cols = cols
+        self.blocked = blocked
+        self.depot = depot or (0, 0)
+        blocked_rows = {r for r, _ in blocked}
+        self.cross_aisles = [r for r in range(rows) if r not in blocked_rows] or [0, max(rows - 1, 0)]
+
+    def access_point(self, cell: Cell) -> Cell:
+        """Walkable cell from which a (possibly blocked) cell is picked."""
+        row, col = cell
+        if cell not in self.blocked:
+            return cell
+        for c in (col - 1, col + 1):
+            if 0 <= c < self.cols and (row, c) not in self.blocked:
+                return (row, c)
+        return cell
+
+    def distance(self, a: Cell, b: Cell) -> int:
+        (r1, c1), (r2, c2) = self.access_point(a), self.access_point(b)
+        if c1 == c2:
+            return abs(r1 - r2)
+        return abs(c1 - c2) + min(abs(r1 - x) + abs(r2 - x) for x in self.cross_aisles)
+
+
+def route_length(dist: List[List[int]], order: List[int]) -> int:
+    """Closed tour length starting and ending at node 0 (the depot)."""
+    path = [0] + order + [0]
+    return sum(dist[path[i]][path[i + 1]] for i in range(len(path) - 1))
+
+
+def nearest_neighbour(dist: List[List[int]]) -> List[int]:
+    remaining = set(range(1, len(dist)))
+    order = []
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda n: (dist[current][n], n))
+        order.append(current)
+        remaining.remove(current)
+    return order
+
+
+def two_opt(dist: List[List[int]], order: List[int], max_passes: int = 50) -> List[int]:
+    """Reverse route segments while it shortens the closed tour."""
+    path = [0] + order + [0]
+    n = len(path)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 2):
+            a, b = path[i - 1], path[i]
+            for j in range(i + 1, n - 1):
+                c, d = path[j], path[j + 1]
+                delta = dist[a][c] + dist[b][d] - dist[a][b] - dist[c][d]
+                if delta < 0:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    b = path[i]
+                    improved = True
+        if not improved:
+            break
+    return path[1:-1]
+
+
+class PickRouteService:
+
+    @staticmethod
+    def load_grid(db: Session, warehouse_id: int) -> Tuple[Optional[LayoutGrid], Dict[int, Cell]]:
+        """
+        Build the walking grid of a warehouse and the location -> cell map in one query.
+        Returns (None, {}) when the warehouse has no layout.
+        """
+        layout = db.query(WarehouseLayout).filter(WarehouseLayout.warehouse_id == warehouse_id).first()
+        if not layout:
+            return None, {}
+
+        rows = db.query(LayoutCell.row, LayoutCell.col, LayoutCell.cell_type, LayoutCell.linked_location_id).filter(
+            LayoutCell.layout_id == layout.id
+        ).all()
+
+        blocked = set()
+        location_cells: Dict[int, Cell] = {}
+        depots: Dict[CellType, Cell] = {}
+        for r in rows:
+            if r.cell_type in BLOCKING_CELL_TYPES:
+                blocked.add((r.row, r.col))
+            if r.linked_location_id and r.linked_location_id not in location_cells:
+                location_cells[r.linked_location_id] = (r.row, r.col)
+            if r.cell_type in DEPOT_CELL_TYPES:
+                depots.setdefault(r.cell_type, (r.row, r.col))
+
+        depot = next((depots[t] for t in DEPOT_CELL_TYPES if t in depots), None)
+        return LayoutGrid(layout.grid_rows, layout.grid_cols, blocked, depot), location_cells
+
+    @staticmethod
+    def optimize(grid: LayoutGrid, cells: List[Cell]) -> Tuple[List[int], int]:
+        """
+        Order a list of cells into a short closed tour from the grid depot
+        (nearest neighbour + 2-opt). Returns (order of indexes into `cells`, distance).
+        """
+        nodes = [grid.depot] + cells
+        dist = [[grid.distance(a, b) for b in nodes] for a in nodes]
+        order = two_opt(dist, nearest_neighbour(dist))
+        return [i - 1 for i in order], route_length(dist, order)
+
+    @staticmethod
+    def build_route(db: Session, warehouse_id: int, lines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the lines sorted in walking order. Each line needs a location_id; lines
+        sharing a cell become one stop. Lines whose location is not on the layout are
+        appended at the end in their original order.
+        """
+        grid, location_cells = PickRouteService.load_grid(db, warehouse_id)
+
+        stops: Dict[Cell, List[Dict[str, Any]]] = {}
+        unmapped = []
+        for line in lines:
+            cell = location_cells.get(line.get("location_id")) if grid else None
+            if cell is None:
+                unmapped.append(line)
+            else:
+                stops.setdefault(cell, []).append(line)
+
+        cells = list(stops.keys())
+        distance = 0
+        ordered = []
+        if cells:
+            order, distance = PickRouteService.optimize(grid, cells)
+            for seq, idx in enumerate(order, start=1):
+                row, col = cells[idx]
+                for line in stops[cells[idx]]:
+                    ordered.append({**line, "sequence": seq, "row": row, "col": col})
+
+        next_seq = len(cells) + 1
+        for offset, line in enumerate(unmapped):
+            ordered.append({**line, "sequence": next_seq + offset, "row": None, "col": None})
+
+        return {
+            "warehouse_id": warehouse_id,
+            "depot": {"row": grid.depot[0], "col": grid.depot[1]} if grid else None,
+            "stops": len(cells),
+            "estimated_distance": distance,
+            "unmapped_lines": len(unmapped),
+            "items": ordered,
+        }
+
+    @staticmethod
+    def route_for_movement(db: Session, movement_request_id: int, allocation_policy: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Pick route for an OUT/TRANSFER movement. Lines without a source location are
+        expanded with the stock allocator into the bins they would be picked from.
+        """
+        request = db.query(MovementRequest).filter(MovementRequest.id == movement_request_id).first()
+        if not request:
+            raise HTTPException(status_code=404, detail="Movement request not found")
+        if request.type not in (MovementType.OUT, MovementType.TRANSFER) or not request.source_warehouse_id:
+            raise HTTPException(status_code=400, detail="Pick routes are only available for OUT and TRANSFER movements")
+
+        policy = allocation_policy or StockService._get_allocation_policy(db)
+        lines = []
+        # Stock already routed to earlier lines of the same product
+        reserved: Dict[Tuple[int, int, Optional[int]], int] = {}
+        for item in request.items:
+            base = {"item_id": item.id, "product_id": item.product_id}
+            if item.source_location_id:
+                lines.append({**base, "location_id": item.source_location_id, "batch_id": item.batch_id, "quantity": item.quantity})
+                key = (item.product_id, item.source_location_id, item.batch_id)
+                reserved[key] = reserved.get(key, 0) + item.quantity
+                continue
+            try:
+                plan = StockService.allocate_stock(
+                    db, item.product_id, request.source_warehouse_id, item.quantity, policy=policy,
+                    batch_id=item.batch_id, reserved=reserved
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            lines.extend({**base, **pick} for pick in plan)
+
+        return PickRouteService.build_route(db, request.source_warehouse_id, lines)
+
+    @staticmethod
+    def route_for_integrated_request(
+        db: Session, request_id: int, warehouse_id: int, allocation_policy: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Pick route for the product lines of an integrated request that are still to be delivered.
+        """
+        request = db.query(IntegratedRequest).filter(IntegratedRequest.id == request_id).first()
+        if not request:
+            raise HTTPException(status_code=404, detail="Request not found")
+
+        policy = allocation_policy or StockService._get_allocation_policy(db)
+        lines = []
+        # Lines of the same product are routed to different stock
+        reserved: Dict[Tuple[int, int, Optional[int]], int] = {}
+        for item in request.items:
+            quantity = (item.quantity_approved or item.quantity_requested) - (item.quantity_delivered or 0)
+            if quantity <= 0:
+                continue
+            try:
+                plan = StockService.allocate_stock(
+                    db, item.product_id, warehouse_id, quantity, policy=policy, batch_id=item.batch_id,
+                    reserved=reserved
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            lines.extend({"item_id": item.id, "product_id": item.product_id, **pick} for pick in plan)
+
+        return PickRouteService.build_route(db, warehouse_id, lines)
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload
+from fastapi import HTTPException
+
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestStatus, RequestItem, RequestItemStatus,
+    RequestTrackingItemType, RequestTrackingAction
+)
+from app.models.movement import MovementRequest, MovementRequestItem, MovementStatus, MovementType
+from app.services import sequence_service
+from app.services.stock_service import StockService
+from app.services.pick_route_service import PickRouteService
+from app.services.integrated_request_service import IntegratedRequestService
+
+DEFAULT_WAVE_WINDOW_MINUTES = 60
+
+WaveKey = Tuple[int, Optional[int]]
+
+
+def _pending_quantity(item: RequestItem) -> int:
+    return (item.quantity_approved or item.quantity_requested) - (item.quantity_delivered or 0)
+
+
+class PickWaveService:
+    """
+    Groups approved integrated requests into pick waves: every request approved in the
+    same time window is picked from the warehouse with one walking route, and the wave
+    is delivered as a single OUT movement.
+    """
+
+    @staticmethod
+    def _load_requests(db: Session, request_ids: Optional[List[int]] = None) -> List[IntegratedRequest]:
+        query = db.query(IntegratedRequest).options(
+            selectinload(IntegratedRequest.items)
+        ).filter(IntegratedRequest.status == IntegratedRequestStatus.APROBADA)
+        if request_ids is not None:
+            query = query.filter(IntegratedRequest.id.in_(request_ids))
+
+        requests = []
+        for request in query.order_by(IntegratedRequest.approved_at, IntegratedRequest.id).all():
+            if any(PickWaveService._is_pending(item) for item in request.items):
+                requests.append(request)
+        return requests
+
+    @staticmethod
+    def _is_pending(item: RequestItem) -> bool:
+        return item.status == RequestItemStatus.APROBADO and _pending_quantity(item) > 0
+
+    @staticmethod
+    def _aggregate(requests: List[IntegratedRequest]) -> Dict[WaveKey, List[RequestItem]]:
+        """Pending request items of the wave grouped by (product_id, batch_id)."""
+        lines: Dict[WaveKey, List[RequestItem]] = {}
+        for request in requests:
+            for item in request.items:
+                if PickWaveService._is_pending(item):
+                    lines.setdefault((item.product_id, item.batch_id), []).append(item)
+        return lines
+
+    @staticmethod
+    def plan_waves(
+        db: Session,
+        warehouse_id: int,
+        window_minutes: int = DEFAULT_WAVE_WINDOW_MINUTES,
+        request_ids: Optional[List[int]] = None,
+        allocation_policy: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Bucket approved requests with undelivered product lines by approval time and build
+        one consolidated pick list per bucket, sorted in walking order. Lines the warehouse
+        cannot cover are reported as shortages instead of failing the whole plan.
+        """
+        if window_minutes <= 0:
+            raise HTTPException(status_code=400, detail="window_minutes must be positive")
+        policy = StockService._check_allocation_policy(db, allocation_policy)
+        window = timedelta(minutes=window_minutes)
+
+        buckets: Dict[int, List[IntegratedRequest]] = {}
+        for request in PickWaveService._load_requests(db, request_ids):
+            approved_at = request.approved_at or request.created_at or datetime.now()
+            buckets.setdefault(int(approved_at.timestamp() // window.total_seconds()), []).append(request)
+
+        waves = []
+        # Stock promised to earlier lines and waves of the plan is not offered again
+        reserved: Dict[Tuple[int, int, Optional[int]], int] = {}
+        for bucket, requests in sorted(buckets.items()):
+            window_start = datetime.fromtimestamp(bucket * window.total_seconds())
+            lines = []
+            shortages = []
+            for (product_id, batch_id), items in PickWaveService._aggregate(requests).items():
+                quantity = sum(_pending_quantity(item) for item in items)
+                base = {
+                    "product_id": product_id,
+                    "request_item_ids": [item.id for item in items],
+                }
+                try:
+                    plan = StockService.allocate_stock(
+                        db, product_id, warehouse_id, quantity, policy=policy, batch_id=batch_id,
+                        reserved=reserved
+                    )
+                except ValueError as e:
+                    shortages.append({**base, "batch_id": batch_id, "quantity": quantity, "reason": str(e)})
+                    continue
+                lines.extend({**base, **pick} for pick in plan)
+
+            route = PickRouteService.build_route(db, warehouse_id, lines)
+            waves.append({
+                "window_start": window_start,
+                "window_end": window_start + window,
+                "request_ids": [request.id for request in requests],
+                "request_numbers": [request.request_number for request in requests],
+                "route": route,
+                "shortages": shortages,
+            })
+        return waves
+
+    @staticmethod
+    async def apply_wave(
+        db: Session,
+        warehouse_id: int,
+        request_ids: List[int],
+        user_id: int,
+        allocation_policy: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Deliver every pending product line of the given requests as ONE OUT movement in
+        one transaction (one ledger pass and product lock per product instead of one
+        movement per request item), then mark each request item ENTREGADO and log it
+        on its request's tracking. Either the whole wave is delivered or nothing is.
+        """
+        requests = PickWaveService._load_requests(db, request_ids)
+        missing = sorted(set(request_ids) - {request.id for request in requests})
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Requests not approved or without pending products: {missing}"
+            )
+        policy = StockService._check_allocation_policy(db, allocation_policy)
+        lines = PickWaveService._aggregate(requests)
+
+        request_number = sequence_service.next_number(db, "WAVE", 5, existing=MovementRequest.request_number)
+        move_req = MovementRequest(
+            request_number=request_number,
+            type=MovementType.OUT,
+            status=MovementStatus.APPROVED,
+            source_warehouse_id=warehouse_id,
+            requested_by=user_id,
+            approved_by=user_id,
+            reference=request_number,
+            reason="Entrega por ola de surtido: " + ", ".join(r.request_number for r in requests)
+        )
+        for (product_id, batch_id), items in lines.items():
+            move_req.items.append(MovementRequestItem(
+                product_id=product_id,
+                batch_id=batch_id,
+                quantity=sum(_pending_quantity(item) for item in items)
+            ))
+
+        try:
+            db.add(move_req)
+            db.flush()
+            items_updated = await StockService.apply_items(db, move_req, user_id, policy)
+
+            for items in lines.values():
+                for item in items:
+                    quantity = _pending_quantity(item)
+                    item.quantity_delivered = (item.quantity_delivered or 0) + quantity
+                    item.status = RequestItemStatus.ENTREGADO
+                    IntegratedRequestService.log_tracking(
+                        db, item.request_id, RequestTrackingItemType.PRODUCTO, item.product_id,
+                        RequestTrackingAction.ENTREGADO, user_id,
+                        f"Entregado {quantity} unidades (ola {request_number})"
+                    )
+
+            db.commit()
+            db.refresh(move_req)
+        except HTTPException:
+            db.rollback()
+            raise
+        except ValueError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error applying wave: {str(e)}")
+
+        await StockService.publish_applied(move_req, items_updated)
+
+        return {
+            "movement_request_id": move_req.id,
+            "request_number": move_req.request_number,
+            "request_ids": [request.id for request in requests],
+            "lines": len(lines),
+            "items_delivered": sum(len(items) for items in lines.values()),
+        }
@@ -3,6 +3,9 @@ from app.models.purchase import PurchaseAlert, PurchaseAlertReason, PurchaseAler
 from app.models.product import Product
 from app.models.tool import Tool
 from app.models.epp import EPP
+from app.services import outbox_service
+
+PURCHASE_ALERT_EVENT = "purchase.alert"
 
 class PurchaseService:
     @staticmethod
@@ -13,7 +16,8 @@ class PurchaseService:
         tool_id: int = None, 
         epp_id: int = None, 
         quantity: int = 1,
-        notes: str = None
+        notes: str = None,
+        commit: bool = True
     ) -> PurchaseAlert:
         
         # Check if pending alert already exists to avoid duplicates
@@ -33,8 +37,11 @@ class PurchaseService:
             # Update quantity if applicable
             existing.quantity_needed += quantity
             existing.notes = (existing.notes or "") + f"\nUpdate: {notes}" if notes else existing.notes
-            db.commit()
-            db.refresh(existing)
+            if commit:
+                db.commit()
+                db.refresh(existing)
+            else:
+                db.flush()
             return existing
 
         priority = "MEDIUM"
@@ -52,12 +59,38 @@ class PurchaseService:
             status=PurchaseAlertStatus.PENDING
         )
         db.add(alert)
-        db.commit()
-        db.refresh(alert)
+        if commit:
+            db.commit()
+            db.refresh(alert)
+        else:
+            db.flush()
         return alert
 
     @staticmethod
-    def check_low_stock(db: Session, product_id: int, new_balance: int):
+    def queue_alert(
+        db: Session,
+        reason: PurchaseAlertReason,
+        product_id: int = None,
+        tool_id: int = None,
+        epp_id: int = None,
+        quantity: int = 1,
+        notes: str = None
+    ) -> None:
+        """
+        Same as create_alert, but recorded in the caller's transaction and created by the
+        outbox dispatcher after it commits.
+        """
+        outbox_service.enqueue(db, PURCHASE_ALERT_EVENT, {
+            "reason": reason.value,
+            "product_id": product_id,
+            "tool_id": tool_id,
+            "epp_id": epp_id,
+            "quantity": quantity,
+            "notes": notes
+        })
+
+    @staticmethod
+    def check_low_stock(db: Session, product_id: int, new_balance: int, commit: bool = True):
         product = db.query(Product).get(product_id)
         if not product or not product.min_stock:
             return
@@ -68,5 +101,6 @@ class PurchaseService:
                 reason=PurchaseAlertReason.LOW_STOCK, 
                 product_id=product_id, 
                 quantity=product.target_stock - new_balance if product.target_stock else product.min_stock * 2,
-                notes=f"Stock actual ({new_balance}) bajo el mínimo ({product.min_stock})"
+                notes=f"Stock actual ({new_balance}) bajo el mínimo ({product.min_stock})",
+                commit=commit
             )
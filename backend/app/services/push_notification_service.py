@@ -1,20 +1,118 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+import time
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 import logging
 
-from app.models.user import User
+import httpx
+
+from app.core.config import settings
+from app.models.notification_preferences import PushToken
+from app.services import outbox_service
 
 logger = logging.getLogger(__name__)
 
+PUSH_EVENT = "push.send"
+PUSH_RECEIPTS_EVENT = "push.receipts"
+# Expo limits: 100 messages per send request, 1000 ids per receipts request
+MAX_MESSAGES_PER_REQUEST = 100
+MAX_RECEIPTS_PER_REQUEST = 1000
+# Expo keeps receipts for a day and recommends fetching them after ~15 minutes
+RECEIPT_DELAY_SECONDS = 15 * 60
+DEAD_TOKEN_ERROR = "DeviceNotRegistered"
+
 
 class ExpoPushService:
-    def __init__(self):
+    """
+    Expo push client. Requests share one pooled httpx.AsyncClient (kept alive across
+    sends, closed on shutdown) and bulk sends are split into chunks of at most 100
+    messages posted concurrently, at most `concurrency` at a time. The endpoint URLs
+    and the httpx transport can be replaced, e.g. by a local stand-in server in tests.
+    """
+
+    def __init__(
+        self,
+        push_url: Optional[str] = None,
+        receipts_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.push_url = push_url or settings.EXPO_PUSH_URL
+        self.receipts_url = receipts_url or settings.EXPO_RECEIPTS_URL
+        self.concurrency = concurrency or settings.EXPO_PUSH_CONCURRENCY
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
         self.access_token = None
         self.enabled = False
+        self.configure(settings.EXPO_ACCESS_TOKEN)
     
     def configure(self, access_token: str):
         self.access_token = access_token
         self.enabled = bool(access_token)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            headers = {
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "Content-Type": "application/json",
+            }
+            if self.access_token:
+                headers["Authorization"] = f"Bearer {self.access_token}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=30.0,
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, url: str, payload: Any) -> Dict[str, Any]:
+        response = await self._get_client().post(url, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+        return response.json()
+
+    async def send_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Post messages in chunks of MAX_MESSAGES_PER_REQUEST with bounded parallelism.
+        Returns one Expo push ticket per message, in order; a chunk whose request failed
+        yields error tickets with details.error = "RequestFailed".
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    result = await self._post(self.push_url, chunk)
+                    return result.get("data", [])
+                except Exception as e:
+                    logger.error(f"Failed to send push notifications: {str(e)}")
+                    return [
+                        {"status": "error", "message": str(e), "details": {"error": "RequestFailed"}}
+                        for _ in chunk
+                    ]
+
+        chunks = [messages[i:i + MAX_MESSAGES_PER_REQUEST] for i in range(0, len(messages), MAX_MESSAGES_PER_REQUEST)]
+        results = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+        return [ticket for tickets in results for ticket in tickets]
+
+    @staticmethod
+    def _message(token: str, title: str, body: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        message = {
+            "to": token,
+            "title": title,
+            "body": body,
+            "sound": "default",
+        }
+        if data:
+            message["data"] = data
+        return message
     
     async def send_push_notification(
         self,
@@ -27,45 +125,10 @@ class ExpoPushService:
             logger.info(f"Push notification would be sent to {token}: {title}")
             return {"success": True, "message": "Push service disabled"}
         
-        try:
-            import httpx
-            
-            message = {
-                "to": token,
-                "title": title,
-                "body": body,
-                "sound": "default",
-            }
-            
-            if data:
-                message["data"] = data
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://exp.host/--/api/v2/push/send",
-                    json=message,
-                    headers={
-                        "Accept": "application/json",
-                        "Content-Type": "application/json",
-                    },
-                    timeout=30.0
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        "success": True,
-                        "message_id": result.get("data", {}).get("id", ""),
-                        "status": result.get("data", {}).get("status", "")
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }
-        except Exception as e:
-            logger.error(f"Failed to send push notification: {str(e)}")
-            return {"success": False, "error": str(e)}
+        ticket = (await self.send_messages([self._message(token, title, body, data)]))[0]
+        if ticket.get("status") == "ok":
+            return {"success": True, "message_id": ticket.get("id", ""), "status": "ok"}
+        return {"success": False, "error": ticket.get("message", ""), "details": ticket.get("details", {})}
     
     async def send_purchase_order_notification(
         self,
@@ -123,54 +186,124 @@ class ExpoPushService:
         data: Optional[Dict[str, Any]] = None
     ) -> dict:
         if not tokens:
-            return {"success": True, "sent": 0, "failed": 0}
+            return {"success": True, "sent": 0, "failed": 0, "tickets": []}
         
         if not self.enabled:
             logger.info(f"Bulk push would be sent to {len(tokens)} devices: {title}")
-            return {"success": True, "sent": len(tokens), "failed": 0}
+            return {"success": True, "sent": len(tokens), "failed": 0, "tickets": []}
         
-        try:
-            import httpx
-            
-            messages = [
-                {
-                    "to": token,
-                    "title": title,
-                    "body": body,
-                    "sound": "default",
-                    **( {"data": data} if data else {} )
-                }
-                for token in tokens
-            ]
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://exp.host/--/api/v2/push/send",
-                    json=messages,
-                    headers={
-                        "Accept": "application/json",
-                        "Content-Type": "application/json",
-                    },
-                    timeout=60.0
-                )
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    sent = sum(1 for r in results.get("data", []) if r.get("status") == "ok")
-                    failed = len(tokens) - sent
-                    return {
-                        "success": True,
-                        "sent": sent,
-                        "failed": failed
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }
-        except Exception as e:
-            logger.error(f"Failed to send bulk push notifications: {str(e)}")
-            return {"success": False, "error": str(e)}
+        tickets = await self.send_messages([self._message(token, title, body, data) for token in tokens])
+        sent = sum(1 for t in tickets if t.get("status") == "ok")
+        request_failed = any(t.get("details", {}).get("error") == "RequestFailed" for t in tickets)
+        return {
+            "success": not request_failed,
+            "sent": sent,
+            "failed": len(tokens) - sent,
+            "tickets": tickets
+        }
+
+    async def get_receipts(self, receipt_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch push receipts by id, in concurrent chunks of MAX_RECEIPTS_PER_REQUEST."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(chunk: List[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return (await self._post(self.receipts_url, {"ids": chunk})).get("data", {})
+
+        chunks = [receipt_ids[i:i + MAX_RECEIPTS_PER_REQUEST] for i in range(0, len(receipt_ids), MAX_RECEIPTS_PER_REQUEST)]
+        receipts: Dict[str, Dict[str, Any]] = {}
+        for result in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            receipts.update(result)
+        return receipts
+
+    @staticmethod
+    def queue_push(
+        db: Session,
+        tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Record a push in the caller's transaction; the outbox dispatcher sends it after
+        the commit and schedules the receipt check.
+        """
+        outbox_service.enqueue(db, PUSH_EVENT, {"tokens": tokens, "title": title, "body": body, "data": data})
+
+    @staticmethod
+    def active_tokens(db: Session, user_ids: List[int]) -> List[str]:
+        rows = db.query(PushToken.token).filter(
+            PushToken.user_id.in_(user_ids),
+            PushToken.is_active == True
+        ).all()
+        return [row.token for row in rows]
+
+    @staticmethod
+    def dead_tokens(tokens: List[str], tickets_or_receipts: List[Dict[str, Any]]) -> List[str]:
+        return [
+            token for token, result in zip(tokens, tickets_or_receipts)
+            if result.get("status") == "error" and result.get("details", {}).get("error") == DEAD_TOKEN_ERROR
+        ]
+
+    @staticmethod
+    def prune_tokens(db: Session, tokens: List[str]) -> int:
+        """Deactivate tokens Expo reported as no longer registered. Does not commit."""
+        if not tokens:
+            return 0
+        return db.query(PushToken).filter(
+            PushToken.token.in_(tokens),
+            PushToken.is_active == True
+        ).update({PushToken.is_active: False, PushToken.updated_at: int(time.time())}, synchronize_session=False)
+
+    async def deliver_queued(self, db: Session, payloads: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+        """
+        Outbox delivery: send every queued push of the batch in one chunked run, prune
+        tokens rejected outright and schedule the receipt check for accepted tickets.
+        Messages of chunks whose request failed are queued again as a new event, so the
+        devices that already got theirs are not sent a duplicate. Returns (messages
+        accepted, tokens pruned).
+        """
+        tokens: List[str] = []
+        messages: List[Dict[str, Any]] = []
+        sources: List[Dict[str, Any]] = []
+        for payload in payloads:
+            for token in payload["tokens"]:
+                tokens.append(token)
+                messages.append(self._message(token, payload["title"], payload["body"], payload.get("data")))
+                sources.append(payload)
+        if not messages:
+            return 0, []
+        if not self.enabled:
+            logger.info(f"Bulk push would be sent to {len(messages)} devices")
+            return len(messages), []
+
+        tickets = await self.send_messages(messages)
+        dead = self.dead_tokens(tokens, tickets)
+        self.prune_tokens(db, dead)
+
+        receipts = {t["id"]: token for token, t in zip(tokens, tickets) if t.get("status") == "ok" and t.get("id")}
+        if receipts:
+            outbox_service.enqueue(db, PUSH_RECEIPTS_EVENT, {"receipts": receipts}, delay_seconds=RECEIPT_DELAY_SECONDS)
+
+        retry: Dict[int, Dict[str, Any]] = {}
+        for token, ticket, payload in zip(tokens, tickets, sources):
+            if ticket.get("details", {}).get("error") == "RequestFailed":
+                retry.setdefault(id(payload), {**payload, "tokens": []})["tokens"].append(token)
+        if retry:
+            outbox_service.requeue(db, PUSH_EVENT, list(retry.values()), "push request failed")
+        return len(receipts), dead
+
+    async def process_receipts(self, db: Session, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Receipt-polling job: fetch the receipts of earlier sends and prune dead tokens."""
+        token_by_receipt: Dict[str, str] = {}
+        for payload in payloads:
+            token_by_receipt.update(payload["receipts"])
+        receipts = await self.get_receipts(list(token_by_receipt))
+
+        ids = list(receipts)
+        dead = self.dead_tokens([token_by_receipt[i] for i in ids], [receipts[i] for i in ids])
+        self.prune_tokens(db, dead)
+        return dead
 
 
 expo_push_service = ExpoPushService()
@@ -0,0 +1,302 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType
+
+# Relative weight of each scoring criterion (higher total score = better location)
+PUTAWAY_WEIGHTS = {
+    "consolidate": 3.0,   # product already stored in the location
+    "fit": 2.0,           # best fit: least capacity left over after the putaway
+    "proximity": 2.0,     # fast movers near the receiving cell, slow movers further away
+    "zone": 2.0,          # keep temperature controlled locations for products that need them
+}
+VELOCITY_WINDOW_DAYS = 30
+INDEX_TTL_SECONDS = 300
+
+
+class WarehouseCapacityIndex:
+    """
+    In-memory free-capacity index of one warehouse.
+    Location attributes are kept in parallel NumPy arrays so every candidate location
+    can be filtered and scored for a putaway line in a few vectorized operations.
+    Stock events only touch the `used` array.
+    """
+
+    def __init__(self, warehouse_id: int):
+        self.warehouse_id = warehouse_id
+        self.ids = np.empty(0, dtype=np.int64)
+        self.codes: List[str] = []
+        self.capacity = np.empty(0)
+        self.used = np.empty(0)
+        self.distance = np.empty(0)
+        self.zones = np.empty(0, dtype=object)
+        self.zoned = np.empty(0, dtype=bool)
+        self.restricted = np.empty(0, dtype=bool)
+        self.position: Dict[int, int] = {}
+        # product_id -> {position: quantity held there}
+        self.product_locations: Dict[int, Dict[int, float]] = {}
+        self.velocity: Dict[int, float] = {}
+        self.max_distance = 0.0
+        self.built_at = 0.0
+
+    def build(self, db: Session) -> "WarehouseCapacityIndex":
+        locations = db.query(
+            StorageLocation.id, StorageLocation.code, StorageLocation.capacity,
+            StorageLocation.temperature_zone, StorageLocation.is_restricted
+        ).filter(StorageLocation.warehouse_id == self.warehouse_id).order_by(StorageLocation.code).all()
+
+        size = len(locations)
+        self.ids = np.array([loc.id for loc in locations], dtype=np.int64)
+        self.codes = [loc.code for loc in locations]
+        # capacity 0/None means the location has no capacity limit
+        self.capacity = np.array([loc.capacity or np.inf for loc in locations], dtype=float)
+        self.zones = np.array([loc.temperature_zone for loc in locations], dtype=object)
+        self.zoned = np.array([bool(loc.temperature_zone) for loc in locations], dtype=bool)
+        self.restricted = np.array([bool(loc.is_restricted) for loc in locations], dtype=bool)
+        self.position = {int(location_id): i for i, location_id in enumerate(self.ids)}
+
+        self.used = np.zeros(size)
+        self.product_locations = {}
+        for row in db.query(
+            ProductLocationAssignment.location_id,
+            ProductLocationAssignment.product_id,
+            func.sum(ProductLocationAssignment.quantity).label("quantity")
+        ).filter(
+            ProductLocationAssignment.warehouse_id == self.warehouse_id
+        ).group_by(
+            ProductLocationAssignment.location_id, ProductLocationAssignment.product_id
+        ).all():
+            pos = self.position.get(row.location_id)
+            if pos is None:
+                continue
+            self.used[pos] += row.quantity or 0
+            if row.quantity:
+                held = self.product_locations.setdefault(row.product_id, {})
+                held[pos] = held.get(pos, 0) + row.quantity
+
+        self.distance = self._load_distances(db, size)
+        known = self.distance[~np.isnan(self.distance)]
+        self.max_distance = float(known.max()) if known.size else 0.0
+        self.velocity = self._load_velocity(db)
+        self.built_at = time.time()
+        return self
+
+    def _load_distances(self, db: Session, size: int) -> np.ndarray:
+        """
+        Manhattan distance (in grid cells) from the receiving cell to each location's layout cell.
+        NaN when the warehouse has no layout, no receiving cell or the location is not on the grid.
+        """
+        distance = np.full(size, np.nan)
+        rows = db.query(LayoutCell.row, LayoutCell.col, LayoutCell.cell_type, LayoutCell.linked_location_id).join(
+            WarehouseLayout, WarehouseLayout.id == LayoutCell.layout_id
+        ).filter(WarehouseLayout.warehouse_id == self.warehouse_id).all()
+
+        receiving = next(((r.row, r.col) for r in rows if r.cell_type == CellType.RECEIVING), None)
+        if receiving is None:
+            return distance
+
+        for r in rows:
+            pos = self.position.get(r.linked_location_id) if r.linked_location_id else None
+            if pos is not None:
+                distance[pos] = abs(r.row - receiving[0]) + abs(r.col - receiving[1])
+        return distance
+
+    def _load_velocity(self, db: Session) -> Dict[int, float]:
+        """
+        Units shipped per product over the velocity window, normalized to a 0..1 percentile rank.
+        """
+        since = datetime.utcnow() - timedelta(days=VELOCITY_WINDOW_DAYS)
+        rows = db.query(
+            LedgerEntry.product_id, func.sum(LedgerEntry.quantity).label("shipped")
+        ).filter(
+            LedgerEntry.warehouse_id == self.warehouse_id,
+            LedgerEntry.entry_type == LedgerEntryType.DECREMENT,
+            LedgerEntry.applied_at >= since
+        ).group_by(LedgerEntry.product_id).all()
+
+        ranked = sorted(rows, key=lambda r: r.shipped or 0)
+        if len(ranked) <= 1:
+            return {r.product_id: 1.0 for r in ranked}
+        return {r.product_id: i / (len(ranked) - 1) for i, r in enumerate(ranked)}
+
+    def apply_delta(self, location_id: int, product_id: int, delta: int) -> None:
+        pos = self.position.get(location_id)
+        if pos is None:
+            return
+        self.used[pos] = max(self.used[pos] + delta, 0)
+        held = self.product_locations.setdefault(product_id, {})
+        remaining = held.get(pos, 0) + delta
+        if remaining > 0:
+            held[pos] = remaining
+        else:
+            # Emptied bins stop earning the consolidate bonus for the product
+            held.pop(pos, None)
+            if not held:
+                del self.product_locations[product_id]
+
+    def score(
+        self,
+        product_id: int,
+        quantity: int,
+        temperature_zone: Optional[str] = None,
+        allow_restricted: bool = False,
+        reserved: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score every location for one putaway line. Locations that cannot take the line get -inf.
+        """
+        free = self.capacity - self.used
+        if reserved is not None:
+            free = free - reserved
+
+        eligible = free >= quantity
+        if not allow_restricted:
+            eligible &= ~self.restricted
+        if temperature_zone:
+            eligible &= self.zones == temperature_zone
+
+        consolidate = np.zeros(len(self.ids))
+        held = list(self.product_locations.get(product_id, ()))
+        if held:
+            consolidate[held] = 1.0
+
+        with np.errstate(invalid="ignore"):
+            fit = np.where(np.isinf(self.capacity), 0.5, 1.0 - (free - quantity) / self.capacity)
+
+        if self.max_distance:
+            target = 1.0 - self.velocity.get(product_id, 0.0)
+            proximity = np.where(
+                np.isnan(self.distance), 0.5, 1.0 - np.abs(self.distance / self.max_distance - target)
+            )
+        else:
+            proximity = np.full(len(self.ids), 0.5)
+
+        zone = np.ones(len(self.ids)) if temperature_zone else np.where(self.zoned, 0.0, 1.0)
+
+        parts = {"consolidate": consolidate, "fit": fit, "proximity": proximity, "zone": zone}
+        total = sum(PUTAWAY_WEIGHTS[k] * v for k, v in parts.items())
+        parts["score"] = np.where(eligible, total, -np.inf)
+        parts["free"] = free
+        return parts
+
+
+class PutawayOptimizer:
+    """
+    Ranks every candidate location of a warehouse for a putaway, using the cached
+    per-warehouse capacity index. The index is refreshed from stock events
+    (on_stock_change) and rebuilt from the database when it is older than INDEX_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[int, WarehouseCapacityIndex] = {}
+        self._lock = threading.RLock()
+
+    def get_index(self, db: Session, warehouse_id: int) -> WarehouseCapacityIndex:
+        with self._lock:
+            index = self._indexes.get(warehouse_id)
+            if index is None or time.time() - index.built_at > INDEX_TTL_SECONDS:
+                index = WarehouseCapacityIndex(warehouse_id).build(db)
+                self._indexes[warehouse_id] = index
+            return index
+
+    def invalidate(self, warehouse_id: Optional[int] = None) -> None:
+        with self._lock:
+            if warehouse_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(warehouse_id, None)
+
+    def on_stock_change(self, warehouse_id: int, location_id: Optional[int], product_id: int, delta: int) -> None:
+        """
+        Apply a committed assignment change to the cached index (no-op if the warehouse is not cached).
+        """
+        if not location_id:
+            return
+        with self._lock:
+            index = self._indexes.get(warehouse_id)
+            if index is not None:
+                index.apply_delta(location_id, product_id, delta)
+
+    @staticmethod
+    def _top(index: WarehouseCapacityIndex, parts: Dict[str, np.ndarray], limit: Optional[int]) -> List[Dict[str, Any]]:
+        scores = parts["score"]
+        eligible = np.flatnonzero(np.isfinite(scores))
+        if limit and eligible.size > limit:
+            eligible = eligible[np.argpartition(-scores[eligible], limit - 1)[:limit]]
+        # Highest score first, ties by location code (positions follow code order)
+        order = eligible[np.lexsort((eligible, -scores[eligible]))]
+
+        ranked = []
+        for pos in order:
+            free = parts["free"][pos]
+            distance = index.distance[pos]
+            ranked.append({
+                "location_id": int(index.ids[pos]),
+                "code": index.codes[pos],
+                "free_capacity": None if np.isinf(free) else int(free),
+                "distance": None if np.isnan(distance) else int(distance),
+                "score": round(float(scores[pos]), 4),
+                "consolidate": round(float(parts["consolidate"][pos]), 4),
+                "fit": round(float(parts["fit"][pos]), 4),
+                "proximity": round(float(parts["proximity"][pos]), 4),
+                "zone": round(float(parts["zone"][pos]), 4),
+            })
+        return ranked
+
+    def rank_locations(
+        self,
+        db: Session,
+        product_id: int,
+        warehouse_id: int,
+        quantity: int,
+        temperature_zone: Optional[str] = None,
+        allow_restricted: bool = False,
+        limit: Optional[int] = 10
+    ) -> List[Dict[str, Any]]:
+        index = self.get_index(db, warehouse_id)
+        with self._lock:
+            parts = index.score(product_id, quantity, temperature_zone, allow_restricted)
+            return self._top(index, parts, limit)
+
+    def suggest_for_receipt(
+        self,
+        db: Session,
+        warehouse_id: int,
+        lines: List[Dict[str, Any]],
+        limit: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank locations for every line of a receipt. Capacity taken by the best suggestion
+        of earlier lines is reserved so later lines are not sent to a bin that is already full.
+        Each line is a dict with product_id, quantity and optional temperature_zone.
+        """
+        index = self.get_index(db, warehouse_id)
+        results = []
+        with self._lock:
+            reserved = np.zeros(len(index.ids))
+            for line in lines:
+                parts = index.score(
+                    line["product_id"], line["quantity"],
+                    temperature_zone=line.get("temperature_zone"), reserved=reserved
+                )
+                ranked = self._top(index, parts, limit)
+                if ranked:
+                    reserved[index.position[ranked[0]["location_id"]]] += line["quantity"]
+                results.append({
+                    "product_id": line["product_id"],
+                    "quantity": line["quantity"],
+                    "suggestions": ranked,
+                })
+        return results
+
+
+putaway_optimizer = PutawayOptimizer()
@@ -0,0 +1,217 @@
+from typing import Any, Dict, Iterator, List, Tuple
+
+from app.services.barcode_generator import BarcodeGenerator
+from app.services.pdf_generator import LINEAR_BARCODE_ASPECT, label_barcode_data, label_text_lines
+
+# Thermal printers are 203 dpi (8 dots/mm) unless configured otherwise
+DEFAULT_DPI = 203
+RAW_FORMATS = ('zpl', 'epl')
+RAW_MEDIA_TYPES = {'zpl': 'text/plain; charset=utf-8', 'epl': 'text/plain; charset=latin-1'}
+LINEAR_SYMBOLOGIES = ('code128', 'code39', 'ean13')
+# Byte-mode capacity of QR versions 1-10 at error correction L
+QR_CAPACITY_L = (17, 32, 53, 78, 106, 134, 154, 192, 230, 271)
+# EPL resident fonts 1-5 and their character height in dots at 203 dpi
+EPL_FONT_HEIGHTS = ((1, 12), (2, 16), (3, 20), (4, 24), (5, 48))
+
+
+def barcode_modules(data: str, label_type: str) -> int:
+    """
+    Upper bound of the modules across the symbol the printer will build, used only to
+    pick the module width. Estimated from the data length instead of encoding it.
+    """
+    if label_type == 'qr':
+        length = len(data.encode('utf-8'))
+        version = next((v for v, capacity in enumerate(QR_CAPACITY_L, start=1) if length <= capacity), len(QR_CAPACITY_L))
+        return 17 + 4 * version
+    if label_type == 'ean13':
+        return 95
+    if label_type == 'code39':
+        # 3:1 wide/narrow ratio: 16 modules per character including the gap, plus start/stop
+        return 16 * (len(data) + 2)
+    # Code 128 subset B: start, data, check (11 modules each) and a 13-module stop
+    return 11 * (len(data) + 2) + 13
+
+
+class RawLabelGenerator:
+    """
+    Label layout in printer dots, mirroring PDFLabelGenerator.draw_label (barcode box
+    centred 5 mm from the top, text lines below it), for printers that take native
+    ZPL/EPL commands. Barcodes are sent as printer barcode commands, so a label is a
+    few hundred bytes and nothing is rasterized on the server or the printer.
+    """
+
+    def __init__(self, width_mm: float = 50, height_mm: float = 25, dpi: int = DEFAULT_DPI):
+        self.dpi = dpi
+        self.width = self.mm(width_mm)
+        self.height = self.mm(height_mm)
+
+    def mm(self, value: float) -> int:
+        return int(round(value * self.dpi / 25.4))
+
+    def pt(self, value: float) -> int:
+        return int(round(value * self.dpi / 72))
+
+    def layout(
+        self,
+        data: Dict[str, Any],
+        label_type: str = 'qr',
+        font_size: int = 8,
+        border_width: int = 1,
+        show_border: bool = True,
+        include_product_name: bool = True,
+        include_sku: bool = True,
+        include_barcode: bool = True,
+        include_location: bool = False,
+        include_batch: bool = False,
+        include_expiration: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Printer-independent layout of one label, top-left origin in dots: the barcode box,
+        its module grid and the baseline of every text line.
+        """
+        label_type = (label_type or 'qr').lower()
+        if label_type not in LINEAR_SYMBOLOGIES:
+            label_type = 'qr'
+        barcode_data = label_barcode_data(data, include_barcode, include_sku, include_location)
+        if label_type == 'ean13':
+            barcode_data = BarcodeGenerator.ean13_digits(barcode_data)
+
+        margin = self.mm(2)
+        box_width = int(min((self.width - 2 * margin) * 0.5, self.height * 0.8))
+        box_height = box_width if label_type == 'qr' else int(box_width * LINEAR_BARCODE_ASPECT)
+        modules = barcode_modules(barcode_data, label_type)
+
+        lines = []
+        baseline = self.mm(5) + box_height + self.mm(2)
+        for size, text, advance in label_text_lines(
+            data, font_size, include_product_name, include_sku, include_location, include_batch, include_expiration
+        ):
+            lines.append((margin, baseline, self.pt(size), text))
+            baseline += self.pt(advance)
+
+        return {
+            'label_type': label_type,
+            'barcode_data': barcode_data,
+            'barcode': ((self.width - box_width) // 2, self.mm(5), box_width, box_height),
+            'module': max(1, box_width // modules),
+            'lines': lines,
+            'border': border_width if show_border else 0,
+        }
+
+
+def _zpl_field(text: str) -> str:
+    """Field data with ZPL control characters hex-escaped (used with ^FH)."""
+    return text.replace('_', '_5F').replace('^', '_5E').replace('~', '_7E')
+
+
+class ZPLLabelGenerator(RawLabelGenerator):
+
+    def render(self, data: Dict[str, Any], label_type: str = 'qr', copies: int = 1, **settings) -> str:
+        layout = self.layout(data, label_type, **settings)
+        x, y, _, height = layout['barcode']
+        module = layout['module']
+        value = _zpl_field(layout['barcode_data'])
+
+        commands = ['^XA', '^CI28', f'^PW{self.width}', f'^LL{self.height}', '^LH0,0']
+        if layout['border']:
+            commands.append(f"^FO0,0^GB{self.width},{self.height},{layout['border']}^FS")
+
+        symbology = layout['label_type']
+        if symbology == 'qr':
+            # Error correction L like the PDF labels; the QR command adds its own offset above the symbol
+            commands.append(f'^FO{x},{y}^BQN,2,{min(module, 10)}^FH^FDLA,{value}^FS')
+        elif symbology == 'code39':
+            commands.append(f'^FO{x},{y}^BY{module}^B3N,N,{height},N,N^FH^FD{value}^FS')
+        elif symbology == 'ean13':
+            commands.append(f'^FO{x},{y}^BY{module}^BEN,{height},N,N^FD{value}^FS')
+        else:
+            commands.append(f'^FO{x},{y}^BY{module}^BCN,{height},N,N,N^FH^FD{value}^FS')
+
+        for text_x, baseline, size, text in layout['lines']:
+            commands.append(f'^FT{text_x},{baseline}^A0N,{size},{size}^FH^FD{_zpl_field(text)}^FS')
+
+        if copies > 1:
+            commands.append(f'^PQ{copies}')
+        commands.append('^XZ')
+        return '\n'.join(commands) + '\n'
+
+
+def _epl_string(text: str) -> str:
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class EPLLabelGenerator(RawLabelGenerator):
+
+    def _font(self, size: int) -> Tuple[int, int]:
+        """Largest resident font not taller than the requested size, scaled for the printer dpi."""
+        scale = self.dpi / DEFAULT_DPI
+        fonts = [(font, int(h * scale)) for font, h in EPL_FONT_HEIGHTS]
+        return max((f for f in fonts if f[1] <= size), default=fonts[0], key=lambda f: f[1])
+
+    def render(self, data: Dict[str, Any], label_type: str = 'qr', copies: int = 1, **settings) -> str:
+        layout = self.layout(data, label_type, **settings)
+        x, y, _, height = layout['barcode']
+        module = layout['module']
+        value = _epl_string(layout['barcode_data'])
+
+        commands = ['', 'N', f'q{self.width}', f'Q{self.height},24']
+        if layout['border']:
+            commands.append(f"X0,0,{layout['border']},{self.width - 1},{self.height - 1}")
+
+        symbology = layout['label_type']
+        if symbology == 'qr':
+            commands.append(f'b{x},{y},Q,m2,s{min(module, 10)},eL,{value}')
+        else:
+            code = {'code39': '3', 'ean13': 'E30'}.get(symbology, '1')
+            commands.append(f'B{x},{y},0,{code},{module},{module * 2},{height},N,{value}')
+
+        for text_x, baseline, size, text in layout['lines']:
+            font, font_height = self._font(size)
+            commands.append(f'A{text_x},{max(baseline - font_height, 0)},0,{font},1,1,N,{_epl_string(text)}')
+
+        commands.append(f'P{max(copies, 1)}')
+        return '\n'.join(commands) + '\n'
+
+
+RAW_GENERATORS = {'zpl': ZPLLabelGenerator, 'epl': EPLLabelGenerator}
+RAW_ENCODINGS = {'zpl': 'utf-8', 'epl': 'latin-1'}
+
+
+def generate_label_raw(
+    data: Dict[str, Any],
+    output_format: str = 'zpl',
+    label_type: str = 'qr',
+    width_mm: float = 50,
+    height_mm: float = 25,
+    copies: int = 1,
+    dpi: int = DEFAULT_DPI,
+    **kwargs
+) -> bytes:
+    generator = RAW_GENERATORS[output_format](width_mm=width_mm, height_mm=height_mm, dpi=dpi)
+    return generator.render(data, label_type, copies=copies, **kwargs).encode(RAW_ENCODINGS[output_format], errors='replace')
+
+
+def generate_label_zpl(data: Dict[str, Any], label_type: str = 'qr', **kwargs) -> bytes:
+    return generate_label_raw(data, 'zpl', label_type, **kwargs)
+
+
+def generate_label_epl(data: Dict[str, Any], label_type: str = 'qr', **kwargs) -> bytes:
+    return generate_label_raw(data, 'epl', label_type, **kwargs)
+
+
+def stream_batch_labels_raw(
+    items: List[Dict[str, Any]],
+    output_format: str = 'zpl',
+    label_type: str = 'qr',
+    width_mm: float = 50,
+    height_mm: float = 25,
+    copies_per_label: int = 1,
+    dpi: int = DEFAULT_DPI,
+    **kwargs
+) -> Iterator[bytes]:
+    """One printer job per item, copies printed by the printer itself (^PQ / P)."""
+    generator = RAW_GENERATORS[output_format](width_mm=width_mm, height_mm=height_mm, dpi=dpi)
+    encoding = RAW_ENCODINGS[output_format]
+    for item in items:
+        yield generator.render(item, label_type, copies=copies_per_label, **kwargs).encode(encoding, errors='replace')
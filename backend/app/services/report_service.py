@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case
 from typing import List, Dict, Any
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from app.models.integrated_request import (
     IntegratedRequest, RequestTool, RequestVehicle, RequestEPP, 
     RequestToolStatus, RequestVehicleStatus, RequestEPPStatus
@@ -10,7 +10,7 @@ from app.models.tool import Tool
 from app.models.vehicle import Vehicle, VehicleDocument
 from app.models.epp import EPP
 from app.models.user import User
-from app.models.movement import Movement, MovementType
+from app.models.movement import Movement, MovementDailyRollup, MovementType
 from app.models.product import Product
 from app.models.inventory_refs import Category
 
@@ -82,19 +82,24 @@ class ReportService:
             "top_epps": [{"name": e[0], "count": e[1]} for e in top_epps]
         }
 
+    @staticmethod
+    def _rollup_cutoff(days: int) -> date:
+        # Rollups are per UTC day; the first day of the window is counted whole
+        return (datetime.now(timezone.utc) - timedelta(days=days)).date()
+
     @staticmethod
     def get_inventory_summary(db: Session) -> Dict[str, Any]:
-        products = db.query(Product).all()
-        
+        products = db.query(Product.id, Product.cost).all()
+
+        # Balance after the latest movement of each product, in one query
+        latest = db.query(func.max(Movement.id)).group_by(Movement.product_id)
+        balances = dict(db.query(Movement.product_id, Movement.new_balance).filter(Movement.id.in_(latest)).all())
+
         total_items = 0
         total_value = 0.0
         
         for product in products:
-            last_movement = db.query(Movement).filter(
-                Movement.product_id == product.id
-            ).order_by(Movement.created_at.desc()).first()
-            
-            stock = last_movement.new_balance if last_movement else 0
+            stock = balances.get(product.id, 0)
             total_items += stock
             total_value += float(product.cost or 0) * stock
         
@@ -106,19 +111,19 @@ class ReportService:
 
     @staticmethod
     def get_movements_daily(db: Session, days: int = 30) -> List[Dict[str, Any]]:
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        cutoff_date = ReportService._rollup_cutoff(days)
         
         results = db.query(
-            func.date(Movement.created_at).label('date'),
-            Movement.type,
-            func.abs(func.sum(Movement.quantity)).label('total_quantity')
+            MovementDailyRollup.day.label('date'),
+            MovementDailyRollup.type,
+            func.abs(func.sum(MovementDailyRollup.quantity)).label('total_quantity')
         ).filter(
-            Movement.created_at >= cutoff_date
+            MovementDailyRollup.day >= cutoff_date
         ).group_by(
-            func.date(Movement.created_at),
-            Movement.type
+            MovementDailyRollup.day,
+            MovementDailyRollup.type
         ).order_by(
-            func.date(Movement.created_at).desc()
+            MovementDailyRollup.day.desc()
         ).all()
         
         return [
@@ -132,18 +137,16 @@ class ReportService:
 
     @staticmethod
     def get_inventory_turnover(db: Session, period_days: int = 30) -> List[Dict[str, Any]]:
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=period_days)
+        cutoff_date = ReportService._rollup_cutoff(period_days)
         
         results = db.query(
             Category.name.label('category'),
-            func.abs(func.sum(Movement.quantity)).label('total_out')
-        ).join(
-            Product, Product.category_id == Category.id
+            func.abs(func.sum(MovementDailyRollup.quantity)).label('total_out')
         ).join(
-            Movement, Movement.product_id == Product.id
+            MovementDailyRollup, MovementDailyRollup.category_id == Category.id
         ).filter(
-            Movement.created_at >= cutoff_date,
-            Movement.type == MovementType.OUT
+            MovementDailyRollup.day >= cutoff_date,
+            MovementDailyRollup.type == MovementType.OUT
         ).group_by(
             Category.id,
             Category.name
@@ -160,22 +163,22 @@ class ReportService:
     @staticmethod
     def get_movements_summary(db: Session, period: str = "month") -> List[Dict[str, Any]]:
         if period == "month":
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=30)
+            cutoff_date = ReportService._rollup_cutoff(30)
         elif period == "week":
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
+            cutoff_date = ReportService._rollup_cutoff(7)
         elif period == "year":
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=365)
+            cutoff_date = ReportService._rollup_cutoff(365)
         else:
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=30)
+            cutoff_date = ReportService._rollup_cutoff(30)
         
         results = db.query(
-            Movement.type,
-            func.count(Movement.id).label('count'),
-            func.abs(func.sum(Movement.quantity)).label('total_quantity')
+            MovementDailyRollup.type,
+            func.sum(MovementDailyRollup.movement_count).label('count'),
+            func.abs(func.sum(MovementDailyRollup.quantity)).label('total_quantity')
         ).filter(
-            Movement.created_at >= cutoff_date
+            MovementDailyRollup.day >= cutoff_date
         ).group_by(
-            Movement.type
+            MovementDailyRollup.type
         ).all()
         
         return [
@@ -0,0 +1,180 @@
+from datetime import date, datetime, time, timezone
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.movement import Movement, MovementDailyRollup, MovementRequest, MovementType
+from app.models.product import Product
+
+# (day, type, product_id, warehouse_id, signed quantity) of one movement row or ledger entry
+MovementDelta = Tuple[date, MovementType, int, int, int]
+# (day, type, product_id, category_id, warehouse_id)
+RollupKey = Tuple[date, MovementType, int, int, int]
+
+REBUILD_CHUNK_SIZE = 1000
+
+
+def _today() -> date:
+    # Movement timestamps are stored in UTC
+    return datetime.now(timezone.utc).date()
+
+
+def _day_of(value: Optional[datetime]) -> date:
+    if value is None:
+        return _today()
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _as_date(value) -> date:
+    # sqlite returns DATE() as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _key_filter(key: RollupKey):
+    day, type, product_id, category_id, warehouse_id = key
+    return (
+        MovementDailyRollup.day == day,
+        MovementDailyRollup.type == type,
+        MovementDailyRollup.product_id == product_id,
+        MovementDailyRollup.category_id == category_id,
+        MovementDailyRollup.warehouse_id == warehouse_id,
+    )
+
+
+def _increment(conn, key: RollupKey, count: int, quantity: int) -> bool:
+    result = conn.execute(
+        update(MovementDailyRollup)
+        .where(*_key_filter(key))
+        .values(
+            movement_count=MovementDailyRollup.movement_count + count,
+            quantity=MovementDailyRollup.quantity + quantity
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
+
+
+def _insert(conn, key: RollupKey, count: int, quantity: int) -> None:
+    day, type, product_id, category_id, warehouse_id = key
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(MovementDailyRollup).values(
+                day=day, type=type, product_id=product_id, category_id=category_id,
+                warehouse_id=warehouse_id, movement_count=count, quantity=quantity
+            ))
+    except IntegrityError:
+        # Created concurrently; add to that row instead
+        _increment(conn, key, count, quantity)
+
+
+def record(conn, deltas: Iterable[MovementDelta]) -> None:
+    """
+    Add movements to their day's rollups on the connection (or session) that wrote them,
+    so the rollups commit or roll back with them: one atomic UPDATE per touched rollup
+    row, and an INSERT for rows that do not exist yet.
+    """
+    totals: Dict[Tuple[date, MovementType, int, int], List[int]] = {}
+    for day, type, product_id, warehouse_id, quantity in deltas:
+        total = totals.setdefault((day, MovementType(type), product_id, warehouse_id), [0, 0])
+        total[0] += 1
+        total[1] += quantity
+    if not totals:
+        return
+
+    categories = dict(conn.execute(
+        select(Product.id, Product.category_id).where(Product.id.in_({key[2] for key in totals}))
+    ).all())
+    for (day, type, product_id, warehouse_id), (count, quantity) in totals.items():
+        key = (day, type, product_id, categories[product_id], warehouse_id)
+        if not _increment(conn, key, count, quantity):
+            _insert(conn, key, count, quantity)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_movements(session: Session, flush_context) -> None:
+    """
+    Every movement row and ledger entry inserted through the ORM, wherever it is written,
+    is added to the rollups in the same transaction.
+    """
+    movements = [obj for obj in session.new if isinstance(obj, Movement)]
+    entries = [obj for obj in session.new if isinstance(obj, LedgerEntry)]
+    if not movements and not entries:
+        return
+
+    conn = session.connection()
+    deltas = [(_day_of(m.created_at), m.type, m.product_id, m.warehouse_id, m.quantity) for m in movements]
+    if entries:
+        # Ledger entries take the type of their movement request and, like rebuild(), the UTC day of applied_at
+        request_types = dict(conn.execute(
+            select(MovementRequest.id, MovementRequest.type).where(
+                MovementRequest.id.in_({entry.movement_request_id for entry in entries})
+            )
+        ).all())
+        deltas.extend(
+            (_day_of(e.applied_at), request_types[e.movement_request_id], e.product_id, e.warehouse_id,
+             e.quantity if e.entry_type == LedgerEntryType.INCREMENT else -e.quantity)
+            for e in entries if e.movement_request_id in request_types
+        )
+    record(conn, deltas)
+
+
+def rebuild(db: Session, since: Optional[date] = None) -> int:
+    """
+    Recompute the rollups from the movements and ledger entries (all of them, or from
+    `since` on) and return the number of rollup rows written. Run it while no stock is
+    moving: rows written during the rebuild may be counted twice or missed. The caller
+    commits.
+    """
+    movement_day = func.date(Movement.created_at)
+    movements = db.query(
+        movement_day, Movement.type, Movement.product_id, Product.category_id, Movement.warehouse_id,
+        func.count(Movement.id), func.sum(Movement.quantity)
+    ).join(Product, Product.id == Movement.product_id)
+
+    ledger_day = func.date(LedgerEntry.applied_at)
+    signed = case(
+        (LedgerEntry.entry_type == LedgerEntryType.INCREMENT, LedgerEntry.quantity),
+        else_=-LedgerEntry.quantity
+    )
+    ledger = db.query(
+        ledger_day, MovementRequest.type, LedgerEntry.product_id, Product.category_id, LedgerEntry.warehouse_id,
+        func.count(LedgerEntry.id), func.sum(signed)
+    ).join(
+        MovementRequest, MovementRequest.id == LedgerEntry.movement_request_id
+    ).join(Product, Product.id == LedgerEntry.product_id)
+
+    if since:
+        start = datetime.combine(since, time.min)
+        movements = movements.filter(Movement.created_at >= start)
+        ledger = ledger.filter(LedgerEntry.applied_at >= start)
+    movements = movements.group_by(
+        movement_day, Movement.type, Movement.product_id, Product.category_id, Movement.warehouse_id
+    )
+    ledger = ledger.group_by(
+        ledger_day, MovementRequest.type, LedgerEntry.product_id, Product.category_id, LedgerEntry.warehouse_id
+    )
+
+    totals: Dict[RollupKey, List[int]] = {}
+    for day, type, product_id, category_id, warehouse_id, count, quantity in chain(movements, ledger):
+        total = totals.setdefault((_as_date(day), MovementType(type), product_id, category_id, warehouse_id), [0, 0])
+        total[0] += count
+        total[1] += int(quantity or 0)
+
+    stale = db.query(MovementDailyRollup)
+    if since:
+        stale = stale.filter(MovementDailyRollup.day >= since)
+    stale.delete(synchronize_session=False)
+
+    rows = [{
+        "day": day, "type": type, "product_id": product_id, "category_id": category_id,
+        "warehouse_id": warehouse_id, "movement_count": count, "quantity": quantity
+    } for (day, type, product_id, category_id, warehouse_id), (count, quantity) in totals.items()]
+    for start in range(0, len(rows), REBUILD_CHUNK_SIZE):
+        db.execute(insert(MovementDailyRollup), rows[start:start + REBUILD_CHUNK_SIZE])
+    return len(rows)
@@ -0,0 +1,48 @@
+"""
+Jobs run by the in-process scheduler. Imported by the scheduler when it starts; each job
+gets its own session, returns the number of rows it touched and is committed by the
+scheduler when it returns.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.session import Session as UserSession
+from app.services import expiration_service, label_stream, location_service
+from app.services.asset_service import AssetService
+from app.services.scheduler_service import scheduled_job
+from app.services.tracking_service import TrackingService
+
+
+@scheduled_job("tracking_daily_checks", settings.SCHEDULE_TRACKING_CHECKS)
+def run_tracking_checks(db: Session) -> int:
+    return TrackingService.run_daily_checks(db)
+
+
+@scheduled_job("asset_daily_checks", settings.SCHEDULE_ASSET_CHECKS)
+def run_asset_checks(db: Session) -> int:
+    return AssetService.run_daily_checks(db)
+
+
+@scheduled_job("batch_expiration_checks", settings.SCHEDULE_BATCH_CHECKS)
+def run_batch_checks(db: Session) -> int:
+    return expiration_service.check_expiring_batches(db, commit=False)
+
+
+@scheduled_job("session_cleanup", settings.SCHEDULE_SESSION_CLEANUP)
+def cleanup_expired_sessions(db: Session) -> int:
+    """Delete expired sessions. Does not commit."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return db.query(UserSession).filter(UserSession.expires_at < now).delete(synchronize_session=False)
+
+
+@scheduled_job("occupancy_reconcile", settings.SCHEDULE_OCCUPANCY_RECONCILE)
+def reconcile_occupancy(db: Session) -> int:
+    return len(location_service.reconcile_location_occupancy(db))
+
+
+@scheduled_job("label_job_cleanup", settings.SCHEDULE_LABEL_JOB_CLEANUP)
+def purge_label_jobs(db: Session) -> int:
+    """Delete batch label job files older than the retention."""
+    return label_stream.purge_label_jobs(settings.LABEL_JOBS_DIR, settings.LABEL_JOB_RETENTION_HOURS * 3600)
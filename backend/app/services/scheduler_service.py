@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.connection import SessionLocal
+from app.models.system import JobRun, JobRunStatus, ScheduledJob
+from app.services import lease_service
+
+logger = logging.getLogger(__name__)
+
+# minute, hour, day of month, month, day of week (0 = Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+# Give up looking for a matching minute after this many days (e.g. "0 0 31 2 *")
+CRON_MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in field.split(","):
+        expr, _, step = part.partition("/")
+        step_value = int(step) if step else 1
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            start, end = (int(v) for v in expr.split("-", 1))
+        else:
+            start = int(expr)
+            end = high if step else start
+        if high == 6 and end == 7:
+            # Day of week 7 is Sunday as well
+            values.add(0)
+            end = 6
+            if start == 7:
+                continue
+        if start < low or end > high or start > end or step_value < 1:
+            raise ValueError(f"Invalid cron field '{field}'")
+        values.update(range(start, end + 1, step_value))
+    return values
+
+
+class CronSchedule:
+    """
+    Five-field cron expression ("minute hour day month weekday") in server local time.
+    Fields accept *, numbers, ranges (1-5), lists (0,30) and steps (*/15, 8-18/2). As in
+    cron, when both day of month and day of week are restricted either one matching is
+    enough.
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(part, low, high) for part, (low, high) in zip(parts, CRON_FIELDS)
+        )
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=CRON_MAX_SEARCH_DAYS)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+JobFunc = Callable[[Session], Optional[int]]
+_jobs: Dict[str, Tuple[CronSchedule, JobFunc]] = {}
+
+
+def scheduled_job(name: str, schedule: str):
+    """
+    Register a job run on the cron `schedule`. It receives a session of its own and
+    returns the number of rows it touched; its writes are committed when it returns,
+    and raising rolls them back and records the run as failed.
+    """
+    cron = CronSchedule(schedule)
+
+    def register(func: JobFunc) -> JobFunc:
+        _jobs[name] = (cron, func)
+        return func
+    return register
+
+
+class JobScheduler:
+    """
+    Background task started in the app lifespan of every worker. Each poll it claims the
+    jobs that are due: the claim advances next_run_at with one conditional UPDATE, so a
+    run is executed by exactly one worker however many are polling. Runs missed while no
+    worker was up are caught up once, not once per missed slot. Every run is recorded in
+    job_runs and summarised on its scheduled_jobs row.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        poll_interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval or settings.SCHEDULER_POLL_INTERVAL
+        self.holder = lease_service.make_holder_id()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        # Jobs live next to the services they call and register on import
+        import app.services.scheduled_jobs  # noqa: F401
+
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Jobs are blocking database work; keep them off the event loop
+                await asyncio.to_thread(self.run_due_jobs)
+            except Exception:
+                logger.exception("Scheduler poll failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def run_due_jobs(self, now: Optional[datetime] = None) -> List[str]:
+        """One poll; returns the names of the jobs this worker ran."""
+        now = now or datetime.now()
+        db = self.session_factory()
+        try:
+            self._sync_jobs(db, now)
+            due = db.query(ScheduledJob.name).filter(
+                ScheduledJob.name.in_(list(_jobs)),
+                ScheduledJob.next_run_at <= now
+            ).order_by(ScheduledJob.next_run_at).all()
+            db.rollback()
+
+            ran = []
+            for (name,) in due:
+                if self._claim(db, name, now):
+                    self._execute(db, name)
+                    ran.append(name)
+            return ran
+        finally:
+            db.close()
+
+    def _sync_jobs(self, db: Session, now: datetime) -> None:
+        """Create the rows of new jobs and reschedule jobs whose expression changed."""
+        stored = dict(db.query(ScheduledJob.name, ScheduledJob.schedule).filter(
+            ScheduledJob.name.in_(list(_jobs))
+        ).all())
+        for name, (cron, _) in _jobs.items():
+            if name not in stored:
+                db.add(ScheduledJob(name=name, schedule=cron.expression, next_run_at=cron.next_after(now)))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another worker registered it first
+                    db.rollback()
+            elif stored[name] != cron.expression:
+                db.execute(
+                    update(ScheduledJob)
+                    .where(ScheduledJob.name == name, ScheduledJob.schedule != cron.expression)
+                    .values(schedule=cron.expression, next_run_at=cron.next_after(now))
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+
+    def _claim(self, db: Session, name: str, now: datetime) -> bool:
+        cron, _ = _jobs[name]
+        result = db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.name == name, ScheduledJob.next_run_at <= now)
+            .values(
+                next_run_at=cron.next_after(now),
+                last_started_at=now,
+                last_status=JobRunStatus.RUNNING
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _execute(self, db: Session, name: str) -> JobRun:
+        _, func = _jobs[name]
+        run = JobRun(job_name=name, holder=self.holder, status=JobRunStatus.RUNNING, started_at=datetime.now())
+        db.add(run)
+        db.commit()
+
+        started = time.perf_counter()
+        job_db = self.session_factory()
+        try:
+            rows = func(job_db)
+            job_db.commit()
+            run.status = JobRunStatus.SUCCESS
+            run.rows_touched = rows or 0
+        except Exception as e:
+            job_db.rollback()
+            logger.exception("Scheduled job %s failed", name)
+            run.status = JobRunStatus.FAILED
+            run.error = f"{type(e).__name__}: {e}"[:2000]
+        finally:
+            job_db.close()
+
+        run.finished_at = datetime.now()
+        run.duration_ms = int((time.perf_counter() - started) * 1000)
+        summary = {
+            ScheduledJob.last_status: run.status,
+            ScheduledJob.last_duration_ms: run.duration_ms,
+            ScheduledJob.last_rows_touched: run.rows_touched,
+            ScheduledJob.last_error: run.error,
+        }
+        if run.status == JobRunStatus.SUCCESS:
+            summary[ScheduledJob.last_success_at] = run.finished_at
+        db.query(ScheduledJob).filter(ScheduledJob.name == name).update(summary, synchronize_session=False)
+        db.query(JobRun).filter(
+            JobRun.job_name == name,
+            JobRun.started_at < run.started_at - timedelta(days=settings.SCHEDULER_RUN_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return run
+
+
+job_scheduler = JobScheduler()
@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.system import DocumentSequence
+
+# Returns the highest number already in use when a sequence is first created
+SequenceSeed = Callable[[Session], int]
+
+
+def _reserve(db: Session, prefix: str, year: int, count: int, seed: Optional[SequenceSeed]) -> int:
+    """
+    Advance the (prefix, year) sequence by `count` and return its new last value. Runs in
+    a short transaction of its own, so the row lock is held for one UPDATE rather than for
+    the caller's whole transaction; numbers of a rolled-back caller are skipped.
+    """
+    session = Session(bind=db.get_bind())
+    key = (DocumentSequence.prefix == prefix, DocumentSequence.year == year)
+    try:
+        for _ in range(2):
+            result = session.execute(
+                update(DocumentSequence)
+                .where(*key)
+                .values(last_value=DocumentSequence.last_value + count)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                # Our UPDATE holds the row, so this reads the value it wrote
+                last_value = session.query(DocumentSequence.last_value).filter(*key).scalar()
+                session.commit()
+                return last_value
+
+            # First use of the sequence: the primary key decides the race
+            last_value = (seed(session) if seed else 0) + count
+            session.add(DocumentSequence(prefix=prefix, year=year, last_value=last_value))
+            try:
+                session.commit()
+                return last_value
+            except IntegrityError:
+                session.rollback()
+        raise RuntimeError(f"Could not reserve numbers of sequence {prefix}/{year}")
+    finally:
+        session.close()
+
+
+class SequenceAllocator:
+    """
+    Hands out increasing numbers per (prefix, year). Each worker reserves a block of
+    numbers at a time (SEQUENCE_BLOCK_SIZES, 1 by default) and serves the block from
+    memory; with blocks above 1, numbers of different workers interleave and the rest of
+    a block is skipped when the worker stops.
+    """
+
+    def __init__(self, block_sizes: Optional[Dict[str, int]] = None):
+        self.block_sizes = settings.SEQUENCE_BLOCK_SIZES if block_sizes is None else block_sizes
+        self._blocks: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def next_value(self, db: Session, prefix: str, year: int = 0, seed: Optional[SequenceSeed] = None) -> int:
+        size = max(1, self.block_sizes.get(prefix, 1))
+        key = (prefix, year)
+        with self._lock:
+            next_value, last_value = self._blocks.get(key, (1, 0))
+            if next_value > last_value:
+                last_value = _reserve(db, prefix, year, size, seed)
+                next_value = last_value - size + 1
+            self._blocks[key] = (next_value + 1, last_value)
+            return next_value
+
+    def reset(self) -> None:
+        """Forget reserved blocks (their unused numbers are skipped)."""
+        with self._lock:
+            self._blocks.clear()
+
+
+sequence_allocator = SequenceAllocator()
+
+
+def max_suffix(db: Session, column, head: str) -> int:
+    """Highest number after `head` among the values of `column` (0 if none)."""
+    values = db.query(column).filter(column.like(f"{head}%")).all()
+    suffixes = [value[len(head):] for (value,) in values]
+    return max((int(s) for s in suffixes if s.isdigit()), default=0)
+
+
+def next_number(db: Session, prefix: str, width: int, yearly: bool = True, existing=None) -> str:
+    """
+    Next document number: "{prefix}-{year}-{n}" for yearly sequences, "{prefix}{n}"
+    otherwise, with n zero-padded to `width`. `existing` is the column holding these
+    numbers; the first time a sequence is used it continues from the highest one there.
+    """
+    year = datetime.now().year if yearly else 0
+    head = f"{prefix}-{year}-" if yearly else prefix
+    seed = (lambda session: max_suffix(session, existing, head)) if existing is not None else None
+    value = sequence_allocator.next_value(db, prefix, year, seed)
+    return f"{head}{value:0{width}d}"
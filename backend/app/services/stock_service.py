@@ -1,62 +1,140 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 from fastapi import HTTPException
 from app.models.ledger import LedgerEntry, LedgerEntryType
 from app.models.movement import MovementRequest, MovementStatus, MovementType, MovementRequestItem
 from app.models.product_location_models import ProductLocationAssignment, AssignmentType
 from app.models.product import Product, ProductBatch
 from app.core.cache import stock_cache
+from app.crud import warehouse_layout as crud_layout
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
-from app.services.websocket_service import manager
-from app.services.purchase_service import PurchaseService
+from app.services import outbox_service
+from app.services.outbox_service import outbox_dispatcher
+from app.services.putaway_optimizer import putaway_optimizer
+from app.services import location_service
 
 from app.models.location_models import StorageLocation
+from app.models.system import SystemConfig
+
+PUTAWAY_STRATEGIES_KEY = "PUTAWAY_STRATEGIES"
+PUTAWAY_STRATEGIES = ("fixed_bin", "consolidate", "nearest_empty", "any_available")
+DEFAULT_PUTAWAY_STRATEGIES = PUTAWAY_STRATEGIES
+
+ALLOCATION_POLICY_KEY = "ALLOCATION_POLICY"
+ALLOCATION_POLICIES = ("fefo", "fifo", "fewest_picks", "smallest_first")
+DEFAULT_ALLOCATION_POLICY = "fewest_picks"
+
+LOW_STOCK_CHECK_EVENT = "stock.low_check"
 
 class StockService:
     
     @staticmethod
-    async def _resolve_location(db: Session, product_id: int, warehouse_id: int, quantity: int, type: str) -> int:
+    def _get_putaway_strategies(db: Session) -> List[str]:
+        """
+        Ordered putaway strategy list, configurable through SystemConfig
+        (key PUTAWAY_STRATEGIES, comma separated).
+        """
+        config = db.query(SystemConfig).filter(SystemConfig.key == PUTAWAY_STRATEGIES_KEY).first()
+        if not config or not config.value:
+            return list(DEFAULT_PUTAWAY_STRATEGIES)
+
+        strategies = [s.strip().lower() for s in config.value.split(",") if s.strip()]
+        unknown = [s for s in strategies if s not in PUTAWAY_STRATEGIES]
+        if unknown:
+            raise ValueError(f"Unknown putaway strategies in {PUTAWAY_STRATEGIES_KEY}: {', '.join(unknown)}")
+        return strategies or list(DEFAULT_PUTAWAY_STRATEGIES)
+
+    @staticmethod
+    def _get_location_capacity_snapshot(db: Session, product_id: int, warehouse_id: int) -> List[Dict[str, Any]]:
+        """
+        Free capacity of every unrestricted location in the warehouse, computed
+        with a single grouped query. Each row also tells whether the product is
+        already stored there and whether that location is its fixed (primary) bin.
+        """
+        # Make pending assignment changes of earlier lines of the same request visible
+        db.flush()
+
+        is_product = ProductLocationAssignment.product_id == product_id
+        rows = db.query(
+            StorageLocation.id,
+            StorageLocation.code,
+            StorageLocation.capacity,
+            func.coalesce(func.sum(ProductLocationAssignment.quantity), 0).label("used"),
+            func.coalesce(func.sum(case((is_product, ProductLocationAssignment.quantity), else_=0)), 0).label("product_qty"),
+            func.coalesce(func.max(case((and_(is_product, ProductLocationAssignment.is_primary == True), 1), else_=0)), 0).label("is_fixed_bin"),
+        ).outerjoin(
+            ProductLocationAssignment, ProductLocationAssignment.location_id == StorageLocation.id
+        ).filter(
+            StorageLocation.warehouse_id == warehouse_id,
+            StorageLocation.is_restricted == False
+        ).group_by(
+            StorageLocation.id, StorageLocation.code, StorageLocation.capacity
+        ).order_by(StorageLocation.code).all()
+
+        return [
+            {
+                "location_id": row.id,
+                "code": row.code,
+                "capacity": row.capacity,
+                "used": int(row.used or 0),
+                "product_qty": int(row.product_qty or 0),
+                "is_fixed_bin": bool(row.is_fixed_bin),
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _pick_putaway_location(snapshot: List[Dict[str, Any]], quantity: int, strategies: List[str]) -> Optional[int]:
+        """
+        Apply the strategies in order over a capacity snapshot and return the first fit.
+        """
+        def fits(row: Dict[str, Any]) -> bool:
+            return row["capacity"] is None or row["used"] + quantity <= row["capacity"]
+
+        for strategy in strategies:
+            if strategy == "fixed_bin":
+                candidates = [r for r in snapshot if r["is_fixed_bin"]]
+            elif strategy == "consolidate":
+                candidates = [r for r in snapshot if r["product_qty"] > 0]
+            elif strategy == "nearest_empty":
+                # Snapshot is ordered by code, so the first empty bin is the next one in the addressing sequence
+                candidates = [r for r in snapshot if r["used"] == 0]
+            elif strategy == "any_available":
+                candidates = snapshot
+            else:
+                raise ValueError(f"Unknown putaway strategy: {strategy}")
+
+            for row in candidates:
+                if fits(row):
+                    return row["location_id"]
+        return None
+
+    @staticmethod
+    async def _resolve_location(
+        db: Session,
+        product_id: int,
+        warehouse_id: int,
+        quantity: int,
+        type: str,
+        strategies: Optional[List[str]] = None
+    ) -> int:
         """
         Auto-assign location strategy.
-        IN: Consolidate -> Empty
+        IN: configurable strategy list (fixed_bin, consolidate, nearest_empty, any_available)
+            evaluated over a single capacity snapshot query.
         OUT: First with enough stock
         """
         if type == "IN":
-            # 1. Consolidate: Find locations with same product and available capacity
-            existing = db.query(ProductLocationAssignment).join(StorageLocation).filter(
-                ProductLocationAssignment.product_id == product_id,
-                ProductLocationAssignment.warehouse_id == warehouse_id,
-                StorageLocation.is_restricted == False
-            ).all()
-            
-            for assignment in existing:
-                loc = assignment.location
-                current_usage = db.query(func.sum(ProductLocationAssignment.quantity)).filter(
-                    ProductLocationAssignment.location_id == loc.id
-                ).scalar() or 0
-                
-                if loc.capacity is None or (current_usage + quantity <= loc.capacity):
-                    return loc.id
-            
-            # 2. Empty: Find first empty location in warehouse
-            # This is a bit complex query-wise, simplified: Find locations with NO assignments
-            # Or just find any location with capacity
-            # For simplicity/performance: Find a location in this warehouse that is not restricted
-            candidates = db.query(StorageLocation).filter(
-                StorageLocation.warehouse_id == warehouse_id,
-                StorageLocation.is_restricted == False
-            ).limit(50).all() # Limit to avoid scanning all
-            
-            for loc in candidates:
-                current_usage = db.query(func.sum(ProductLocationAssignment.quantity)).filter(
-                    ProductLocationAssignment.location_id == loc.id
-                ).scalar() or 0
-                 
-                if loc.capacity is None or (current_usage + quantity <= loc.capacity):
-                    return loc.id
-            
+            if strategies is None:
+                strategies = StockService._get_putaway_strategies(db)
+
+            snapshot = StockService._get_location_capacity_snapshot(db, product_id, warehouse_id)
+            location_id = StockService._pick_putaway_location(snapshot, quantity, strategies)
+            if location_id:
+                return location_id
+
             raise ValueError(f"No suitable location found in warehouse {warehouse_id} for product {product_id}")
 
         elif type == "OUT":
@@ -75,9 +153,144 @@ class StockService:
         return None
 
     @staticmethod
-    async def apply_movement(db: Session, movement_request_id: int, user_id: int) -> Dict[str, Any]:
+    def _get_allocation_policy(db: Session) -> str:
+        """
+        Default split policy for OUT/TRANSFER lines (SystemConfig key ALLOCATION_POLICY).
+        """
+        config = db.query(SystemConfig).filter(SystemConfig.key == ALLOCATION_POLICY_KEY).first()
+        if not config or not config.value:
+            return DEFAULT_ALLOCATION_POLICY
+        return config.value.strip().lower()
+
+    @staticmethod
+    def allocate_stock(
+        db: Session,
+        product_id: int,
+        warehouse_id: int,
+        quantity: int,
+        policy: str = DEFAULT_ALLOCATION_POLICY,
+        batch_id: Optional[int] = None,
+        reserved: Optional[Dict[Tuple[int, int, Optional[int]], int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build a pick plan that splits `quantity` across one or more bins.
+        The candidate assignments are read in a single query already sorted by the policy:
+        - fefo: earliest ProductBatch.expiration_date first (no expiration last)
+        - fifo: oldest assigned_at first
+        - fewest_picks: largest quantities first
+        - smallest_first: smallest quantities first, emptying small bins
+        Plans that allocate several lines without applying them pass one `reserved` map of
+        (product_id, location_id, batch_id) -> quantity: stock promised to earlier lines is
+        left out, and the picks of a successful allocation are added to it.
+        """
+        if policy not in ALLOCATION_POLICIES:
+            raise ValueError(f"Unknown allocation policy: {policy}")
+
+        # Make pending assignment changes of earlier lines of the same request visible
+        db.flush()
+
+        query = db.query(
+            ProductLocationAssignment.location_id,
+            ProductLocationAssignment.batch_id,
+            ProductLocationAssignment.quantity
+        ).outerjoin(
+            ProductBatch, ProductBatch.id == ProductLocationAssignment.batch_id
+        ).filter(
+            ProductLocationAssignment.product_id == product_id,
+            ProductLocationAssignment.warehouse_id == warehouse_id,
+            ProductLocationAssignment.quantity > 0
+        )
+        if batch_id is not None:
+            query = query.filter(ProductLocationAssignment.batch_id == batch_id)
+
+        if policy == "fefo":
+            query = query.order_by(
+                ProductBatch.expiration_date.is_(None),
+                ProductBatch.expiration_date.asc(),
+                ProductLocationAssignment.assigned_at.asc(),
+                ProductLocationAssignment.id.asc()
+            )
+        elif policy == "fifo":
+            query = query.order_by(ProductLocationAssignment.assigned_at.asc(), ProductLocationAssignment.id.asc())
+        elif policy == "fewest_picks":
+            query = query.order_by(ProductLocationAssignment.quantity.desc(), ProductLocationAssignment.id.asc())
+        else:
+            query = query.order_by(ProductLocationAssignment.quantity.asc(), ProductLocationAssignment.id.asc())
+
+        plan = []
+        remaining = quantity
+        for row in query.all():
+            free = row.quantity
+            if reserved:
+                free -= reserved.get((product_id, row.location_id, row.batch_id), 0)
+            if free <= 0:
+                continue
+            take = min(free, remaining)
+            plan.append({"location_id": row.location_id, "batch_id": row.batch_id, "quantity": take})
+            remaining -= take
+            if remaining == 0:
+                if reserved is not None:
+                    for pick in plan:
+                        key = (product_id, pick["location_id"], pick["batch_id"])
+                        reserved[key] = reserved.get(key, 0) + pick["quantity"]
+                return plan
+
+        available = quantity - remaining
+        raise ValueError(
+            f"Insufficient stock in warehouse {warehouse_id} for product {product_id}. "
+            f"Available in locations: {available}, Requested: {quantity}"
+        )
+
+    @staticmethod
+    async def _decrement_source(
+        db: Session,
+        request: MovementRequest,
+        item: MovementRequestItem,
+        warehouse_id: int,
+        user_id: int,
+        allocation_policy: Optional[str] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Decrement an item from its source location, or from several bins following
+        the allocation policy when no source location was given. Returns the picks
+        (location, batch and quantity) and their stock updates.
+        """
+        if item.source_location_id:
+            plan = [{"location_id": item.source_location_id, "batch_id": item.batch_id, "quantity": item.quantity}]
+        else:
+            plan = StockService.allocate_stock(
+                db, item.product_id, warehouse_id, item.quantity,
+                policy=allocation_policy or DEFAULT_ALLOCATION_POLICY,
+                batch_id=item.batch_id
+            )
+
+        updates = []
+        for pick in plan:
+            upd = await StockService._update_stock(
+                db=db,
+                request=request,
+                item=item,
+                warehouse_id=warehouse_id,
+                location_id=pick["location_id"],
+                quantity=pick["quantity"],
+                entry_type=LedgerEntryType.DECREMENT,
+                user_id=user_id,
+                batch_id=pick["batch_id"]
+            )
+            updates.append(upd)
+        return plan, updates
+
+    @staticmethod
+    async def apply_movement(
+        db: Session,
+        movement_request_id: int,
+        user_id: int,
+        allocation_policy: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Apply an APPROVED movement request to the stock ledger and update real-time assignments.
+        allocation_policy selects how OUT/TRANSFER lines without a source location are
+        split across bins (see ALLOCATION_POLICIES); defaults to the ALLOCATION_POLICY config.
         """
         # 1. Get and validate request
         request = db.query(MovementRequest).filter(MovementRequest.id == movement_request_id).first()
@@ -90,29 +303,15 @@ class StockService:
             raise HTTPException(status_code=400, detail=f"Movement status must be APPROVED, found {request.status}")
 
         # 2. Process items
-        items_updated = []
+        allocation_policy = StockService._check_allocation_policy(db, allocation_policy)
+
         try:
-            for item in request.items:
-                updated_item = await StockService._process_item(db, request, item, user_id)
-                if updated_item:
-                    items_updated.append(updated_item)
-            
-            # 3. Update Request Status
-            request.status = MovementStatus.COMPLETED
-            db.add(request)
+            items_updated = await StockService.apply_items(db, request, user_id, allocation_policy)
             
             db.commit()
             db.refresh(request)
-            
-            # Broadcast event
-            await manager.broadcast({
-                "type": "movement_applied",
-                "data": {
-                    "movement_id": request.id,
-                    "type": request.type,
-                    "items": items_updated
-                }
-            })
+
+            await StockService.publish_applied(request, items_updated)
 
             return {"message": "Movement applied successfully", "request_id": request.id, "status": request.status}
             
@@ -121,7 +320,76 @@ class StockService:
             raise HTTPException(status_code=500, detail=f"Error applying movement: {str(e)}")
 
     @staticmethod
-    async def _process_item(db: Session, request: MovementRequest, item: MovementRequestItem, user_id: int) -> Optional[Dict]:
+    def _check_allocation_policy(db: Session, allocation_policy: Optional[str]) -> str:
+        if allocation_policy is None:
+            allocation_policy = StockService._get_allocation_policy(db)
+        if allocation_policy not in ALLOCATION_POLICIES:
+            raise HTTPException(status_code=400, detail=f"Unknown allocation policy: {allocation_policy}")
+        return allocation_policy
+
+    @staticmethod
+    async def apply_items(
+        db: Session,
+        request: MovementRequest,
+        user_id: int,
+        allocation_policy: str
+    ) -> List[Dict]:
+        """
+        Write the ledger entries and assignment changes of every item and mark the request
+        COMPLETED, without committing. Callers that batch more work into the same
+        transaction commit themselves and then call publish_applied.
+        """
+        items_updated = []
+        for item in request.items:
+            updated_item = await StockService._process_item(db, request, item, user_id, allocation_policy)
+            if updated_item:
+                items_updated.append(updated_item)
+        
+        # 3. Update Request Status
+        request.status = MovementStatus.COMPLETED
+        db.add(request)
+
+        outbox_service.enqueue_broadcast(db, {
+            "type": "movement_applied",
+            "data": {
+                "movement_id": request.id,
+                "type": request.type,
+                "items": items_updated
+            }
+        })
+        return items_updated
+
+    @staticmethod
+    async def publish_applied(request: MovementRequest, items_updated: List[Dict]) -> None:
+        """
+        Post-commit side effects of an applied movement that are local to this worker.
+        """
+        # Keep the in-memory putaway index in sync with the committed assignments
+        touched_warehouses = set()
+        for updated_item in items_updated:
+            for upd in updated_item["updates"]:
+                putaway_optimizer.on_stock_change(
+                    upd["warehouse_id"], upd["location_id"], updated_item["product_id"], upd["change"]
+                )
+                crud_layout.invalidate_heatmap(warehouse_id=upd["warehouse_id"], location_ids=[upd["location_id"]])
+                if upd["location_id"]:
+                    touched_warehouses.add(upd["warehouse_id"])
+
+        # Cached location trees show occupancy; drop them only now that it is committed
+        for warehouse_id in touched_warehouses:
+            location_service.invalidate_location_tree(warehouse_id)
+
+        # The broadcasts and alerts were queued in the outbox with the ledger entries
+        outbox_dispatcher.wake()
+
+    @staticmethod
+    async def _process_item(
+        db: Session,
+        request: MovementRequest,
+        item: MovementRequestItem,
+        user_id: int,
+        allocation_policy: Optional[str] = None
+    ) -> Optional[Dict]:
         """
         Process a single item based on movement type.
         """
@@ -158,45 +426,19 @@ class StockService:
             if not request.source_warehouse_id:
                 raise ValueError("Source warehouse required for OUT movement")
                 
-            source_loc_id = item.source_location_id
-            if not source_loc_id:
-                source_loc_id = await StockService._resolve_location(
-                    db, item.product_id, request.source_warehouse_id, item.quantity, "OUT"
-                )
-
-            upd = await StockService._update_stock(
-                db=db,
-                request=request,
-                item=item,
-                warehouse_id=request.source_warehouse_id,
-                location_id=source_loc_id,
-                quantity=item.quantity,
-                entry_type=LedgerEntryType.DECREMENT,
-                user_id=user_id
+            _, source_updates = await StockService._decrement_source(
+                db, request, item, request.source_warehouse_id, user_id, allocation_policy
             )
-            updates.append(upd)
+            updates.extend(source_updates)
             
         elif m_type == MovementType.TRANSFER:
             if not request.source_warehouse_id or not request.destination_warehouse_id:
                 raise ValueError("Both source and destination warehouses required for TRANSFER")
                 
-            source_loc_id = item.source_location_id
-            if not source_loc_id:
-                source_loc_id = await StockService._resolve_location(
-                    db, item.product_id, request.source_warehouse_id, item.quantity, "OUT"
-                )
-
-            upd1 = await StockService._update_stock(
-                db=db,
-                request=request,
-                item=item,
-                warehouse_id=request.source_warehouse_id,
-                location_id=source_loc_id,
-                quantity=item.quantity,
-                entry_type=LedgerEntryType.DECREMENT,
-                user_id=user_id
+            picks, source_updates = await StockService._decrement_source(
+                db, request, item, request.source_warehouse_id, user_id, allocation_policy
             )
-            updates.append(upd1)
+            updates.extend(source_updates)
             
             dest_loc_id = item.destination_location_id
             if not dest_loc_id:
@@ -204,17 +446,20 @@ class StockService:
                     db, item.product_id, request.destination_warehouse_id, item.quantity, "IN"
                 )
 
-            upd2 = await StockService._update_stock(
-                db=db,
-                request=request,
-                item=item,
-                warehouse_id=request.destination_warehouse_id,
-                location_id=dest_loc_id,
-                quantity=item.quantity,
-                entry_type=LedgerEntryType.INCREMENT,
-                user_id=user_id
-            )
-            updates.append(upd2)
+            # Each pick keeps its batch at the destination
+            for pick in picks:
+                upd2 = await StockService._update_stock(
+                    db=db,
+                    request=request,
+                    item=item,
+                    warehouse_id=request.destination_warehouse_id,
+                    location_id=dest_loc_id,
+                    quantity=pick["quantity"],
+                    entry_type=LedgerEntryType.INCREMENT,
+                    user_id=user_id,
+                    batch_id=pick["batch_id"]
+                )
+                updates.append(upd2)
             
         elif m_type == MovementType.ADJUSTMENT:
             if request.source_warehouse_id:
@@ -265,12 +510,18 @@ class StockService:
         location_id: Optional[int],
         quantity: int,
         entry_type: LedgerEntryType,
-        user_id: int
+        user_id: int,
+        batch_id: Optional[int] = None
     ) -> Dict:
         """
-        Core logic: Create LedgerEntry and update ProductLocationAssignment
+        Core logic: Create LedgerEntry and update ProductLocationAssignment.
+        batch_id overrides item.batch_id (used when an allocation picks a specific batch).
         """
+        batch_id = batch_id if batch_id is not None else item.batch_id
+
         # Calculate current stock WITHOUT cache to ensure fresh data inside transaction
+        # (flush first so earlier entries of a split line are part of the balance)
+        db.flush()
         current_wh_stock = StockService._calculate_current_stock_db(db, item.product_id, warehouse_id)
         
         previous_balance = current_wh_stock
@@ -286,7 +537,7 @@ class StockService:
         ledger_entry = LedgerEntry(
             movement_request_id=request.id,
             product_id=item.product_id,
-            batch_id=item.batch_id,
+            batch_id=batch_id,
             warehouse_id=warehouse_id,
             location_id=location_id,
             entry_type=entry_type,
@@ -302,7 +553,7 @@ class StockService:
             assignment = db.query(ProductLocationAssignment).filter(
                 ProductLocationAssignment.location_id == location_id,
                 ProductLocationAssignment.product_id == item.product_id,
-                ProductLocationAssignment.batch_id == item.batch_id
+                ProductLocationAssignment.batch_id == batch_id
             ).first()
             
             if entry_type == LedgerEntryType.INCREMENT:
@@ -311,7 +562,7 @@ class StockService:
                 else:
                     assignment = ProductLocationAssignment(
                         product_id=item.product_id,
-                        batch_id=item.batch_id,
+                        batch_id=batch_id,
                         location_id=location_id,
                         warehouse_id=warehouse_id,
                         quantity=quantity,
@@ -319,6 +570,7 @@ class StockService:
                         assigned_by=user_id
                     )
                     db.add(assignment)
+                location_service.adjust_location_occupancy(db, warehouse_id, location_id, quantity)
             else: # DECREMENT
                 if not assignment:
                      raise ValueError(f"No stock found in location {location_id} to decrement")
@@ -329,16 +581,15 @@ class StockService:
                 assignment.quantity -= quantity
                 if assignment.quantity == 0:
                     db.delete(assignment) # Clean up empty assignments? Or keep as 0? Usually cleanup to keep table small.
+                location_service.adjust_location_occupancy(db, warehouse_id, location_id, -quantity)
         
-        # Check Low Stock
+        # Check Low Stock (purchase alert created by the outbox dispatcher after commit).
+        # min_stock is product-wide, so the handler compares it with the balance of all warehouses
         if entry_type == LedgerEntryType.DECREMENT:
-            # We don't check low stock here, it should be done in purchase service or separate task
-            # to avoid circular imports or complexity. But if required:
-            # PurchaseService.check_low_stock(db, item.product_id, new_balance)
-            pass
+            outbox_service.enqueue(db, LOW_STOCK_CHECK_EVENT, {"product_id": item.product_id})
 
-        # Emit real-time stock update
-        await manager.broadcast({
+        # Emit real-time stock update once the transaction commits
+        outbox_service.enqueue_broadcast(db, {
             "type": "stock_updated",
             "data": {
                 "product_id": item.product_id,
@@ -352,7 +603,8 @@ class StockService:
         return {
             "warehouse_id": warehouse_id,
             "location_id": location_id,
-            "new_balance": new_balance
+            "new_balance": new_balance,
+            "change": quantity if entry_type == LedgerEntryType.INCREMENT else -quantity
         }
 
 
@@ -394,6 +646,29 @@ class StockService:
         
         return total
 
+    @staticmethod
+    def current_stock_map(db: Session, product_ids, warehouse_id: Optional[int] = None) -> Dict[int, int]:
+        """
+        Ledger balance of many products in one grouped query, read from the database
+        rather than the cache. Products without entries are 0.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return {}
+        query = db.query(
+            LedgerEntry.product_id,
+            func.sum(case(
+                (LedgerEntry.entry_type == LedgerEntryType.INCREMENT, LedgerEntry.quantity),
+                else_=-LedgerEntry.quantity
+            ))
+        ).filter(LedgerEntry.product_id.in_(product_ids))
+        if warehouse_id:
+            query = query.filter(LedgerEntry.warehouse_id == warehouse_id)
+
+        balances = dict.fromkeys(product_ids, 0)
+        balances.update({product_id: int(total or 0) for product_id, total in query.group_by(LedgerEntry.product_id)})
+        return balances
+
     @staticmethod
     def validate_stock_availability(db: Session, product_id: int, warehouse_id: int, quantity: int, location_id: Optional[int] = None):
         """
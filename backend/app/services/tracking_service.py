@@ -9,9 +9,13 @@ from app.models.integrated_request import (
 )
 from app.models.system import SystemConfig
 from app.models.notification import NotificationType
+from app.services import expiration_service
 from app.services.notification_service import NotificationService
 from app.schemas.tracking import ItemTrackingCreate, PenalizationCreate
 
+# Loans are reminded daily during the last days before their return date
+UPCOMING_DAYS = 3
+
 class TrackingService:
     @staticmethod
     def log_position(db: Session, data: ItemTrackingCreate, user_id: int) -> ItemTracking:
@@ -87,125 +91,97 @@ class TrackingService:
         return None
 
     @staticmethod
-    def run_daily_checks(db: Session):
+    def run_daily_checks(db: Session) -> int:
         """
         Runs daily checks for upcoming expirations and overdue items.
-        Should be called by a scheduler or cron job.
+        Run every morning by the scheduler (see app.services.scheduled_jobs).
+        Returns the number of notifications created.
         """
-        TrackingService.check_upcoming_expirations(db)
-        TrackingService.check_overdue_items(db)
+        return TrackingService.check_upcoming_expirations(db) + TrackingService.check_overdue_items(db)
 
     @staticmethod
-    def check_upcoming_expirations(db: Session):
+    def check_upcoming_expirations(db: Session) -> int:
+        """Daily reminder for loans due in the next UPCOMING_DAYS days (once per day)."""
         today = datetime.now().date()
-        
-        # Tools
-        tools = db.query(RequestTool).filter(
-            RequestTool.status.in_([RequestToolStatus.PRESTADA, RequestToolStatus.EN_DEVOLUCION]),
-            RequestTool.expected_return_date != None
-        ).all()
-        
-        for tool in tools:
-            if not tool.expected_return_date: continue
-            days_left = (tool.expected_return_date - today).days
-            if days_left in [1, 2, 3]:
-                # Check duplicate
-                if not NotificationService.has_notification_today(
-                    db, tool.request.requested_by, NotificationType.UPCOMING_EXPIRATION, tool.request_id, f"herramienta '{tool.tool.name}'"
-                ):
-                    NotificationService.create_notification(
-                        db,
-                        user_id=tool.request.requested_by,
-                        title=f"Vencimiento Próximo: {tool.tool.name}",
-                        message=f"Tu préstamo de la herramienta '{tool.tool.name}' vence en {days_left} días ({tool.expected_return_date}).",
-                        type=NotificationType.UPCOMING_EXPIRATION,
-                        related_request_id=tool.request_id
-                    )
-
-        # Vehicles (Using IntegratedRequest return date if item doesn't have it, but item doesn't have it)
-        # Vehicles rely on Request status
-        vehicles = db.query(RequestVehicle).filter(
-            RequestVehicle.status.in_([RequestVehicleStatus.EN_USO, RequestVehicleStatus.EN_DEVOLUCION])
-        ).all()
-        
-        for vehicle in vehicles:
-            if not vehicle.request.expected_return_date: continue
-            days_left = (vehicle.request.expected_return_date - today).days
-            if days_left in [1, 2, 3]:
-                if not NotificationService.has_notification_today(
-                    db, vehicle.request.requested_by, NotificationType.UPCOMING_EXPIRATION, vehicle.request_id, f"vehículo {vehicle.vehicle.brand}"
-                ):
-                    NotificationService.create_notification(
-                        db,
-                        user_id=vehicle.request.requested_by,
-                        title=f"Vencimiento Próximo: {vehicle.vehicle.brand} {vehicle.vehicle.model}",
-                        message=f"Tu préstamo del vehículo vence en {days_left} días ({vehicle.request.expected_return_date}).",
-                        type=NotificationType.UPCOMING_EXPIRATION,
-                        related_request_id=vehicle.request_id
-                    )
+        since, until = today + timedelta(days=1), today + timedelta(days=UPCOMING_DAYS)
+        notifications = []
+
+        for tool in expiration_service.loaned_tools(
+            db, [RequestToolStatus.PRESTADA, RequestToolStatus.EN_DEVOLUCION], since, until
+        ):
+            days_left = (tool.due_date - today).days
+            notifications.append({
+                "user_id": tool.user_id,
+                "title": f"Vencimiento Próximo: {tool.name}",
+                "message": f"Tu préstamo de la herramienta '{tool.name}' vence en {days_left} días ({tool.due_date}).",
+                "type": NotificationType.UPCOMING_EXPIRATION,
+                "related_request_id": tool.request_id
+            })
+
+        for vehicle in expiration_service.loaned_vehicles(
+            db, [RequestVehicleStatus.EN_USO, RequestVehicleStatus.EN_DEVOLUCION], since, until
+        ):
+            days_left = (vehicle.due_date - today).days
+            notifications.append({
+                "user_id": vehicle.user_id,
+                "title": f"Vencimiento Próximo: {vehicle.name}",
+                "message": f"Tu préstamo del vehículo vence en {days_left} días ({vehicle.due_date}).",
+                "type": NotificationType.UPCOMING_EXPIRATION,
+                "related_request_id": vehicle.request_id
+            })
 
         # EPP (Only if expected_return_date is set, usually for temporary assignment)
-        epps = db.query(RequestEPP).filter(
-            RequestEPP.status.in_([RequestEPPStatus.ASIGNADO, RequestEPPStatus.EN_DEVOLUCION]),
-            RequestEPP.expected_return_date != None
-        ).all()
-        
-        for epp in epps:
-             if not epp.expected_return_date: continue
-             days_left = (epp.expected_return_date - today).days
-             if days_left in [1, 2, 3]:
-                if not NotificationService.has_notification_today(
-                    db, epp.request.requested_by, NotificationType.UPCOMING_EXPIRATION, epp.request_id, f"EPP {epp.epp.product.name}"
-                ):
-                    NotificationService.create_notification(
-                        db,
-                        user_id=epp.request.requested_by,
-                        title=f"Vencimiento Próximo: {epp.epp.product.name}",
-                        message=f"Tu asignación de EPP vence en {days_left} días ({epp.expected_return_date}).",
-                        type=NotificationType.UPCOMING_EXPIRATION,
-                        related_request_id=epp.request_id
-                    )
+        for epp in expiration_service.loaned_epp(
+            db, [RequestEPPStatus.ASIGNADO, RequestEPPStatus.EN_DEVOLUCION], since, until
+        ):
+            days_left = (epp.due_date - today).days
+            notifications.append({
+                "user_id": epp.user_id,
+                "title": f"Vencimiento Próximo: {epp.name}",
+                "message": f"Tu asignación de EPP vence en {days_left} días ({epp.due_date}).",
+                "type": NotificationType.UPCOMING_EXPIRATION,
+                "related_request_id": epp.request_id
+            })
+
+        # One lookup of today's notifications and one insert, skipping those already sent today
+        return NotificationService.create_notifications(db, notifications)
 
     @staticmethod
-    def check_overdue_items(db: Session):
+    def check_overdue_items(db: Session) -> int:
+        """Daily reminder for every loan past its return date (once per day)."""
         today = datetime.now().date()
-        
-        # Tools
-        tools = db.query(RequestTool).filter(
-            RequestTool.status.in_([RequestToolStatus.PRESTADA]), # Only active loans, EN_DEVOLUCION is being processed
-            RequestTool.expected_return_date < today
-        ).all()
-        
-        for tool in tools:
-             if not NotificationService.has_notification_today(
-                db, tool.request.requested_by, NotificationType.LATE_RETURN, tool.request_id, f"herramienta '{tool.tool.name}'"
-             ):
-                days_late = (today - tool.expected_return_date).days
-                NotificationService.create_notification(
-                    db,
-                    user_id=tool.request.requested_by,
-                    title=f"Retraso en Devolución: {tool.tool.name}",
-                    message=f"La herramienta '{tool.tool.name}' tiene {days_late} días de retraso. Por favor devuélvela lo antes posible para evitar penalizaciones mayores.",
-                    type=NotificationType.LATE_RETURN,
-                    related_request_id=tool.request_id
-                )
-
-        # Vehicles
-        vehicles = db.query(RequestVehicle).join(IntegratedRequest).filter(
-            RequestVehicle.status.in_([RequestVehicleStatus.EN_USO]),
-            IntegratedRequest.expected_return_date < today
-        ).all()
-        
-        for vehicle in vehicles:
-             if not NotificationService.has_notification_today(
-                db, vehicle.request.requested_by, NotificationType.LATE_RETURN, vehicle.request_id, f"vehículo {vehicle.vehicle.brand}"
-             ):
-                days_late = (today - vehicle.request.expected_return_date).days
-                NotificationService.create_notification(
-                    db,
-                    user_id=vehicle.request.requested_by,
-                    title=f"Retraso en Devolución: {vehicle.vehicle.brand}",
-                    message=f"El vehículo tiene {days_late} días de retraso. Por favor devuélvelo lo antes posible.",
-                    type=NotificationType.LATE_RETURN,
-                    related_request_id=vehicle.request_id
-                )
+        until = today - timedelta(days=1)
+        notifications = []
+
+        # Only active loans, EN_DEVOLUCION is being processed
+        for tool in expiration_service.loaned_tools(db, [RequestToolStatus.PRESTADA], until=until):
+            days_late = (today - tool.due_date).days
+            notifications.append({
+                "user_id": tool.user_id,
+                "title": f"Retraso en Devolución: {tool.name}",
+                "message": f"La herramienta '{tool.name}' tiene {days_late} días de retraso. Por favor devuélvela lo antes posible para evitar penalizaciones mayores.",
+                "type": NotificationType.LATE_RETURN,
+                "related_request_id": tool.request_id
+            })
+
+        for vehicle in expiration_service.loaned_vehicles(db, [RequestVehicleStatus.EN_USO], until=until):
+            days_late = (today - vehicle.due_date).days
+            notifications.append({
+                "user_id": vehicle.user_id,
+                "title": f"Retraso en Devolución: {vehicle.name}",
+                "message": f"El vehículo tiene {days_late} días de retraso. Por favor devuélvelo lo antes posible.",
+                "type": NotificationType.LATE_RETURN,
+                "related_request_id": vehicle.request_id
+            })
+
+        for epp in expiration_service.loaned_epp(db, [RequestEPPStatus.ASIGNADO], until=until):
+            days_late = (today - epp.due_date).days
+            notifications.append({
+                "user_id": epp.user_id,
+                "title": f"Retraso en Devolución: {epp.name}",
+                "message": f"Tu asignación de EPP tiene {days_late} días de retraso. Por favor devuélvela lo antes posible.",
+                "type": NotificationType.LATE_RETURN,
+                "related_request_id": epp.request_id
+            })
+
+        return NotificationService.create_notifications(db, notifications)
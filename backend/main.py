@@ -33,13 +33,23 @@ from app.api.endpoints.suppliers import router as suppliers_router
 from app.api.endpoints.purchase_orders import router as purchase_orders_router
 from app.core.config import settings
 from app.core.middleware import ActiveSessionMiddleware
+from app.services.outbox_service import outbox_dispatcher
+from app.services.push_notification_service import expo_push_service
+from app.services.scheduler_service import job_scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Iniciando aplicación...")
     test_db_connection()
     ensure_schema()
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_dispatcher.start()
+    if settings.SCHEDULER_ENABLED:
+        job_scheduler.start()
     yield
+    await job_scheduler.stop()
+    await outbox_dispatcher.stop()
+    await expo_push_service.aclose()
 
 app = FastAPI(title="Sistema de Inventario API", lifespan=lifespan)
 
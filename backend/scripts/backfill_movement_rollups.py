@@ -0,0 +1,35 @@
+import argparse
+import sys
+import os
+from datetime import date, datetime, timezone
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.connection import SessionLocal
+from app.services import rollup_service
+
+def backfill_movement_rollups(since=None):
+    """
+    Rebuild the daily movement rollups read by the reports from the movements and
+    ledger entries (all history, or from --since on). The API keeps them up to date as
+    stock moves; run this once after the upgrade and whenever they need repairing,
+    while no stock is moving.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        rows = rollup_service.rebuild(db, since)
+        db.commit()
+        scope = f"since {since}" if since else "for all history"
+        print(f"[{now}] Rebuilt {rows} movement rollup rows {scope}.")
+    except Exception as e:
+        print(f"Error rebuilding movement rollups: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily movement rollups")
+    parser.add_argument("--since", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    backfill_movement_rollups(parser.parse_args().since)
@@ -0,0 +1,158 @@
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registers every table)
+from app.database import Base
+from app.models.assets import Asset, AssetCalibration, AssetCategory, AssetType, CalibrationStatus
+from app.models.epp import EPP
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestPurpose, RequestEPP, RequestEPPStatus, RequestTool, RequestToolStatus
+)
+from app.models.inventory_refs import Category, Condition, Unit
+from app.models.notification import Notification
+from app.models.product import Product, ProductBatch
+from app.models.tool import Tool
+from app.models.user import User
+from app.services import expiration_service
+from app.services.asset_service import AssetService
+from app.services.tracking_service import TrackingService
+
+TOOL_LOANS = 40_000
+EPP_LOANS = 20_000
+CALIBRATIONS = 20_000
+BATCHES = 20_000
+USERS = 500
+PRODUCTS = 1_000
+# Due dates are spread over +/- this many days around today
+SPREAD_DAYS = 60
+
+
+def due_date(today: date) -> date:
+    return today + timedelta(days=random.randint(-SPREAD_DAYS, SPREAD_DAYS))
+
+
+def seed(db, today: date) -> None:
+    db.add_all([Category(id=1, name="General"), Unit(id=1, name="Pieza", abbreviation="pz"), Condition(id=1, name="NUEVO")])
+    db.add(AssetCategory(id=1, code="MED", name="Medición", asset_type=AssetType.EQUIPO_MEDICION))
+    db.commit()
+    rows = lambda table, items: db.execute(insert(table), items)
+
+    rows(User, [{"id": i, "email": f"user{i}@example.com", "password_hash": "x", "role_id": 3 if i > 5 else 2}
+                for i in range(1, USERS + 1)])
+    rows(Product, [{"id": i, "sku": f"SKU-{i:05d}", "name": f"Producto {i}", "category_id": 1, "unit_id": 1}
+                   for i in range(1, PRODUCTS + 1)])
+    requests = TOOL_LOANS + EPP_LOANS
+    rows(IntegratedRequest, [{
+        "id": i, "request_number": f"SOL-{i:06d}", "requested_by": random.randint(1, USERS),
+        "purpose": IntegratedRequestPurpose.OBRA
+    } for i in range(1, requests + 1)])
+    rows(Tool, [{"id": i, "product_id": random.randint(1, PRODUCTS), "serial_number": f"T-{i:06d}", "condition_id": 1}
+                for i in range(1, TOOL_LOANS + 1)])
+    rows(RequestTool, [{
+        "request_id": i, "tool_id": i, "status": RequestToolStatus.PRESTADA, "expected_return_date": due_date(today)
+    } for i in range(1, TOOL_LOANS + 1)])
+    rows(EPP, [{"id": i, "product_id": random.randint(1, PRODUCTS), "serial_number": f"E-{i:06d}"}
+               for i in range(1, EPP_LOANS + 1)])
+    rows(RequestEPP, [{
+        "request_id": TOOL_LOANS + i, "epp_id": i, "status": RequestEPPStatus.ASIGNADO,
+        "expected_return_date": due_date(today)
+    } for i in range(1, EPP_LOANS + 1)])
+    rows(Asset, [{
+        "id": i, "asset_tag": f"ACT-{i:06d}", "category_id": 1, "name": f"Activo {i}",
+        "responsible_user_id": random.randint(1, USERS), "warranty_expiration": due_date(today)
+    } for i in range(1, CALIBRATIONS + 1)])
+    rows(AssetCalibration, [{
+        "asset_id": i, "calibration_date": today - timedelta(days=300), "expiration_date": due_date(today),
+        "status": CalibrationStatus.VIGENTE
+    } for i in range(1, CALIBRATIONS + 1)])
+    rows(ProductBatch, [{
+        "product_id": random.randint(1, PRODUCTS), "batch_number": f"L-{i:06d}", "expiration_date": due_date(today),
+        "quantity": random.randint(0, 20)
+    } for i in range(1, BATCHES + 1)])
+    db.commit()
+
+
+def naive_loan_scan(db, today: date) -> int:
+    """The previous shape: load every loan, then lazy-load its request and tool per row."""
+    found = 0
+    for tool in db.query(RequestTool).filter(RequestTool.status == RequestToolStatus.PRESTADA).all():
+        days_left = (tool.expected_return_date - today).days
+        if days_left in (1, 2, 3) or days_left < 0:
+            found += bool(tool.request.requested_by and tool.tool.product.name)
+    for epp in db.query(RequestEPP).filter(RequestEPP.status == RequestEPPStatus.ASIGNADO).all():
+        days_left = (epp.expected_return_date - today).days
+        if days_left in (1, 2, 3):
+            found += bool(epp.request.requested_by and epp.epp.product.name)
+    return found
+
+
+def windowed_loan_scan(db, today: date) -> int:
+    upcoming = (today + timedelta(days=1), today + timedelta(days=3))
+    overdue = today - timedelta(days=1)
+    return (
+        len(expiration_service.loaned_tools(db, [RequestToolStatus.PRESTADA], *upcoming))
+        + len(expiration_service.loaned_tools(db, [RequestToolStatus.PRESTADA], until=overdue))
+        + len(expiration_service.loaned_epp(db, [RequestEPPStatus.ASIGNADO], *upcoming))
+    )
+
+
+def timed(db, func):
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    db.expunge_all()
+    return result, 1000 * (time.perf_counter() - start), len(statements)
+
+
+def main():
+    random.seed(42)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    today = date.today()
+
+    start = time.perf_counter()
+    seed(db, today)
+    total = TOOL_LOANS + EPP_LOANS + CALIBRATIONS + BATCHES
+    print(f"Seeded {total} expiring rows in {time.perf_counter() - start:.1f} s "
+          f"(due dates within +/-{SPREAD_DAYS} days)")
+
+    for label, func in (
+        ("Loan scan, per-row lazy loads", lambda: naive_loan_scan(db, today)),
+        ("Loan scan, windowed joins", lambda: windowed_loan_scan(db, today)),
+    ):
+        found, ms, queries = timed(db, func)
+        print(f"{label:34s} {found:7d} due {ms:9.1f} ms {queries:7d} queries")
+
+    checks = (
+        ("Tracking checks", lambda: TrackingService.run_daily_checks(db)),
+        ("Asset checks", lambda: AssetService.run_daily_checks(db)),
+        ("Batch checks", lambda: expiration_service.check_expiring_batches(db)),
+    )
+    for attempt in ("first run", "second run"):
+        for label, func in checks:
+            created, ms, queries = timed(db, func)
+            print(f"{label + ', ' + attempt:34s} {created:7d} new {ms:9.1f} ms {queries:7d} queries")
+    print(f"Notifications stored: {db.query(Notification).count()}")
+
+
+if __name__ == "__main__":
+    main()
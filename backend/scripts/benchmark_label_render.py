@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from app.services.barcode_generator import barcode_cache, _vector_modules
+from app.services.pdf_generator import RENDER_MODES, generate_label_pdf, generate_batch_labels_pdf
+
+LABELS = 200
+BATCH_LABELS = 500
+SYMBOLOGIES = ("code128", "code39", "ean13", "qr")
+
+
+def label_data(i: int) -> dict:
+    return {"product_name": f"Producto {i}", "sku": f"SKU-{i:06d}", "barcode": f"750{i:09d}"}
+
+
+def clear_caches():
+    barcode_cache.clear()
+    _vector_modules.cache_clear()
+
+
+def bench_single(label_type: str, render_mode: str):
+    """Unique labels, so every barcode is rendered from scratch."""
+    clear_caches()
+    total_bytes = 0
+    start = time.perf_counter()
+    for i in range(LABELS):
+        total_bytes += len(generate_label_pdf(label_data(i), label_type=label_type, render_mode=render_mode))
+    elapsed = time.perf_counter() - start
+    return 1000 * elapsed / LABELS, total_bytes / LABELS
+
+
+def bench_batch(label_type: str, render_mode: str):
+    clear_caches()
+    items = [label_data(i) for i in range(BATCH_LABELS)]
+    start = time.perf_counter()
+    pdf = generate_batch_labels_pdf(items, label_type=label_type, render_mode=render_mode)
+    elapsed = time.perf_counter() - start
+    return 1000 * elapsed / BATCH_LABELS, len(pdf) / BATCH_LABELS
+
+
+def main():
+    print(f"Single labels: {LABELS} per run, batch: {BATCH_LABELS} labels in one PDF")
+    print(f"{'symbology':<10} {'mode':<7} {'single ms':>10} {'single B':>10} {'batch ms':>10} {'batch B':>10}")
+    for label_type in SYMBOLOGIES:
+        for render_mode in RENDER_MODES:
+            single_ms, single_bytes = bench_single(label_type, render_mode)
+            batch_ms, batch_bytes = bench_batch(label_type, render_mode)
+            print(
+                f"{label_type:<10} {render_mode:<7} {single_ms:10.2f} {single_bytes:10.0f} "
+                f"{batch_ms:10.2f} {batch_bytes:10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
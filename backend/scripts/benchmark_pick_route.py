@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.warehouse_layout import CellType
+from app.services.pick_route_service import LayoutGrid, PickRouteService, route_length
+
+ROWS = 50
+COLS = 80
+STOPS = 100
+RUNS = 20
+
+
+def build_grid() -> LayoutGrid:
+    """Racks on every other column, cross aisles on the first, middle and last rows."""
+    cross_aisles = {0, ROWS // 2, ROWS - 1}
+    blocked = {
+        (r, c)
+        for r in range(ROWS)
+        for c in range(COLS)
+        if c % 2 == 1 and r not in cross_aisles
+    }
+    return LayoutGrid(ROWS, COLS, blocked, depot=(0, 0))
+
+
+def main():
+    random.seed(42)
+    grid = build_grid()
+    storage = sorted(grid.blocked)
+
+    naive_total = 0
+    optimized_total = 0
+    elapsed = 0.0
+    for _ in range(RUNS):
+        cells = random.sample(storage, STOPS)
+        nodes = [grid.depot] + cells
+        dist = [[grid.distance(a, b) for b in nodes] for a in nodes]
+        naive_total += route_length(dist, list(range(1, len(nodes))))
+
+        start = time.perf_counter()
+        _, distance = PickRouteService.optimize(grid, cells)
+        elapsed += time.perf_counter() - start
+        optimized_total += distance
+
+    print(f"Layout {ROWS}x{COLS} ({CellType.RACK.value} every other column), {STOPS} stops, {RUNS} runs")
+    print(f"Arbitrary order:   {naive_total / RUNS:10.1f} cells walked")
+    print(f"NN + 2-opt route:  {optimized_total / RUNS:10.1f} cells walked")
+    print(f"Reduction:         {100 * (1 - optimized_total / naive_total):10.1f} %")
+    print(f"Time per route:    {1000 * elapsed / RUNS:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,18 @@ from datetime import datetime, timezone
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.db.connection import SessionLocal
-from app.models.session import Session
+from app.services.scheduled_jobs import cleanup_expired_sessions as delete_expired_sessions
 
 def cleanup_expired_sessions():
     """
     Remove expired sessions from the database.
+    The API runs this hourly as the session_cleanup scheduled job; this script is
+    for running it by hand.
     """
     db = SessionLocal()
     try:
         now = datetime.now(timezone.utc).replace(tzinfo=None)
-        deleted_count = db.query(Session).filter(Session.expires_at < now).delete()
+        deleted_count = delete_expired_sessions(db)
         db.commit()
         print(f"[{now}] Cleaned up {deleted_count} expired sessions.")
     except Exception as e:
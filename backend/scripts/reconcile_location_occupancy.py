@@ -0,0 +1,38 @@
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.connection import SessionLocal
+from app.services.location_service import reconcile_location_occupancy
+
+def main():
+    """
+    Recompute storage_locations.current_occupancy from product assignments and
+    print every location whose stored value drifted.
+    """
+    parser = argparse.ArgumentParser(description="Reconcile location occupancy")
+    parser.add_argument("--warehouse-id", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = reconcile_location_occupancy(db, warehouse_id=args.warehouse_id, fix=not args.dry_run)
+        for row in drift:
+            print(
+                f"Location {row['location_id']} ({row['code']}, warehouse {row['warehouse_id']}): "
+                f"recorded {row['recorded']}, actual {row['actual']}, drift {row['drift']:+d}"
+            )
+        action = "Found" if args.dry_run else "Fixed"
+        print(f"{action} {len(drift)} locations with occupancy drift.")
+    except Exception as e:
+        print(f"Error reconciling occupancy: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,10 @@
+import os
+
+# The app under test uses an overridden session; background workers started in the
+# lifespan would poll the configured database instead, so they stay off in tests
+os.environ.setdefault("OUTBOX_DISPATCHER_ENABLED", "false")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -324,7 +324,10 @@ def test_scenario_4_concurrency(client: TestClient, db: Session, token_headers):
     assert resp.status_code == 400, f"Expected 400 but got {resp.status_code}: {resp.text}"
     assert "already applied" in resp.text
 
+import asyncio
 from unittest.mock import AsyncMock, patch
+from sqlalchemy.orm import sessionmaker
+from app.services.outbox_service import OutboxDispatcher
 
 def test_scenario_5_realtime(client: TestClient, db: Session, token_headers):
     """
@@ -349,19 +352,21 @@ def test_scenario_5_realtime(client: TestClient, db: Session, token_headers):
     client.post(f"/movements/requests/{req_id}/submit", headers=token_headers)
     client.post(f"/movements/requests/{req_id}/approve", headers=token_headers)
     
-        # Mock the manager.broadcast
-    # The module path depends on how it is imported in stock_service.py
-    # In stock_service.py: from app.services.websocket_service import manager
-    with patch("app.services.stock_service.manager.broadcast", new_callable=AsyncMock) as mock_broadcast:
+    # Broadcasts are queued in the outbox with the ledger entries and sent by the dispatcher
+    dispatcher = OutboxDispatcher(session_factory=sessionmaker(bind=db.get_bind()))
+    asyncio.run(dispatcher.fan_out_broadcasts(db))
+
+    with patch("app.services.outbox_service.manager.broadcast", new_callable=AsyncMock) as mock_broadcast:
         resp = client.post(f"/movements/requests/{req_id}/apply", headers=token_headers)
         assert resp.status_code == 200
-        
-        # Verify broadcast was called
-        # Note: StockService.apply_movement calls broadcast TWICE:
+        assert not mock_broadcast.called
+
+        asyncio.run(dispatcher.fan_out_broadcasts(db))
+
+        # StockService.apply_movement queues two kinds of broadcast:
         # 1. stock_updated (per item)
         # 2. movement_applied (final)
         # So call_count should be at least 2 (1 item + 1 final)
-        assert mock_broadcast.called
         assert mock_broadcast.call_count >= 2
         
         # Verify final call is movement_applied
@@ -0,0 +1,55 @@
+import pytest
+from app.services import barcode_generator
+from app.services.barcode_generator import BarcodeGenerator, BarcodeImageCache
+from app.services.pdf_generator import generate_label_pdf, generate_batch_labels_pdf
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = BarcodeImageCache(max_entries=4)
+    monkeypatch.setattr(barcode_generator, "barcode_cache", cache)
+    return cache
+
+
+def test_generate_reuses_rendered_image(cache):
+    first = BarcodeGenerator.generate_image("LOC-A-01", "code128", height=30)
+    # QR size is not part of a linear barcode key
+    assert BarcodeGenerator.generate_image("LOC-A-01", "CODE128", size=250, height=30) is first
+    assert BarcodeGenerator.generate_image("LOC-A-01", "code128", height=40) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    assert first.png[:8] == b"\x89PNG\r\n\x1a\n"
+    assert first.width > first.height > 0
+    assert BarcodeGenerator.generate("LOC-A-01", "code128", height=30) == first.png
+
+
+def test_cache_is_bounded(cache):
+    images = [BarcodeGenerator.generate_image(f"QR-{i}", "qr", size=50) for i in range(6)]
+    assert len(cache._store) == 4
+    # The oldest entries were evicted and are rendered again
+    assert BarcodeGenerator.generate_image("QR-0", "qr", size=50) is not images[0]
+    assert BarcodeGenerator.generate_image("QR-5", "qr", size=50) is images[5]
+
+
+def test_disk_tier_survives_memory_eviction(monkeypatch, tmp_path):
+    cache = BarcodeImageCache(max_entries=1, disk_dir=tmp_path)
+    monkeypatch.setattr(barcode_generator, "barcode_cache", cache)
+
+    image = BarcodeGenerator.generate_image("DISK-1", "code39", height=30)
+    assert len(list(tmp_path.rglob("*.png"))) == 1
+    cache.clear()
+
+    monkeypatch.setattr(BarcodeGenerator, "render", staticmethod(lambda *args: pytest.fail("rendered again")))
+    assert BarcodeGenerator.generate_image("DISK-1", "code39", height=30).png == image.png
+
+
+def test_label_pdfs_share_cached_barcodes(cache):
+    single = generate_label_pdf({"sku": "SKU-1", "product_name": "Product"}, label_type="qr", render_mode="raster")
+    assert single.startswith(b"%PDF")
+    assert cache.misses == 1
+
+    batch = generate_batch_labels_pdf(
+        [{"sku": "SKU-1"}, {"sku": "SKU-2"}], label_type="qr", copies_per_label=3, render_mode="raster"
+    )
+    assert batch.startswith(b"%PDF")
+    assert (cache.hits, cache.misses) == (5, 2)
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.models.system import ServiceLease
+from app.services.email_service import (
+    EMAIL_EVENT, EmailService, EmailTransport, FileTransport, SendGridTransport, email_service
+)
+from app.services.outbox_service import OutboxDispatcher
+
+
+def read_sink(path):
+    return sorted((json.loads(p.read_text()) for p in path.glob("*.json")), key=lambda m: m["subject"])
+
+
+def test_batch_groups_recipients_of_identical_messages(tmp_path):
+    service = EmailService(FileTransport(str(tmp_path)))
+    payloads = [
+        {"to_email": "a@example.com", "subject": "Alerta", "html_content": "<p>x</p>"},
+        {"to_email": "b@example.com", "subject": "Alerta", "html_content": "<p>x</p>"},
+        {"to_email": "a@example.com", "subject": "Alerta", "html_content": "<p>x</p>"},
+        {"to_email": "c@example.com", "subject": "Orden", "html_content": "<p>y</p>"},
+    ]
+    assert asyncio.run(service.send_batch(payloads)) == (2, [])
+
+    alert, order = read_sink(tmp_path)
+    assert alert["to"] == ["a@example.com", "b@example.com"]
+    assert order["to"] == ["c@example.com"]
+
+
+def test_sendgrid_uses_one_personalization_per_recipient():
+    transport = SendGridTransport("SG.key", "noreply@exproof.com", "EXPROOF Inventory")
+    response = MagicMock(status_code=202, headers={"X-Message-Id": "abc"})
+    with patch("sendgrid.SendGridAPIClient.send", return_value=response) as send:
+        result = transport.send(["a@example.com", "b@example.com"], "Alerta", "<p>x</p>")
+
+    body = send.call_args[0][0].get()
+    recipients = sorted(p["to"][0]["email"] for p in body["personalizations"])
+    assert recipients == ["a@example.com", "b@example.com"]
+    assert all(len(p["to"]) == 1 for p in body["personalizations"])
+    assert body["subject"] == "Alerta"
+    assert result["message_id"] == "abc"
+
+
+def test_sends_run_off_the_event_loop():
+    class SlowTransport(EmailTransport):
+        def send(self, recipients, subject, html_content, text_content=None):
+            time.sleep(0.2)
+            return {}
+
+    service = EmailService(SlowTransport())
+
+    async def send_two():
+        return await asyncio.gather(
+            service.send_email("a@example.com", "A", "<p>a</p>"),
+            service.send_email("b@example.com", "B", "<p>b</p>"),
+        )
+
+    start = time.perf_counter()
+    results = asyncio.run(send_two())
+    assert all(r["success"] for r in results)
+    assert time.perf_counter() - start < 0.35
+
+
+def test_queued_emails_are_sent_by_the_dispatcher(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(email_service, "transport", FileTransport(str(tmp_path)))
+    db.query(OutboxEvent).delete()
+    db.query(ServiceLease).delete()
+    db.commit()
+
+    for to_email in ("a@example.com", "b@example.com"):
+        email_service.queue_purchase_order_notification(db, to_email, "OC-0001", "approved", "status_changed")
+    email_service.queue_low_stock_alert(db, "a@example.com", "Tornillo", "SKU-1", 2, 10)
+    db.commit()
+    assert not list(tmp_path.glob("*.json"))
+
+    import app.services.outbox_handlers  # noqa: F401
+    dispatcher = OutboxDispatcher(session_factory=sessionmaker(bind=db.get_bind()))
+    assert asyncio.run(dispatcher.run_once()) == 3
+
+    stock, order = read_sink(tmp_path)
+    assert order["subject"] == "Orden de Compra OC-0001 - APPROVED"
+    assert order["to"] == ["a@example.com", "b@example.com"]
+    assert stock["to"] == ["a@example.com"]
+    assert {e.status for e in db.query(OutboxEvent).filter(OutboxEvent.event_type == EMAIL_EVENT)} == {
+        OutboxStatus.DELIVERED
+    }
+
+
+def test_failed_group_is_requeued_without_resending_the_rest(db, tmp_path, monkeypatch):
+    class FlakyTransport(FileTransport):
+        def send(self, recipients, subject, html_content, text_content=None):
+            if subject == "Orden":
+                raise RuntimeError("provider unavailable")
+            return super().send(recipients, subject, html_content, text_content)
+
+    monkeypatch.setattr(email_service, "transport", FlakyTransport(str(tmp_path)))
+    db.query(OutboxEvent).delete()
+    db.query(ServiceLease).delete()
+    db.commit()
+    email_service.queue_email(db, "a@example.com", "Alerta", "<p>x</p>")
+    email_service.queue_email(db, "b@example.com", "Orden", "<p>y</p>")
+    db.commit()
+
+    import app.services.outbox_handlers  # noqa: F401
+    dispatcher = OutboxDispatcher(session_factory=sessionmaker(bind=db.get_bind()))
+    assert asyncio.run(dispatcher.run_once()) == 2
+    assert [m["to"] for m in read_sink(tmp_path)] == [["a@example.com"]]
+
+    retry = db.query(OutboxEvent).filter(OutboxEvent.status == OutboxStatus.PENDING).one()
+    assert (retry.payload["to_email"], retry.payload["subject"], retry.payload["attempt"]) == ("b@example.com", "Orden", 1)
+    assert retry.available_at > retry.created_at
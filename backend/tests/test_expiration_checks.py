@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.assets import Asset, AssetCalibration, AssetCategory, AssetType, CalibrationStatus
+from app.models.epp import EPP
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestPurpose, RequestEPP, RequestEPPStatus, RequestTool,
+    RequestToolStatus
+)
+from app.models.inventory_refs import Condition
+from app.models.notification import Notification
+from app.models.product import Product, ProductBatch
+from app.models.tool import Tool
+from app.models.user import User
+from app.services import expiration_service
+from app.services.asset_service import AssetService
+from app.services.tracking_service import TrackingService
+
+TODAY = date.today()
+
+
+@pytest.fixture(scope="module")
+def user_id(db, super_admin_token):
+    return db.query(User).filter(User.email == "superadmin_test@example.com").first().id
+
+
+@pytest.fixture(scope="module")
+def product(db, setup_roles):
+    product = Product(sku="EXP-001", name="Taladro", category_id=1, unit_id=1)
+    db.add_all([product, Condition(name="EXP-NEW")])
+    db.commit()
+    return product
+
+
+def titles(db, user_id):
+    return sorted(n.title for n in db.query(Notification).filter(Notification.user_id == user_id))
+
+
+def loan_tools(db, user_id, product, due_dates):
+    condition = db.query(Condition).filter(Condition.name == "EXP-NEW").one()
+    count = db.query(IntegratedRequest).count()
+    for i, due in enumerate(due_dates, start=count):
+        request = IntegratedRequest(
+            request_number=f"SOL-EXP-{i}", requested_by=user_id, purpose=IntegratedRequestPurpose.OBRA
+        )
+        tool = Tool(product_id=product.id, serial_number=f"EXP-TOOL-{i}", condition_id=condition.id)
+        db.add_all([request, tool])
+        db.flush()
+        db.add(RequestTool(
+            request_id=request.id, tool_id=tool.id, status=RequestToolStatus.PRESTADA, expected_return_date=due
+        ))
+    db.commit()
+
+
+def count_queries(db, func):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        func()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return len(statements)
+
+
+def test_loan_checks_use_one_query_per_item_type(db, user_id, product):
+    db.query(Notification).delete()
+    loan_tools(db, user_id, product, [TODAY + timedelta(days=2), TODAY + timedelta(days=10), TODAY - timedelta(days=2)])
+    epp = EPP(product_id=product.id, serial_number="EXP-EPP-1")
+    request = IntegratedRequest(request_number="SOL-EXP-EPP", requested_by=user_id, purpose=IntegratedRequestPurpose.OBRA)
+    db.add_all([epp, request])
+    db.flush()
+    db.add(RequestEPP(
+        request_id=request.id, epp_id=epp.id, status=RequestEPPStatus.ASIGNADO,
+        expected_return_date=TODAY - timedelta(days=1)
+    ))
+    db.commit()
+
+    assert TrackingService.run_daily_checks(db) == 3
+    assert titles(db, user_id) == [
+        "Retraso en Devolución: Taladro", "Retraso en Devolución: Taladro", "Vencimiento Próximo: Taladro"
+    ]
+    # Reminders are daily: a second run today adds nothing
+    assert TrackingService.run_daily_checks(db) == 0
+
+    # The number of queries does not grow with the number of loans
+    def queries_of_a_fresh_run():
+        db.query(Notification).delete()
+        db.commit()
+        return count_queries(db, lambda: TrackingService.run_daily_checks(db))
+
+    baseline = queries_of_a_fresh_run()
+    loan_tools(db, user_id, product, [TODAY + timedelta(days=1)] * 20 + [TODAY - timedelta(days=5)] * 20)
+    assert queries_of_a_fresh_run() == baseline
+
+
+def test_asset_checks_catch_up_missed_days(db, user_id):
+    db.query(Notification).delete()
+    category = AssetCategory(code="EXP-MED", name="Medición", asset_type=AssetType.EQUIPO_MEDICION)
+    db.add(category)
+    db.flush()
+    asset = Asset(
+        asset_tag="ACT-EXP-0001", category_id=category.id, name="Multímetro", responsible_user_id=user_id,
+        warranty_expiration=TODAY + timedelta(days=12)
+    )
+    db.add(asset)
+    db.flush()
+    # 20 days left: the run on the 30-day mark was missed
+    upcoming = AssetCalibration(
+        asset_id=asset.id, calibration_date=TODAY - timedelta(days=340),
+        expiration_date=TODAY + timedelta(days=20), status=CalibrationStatus.VIGENTE
+    )
+    expired = AssetCalibration(
+        asset_id=asset.id, calibration_date=TODAY - timedelta(days=400),
+        expiration_date=TODAY - timedelta(days=3), status=CalibrationStatus.PROXIMO_A_VENCER
+    )
+    db.add_all([upcoming, expired])
+    db.commit()
+
+    assert AssetService.run_daily_checks(db) == 3
+    db.refresh(upcoming)
+    db.refresh(expired)
+    assert (upcoming.status, expired.status) == (CalibrationStatus.PROXIMO_A_VENCER, CalibrationStatus.VENCIDO)
+    assert titles(db, user_id) == [
+        "Alerta de Calibración: Multímetro (ACT-EXP-0001)", "Calibración Vencida: Multímetro (ACT-EXP-0001)",
+        "Garantía por Vencer: Multímetro (ACT-EXP-0001)"
+    ]
+
+    # Each alert is sent once per threshold, not once per day
+    assert AssetService.run_daily_checks(db) == 0
+    for notification in db.query(Notification):
+        notification.created_at -= timedelta(days=3)
+    db.commit()
+    assert AssetService.run_daily_checks(db) == 0
+
+    # Crossing the 15-day threshold sends the next reminder
+    upcoming.expiration_date = TODAY + timedelta(days=14)
+    db.commit()
+    assert AssetService.run_daily_checks(db) == 1
+
+
+def test_asset_alerts_of_same_named_assets_are_all_sent(db, user_id):
+    db.query(Notification).delete()
+    category = AssetCategory(code="EXP-DUP", name="Duplicados", asset_type=AssetType.EQUIPO_MEDICION)
+    db.add(category)
+    db.flush()
+    db.add_all([
+        Asset(
+            asset_tag=f"ACT-DUP-000{i}", category_id=category.id, name="Balanza", responsible_user_id=user_id,
+            warranty_expiration=TODAY + timedelta(days=10)
+        ) for i in range(2)
+    ])
+    db.commit()
+
+    assert AssetService.run_daily_checks(db) == len(titles(db, user_id))
+    assert [title for title in titles(db, user_id) if "Balanza" in title] == [
+        "Garantía por Vencer: Balanza (ACT-DUP-0000)", "Garantía por Vencer: Balanza (ACT-DUP-0001)"
+    ]
+
+
+def test_expiring_batches_alert_admins_once(db, user_id, product):
+    db.query(Notification).delete()
+    db.add_all([
+        ProductBatch(product_id=product.id, batch_number="L-EXP-1", expiration_date=TODAY + timedelta(days=5), quantity=4),
+        ProductBatch(product_id=product.id, batch_number="L-EXP-2", expiration_date=TODAY - timedelta(days=1), quantity=2),
+        ProductBatch(product_id=product.id, batch_number="L-EXP-3", expiration_date=TODAY + timedelta(days=5), quantity=0),
+        ProductBatch(product_id=product.id, batch_number="L-EXP-4", expiration_date=TODAY + timedelta(days=90), quantity=9),
+    ])
+    db.commit()
+
+    assert expiration_service.expiration_recipients(db) == [user_id]
+    assert expiration_service.check_expiring_batches(db) == 2
+    assert titles(db, user_id) == ["Lote Vencido: Taladro (L-EXP-2)", "Lote por Vencer: Taladro (L-EXP-1)"]
+    assert expiration_service.check_expiring_batches(db) == 0
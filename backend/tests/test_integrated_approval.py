@@ -0,0 +1,126 @@
+import pytest
+from sqlalchemy import event
+
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestPurpose, IntegratedRequestStatus, RequestItem, RequestTool,
+    RequestTracking, RequestTrackingAction, RequestTrackingItemType, RequestVehicle
+)
+from app.models.inventory_refs import Condition
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.product import Product
+from app.models.tool import Tool, ToolStatus
+from app.models.user import User
+from app.models.vehicle import Vehicle
+from app.services.integrated_request_service import IntegratedRequestService
+
+
+@pytest.fixture(scope="module")
+def approval_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    product = Product(sku="APR-001", name="Guantes", category_id=1, unit_id=1)
+    condition = Condition(name="APR-NEW")
+    db.add_all([product, condition])
+    db.flush()
+    db.add(LedgerEntry(
+        movement_request_id=0, product_id=product.id, warehouse_id=1, entry_type=LedgerEntryType.INCREMENT,
+        quantity=10, previous_balance=0, new_balance=10, applied_by=user.id
+    ))
+    db.commit()
+    return {"user": user, "product": product, "condition": condition}
+
+
+def pending_request(db, data, number, quantity=1, tools=0, assigned_tools=0, vehicle=False):
+    request = IntegratedRequest(
+        request_number=number, requested_by=data["user"].id, purpose=IntegratedRequestPurpose.OBRA,
+        status=IntegratedRequestStatus.PENDIENTE
+    )
+    request.items.append(RequestItem(product_id=data["product"].id, quantity_requested=quantity))
+    for i in range(tools + assigned_tools):
+        tool = Tool(
+            product_id=data["product"].id, serial_number=f"{number}-T{i}", condition_id=data["condition"].id,
+            status=ToolStatus.ASSIGNED if i >= tools else ToolStatus.AVAILABLE
+        )
+        db.add(tool)
+        db.flush()
+        request.tools.append(RequestTool(tool_id=tool.id))
+    if vehicle:
+        car = Vehicle(vin=f"VIN-{number}", license_plate=number[-8:], brand="Nissan", model="NP300", year=2024,
+                      status="MAINTENANCE")
+        db.add(car)
+        db.flush()
+        request.vehicles.append(RequestVehicle(vehicle_id=car.id))
+    db.add(request)
+    db.commit()
+    return request
+
+
+def count_queries(db, func):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        func()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return len(statements)
+
+
+def test_bulk_approve_shares_stock_and_notes_unavailable_lines(client, db, super_admin_token, approval_data):
+    first = pending_request(db, approval_data, "SOL-APR-1", quantity=6, tools=1, assigned_tools=1)
+    second = pending_request(db, approval_data, "SOL-APR-2", quantity=8, vehicle=True)
+    draft = IntegratedRequest(
+        request_number="SOL-APR-3", requested_by=approval_data["user"].id, purpose=IntegratedRequestPurpose.OBRA
+    )
+    db.add(draft)
+    db.commit()
+
+    response = client.post(
+        "/requests/integrated/bulk-approve",
+        json={"request_ids": [first.id, second.id, draft.id, 999999]},
+        headers={"Authorization": f"Bearer {super_admin_token}"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["approved"] == [first.id, second.id]
+    assert body["skipped"] == [
+        {"request_id": draft.id, "reason": "Request is not pending"},
+        {"request_id": 999999, "reason": "Request not found"},
+    ]
+
+    db.expire_all()
+    assert first.status == second.status == IntegratedRequestStatus.APROBADA
+    # 10 in stock: the second request gets what the first one left
+    assert (first.items[0].quantity_approved, second.items[0].quantity_approved) == (6, 4)
+
+    notes = sorted(
+        (t.item_type, t.notes) for t in db.query(RequestTracking).filter(
+            RequestTracking.request_id.in_([first.id, second.id]),
+            RequestTracking.action == RequestTrackingAction.APROBADO
+        )
+    )
+    assert notes == sorted([
+        (RequestTrackingItemType.PRODUCTO, "Solicitud Aprobada"),
+        (RequestTrackingItemType.PRODUCTO, "Solicitud Aprobada"),
+        (RequestTrackingItemType.HERRAMIENTA, "No disponible (ASSIGNED)"),
+        (RequestTrackingItemType.PRODUCTO, "Aprobado 4 de 8 (stock insuficiente)"),
+        (RequestTrackingItemType.VEHICULO, "No disponible (MAINTENANCE)"),
+    ])
+
+    with pytest.raises(Exception) as exc:
+        IntegratedRequestService.approve_request(db, first.id, approval_data["user"].id)
+    assert exc.value.status_code == 400
+
+
+def test_approval_queries_do_not_grow_with_lines(db, approval_data):
+    small = pending_request(db, approval_data, "SOL-APR-S", tools=2, assigned_tools=1)
+    large = pending_request(db, approval_data, "SOL-APR-L", tools=40, assigned_tools=10)
+    user_id = approval_data["user"].id
+
+    queries = [
+        count_queries(db, lambda: IntegratedRequestService.approve_request(db, request.id, user_id))
+        for request in (small, large)
+    ]
+    assert queries[0] == queries[1]
+    assert db.query(RequestTracking).filter(
+        RequestTracking.request_id == large.id, RequestTracking.item_type == RequestTrackingItemType.HERRAMIENTA
+    ).count() == 10
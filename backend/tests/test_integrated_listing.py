@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import event
+
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestPurpose, IntegratedRequestStatus, RequestItem, RequestItemStatus,
+    RequestTool, RequestTracking, RequestTrackingAction, RequestTrackingItemType
+)
+from app.models.inventory_refs import Condition
+from app.models.product import Product
+from app.models.tool import Tool
+from app.models.user import User
+
+
+@pytest.fixture(scope="module")
+def listing_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    product = Product(sku="LST-001", name="Casco", category_id=1, unit_id=1)
+    condition = Condition(name="LST-NEW")
+    db.add_all([product, condition])
+    db.commit()
+    return {"user": user, "product": product, "condition": condition, "count": 0}
+
+
+def add_requests(db, data, count, status=IntegratedRequestStatus.PENDIENTE):
+    for _ in range(count):
+        data["count"] += 1
+        number = f"SOL-LST-{data['count']}"
+        request = IntegratedRequest(
+            request_number=number, requested_by=data["user"].id, purpose=IntegratedRequestPurpose.OBRA,
+            status=status
+        )
+        request.items.append(RequestItem(product_id=data["product"].id, quantity_requested=2))
+        request.items.append(RequestItem(
+            product_id=data["product"].id, quantity_requested=1, status=RequestItemStatus.APROBADO
+        ))
+        tool = Tool(product_id=data["product"].id, serial_number=f"{number}-T", condition_id=data["condition"].id)
+        db.add(tool)
+        db.flush()
+        request.tools.append(RequestTool(tool_id=tool.id))
+        request.tracking.append(RequestTracking(
+            item_type=RequestTrackingItemType.PRODUCTO, item_id=0, action=RequestTrackingAction.SOLICITADO,
+            performed_by=data["user"].id
+        ))
+        db.add(request)
+    db.commit()
+
+
+def get(client, db, token, params):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        response = client.get("/requests/integrated/", params=params, headers={"Authorization": f"Bearer {token}"})
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert response.status_code == 200
+    return response.json(), len(statements)
+
+
+def test_listing_queries_do_not_grow_with_page_size(client, db, super_admin_token, listing_data):
+    add_requests(db, listing_data, 2)
+    full, full_queries = get(client, db, super_admin_token, {})
+    brief, brief_queries = get(client, db, super_admin_token, {"summary": True})
+    assert len(full) == len(brief) == 2
+    assert len(full[0]["items"]) == 2 and len(full[0]["tracking"]) == 1
+
+    add_requests(db, listing_data, 10)
+    assert get(client, db, super_admin_token, {})[1] == full_queries
+    assert get(client, db, super_admin_token, {"summary": True})[1] == brief_queries
+
+
+def test_summary_counts_and_filters(client, db, super_admin_token, listing_data):
+    add_requests(db, listing_data, 1, status=IntegratedRequestStatus.APROBADA)
+
+    rows, _ = get(client, db, super_admin_token, {"summary": True, "status": "aprobada"})
+    assert [row["request_number"] for row in rows] == [f"SOL-LST-{listing_data['count']}"]
+    assert "items" not in rows[0]
+    assert rows[0]["line_counts"] == {"items": 2, "tools": 1, "epp_items": 0, "vehicles": 0}
+    assert rows[0]["status_counts"]["items"] == {"pendiente": 1, "aprobado": 1}
+    assert rows[0]["status_counts"]["tools"] == {"pendiente": 1}
+
+    rows, _ = get(client, db, super_admin_token, {"summary": True, "requested_by": listing_data["user"].id + 1000})
+    assert rows == []
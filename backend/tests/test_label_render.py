@@ -0,0 +1,44 @@
+import barcode
+import pytest
+from app.services.barcode_generator import BarcodeGenerator
+from app.services.pdf_generator import generate_label_pdf, generate_batch_labels_pdf
+
+
+@pytest.mark.parametrize("label_type", ["code128", "code39", "ean13"])
+def test_linear_modules_match_encoder(label_type):
+    data = "7501234567890" if label_type == "ean13" else "LOC-A-01"
+    cols, rows, runs = BarcodeGenerator.vector_modules(data, label_type)
+
+    symbol = barcode.get_barcode_class(label_type)(BarcodeGenerator.ean13_digits(data) if label_type == "ean13" else data)
+    pattern = symbol.build()[0]
+    assert (cols, rows) == (len(pattern), 1)
+
+    drawn = ["0"] * cols
+    for x, _, width, _ in runs:
+        drawn[x:x + width] = "1" * width
+    assert "".join(drawn) == pattern
+
+
+def test_qr_modules_are_square():
+    cols, rows, runs = BarcodeGenerator.vector_modules("SKU-000123", "QR")
+    assert cols == rows == 21
+    # Finder pattern: the top row starts with a run of 7 dark modules
+    assert runs[0] == (0, 0, 7, 1)
+    assert BarcodeGenerator.vector_modules("SKU-000123", "unknown") == (cols, rows, runs)
+
+
+@pytest.mark.parametrize("label_type", ["qr", "code128", "code39", "ean13"])
+def test_vector_labels_embed_no_images(label_type):
+    data = {"sku": "SKU-1", "product_name": "Product", "barcode": "7501234567890"}
+    vector = generate_label_pdf(data, label_type=label_type, render_mode="vector")
+    raster = generate_label_pdf(data, label_type=label_type, render_mode="raster")
+
+    assert b"/Subtype /Image" not in vector
+    assert b"/Subtype /Image" in raster
+
+
+def test_vector_batch_labels():
+    items = [{"sku": f"SKU-{i}"} for i in range(30)]
+    pdf = generate_batch_labels_pdf(items, label_type="code128", render_mode="vector")
+    assert pdf.startswith(b"%PDF")
+    assert b"/Subtype /Image" not in pdf
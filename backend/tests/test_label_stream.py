@@ -0,0 +1,78 @@
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from reportlab.pdfbase.pdfmetrics import standardFonts
+import pytest
+from app.services.label_stream import PageCanvas, purge_label_jobs, stream_batch_labels_pdf
+from app.services.pdf_generator import PDFLabelGenerator
+
+
+def check_xref(pdf: bytes) -> int:
+    """Every xref entry points at its object; returns the object count."""
+    start = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    match = re.match(rb"xref\n0 (\d+)\n", pdf[start:])
+    size = int(match.group(1))
+    entries = pdf[start + match.end():].split(b"\n")[:size]
+    for obj_id, entry in enumerate(entries[1:], start=1):
+        assert pdf[int(entry[:10]):].startswith(b"%d 0 obj" % obj_id)
+    return size
+
+
+def test_stream_is_a_valid_pdf_in_page_order():
+    items = [{"product_name": f"Producto ({i})", "sku": f"SKU-{i:04d}"} for i in range(100)]
+    per_page = PDFLabelGenerator().labels_per_page()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        chunks = list(stream_batch_labels_pdf(
+            items, label_type="code128", copies_per_label=2, executor=executor, workers=2
+        ))
+    pdf = b"".join(chunks)
+
+    pages = -(-200 // per_page)
+    assert pdf.startswith(b"%PDF-1.4")
+    assert b"/Count %d" % pages in pdf
+    # header, one chunk per page, trailer
+    assert len(chunks) == pages + 2
+    assert check_xref(pdf) == 4 + 2 * pages + 1
+
+    first = chunks[1]
+    content = zlib.decompress(first[first.index(b"stream\n") + 7:first.index(b"\nendstream")])
+    assert b"(Producto \\(0\\)) Tj" in content
+    assert b"(Producto \\(%d\\)) Tj" % (per_page // 2 - 1) in content
+    assert b"(Producto \\(%d\\)) Tj" % (per_page // 2) not in content
+
+
+def test_stream_with_process_pool():
+    pdf = b"".join(stream_batch_labels_pdf([{"sku": "SKU-1"}], label_type="qr"))
+    assert check_xref(pdf) == 4 + 2 + 1
+    assert b"/BaseFont /Helvetica" in pdf
+
+
+def test_page_canvas_falls_back_to_standard_font():
+    page = PageCanvas()
+    page.setFont("Comic Sans", 8)
+    page.drawString(1, 2, "Año")
+    assert page.fonts == {"Helvetica"}
+    font = standardFonts.index("Helvetica") + 1
+    assert zlib.decompress(page.content()) == b"BT /F%d 8 Tf 1 2 Td (A\xf1o) Tj ET" % font
+
+
+def test_stream_rejects_raster_before_streaming():
+    with pytest.raises(ValueError):
+        stream_batch_labels_pdf([{"sku": "SKU-1"}], render_mode="raster")
+
+
+def test_purge_removes_only_expired_jobs(tmp_path):
+    old = tmp_path / "labels_batch_old.pdf"
+    fresh = tmp_path / "labels_batch_new.pdf.part"
+    other = tmp_path / "keep.txt"
+    for path in (old, fresh, other):
+        path.write_bytes(b"x")
+    stale = time.time() - 7200
+    os.utime(old, (stale, stale))
+    os.utime(other, (stale, stale))
+
+    assert purge_label_jobs(str(tmp_path), 3600) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["keep.txt", "labels_batch_new.pdf.part"]
@@ -10,6 +10,7 @@ from app.models.inventory_refs import Category, Unit
 from app.models.label import LabelTemplate, LabelType
 from app.core import security
 from app.api import deps
+from app.api.endpoints import labels as labels_endpoints
 from main import app
 import time
 
@@ -244,6 +245,17 @@ class TestLabelGeneration:
         )
         assert response.status_code == 200
 
+    def test_generate_product_label_zpl(self, client, super_admin_token):
+        response = client.get(
+            "/inventory/labels/product/1?label_type=code128&output_format=zpl",
+            headers={"Authorization": f"Bearer {super_admin_token}"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text.startswith("^XA")
+        assert "^BCN" in response.text and "^FD1234567890^FS" in response.text
+        assert len(response.content) < 1000
+
     def test_generate_custom_label(self, client, super_admin_token):
         response = client.post(
             "/inventory/labels/generate",
@@ -273,6 +285,55 @@ class TestLabelGeneration:
             }
         )
         assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["x-label-count"] == "4"
+        assert response.content.startswith(b"%PDF")
+        assert response.content.rstrip().endswith(b"%%EOF")
+
+    def test_batch_print_epl(self, client, super_admin_token):
+        response = client.post(
+            "/inventory/labels/batch-print",
+            headers={"Authorization": f"Bearer {super_admin_token}"},
+            json={
+                "items": [{"product_name": f"Product {i}", "sku": f"P{i}"} for i in range(50)],
+                "copies_per_label": 2,
+                "output_format": "epl"
+            }
+        )
+        assert response.status_code == 200
+        assert response.headers["x-label-count"] == "100"
+        assert response.text.count("\nP2\n") == 50
+
+    def test_batch_print_job(self, client, super_admin_token, tmp_path, monkeypatch):
+        monkeypatch.setattr(labels_endpoints, "LABELS_DIR", str(tmp_path))
+        headers = {"Authorization": f"Bearer {super_admin_token}"}
+        response = client.post(
+            "/inventory/labels/batch-print",
+            headers=headers,
+            json={"items": [{"product_name": "Product 1", "sku": "P1"}], "copies_per_label": 3, "job": True}
+        )
+        assert response.status_code == 200
         data = response.json()
-        assert data["success"] == True
-        assert data["label_count"] == 4
+        assert data["label_count"] == 3
+        assert data["download_url"] == f"/inventory/labels/jobs/{data['job_id']}/download"
+
+        # The background task has run by the time the test client returns
+        status = client.get(data["status_url"], headers=headers).json()
+        assert status["status"] == "completed"
+        assert (tmp_path / data["filename"]).read_bytes().startswith(b"%PDF")
+        assert client.get("/inventory/labels/jobs/not-a-job", headers=headers).status_code == 404
+
+        # Only served through the authenticated endpoint
+        download = client.get(data["download_url"], headers=headers)
+        assert download.status_code == 200
+        assert download.content.startswith(b"%PDF")
+        assert client.get(data["download_url"]).status_code == 401
+        assert client.get(f"/uploads/labels/{data['filename']}").status_code == 404
+
+    def test_batch_print_rejects_raster(self, client, super_admin_token):
+        response = client.post(
+            "/inventory/labels/batch-print",
+            headers={"Authorization": f"Bearer {super_admin_token}"},
+            json={"items": [{"product_name": "Product 1", "sku": "P1"}], "render_mode": "raster"}
+        )
+        assert response.status_code == 400
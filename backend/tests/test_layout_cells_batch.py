@@ -0,0 +1,74 @@
+import time
+import pytest
+from app.models.user import User
+from app.models.warehouse import Warehouse
+from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType
+from app.schemas.warehouse_layout import LayoutCellCreate, LayoutCellUpdate
+from app.crud import warehouse_layout as crud_layout
+
+
+@pytest.fixture(scope="module")
+def batch_layout(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-CELLS", name="Cells WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+    layout = WarehouseLayout(warehouse_id=wh.id, name="Cells layout", grid_rows=5, grid_cols=5, created_by=user.id, created_at=int(time.time()))
+    db.add(layout)
+    db.commit()
+    return {"user": user, "warehouse": wh, "layout": layout}
+
+
+def make_cell(row, col, **kwargs):
+    return LayoutCellCreate(row=row, col=col, x=col * 10, y=row * 10, width=10, height=10, **kwargs)
+
+
+def test_create_cells_batch_skips_taken_positions(db, batch_layout):
+    layout_id = batch_layout["layout"].id
+    crud_layout.create_cells_batch(db, layout_id, [make_cell(0, 0)])
+
+    created = crud_layout.create_cells_batch(db, layout_id, [
+        make_cell(0, 0),
+        make_cell(0, 1, cell_type=CellType.RACK, metadata={"levels": 4}),
+        make_cell(0, 1),
+        make_cell(1, 0, name="Dock"),
+    ])
+
+    assert [(c.row, c.col) for c in created] == [(0, 1), (1, 0)]
+    assert all(c.id for c in created)
+    assert created[0].cell_type == CellType.RACK
+    assert created[0].metadata == {"levels": 4}
+    assert created[1].name == "Dock"
+    assert db.query(LayoutCell).filter(LayoutCell.layout_id == layout_id).count() == 3
+
+
+def test_update_cells_batch(db, batch_layout):
+    layout_id = batch_layout["layout"].id
+    updated = crud_layout.update_cells_batch(db, layout_id, [
+        LayoutCellUpdate(row=0, col=0, cell_type=CellType.SHIPPING),
+        LayoutCellUpdate(row=1, col=0, name="Dock 2", color="#00ff00"),
+        LayoutCellUpdate(row=4, col=4, name="Missing"),
+        LayoutCellUpdate(name="No position"),
+    ])
+
+    assert [(c.row, c.col) for c in updated] == [(0, 0), (1, 0)]
+    assert updated[0].cell_type == CellType.SHIPPING
+    assert updated[1].name == "Dock 2"
+    assert updated[1].color == "#00ff00"
+    # Fields not sent are left alone
+    assert crud_layout.get_cell_by_position(db, layout_id, 0, 1).metadata == {"levels": 4}
+
+
+def test_generate_and_import_layout(db, batch_layout):
+    layout_id = batch_layout["layout"].id
+    cells = crud_layout.generate_empty_layout(db, layout_id, rows=40, cols=50, cell_width=2, cell_height=3)
+    assert len(cells) == 2000
+    assert (cells[-1].row, cells[-1].col, cells[-1].x, cells[-1].y) == (39, 49, 98, 117)
+    assert db.query(LayoutCell).filter(LayoutCell.layout_id == layout_id).count() == 2000
+
+    data = crud_layout.export_layout(db, layout_id)
+    data["cells"][0]["cell_type"] = CellType.RECEIVING.value
+    imported = crud_layout.import_layout(db, batch_layout["warehouse"].id, data, batch_layout["user"].id)
+
+    assert db.query(LayoutCell).filter(LayoutCell.layout_id == imported.id).count() == 2000
+    assert crud_layout.get_cell_by_position(db, imported.id, 0, 0).cell_type == CellType.RECEIVING
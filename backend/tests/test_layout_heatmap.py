@@ -0,0 +1,104 @@
+import asyncio
+import time
+import pytest
+from app.models.user import User
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType, OccupancyLevel
+from app.crud import warehouse_layout as crud_layout
+from app.schemas.product_location import ProductRelocationRequest
+from app.api.endpoints import products as products_endpoints
+from app.services.location_service import assign_product_to_location
+
+
+@pytest.fixture(scope="module")
+def heatmap_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-HEAT", name="Heatmap WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+
+    prods = [Product(sku=f"HEAT-00{i}", name=f"Heat Product {i}", category_id=1, unit_id=1) for i in range(2)]
+    db.add_all(prods)
+    locs = [StorageLocation(warehouse_id=wh.id, code=f"H-0{i}", name=f"H-0{i}", capacity=100) for i in range(2)]
+    db.add_all(locs)
+    db.commit()
+
+    # H-00 holds both products (80 units), H-01 is empty
+    for prod, qty in zip(prods, (50, 30)):
+        db.add(ProductLocationAssignment(product_id=prod.id, location_id=locs[0].id, warehouse_id=wh.id, quantity=qty))
+
+    now = int(time.time())
+    layout = WarehouseLayout(warehouse_id=wh.id, name="Heat layout", grid_rows=2, grid_cols=2, created_by=user.id, created_at=now)
+    db.add(layout)
+    db.commit()
+    cells = [
+        (0, 0, locs[0].id, 0, OccupancyLevel.EMPTY),
+        (0, 1, locs[1].id, 0, OccupancyLevel.EMPTY),
+        # Unlinked cell keeps the occupancy stored on it
+        (1, 0, None, 55, OccupancyLevel.MEDIUM),
+        (1, 1, None, 0, OccupancyLevel.EMPTY),
+    ]
+    for row, col, location_id, pct, level in cells:
+        db.add(LayoutCell(
+            layout_id=layout.id, row=row, col=col, x=col, y=row, width=1, height=1, cell_type=CellType.STORAGE,
+            linked_location_id=location_id, occupancy_percentage=pct, occupancy_level=level, created_at=now
+        ))
+    db.commit()
+    crud_layout.invalidate_heatmap()
+    return {"user": user, "warehouse": wh, "products": prods, "locations": locs, "layout": layout}
+
+
+def test_heatmap_live_occupancy(db, heatmap_data):
+    heatmap = crud_layout.get_heatmap_data(db, heatmap_data["layout"].id)
+    cells = {(c["row"], c["col"]): c for c in heatmap["cells"]}
+
+    assert cells[(0, 0)]["occupancy_percentage"] == 80
+    assert cells[(0, 0)]["occupancy_level"] == OccupancyLevel.HIGH.value
+    assert cells[(0, 0)]["product_count"] == 2
+    assert cells[(0, 1)]["occupancy_level"] == OccupancyLevel.EMPTY.value
+    assert cells[(1, 0)]["occupancy_percentage"] == 55
+    assert cells[(1, 0)]["occupancy_level"] == OccupancyLevel.MEDIUM.value
+    assert heatmap["total_occupancy"] == 135
+    assert heatmap["average_occupancy"] == 33.75
+
+
+def test_heatmap_cached_until_stock_event(db, heatmap_data):
+    layout_id = heatmap_data["layout"].id
+    first = crud_layout.get_heatmap_data(db, layout_id)
+    assert crud_layout.get_heatmap_data(db, layout_id) is first
+
+    # A stock event on another warehouse does not drop the heatmap
+    crud_layout.invalidate_heatmap(warehouse_id=heatmap_data["warehouse"].id + 1000, location_ids=[1])
+    assert crud_layout.get_heatmap_data(db, layout_id) is first
+
+    loc = heatmap_data["locations"][1]
+    asyncio.run(assign_product_to_location(
+        db, heatmap_data["products"][0].id, loc.id, 95, heatmap_data["user"].id
+    ))
+    heatmap = crud_layout.get_heatmap_data(db, layout_id)
+    assert heatmap is not first
+    cell = next(c for c in heatmap["cells"] if (c["row"], c["col"]) == (0, 1))
+    assert cell["occupancy_level"] == OccupancyLevel.FULL.value
+
+
+def test_heatmap_dropped_by_relocation(db, heatmap_data, monkeypatch):
+    layout_id = heatmap_data["layout"].id
+    source, dest = heatmap_data["locations"][1], heatmap_data["locations"][0]
+    first = crud_layout.get_heatmap_data(db, layout_id)
+
+    # Role levels of the test fixtures are below the product write level
+    monkeypatch.setattr(products_endpoints, "check_permissions", lambda user: None)
+    products_endpoints.relocate_product(
+        heatmap_data["products"][0].id,
+        ProductRelocationRequest(from_location_id=source.id, to_location_id=dest.id, quantity=5),
+        db=db,
+        current_user=heatmap_data["user"],
+    )
+
+    heatmap = crud_layout.get_heatmap_data(db, layout_id)
+    assert heatmap is not first
+    cell = next(c for c in heatmap["cells"] if (c["row"], c["col"]) == (0, 0))
+    assert cell["occupancy_percentage"] == 85
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.models.user import User
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.schemas.product_location import ProductRelocationRequest
+from app.services import location_service
+from app.api.endpoints import products as products_endpoints
+
+
+@pytest.fixture(scope="module")
+def occupancy_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-OCC", name="Occupancy WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+
+    prod = Product(sku="OCC-001", name="Occupancy Product", category_id=1, unit_id=1)
+    db.add(prod)
+    locs = [StorageLocation(warehouse_id=wh.id, code=f"O-0{i}", name=f"O-0{i}", capacity=100) for i in range(2)]
+    db.add_all(locs)
+    db.commit()
+    return {"user": user, "warehouse": wh, "product": prod, "locations": locs}
+
+
+def test_assignment_changes_keep_occupancy(db, occupancy_data):
+    prod, user = occupancy_data["product"], occupancy_data["user"]
+    loc = occupancy_data["locations"][0]
+
+    asyncio.run(location_service.assign_product_to_location(db, prod.id, loc.id, 60, user.id))
+    assert loc.current_occupancy == 60
+    asyncio.run(location_service.assign_product_to_location(db, prod.id, loc.id, -15, user.id))
+    assert loc.current_occupancy == 45
+
+    # The capacity check reads the maintained column
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(location_service.assign_product_to_location(db, prod.id, loc.id, 56, user.id))
+    assert exc.value.status_code == 400
+    assert loc.current_occupancy == 45
+
+
+def test_relocate_moves_occupancy(db, occupancy_data, monkeypatch):
+    prod = occupancy_data["product"]
+    source, dest = occupancy_data["locations"]
+
+    # Role levels of the test fixtures are below the product write level
+    monkeypatch.setattr(products_endpoints, "check_permissions", lambda user: None)
+    products_endpoints.relocate_product(
+        prod.id,
+        ProductRelocationRequest(from_location_id=source.id, to_location_id=dest.id, quantity=20),
+        db=db,
+        current_user=occupancy_data["user"],
+    )
+
+    db.refresh(source)
+    db.refresh(dest)
+    assert (source.current_occupancy, dest.current_occupancy) == (25, 20)
+    assert location_service.reconcile_location_occupancy(db, occupancy_data["warehouse"].id) == []
+
+
+def test_reconcile_reports_and_fixes_drift(db, occupancy_data):
+    wh_id = occupancy_data["warehouse"].id
+    source, dest = occupancy_data["locations"]
+    source.current_occupancy = 70
+    db.add(ProductLocationAssignment(
+        product_id=occupancy_data["product"].id, location_id=dest.id, warehouse_id=wh_id, quantity=5, batch_id=None
+    ))
+    db.commit()
+
+    drift = location_service.reconcile_location_occupancy(db, wh_id, fix=False)
+    assert [(d["location_id"], d["recorded"], d["actual"], d["drift"]) for d in drift] == [
+        (source.id, 70, 25, 45),
+        (dest.id, 20, 25, -5),
+    ]
+    db.refresh(source)
+    assert source.current_occupancy == 70
+
+    assert len(location_service.reconcile_location_occupancy(db, wh_id)) == 2
+    db.refresh(source)
+    db.refresh(dest)
+    assert (source.current_occupancy, dest.current_occupancy) == (25, 25)
+    assert location_service.reconcile_location_occupancy(db, wh_id, fix=False) == []
+
+
+def test_tree_cache_refreshed_after_commit_only(db, occupancy_data):
+    wh_id = occupancy_data["warehouse"].id
+    loc = occupancy_data["locations"][0]
+    occupancy = lambda: next(n for n in location_service.get_location_tree(db, wh_id) if n["id"] == loc.id)["current_occupancy"]
+    before = occupancy()
+
+    # An uncommitted write leaves the cached (committed) tree in place
+    location_service.adjust_location_occupancy(db, wh_id, loc.id, 5)
+    assert wh_id in location_service._tree_cache
+    db.rollback()
+
+    asyncio.run(location_service.assign_product_to_location(
+        db, occupancy_data["product"].id, loc.id, 5, occupancy_data["user"].id
+    ))
+    assert occupancy() == before + 5
+
+
+def test_reconcile_keeps_concurrent_increments(db, occupancy_data, monkeypatch):
+    wh_id = occupancy_data["warehouse"].id
+    loc = occupancy_data["locations"][1]
+    loc.current_occupancy = 999
+    db.commit()
+    product_id, loc_id = occupancy_data["product"].id, loc.id
+
+    execute = db.execute
+    calls = []
+
+    def execute_then_write(*args, **kwargs):
+        result = execute(*args, **kwargs)
+        if not calls:
+            calls.append(args)
+            # Another writer moves stock in after the drift report was read
+            db.add(ProductLocationAssignment(
+                product_id=product_id, location_id=loc_id, warehouse_id=wh_id, quantity=10, batch_id=None
+            ))
+            db.flush()
+            location_service.adjust_location_occupancy(db, wh_id, loc_id, 10)
+        return result
+
+    monkeypatch.setattr(db, "execute", execute_then_write)
+    assert len(location_service.reconcile_location_occupancy(db, wh_id)) == 1
+    monkeypatch.undo()
+    db.refresh(loc)
+    assert loc.current_occupancy == 35
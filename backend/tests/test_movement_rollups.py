@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud.movement import movement_request as crud_movement_request
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.movement import (
+    Movement, MovementDailyRollup, MovementRequest, MovementRequestItem, MovementStatus, MovementType
+)
+from app.models.product import Product
+from app.models.user import User
+from app.models.warehouse import Warehouse
+from app.services import rollup_service
+from app.services.report_service import ReportService
+
+
+@pytest.fixture(scope="module")
+def rollup_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    warehouse = Warehouse(code="WH-ROLL", name="Rollup WH", created_by=user.id)
+    products = [Product(sku=f"ROLL-00{i}", name=f"Rollup {i}", category_id=1, unit_id=1) for i in range(2)]
+    db.add_all([warehouse, *products])
+    db.commit()
+    return {"user": user, "warehouse": warehouse, "products": products}
+
+
+def apply_request(db, data, type, lines):
+    warehouse_id = data["warehouse"].id
+    request = MovementRequest(
+        request_number=f"MR-ROLL-{db.query(MovementRequest).count() + 1}", type=type,
+        status=MovementStatus.APPROVED, requested_by=data["user"].id,
+        source_warehouse_id=warehouse_id if type == MovementType.OUT else None,
+        destination_warehouse_id=warehouse_id if type == MovementType.IN else None
+    )
+    for product, quantity in lines:
+        request.items.append(MovementRequestItem(product_id=product.id, quantity=quantity))
+    db.add(request)
+    db.commit()
+    crud_movement_request.apply(db, request, data["user"].id)
+    return request
+
+
+def rollups(db):
+    return sorted(
+        (r.day, r.type, r.product_id, r.category_id, r.warehouse_id, r.movement_count, r.quantity)
+        for r in db.query(MovementDailyRollup)
+    )
+
+
+def test_reports_read_rollups_maintained_on_write(db, rollup_data):
+    # Movements written directly are rolled up on their own day
+    db.add(Movement(
+        type=MovementType.OUT, product_id=rollup_data["products"][1].id, warehouse_id=rollup_data["warehouse"].id,
+        quantity=-1, new_balance=0, created_at=datetime.now(timezone.utc) - timedelta(days=20)
+    ))
+    db.commit()
+
+    first, second = rollup_data["products"]
+    apply_request(db, rollup_data, MovementType.IN, [(first, 10), (second, 5)])
+    apply_request(db, rollup_data, MovementType.IN, [(first, 2)])
+    apply_request(db, rollup_data, MovementType.OUT, [(first, 4)])
+
+    assert [(r[1], r[2], r[5], r[6]) for r in rollups(db)[1:]] == sorted([
+        (MovementType.IN, first.id, 2, 12),
+        (MovementType.IN, second.id, 1, 5),
+        (MovementType.OUT, first.id, 1, -4),
+    ])
+    assert ReportService.get_movements_summary(db, "month")[-1] == {"type": "OUT", "count": 2, "total_quantity": 5}
+    summary = {r["type"]: (r["count"], r["total_quantity"]) for r in ReportService.get_movements_summary(db, "week")}
+    assert summary == {"IN": (3, 17), "OUT": (1, 4)}
+    assert {r["type"]: r["total_quantity"] for r in ReportService.get_movements_daily(db, 7)} == {"IN": 17, "OUT": 4}
+    assert [r["total_out"] for r in ReportService.get_inventory_turnover(db, 7)] == [4]
+
+    inventory = ReportService.get_inventory_summary(db)
+    # Balances after each product's latest movement: 12 - 4, and -1 + 5
+    assert inventory["total_items"] == 8 + 4
+
+
+def test_rebuild_matches_incremental_rollups(db, rollup_data):
+    first = rollup_data["products"][0]
+    request = apply_request(db, rollup_data, MovementType.IN, [(first, 1)])
+    # Stock ledger entries are rolled up under their request's type
+    db.add(LedgerEntry(
+        movement_request_id=request.id, product_id=first.id, warehouse_id=rollup_data["warehouse"].id,
+        entry_type=LedgerEntryType.DECREMENT, quantity=3, previous_balance=3, new_balance=0,
+        applied_by=rollup_data["user"].id
+    ))
+    # Both paths file an entry applied just before midnight UTC under that day
+    before_midnight = datetime.combine(
+        datetime.now(timezone.utc).date() - timedelta(days=3), datetime.max.time()
+    ).replace(microsecond=0)
+    db.add(LedgerEntry(
+        movement_request_id=request.id, product_id=first.id, warehouse_id=rollup_data["warehouse"].id,
+        entry_type=LedgerEntryType.INCREMENT, quantity=2, previous_balance=0, new_balance=2,
+        applied_by=rollup_data["user"].id, applied_at=before_midnight
+    ))
+    db.commit()
+    incremental = rollups(db)
+    assert (before_midnight.date(), MovementType.IN, first.id, 1, rollup_data["warehouse"].id, 1, 2) in incremental
+
+    db.query(MovementDailyRollup).delete()
+    db.commit()
+    assert rollup_service.rebuild(db) == len(incremental) == 5
+    db.commit()
+    assert rollups(db) == incremental
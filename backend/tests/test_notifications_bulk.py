@@ -0,0 +1,80 @@
+import pytest
+
+from app.models.notification import Notification, NotificationCounter, NotificationType
+from app.models.user import User
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def user_id(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    db.query(Notification).filter(Notification.user_id == user.id).delete()
+    db.query(NotificationCounter).filter(NotificationCounter.user_id == user.id).delete()
+    db.commit()
+    return user.id
+
+
+def make(user_id, title, related_request_id=None):
+    return {
+        "user_id": user_id,
+        "title": title,
+        "message": f"{title} mensaje",
+        "type": NotificationType.WARNING,
+        "related_request_id": related_request_id,
+    }
+
+
+def test_bulk_create_skips_notifications_already_sent_today(db, user_id):
+    NotificationService.create_notification(
+        db, user_id, "Préstamo vencido", "ya enviado", NotificationType.WARNING, related_request_id=None
+    )
+
+    created = NotificationService.create_notifications(db, [
+        make(user_id, "Préstamo vencido"),
+        make(user_id, "Préstamo por vencer"),
+        make(user_id, "Préstamo por vencer"),
+        make(user_id, "Préstamo por vencer", related_request_id=7),
+    ])
+    assert created == 2
+    assert db.query(Notification).filter(Notification.user_id == user_id).count() == 3
+
+    # Running the same batch again creates nothing
+    assert NotificationService.create_notifications(db, [make(user_id, "Préstamo por vencer")]) == 0
+
+
+def test_unread_counter_follows_reads(db, user_id):
+    # Rows written before the counter existed are picked up when it is seeded
+    db.add(Notification(user_id=user_id, title="Antigua", message="x", type=NotificationType.INFO))
+    db.commit()
+    assert NotificationService.get_unread_count(db, user_id) == 1
+
+    NotificationService.create_notifications(db, [make(user_id, f"Aviso {i}") for i in range(3)])
+    assert NotificationService.get_unread_count(db, user_id) == 4
+
+    notification = db.query(Notification).filter(Notification.user_id == user_id).first()
+    NotificationService.mark_as_read(db, notification.id, user_id)
+    NotificationService.mark_as_read(db, notification.id, user_id)
+    assert NotificationService.get_unread_count(db, user_id) == 3
+
+    assert NotificationService.mark_all_as_read(db, user_id) == 3
+    assert NotificationService.get_unread_count(db, user_id) == 0
+
+
+def test_unread_count_endpoint(client, db, user_id, super_admin_token):
+    NotificationService.create_notifications(db, [make(user_id, "Aviso 1"), make(user_id, "Aviso 2")])
+
+    response = client.get(
+        "/notifications/unread-count", headers={"Authorization": f"Bearer {super_admin_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"unread": 2}
+
+
+def test_lost_seed_race_keeps_our_delta(db, user_id):
+    # Another transaction seeded the counter from a COUNT that could not see our rows
+    db.add(NotificationCounter(user_id=user_id, unread=2))
+    db.commit()
+
+    NotificationService._seed_counters(db, {user_id: 5}, {user_id: 3})
+    db.commit()
+    assert NotificationService.get_unread_count(db, user_id) == 5
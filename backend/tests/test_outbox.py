@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.product import Product
+from app.models.purchase import PurchaseAlert, PurchaseAlertReason
+from app.models.system import ServiceLease
+from app.services import lease_service, outbox_service
+from app.services.outbox_service import OutboxDispatcher, outbox_handler
+from app.services.purchase_service import PurchaseService
+from app.services.stock_service import LOW_STOCK_CHECK_EVENT
+
+
+@pytest.fixture
+def dispatcher(db):
+    import app.services.outbox_handlers  # noqa: F401
+
+    db.query(OutboxEvent).delete()
+    db.query(ServiceLease).delete()
+    db.commit()
+    return OutboxDispatcher(session_factory=sessionmaker(bind=db.get_bind()), max_attempts=2)
+
+
+@pytest.fixture
+def delivered():
+    payloads = []
+
+    @outbox_handler("test.event")
+    async def collect(db, batch):
+        if any(p.get("fail") for p in batch):
+            raise RuntimeError("delivery failed")
+        payloads.extend(batch)
+
+    yield payloads
+    outbox_service._handlers.pop("test.event", None)
+
+
+def test_lease_has_single_holder(db):
+    assert lease_service.acquire_lease(db, "test-lease", "worker-a", 30)
+    assert not lease_service.acquire_lease(db, "test-lease", "worker-b", 30)
+    # The holder renews its own lease
+    assert lease_service.acquire_lease(db, "test-lease", "worker-a", 30)
+
+    lease_service.release_lease(db, "test-lease", "worker-a")
+    assert lease_service.acquire_lease(db, "test-lease", "worker-b", 30)
+
+
+def test_events_are_delivered_only_after_commit(db, dispatcher, delivered):
+    outbox_service.enqueue(db, "test.event", {"n": 0})
+    db.rollback()
+    outbox_service.enqueue(db, "test.event", {"n": 1})
+    outbox_service.enqueue(db, "test.event", {"n": 2})
+    db.commit()
+
+    assert asyncio.run(dispatcher.run_once()) == 2
+    assert delivered == [{"n": 1}, {"n": 2}]
+    assert {e.status for e in db.query(OutboxEvent).all()} == {OutboxStatus.DELIVERED}
+    # Nothing left to deliver
+    assert asyncio.run(dispatcher.run_once()) == 0
+
+
+def test_failed_event_is_retried_alone(db, dispatcher, delivered):
+    bad = outbox_service.enqueue(db, "test.event", {"fail": True})
+    outbox_service.enqueue(db, "test.event", {"n": 1})
+    db.commit()
+
+    assert asyncio.run(dispatcher.run_once()) == 1
+    assert delivered == [{"n": 1}]
+
+    db.refresh(bad)
+    assert bad.status == OutboxStatus.PENDING
+    assert bad.attempts == 1 and "delivery failed" in bad.last_error
+    assert bad.available_at > datetime.now()
+
+    # Due again: the second failure reaches max_attempts
+    bad.available_at = datetime.now()
+    db.commit()
+    asyncio.run(dispatcher.run_once())
+    db.refresh(bad)
+    assert (bad.status, bad.attempts) == (OutboxStatus.FAILED, 2)
+
+
+def test_only_the_leader_dispatches(db, dispatcher, delivered):
+    other = OutboxDispatcher(session_factory=dispatcher.session_factory)
+    assert lease_service.acquire_lease(db, outbox_service.OUTBOX_LEASE, other.holder, 30)
+
+    outbox_service.enqueue(db, "test.event", {"n": 1})
+    db.commit()
+    assert asyncio.run(dispatcher.run_once()) == 0
+    assert asyncio.run(other.run_once()) == 1
+    lease_service.release_lease(db, outbox_service.OUTBOX_LEASE, other.holder)
+
+
+def test_broadcasts_reach_every_worker(db, dispatcher):
+    other = OutboxDispatcher(session_factory=dispatcher.session_factory)
+    asyncio.run(dispatcher.fan_out_broadcasts(db))
+    asyncio.run(other.fan_out_broadcasts(db))
+
+    outbox_service.enqueue_broadcast(db, {"type": "stock_updated", "data": {"product_id": 1}})
+    db.commit()
+    with patch("app.services.outbox_service.manager.broadcast", new_callable=AsyncMock) as broadcast:
+        asyncio.run(dispatcher.run_once())
+        asyncio.run(other.run_once())
+        asyncio.run(dispatcher.run_once())
+
+    assert broadcast.call_count == 2
+    assert broadcast.call_args[0][0]["type"] == "stock_updated"
+
+
+def test_broadcast_committed_out_of_order_is_sent(db, dispatcher, monkeypatch):
+    asyncio.run(dispatcher.fan_out_broadcasts(db))
+    tail = dispatcher.broadcast_cursor
+
+    def commit_broadcast(event_id, n):
+        db.add(OutboxEvent(
+            id=event_id, event_type=outbox_service.BROADCAST_EVENT, payload={"n": n},
+            status=OutboxStatus.PENDING, available_at=datetime.now()
+        ))
+        db.commit()
+
+    with patch("app.services.outbox_service.manager.broadcast", new_callable=AsyncMock) as broadcast:
+        # The transaction holding tail + 1 commits after the one holding tail + 2
+        commit_broadcast(tail + 2, 2)
+        asyncio.run(dispatcher.fan_out_broadcasts(db))
+        commit_broadcast(tail + 1, 1)
+        asyncio.run(dispatcher.fan_out_broadcasts(db))
+        asyncio.run(dispatcher.fan_out_broadcasts(db))
+        assert [c.args[0] for c in broadcast.call_args_list] == [{"n": 2}, {"n": 1}]
+        assert dispatcher.broadcast_gaps == {}
+
+        # A gap left by a rolled back transaction is given up after the grace period
+        commit_broadcast(tail + 4, 4)
+        asyncio.run(dispatcher.fan_out_broadcasts(db))
+        assert list(dispatcher.broadcast_gaps) == [tail + 3]
+        monkeypatch.setattr(outbox_service, "BROADCAST_GAP_GRACE_SECONDS", 0)
+        asyncio.run(dispatcher.fan_out_broadcasts(db))
+        assert dispatcher.broadcast_gaps == {}
+        assert broadcast.call_count == 3
+
+
+def test_queued_purchase_alert(db, dispatcher):
+    product = Product(sku="OUTBOX-001", name="Outbox Product", category_id=1, unit_id=1)
+    db.add(product)
+    db.commit()
+
+    PurchaseService.queue_alert(db, PurchaseAlertReason.CONSUMED, product_id=product.id, quantity=3)
+    PurchaseService.queue_alert(db, PurchaseAlertReason.CONSUMED, product_id=product.id, quantity=2)
+    db.commit()
+    assert db.query(PurchaseAlert).filter(PurchaseAlert.product_id == product.id).count() == 0
+
+    asyncio.run(dispatcher.run_once())
+    alerts = db.query(PurchaseAlert).filter(PurchaseAlert.product_id == product.id).all()
+    assert [a.quantity_needed for a in alerts] == [5]
+
+
+def test_low_stock_check_uses_product_wide_balance(db, dispatcher):
+    product = Product(sku="OUTBOX-002", name="Low Stock Product", category_id=1, unit_id=1, min_stock=10)
+    db.add(product)
+    db.commit()
+
+    def move(warehouse_id, entry_type, quantity):
+        db.add(LedgerEntry(
+            movement_request_id=0, product_id=product.id, warehouse_id=warehouse_id, entry_type=entry_type,
+            quantity=quantity, previous_balance=0, new_balance=0, applied_by=1
+        ))
+        outbox_service.enqueue(db, LOW_STOCK_CHECK_EVENT, {"product_id": product.id})
+        db.commit()
+
+    def low_stock_alerts():
+        return db.query(PurchaseAlert).filter(
+            PurchaseAlert.product_id == product.id, PurchaseAlert.reason == PurchaseAlertReason.LOW_STOCK
+        ).count()
+
+    # One warehouse runs low while the product as a whole is well stocked
+    move(1, LedgerEntryType.INCREMENT, 100)
+    move(2, LedgerEntryType.INCREMENT, 8)
+    move(2, LedgerEntryType.DECREMENT, 3)
+    asyncio.run(dispatcher.run_once())
+    assert low_stock_alerts() == 0
+
+    move(1, LedgerEntryType.DECREMENT, 96)
+    asyncio.run(dispatcher.run_once())
+    assert low_stock_alerts() == 1
@@ -0,0 +1,109 @@
+import time
+import pytest
+from app.models.user import User
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.movement import MovementRequest, MovementRequestItem, MovementType, MovementStatus
+from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestPurpose, IntegratedRequestStatus, RequestItem, RequestItemStatus
+)
+from app.services.pick_route_service import LayoutGrid, PickRouteService
+
+
+def test_distance_uses_cross_aisles():
+    # Column 1 is a rack from row 1 to 8, rows 0 and 9 are cross aisles
+    blocked = {(r, 1) for r in range(1, 9)}
+    grid = LayoutGrid(10, 3, blocked, depot=(0, 0))
+    assert grid.cross_aisles == [0, 9]
+    # Same aisle: straight walk
+    assert grid.distance((2, 0), (7, 0)) == 5
+    # Different aisles: walk to the nearest cross aisle and back
+    assert grid.distance((2, 0), (3, 2)) == 2 + 2 + 3
+    # Rack cells are picked from the adjacent aisle
+    assert grid.access_point((4, 1)) == (4, 0)
+
+
+def test_optimize_beats_arbitrary_order():
+    grid = LayoutGrid(10, 10, set(), depot=(0, 0))
+    cells = [(9, 9), (0, 1), (9, 8), (0, 2), (9, 7)]
+    order, distance = PickRouteService.optimize(grid, cells)
+    assert sorted(order) == list(range(len(cells)))
+    assert distance == 36
+
+
+@pytest.fixture(scope="module")
+def route_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-ROUTE", name="Route WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+    prod = Product(sku="ROUTE-001", name="Route Product", category_id=1, unit_id=1)
+    db.add(prod)
+    db.commit()
+
+    locs = [StorageLocation(warehouse_id=wh.id, code=f"R-{i}", name=f"R-{i}", capacity=100) for i in range(3)]
+    db.add_all(locs)
+    db.commit()
+
+    now = int(time.time())
+    layout = WarehouseLayout(warehouse_id=wh.id, name="Route layout", grid_rows=10, grid_cols=10, created_by=user.id, created_at=now)
+    db.add(layout)
+    db.commit()
+    db.add(LayoutCell(layout_id=layout.id, row=0, col=0, x=0, y=0, width=1, height=1, cell_type=CellType.SHIPPING, created_at=now))
+    for loc, (row, col) in zip(locs, [(9, 9), (1, 1), (5, 5)]):
+        db.add(LayoutCell(
+            layout_id=layout.id, row=row, col=col, x=col, y=row, width=1, height=1,
+            cell_type=CellType.EMPTY, linked_location_id=loc.id, created_at=now
+        ))
+
+    request = MovementRequest(
+        type=MovementType.OUT, status=MovementStatus.APPROVED, source_warehouse_id=wh.id,
+        requested_by=user.id, request_number="OUT-ROUTE-1"
+    )
+    db.add(request)
+    db.commit()
+    for loc in locs:
+        db.add(MovementRequestItem(request_id=request.id, product_id=prod.id, quantity=1, source_location_id=loc.id))
+    db.commit()
+    return {"request": request, "locations": locs, "product": prod, "warehouse": wh, "user": user}
+
+
+def test_movement_pick_route(client, super_admin_token, route_data):
+    res = client.get(
+        f"/movements/requests/{route_data['request'].id}/pick-route",
+        headers={"Authorization": f"Bearer {super_admin_token}"}
+    )
+    assert res.status_code == 200
+    data = res.json()
+    locs = route_data["locations"]
+    assert data["depot"] == {"row": 0, "col": 0}
+    assert data["stops"] == 3
+    assert data["estimated_distance"] == 36
+    assert [i["location_id"] for i in data["items"]][0] == locs[1].id
+
+
+def test_integrated_route_does_not_reuse_stock(db, route_data):
+    locs = route_data["locations"]
+    prod = route_data["product"]
+    wh = route_data["warehouse"]
+    for loc in locs[:2]:
+        db.add(ProductLocationAssignment(product_id=prod.id, location_id=loc.id, warehouse_id=wh.id, quantity=5))
+    request = IntegratedRequest(
+        request_number="SOL-ROUTE-1", requested_by=route_data["user"].id, purpose=IntegratedRequestPurpose.OBRA,
+        status=IntegratedRequestStatus.APROBADA
+    )
+    for _ in range(2):
+        request.items.append(RequestItem(
+            product_id=prod.id, quantity_requested=4, quantity_approved=4, status=RequestItemStatus.APROBADO
+        ))
+    db.add(request)
+    db.commit()
+
+    route = PickRouteService.route_for_integrated_request(db, request.id, wh.id, allocation_policy="fewest_picks")
+    picked = {}
+    for line in route["items"]:
+        picked[line["location_id"]] = picked.get(line["location_id"], 0) + line["quantity"]
+    assert picked == {locs[0].id: 5, locs[1].id: 3}
@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app.models.user import User
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.movement import MovementRequest
+from app.models.integrated_request import (
+    IntegratedRequest, IntegratedRequestStatus, IntegratedRequestPurpose, RequestItem,
+    RequestItemStatus, RequestTracking, RequestTrackingAction
+)
+from app.services.pick_wave_service import PickWaveService
+
+
+@pytest.fixture(scope="module")
+def wave_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-WAVE", name="Wave WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+
+    prods = [Product(sku=f"WAVE-00{i}", name=f"Wave Product {i}", category_id=1, unit_id=1) for i in range(2)]
+    db.add_all(prods)
+    db.commit()
+
+    locs = [StorageLocation(warehouse_id=wh.id, code=f"W-0{i}", name=f"W-0{i}", capacity=500) for i in range(2)]
+    db.add_all(locs)
+    db.commit()
+
+    for prod, loc in zip(prods, locs):
+        db.add(ProductLocationAssignment(product_id=prod.id, location_id=loc.id, warehouse_id=wh.id, quantity=40))
+        db.add(LedgerEntry(
+            movement_request_id=0, product_id=prod.id, warehouse_id=wh.id, location_id=loc.id,
+            entry_type=LedgerEntryType.INCREMENT, quantity=40, previous_balance=0, new_balance=40,
+            applied_by=user.id
+        ))
+    db.commit()
+
+    approved_at = datetime(2030, 1, 1, 8, 10)
+    requests = []
+    # Two requests in the 08:00 window share product 0; a third falls in the 10:00 window
+    for number, minutes, lines in (
+        ("SOL-WAVE-1", 0, [(prods[0], 5), (prods[1], 3)]),
+        ("SOL-WAVE-2", 20, [(prods[0], 7)]),
+        ("SOL-WAVE-3", 120, [(prods[1], 2)]),
+    ):
+        request = IntegratedRequest(
+            request_number=number, requested_by=user.id, purpose=IntegratedRequestPurpose.OBRA,
+            status=IntegratedRequestStatus.APROBADA, approved_by=user.id,
+            approved_at=approved_at + timedelta(minutes=minutes)
+        )
+        for prod, qty in lines:
+            request.items.append(RequestItem(
+                product_id=prod.id, quantity_requested=qty, quantity_approved=qty,
+                status=RequestItemStatus.APROBADO
+            ))
+        db.add(request)
+        requests.append(request)
+    db.commit()
+    return {"user": user, "warehouse": wh, "products": prods, "requests": requests}
+
+
+def test_plan_groups_requests_by_window(db, wave_data):
+    requests = wave_data["requests"]
+    waves = PickWaveService.plan_waves(
+        db, wave_data["warehouse"].id, window_minutes=60, request_ids=[r.id for r in requests]
+    )
+    assert [w["request_ids"] for w in waves] == [[requests[0].id, requests[1].id], [requests[2].id]]
+
+    first = waves[0]["route"]["items"]
+    by_product = {line["product_id"]: line for line in first}
+    # Product 0 of both requests is consolidated into one pick line
+    assert by_product[wave_data["products"][0].id]["quantity"] == 12
+    assert len(by_product[wave_data["products"][0].id]["request_item_ids"]) == 2
+    assert waves[0]["shortages"] == []
+
+
+def test_plan_reserves_stock_across_waves(db, wave_data):
+    requests = wave_data["requests"]
+    item = requests[2].items[0]
+    # The first wave already takes 3 of the 40 units of product 1
+    item.quantity_approved = 38
+    db.commit()
+    try:
+        waves = PickWaveService.plan_waves(
+            db, wave_data["warehouse"].id, window_minutes=60, request_ids=[r.id for r in requests]
+        )
+    finally:
+        item.quantity_approved = 2
+        db.commit()
+    assert waves[0]["shortages"] == []
+    assert [s["request_item_ids"] for s in waves[1]["shortages"]] == [[item.id]]
+
+
+def test_apply_wave_is_one_movement(db, wave_data):
+    requests = wave_data["requests"][:2]
+    before = db.query(MovementRequest).count()
+
+    result = asyncio.run(PickWaveService.apply_wave(
+        db, wave_data["warehouse"].id, [r.id for r in requests], wave_data["user"].id
+    ))
+
+    assert db.query(MovementRequest).count() == before + 1
+    assert result["lines"] == 2
+    assert result["items_delivered"] == 3
+
+    for request in requests:
+        db.refresh(request)
+        assert all(item.status == RequestItemStatus.ENTREGADO for item in request.items)
+        assert all(item.quantity_delivered == item.quantity_approved for item in request.items)
+        assert db.query(RequestTracking).filter(
+            RequestTracking.request_id == request.id,
+            RequestTracking.action == RequestTrackingAction.ENTREGADO
+        ).count() == len(request.items)
+
+    stock = db.query(ProductLocationAssignment).filter(
+        ProductLocationAssignment.product_id == wave_data["products"][0].id
+    ).one()
+    assert stock.quantity == 40 - 12
+
+
+def test_apply_wave_rolls_back_on_shortage(db, wave_data):
+    request = wave_data["requests"][2]
+    item = request.items[0]
+    item.quantity_approved = 1000
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(PickWaveService.apply_wave(db, wave_data["warehouse"].id, [request.id], wave_data["user"].id))
+    assert exc.value.status_code == 400
+
+    db.refresh(item)
+    assert item.status == RequestItemStatus.APROBADO
+    assert item.quantity_delivered == 0
+
+    # Delivered requests cannot be picked again
+    with pytest.raises(HTTPException):
+        asyncio.run(PickWaveService.apply_wave(
+            db, wave_data["warehouse"].id, [wave_data["requests"][0].id], wave_data["user"].id
+        ))
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.models.notification_preferences import PushToken
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.models.user import User
+from app.services import push_notification_service
+from app.services.push_notification_service import PUSH_EVENT, PUSH_RECEIPTS_EVENT, ExpoPushService
+
+PUSH_URL = "http://expo.test/push/send"
+RECEIPTS_URL = "http://expo.test/push/getReceipts"
+
+
+class ExpoStandIn:
+    """Local stand-in for the Expo push API."""
+
+    def __init__(self, dead_tokens=(), dead_receipts=()):
+        self.dead_tokens = set(dead_tokens)
+        self.dead_receipts = set(dead_receipts)
+        self.chunk_sizes = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.url.path.endswith("getReceipts"):
+            return httpx.Response(200, json={"data": {
+                receipt_id: {"status": "error", "details": {"error": "DeviceNotRegistered"}}
+                if receipt_id in self.dead_receipts else {"status": "ok"}
+                for receipt_id in body["ids"]
+            }})
+
+        self.chunk_sizes.append(len(body))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return httpx.Response(200, json={"data": [
+            {"status": "error", "message": "not registered", "details": {"error": "DeviceNotRegistered"}}
+            if message["to"] in self.dead_tokens else {"status": "ok", "id": f"receipt-{message['to']}"}
+            for message in body
+        ]})
+
+
+def make_service(stand_in, concurrency=2):
+    service = ExpoPushService(
+        push_url=PUSH_URL, receipts_url=RECEIPTS_URL, concurrency=concurrency,
+        transport=httpx.MockTransport(stand_in)
+    )
+    service.configure("test-token")
+    return service
+
+
+def test_bulk_send_is_chunked_with_bounded_parallelism():
+    stand_in = ExpoStandIn(dead_tokens={"token-7"})
+    service = make_service(stand_in)
+
+    async def send():
+        first = await service.send_bulk_notifications([f"token-{i}" for i in range(250)], "Alerta", "Stock bajo")
+        client = service._client
+        await service.send_push_notification("token-1", "Alerta", "Stock bajo")
+        assert service._client is client
+        await service.aclose()
+        return first
+
+    result = asyncio.run(send())
+    assert sorted(stand_in.chunk_sizes) == [1, 50, 100, 100]
+    assert stand_in.max_in_flight == 2
+    assert (result["success"], result["sent"], result["failed"]) == (True, 249, 1)
+
+
+def test_failed_request_is_reported():
+    service = make_service(lambda request: httpx.Response(500, text="unavailable"))
+    result = asyncio.run(service.send_bulk_notifications(["token-1"], "Alerta", "Stock bajo"))
+    assert result["success"] is False
+    assert result["failed"] == 1
+
+
+@pytest.fixture
+def push_tokens(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    db.query(PushToken).delete()
+    db.query(OutboxEvent).delete()
+    tokens = [PushToken(user_id=user.id, token=f"ExponentPushToken[{i}]", created_at=int(time.time())) for i in range(3)]
+    db.add_all(tokens)
+    db.commit()
+    return [t.token for t in tokens]
+
+
+def test_dead_tokens_are_pruned(db, push_tokens):
+    stand_in = ExpoStandIn(dead_tokens={push_tokens[0]}, dead_receipts={f"receipt-{push_tokens[1]}"})
+    service = make_service(stand_in)
+    assert ExpoPushService.active_tokens(db, [db.query(PushToken).first().user_id]) == push_tokens
+
+    payloads = [{"tokens": push_tokens[:2], "title": "A", "body": "a"}, {"tokens": push_tokens[2:], "title": "B", "body": "b"}]
+    accepted, dead = asyncio.run(service.deliver_queued(db, payloads))
+    db.commit()
+    assert (accepted, dead) == (2, [push_tokens[0]])
+
+    # The receipt check is scheduled for later
+    check = db.query(OutboxEvent).filter(OutboxEvent.event_type == PUSH_RECEIPTS_EVENT).one()
+    assert check.status == OutboxStatus.PENDING
+    assert check.available_at > check.created_at
+    assert set(check.payload["receipts"].values()) == set(push_tokens[1:])
+
+    assert asyncio.run(service.process_receipts(db, [check.payload])) == [push_tokens[1]]
+    db.commit()
+    active = {t.token for t in db.query(PushToken).filter(PushToken.is_active == True)}
+    assert active == {push_tokens[2]}
+
+
+def test_failed_chunk_is_requeued_alone(db, push_tokens, monkeypatch):
+    monkeypatch.setattr(push_notification_service, "MAX_MESSAGES_PER_REQUEST", 2)
+    stand_in = ExpoStandIn()
+
+    async def fail_last_chunk(request):
+        if push_tokens[2] in request.content.decode():
+            return httpx.Response(503, text="unavailable")
+        return await stand_in(request)
+
+    service = make_service(fail_last_chunk)
+    payloads = [{"tokens": push_tokens[:2], "title": "A", "body": "a"}, {"tokens": push_tokens[2:], "title": "B", "body": "b"}]
+    accepted, _ = asyncio.run(service.deliver_queued(db, payloads))
+    db.commit()
+    assert accepted == 2
+
+    # Only the message of the failed chunk is sent again, later
+    retry = db.query(OutboxEvent).filter(OutboxEvent.event_type == PUSH_EVENT).one()
+    assert (retry.payload["tokens"], retry.payload["title"], retry.payload["attempt"]) == ([push_tokens[2]], "B", 1)
+    assert retry.available_at > retry.created_at
+    assert db.query(OutboxEvent).filter(OutboxEvent.event_type == PUSH_RECEIPTS_EVENT).count() == 1
+
+
+def test_register_push_token(client, super_admin_token, db):
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+    for _ in range(2):
+        response = client.post(
+            "/notifications/register-push-token",
+            headers=headers,
+            json={"token": "ExponentPushToken[register]", "platform": "android"}
+        )
+        assert response.status_code == 200
+    assert db.query(PushToken).filter(PushToken.token == "ExponentPushToken[register]").count() == 1
+
+    response = client.delete("/notifications/unregister-push-token?token=ExponentPushToken[register]", headers=headers)
+    assert response.status_code == 200
+    token = db.query(PushToken).filter(PushToken.token == "ExponentPushToken[register]").one()
+    db.refresh(token)
+    assert token.is_active is False
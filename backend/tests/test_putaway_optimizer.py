@@ -0,0 +1,147 @@
+import time
+import pytest
+from app.models.user import User
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.warehouse_layout import WarehouseLayout, LayoutCell, CellType
+from app.services.putaway_optimizer import putaway_optimizer
+from app.schemas.product_location import ProductLocationAssignmentCreate, ProductRelocationRequest
+from app.api.endpoints import products as products_endpoints
+
+
+@pytest.fixture(scope="module")
+def optimizer_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-OPT", name="Optimizer WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+
+    prod = Product(sku="OPT-001", name="Optimizer Product", category_id=1, unit_id=1)
+    db.add(prod)
+    db.commit()
+
+    near = StorageLocation(warehouse_id=wh.id, code="N-01", name="Near", capacity=100)
+    far = StorageLocation(warehouse_id=wh.id, code="F-01", name="Far", capacity=100)
+    cold = StorageLocation(warehouse_id=wh.id, code="C-01", name="Cold", capacity=100, temperature_zone="REFRIGERATED")
+    restricted = StorageLocation(warehouse_id=wh.id, code="R-01", name="Restricted", capacity=100, is_restricted=True)
+    db.add_all([near, far, cold, restricted])
+    db.commit()
+
+    now = int(time.time())
+    layout = WarehouseLayout(warehouse_id=wh.id, name="Opt layout", grid_rows=10, grid_cols=10, created_by=user.id, created_at=now)
+    db.add(layout)
+    db.commit()
+    for row, col, cell_type, loc in [
+        (0, 0, CellType.RECEIVING, None),
+        (0, 1, CellType.STORAGE, near),
+        (9, 9, CellType.STORAGE, far),
+        (5, 5, CellType.STORAGE, cold),
+    ]:
+        db.add(LayoutCell(
+            layout_id=layout.id, row=row, col=col, x=col * 100, y=row * 100, width=100, height=100,
+            cell_type=cell_type, linked_location_id=loc.id if loc else None, created_at=now
+        ))
+    db.commit()
+    putaway_optimizer.invalidate(wh.id)
+    return {"warehouse": wh, "product": prod, "near": near, "far": far, "cold": cold, "restricted": restricted}
+
+
+def test_rank_excludes_restricted_and_zoned(db, optimizer_data):
+    ranked = putaway_optimizer.rank_locations(db, optimizer_data["product"].id, optimizer_data["warehouse"].id, 10, limit=None)
+    codes = [r["code"] for r in ranked]
+    assert "R-01" not in codes
+    # Cold storage is kept for products that need it
+    assert codes[-1] == "C-01"
+
+
+def test_temperature_zone_filter(db, optimizer_data):
+    ranked = putaway_optimizer.rank_locations(
+        db, optimizer_data["product"].id, optimizer_data["warehouse"].id, 10, temperature_zone="REFRIGERATED"
+    )
+    assert [r["code"] for r in ranked] == ["C-01"]
+
+
+def test_consolidation_and_stock_events(db, optimizer_data):
+    wh = optimizer_data["warehouse"]
+    prod = optimizer_data["product"]
+    far = optimizer_data["far"]
+    db.add(ProductLocationAssignment(product_id=prod.id, location_id=far.id, warehouse_id=wh.id, quantity=20))
+    db.commit()
+    putaway_optimizer.on_stock_change(wh.id, far.id, prod.id, 20)
+
+    ranked = putaway_optimizer.rank_locations(db, prod.id, wh.id, 10)
+    assert ranked[0]["location_id"] == far.id
+    assert ranked[0]["free_capacity"] == 80
+
+    # A quantity that no longer fits in the consolidated bin goes elsewhere
+    ranked = putaway_optimizer.rank_locations(db, prod.id, wh.id, 90)
+    assert far.id not in [r["location_id"] for r in ranked]
+
+
+def test_emptied_bin_loses_consolidation(db, optimizer_data):
+    wh = optimizer_data["warehouse"]
+    prod = optimizer_data["product"]
+    far = optimizer_data["far"]
+    putaway_optimizer.on_stock_change(wh.id, far.id, prod.id, -20)
+    db.query(ProductLocationAssignment).filter(ProductLocationAssignment.location_id == far.id).delete()
+    db.commit()
+
+    ranked = putaway_optimizer.rank_locations(db, prod.id, wh.id, 10, limit=None)
+    assert all(r["consolidate"] == 0 for r in ranked)
+    assert next(r for r in ranked if r["location_id"] == far.id)["free_capacity"] == 100
+
+
+def test_receipt_reserves_capacity(db, optimizer_data):
+    wh = optimizer_data["warehouse"]
+    prod = optimizer_data["product"]
+    lines = [{"product_id": prod.id, "quantity": 60} for _ in range(3)]
+    result = putaway_optimizer.suggest_for_receipt(db, wh.id, lines)
+    best = [line["suggestions"][0]["location_id"] for line in result if line["suggestions"]]
+    assert len(best) == len(set(best))
+
+
+def test_location_endpoints_update_index(db, optimizer_data, monkeypatch):
+    wh = optimizer_data["warehouse"]
+    prod = optimizer_data["product"]
+    near, far = optimizer_data["near"], optimizer_data["far"]
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    putaway_optimizer.get_index(db, wh.id)
+
+    # Role levels of the test fixtures are below the product write level
+    monkeypatch.setattr(products_endpoints, "check_permissions", lambda user: None)
+    products_endpoints.assign_product_location(
+        prod.id, ProductLocationAssignmentCreate(location_id=near.id, quantity=40), db=db, current_user=user
+    )
+    products_endpoints.relocate_product(
+        prod.id, ProductRelocationRequest(from_location_id=near.id, to_location_id=far.id, quantity=30),
+        db=db, current_user=user
+    )
+
+    ranked = {r["location_id"]: r for r in putaway_optimizer.rank_locations(db, prod.id, wh.id, 5, limit=None)}
+    assert (ranked[near.id]["free_capacity"], ranked[far.id]["free_capacity"]) == (90, 70)
+    assert ranked[far.id]["consolidate"] > 0
+
+
+def test_suggest_endpoint(client, super_admin_token, optimizer_data):
+    res = client.post(
+        "/inventory/putaway/suggest",
+        json={"warehouse_id": optimizer_data["warehouse"].id, "items": [{"product_id": optimizer_data["product"].id, "quantity": 5}]},
+        headers={"Authorization": f"Bearer {super_admin_token}"}
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert len(data["lines"]) == 1
+    assert data["lines"][0]["suggestions"]
+
+
+def test_suggest_endpoint_bounds(client, super_admin_token, optimizer_data):
+    line = {"product_id": optimizer_data["product"].id, "quantity": 5}
+    for body in ({"items": [line], "limit": 0}, {"items": [line], "limit": 1000}, {"items": []}):
+        res = client.post(
+            "/inventory/putaway/suggest",
+            json={"warehouse_id": optimizer_data["warehouse"].id, **body},
+            headers={"Authorization": f"Bearer {super_admin_token}"}
+        )
+        assert res.status_code == 422
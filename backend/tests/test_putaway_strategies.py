@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from app.models.user import User
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.system import SystemConfig
+from app.services.stock_service import StockService
+
+
+@pytest.fixture(scope="module")
+def putaway_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-PUTAWAY", name="Putaway WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+
+    prod = Product(sku="PUTAWAY-001", name="Putaway Product", category_id=1, unit_id=1)
+    other = Product(sku="PUTAWAY-002", name="Other Product", category_id=1, unit_id=1)
+    db.add_all([prod, other])
+    db.commit()
+
+    locs = {}
+    for code, capacity in [("A-01", 100), ("A-02", 100), ("A-03", 100), ("A-04", 10)]:
+        loc = StorageLocation(warehouse_id=wh.id, code=code, name=code, capacity=capacity)
+        db.add(loc)
+        locs[code] = loc
+    db.commit()
+
+    # A-01 holds another product, A-03 already holds our product
+    db.add(ProductLocationAssignment(product_id=other.id, location_id=locs["A-01"].id, warehouse_id=wh.id, quantity=50))
+    db.add(ProductLocationAssignment(product_id=prod.id, location_id=locs["A-03"].id, warehouse_id=wh.id, quantity=80))
+    db.commit()
+    return {"warehouse": wh, "product": prod, "locations": locs}
+
+
+def resolve(db, data, quantity, strategies=None):
+    return asyncio.run(StockService._resolve_location(
+        db, data["product"].id, data["warehouse"].id, quantity, "IN", strategies=strategies
+    ))
+
+
+def test_capacity_snapshot_single_query(db, putaway_data):
+    snapshot = StockService._get_location_capacity_snapshot(
+        db, putaway_data["product"].id, putaway_data["warehouse"].id
+    )
+    by_code = {row["code"]: row for row in snapshot}
+    assert [row["code"] for row in snapshot] == ["A-01", "A-02", "A-03", "A-04"]
+    assert by_code["A-01"]["used"] == 50 and by_code["A-01"]["product_qty"] == 0
+    assert by_code["A-03"]["used"] == 80 and by_code["A-03"]["product_qty"] == 80
+    assert by_code["A-02"]["used"] == 0
+
+
+def test_consolidate_first(db, putaway_data):
+    locs = putaway_data["locations"]
+    assert resolve(db, putaway_data, 10) == locs["A-03"].id
+
+
+def test_consolidate_falls_back_to_nearest_empty(db, putaway_data):
+    locs = putaway_data["locations"]
+    # 30 units do not fit in A-03 (80/100), next empty bin by code is A-02
+    assert resolve(db, putaway_data, 30) == locs["A-02"].id
+
+
+def test_any_available_strategy(db, putaway_data):
+    locs = putaway_data["locations"]
+    assert resolve(db, putaway_data, 30, strategies=["any_available"]) == locs["A-01"].id
+
+
+def test_fixed_bin_strategy(db, putaway_data):
+    locs = putaway_data["locations"]
+    db.add(ProductLocationAssignment(
+        product_id=putaway_data["product"].id, location_id=locs["A-04"].id,
+        warehouse_id=putaway_data["warehouse"].id, quantity=0, is_primary=True
+    ))
+    db.commit()
+    assert resolve(db, putaway_data, 5, strategies=["fixed_bin", "consolidate"]) == locs["A-04"].id
+    # Fixed bin is full for 20 units, consolidation takes over
+    assert resolve(db, putaway_data, 20, strategies=["fixed_bin", "consolidate"]) == locs["A-03"].id
+
+
+def test_strategies_from_system_config(db, putaway_data):
+    locs = putaway_data["locations"]
+    db.add(SystemConfig(key="PUTAWAY_STRATEGIES", value="nearest_empty"))
+    db.commit()
+    try:
+        assert resolve(db, putaway_data, 10) == locs["A-02"].id
+    finally:
+        db.query(SystemConfig).filter(SystemConfig.key == "PUTAWAY_STRATEGIES").delete()
+        db.commit()
+
+
+def test_no_location_fits(db, putaway_data):
+    with pytest.raises(ValueError):
+        resolve(db, putaway_data, 1000)
@@ -0,0 +1,50 @@
+from app.services.raw_label_generator import (
+    EPLLabelGenerator, ZPLLabelGenerator, barcode_modules, generate_label_epl, generate_label_zpl
+)
+from app.services.barcode_generator import BarcodeGenerator
+
+DATA = {"product_name": "Tornillo ^ 1/2_", "sku": "SKU-001", "barcode": "7501234567890", "location_code": "A-01"}
+
+
+def test_zpl_uses_native_barcode_commands():
+    zpl = generate_label_zpl(DATA, "code128", width_mm=50, height_mm=25, include_location=True).decode()
+    lines = zpl.splitlines()
+
+    assert lines[0] == "^XA" and lines[-1] == "^XZ"
+    # 50 x 25 mm at 203 dpi
+    assert "^PW400" in lines and "^LL200" in lines
+    assert any(line.startswith("^FO") and "^BCN," in line and line.endswith("^FD7501234567890^FS") for line in lines)
+    # Control characters in text are hex-escaped
+    assert "^FDTornillo _5E 1/2_5F^FS" in zpl
+    assert "^FDLoc: A-01^FS" in zpl
+    assert len(zpl) < 500
+
+
+def test_zpl_follows_template_settings():
+    zpl = generate_label_zpl(DATA, "qr", show_border=False, include_sku=False, copies=3, dpi=300).decode()
+    assert "^GB" not in zpl
+    assert "SKU:" not in zpl
+    assert "^BQN,2," in zpl and "^FDLA,7501234567890^FS" in zpl
+    assert "^PQ3" in zpl
+    assert f"^PW{ZPLLabelGenerator(dpi=300).width}" in zpl
+
+    ean = generate_label_zpl({"barcode": "ABC-750123456789012"}, "ean13").decode()
+    assert "^BEN," in ean and f"^FD{BarcodeGenerator.ean13_digits('ABC-750123456789012')}^FS" in ean
+
+
+def test_epl_output():
+    epl = generate_label_epl(DATA, "code39", copies=2).decode("latin-1")
+    lines = epl.splitlines()
+    assert lines[1:4] == ["N", "q400", "Q200,24"]
+    assert any(line.startswith("B") and ",0,3," in line and line.endswith('"7501234567890"') for line in lines)
+    assert 'A16,' in epl and '"SKU: SKU-001"' in epl
+    assert lines[-1] == "P2"
+
+    # Resident fonts are picked by height and scaled with the printer resolution
+    assert EPLLabelGenerator()._font(23) == (3, 20)
+    assert EPLLabelGenerator(dpi=300)._font(23) == (2, 23)
+
+
+def test_module_estimates_fit_the_symbol():
+    for label_type, data in (("code128", "SKU-000123"), ("ean13", "750123456789"), ("qr", "SKU-000123")):
+        assert barcode_modules(data, label_type) >= BarcodeGenerator.vector_modules(data, label_type)[0]
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.session import Session as UserSession
+from app.models.system import JobRun, JobRunStatus, ScheduledJob
+from app.models.user import User
+from app.services import scheduler_service
+from app.services.scheduled_jobs import cleanup_expired_sessions
+from app.services.scheduler_service import CronSchedule, JobScheduler, scheduled_job
+
+
+def test_cron_next_run():
+    daily = CronSchedule("0 6 * * *")
+    assert daily.next_after(datetime(2026, 3, 1, 5, 59, 30)) == datetime(2026, 3, 1, 6, 0)
+    assert daily.next_after(datetime(2026, 3, 1, 6, 0)) == datetime(2026, 3, 2, 6, 0)
+
+    quarter = CronSchedule("*/15 8-18 * * 1-5")
+    # Friday evening rolls over to Monday morning
+    assert quarter.next_after(datetime(2026, 3, 6, 18, 50)) == datetime(2026, 3, 9, 8, 0)
+    assert quarter.next_after(datetime(2026, 3, 9, 8, 0)) == datetime(2026, 3, 9, 8, 15)
+
+    # Day of month and day of week restricted together: either matches
+    assert CronSchedule("0 0 1 * 0").next_after(datetime(2026, 3, 2)) == datetime(2026, 3, 8)
+
+    for expression in ("0 6 * *", "60 * * * *", "0 0 31 2 *"):
+        with pytest.raises(ValueError):
+            CronSchedule(expression).next_after(datetime(2026, 1, 1))
+
+
+@pytest.fixture
+def jobs(db, monkeypatch):
+    # Only the test jobs are registered while the test runs
+    monkeypatch.setattr(scheduler_service, "_jobs", {})
+    db.query(JobRun).delete()
+    db.query(ScheduledJob).delete()
+    db.commit()
+    calls = []
+
+    @scheduled_job("test_counting", "0 6 * * *")
+    def counting(job_db):
+        calls.append("counting")
+        return 3
+
+    @scheduled_job("test_failing", "0 6 * * *")
+    def failing(job_db):
+        raise RuntimeError("boom")
+
+    return calls
+
+
+def test_each_run_is_executed_by_one_worker(db, jobs):
+    factory = sessionmaker(bind=db.get_bind())
+    workers = [JobScheduler(session_factory=factory) for _ in range(3)]
+
+    # Registered for the next 06:00; nothing is due yet
+    assert workers[0].run_due_jobs(datetime(2026, 3, 1, 5, 0)) == []
+    due = datetime(2026, 3, 1, 6, 0, 10)
+    assert [w.run_due_jobs(due) for w in workers] == [["test_counting", "test_failing"], [], []]
+    assert jobs == ["counting"]
+
+    job = db.query(ScheduledJob).filter(ScheduledJob.name == "test_counting").one()
+    assert job.next_run_at == datetime(2026, 3, 2, 6, 0)
+    assert (job.last_status, job.last_rows_touched, job.last_error) == (JobRunStatus.SUCCESS, 3, None)
+    assert job.last_success_at is not None and job.last_duration_ms >= 0
+
+    failed = db.query(ScheduledJob).filter(ScheduledJob.name == "test_failing").one()
+    assert failed.last_status == JobRunStatus.FAILED and failed.last_success_at is None
+    run = db.query(JobRun).filter(JobRun.job_name == "test_failing").one()
+    assert run.holder == workers[0].holder and "boom" in run.error
+
+    # Missed runs are caught up once
+    assert workers[1].run_due_jobs(datetime(2026, 3, 5, 12, 0)) == ["test_counting", "test_failing"]
+    assert workers[2].run_due_jobs(datetime(2026, 3, 5, 12, 0)) == []
+    assert db.query(JobRun).filter(JobRun.job_name == "test_counting").count() == 2
+
+
+def test_job_status_endpoint(client, db, jobs, super_admin_token):
+    scheduler = JobScheduler(session_factory=sessionmaker(bind=db.get_bind()))
+    scheduler.run_due_jobs()
+    scheduler.run_due_jobs(datetime.now() + timedelta(days=1))
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+
+    response = client.get("/system/jobs", headers=headers)
+    assert response.status_code == 200
+    assert {j["name"]: j["last_status"] for j in response.json()} == {
+        "test_counting": "SUCCESS", "test_failing": "FAILED"
+    }
+
+    response = client.get("/system/jobs/test_counting/runs", headers=headers)
+    assert response.status_code == 200
+    assert [r["rows_touched"] for r in response.json()] == [3]
+
+
+def test_session_cleanup_job(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    now = datetime.utcnow()
+    db.add_all([
+        UserSession(user_id=user.id, refresh_token_hash="expired", expires_at=now - timedelta(hours=1)),
+        UserSession(user_id=user.id, refresh_token_hash="valid", expires_at=now + timedelta(hours=1)),
+    ])
+    db.commit()
+
+    assert cleanup_expired_sessions(db) >= 1
+    db.commit()
+    assert db.query(UserSession).filter(UserSession.refresh_token_hash == "expired").count() == 0
+    assert db.query(UserSession).filter(UserSession.refresh_token_hash == "valid").count() == 1
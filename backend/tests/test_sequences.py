@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.integrated_request import IntegratedRequest, IntegratedRequestPurpose
+from app.models.purchase_order import PurchaseOrder
+from app.models.system import DocumentSequence
+from app.models.user import User
+from app.services import sequence_service
+from app.services.sequence_service import SequenceAllocator
+
+YEAR = datetime.now().year
+
+
+def test_numbers_continue_from_existing_documents(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    db.add(IntegratedRequest(
+        request_number=f"SOL-{YEAR}-041", requested_by=user.id, purpose=IntegratedRequestPurpose.OBRA
+    ))
+    db.commit()
+
+    numbers = [
+        sequence_service.next_number(db, "SOL", 3, existing=IntegratedRequest.request_number)
+        for _ in range(3)
+    ]
+    assert numbers == [f"SOL-{YEAR}-042", f"SOL-{YEAR}-043", f"SOL-{YEAR}-044"]
+    assert sequence_service.next_number(db, "PO", 6, yearly=False, existing=PurchaseOrder.order_number) == "PO000001"
+    assert db.query(DocumentSequence.last_value).filter(
+        DocumentSequence.prefix == "SOL", DocumentSequence.year == YEAR
+    ).scalar() == 44
+
+
+def test_blocks_are_reserved_once_per_worker(db):
+    workers = [SequenceAllocator({"BLK": 5}), SequenceAllocator({"BLK": 5})]
+    values = [workers[i % 2].next_value(db, "BLK") for i in range(8)]
+
+    # Each worker serves its own block; numbers interleave but never repeat
+    assert values == [1, 6, 2, 7, 3, 8, 4, 9]
+    assert db.query(DocumentSequence.last_value).filter(DocumentSequence.prefix == "BLK").scalar() == 10
+
+
+def test_concurrent_workers_get_unique_numbers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sequences.db'}", connect_args={"timeout": 30})
+    DocumentSequence.__table__.create(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    def worker(block_size):
+        allocator = SequenceAllocator({"MR": block_size})
+        db = Session()
+        try:
+            return [allocator.next_value(db, "MR", YEAR) for _ in range(25)]
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(worker, [1, 1, 1, 1, 10, 10, 10, 10]))
+    engine.dispose()
+
+    values = [value for result in results for value in result]
+    assert len(set(values)) == len(values) == 200
+    assert all(result == sorted(result) for result in results)
@@ -0,0 +1,150 @@
+import asyncio
+from datetime import date
+import pytest
+from app.models.user import User
+from app.models.product import Product, ProductBatch
+from app.models.warehouse import Warehouse
+from app.models.location_models import StorageLocation
+from app.models.product_location_models import ProductLocationAssignment
+from app.models.movement import MovementRequest, MovementRequestItem, MovementType, MovementStatus
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.services.stock_service import StockService
+
+
+@pytest.fixture(scope="module")
+def alloc_data(db, super_admin_token):
+    user = db.query(User).filter(User.email == "superadmin_test@example.com").first()
+    wh = Warehouse(code="WH-ALLOC", name="Allocation WH", created_by=user.id)
+    db.add(wh)
+    db.commit()
+
+    prod = Product(sku="ALLOC-001", name="Allocation Product", category_id=1, unit_id=1, has_batch=True)
+    db.add(prod)
+    db.commit()
+
+    late = ProductBatch(product_id=prod.id, batch_number="LATE", expiration_date=date(2031, 1, 1))
+    early = ProductBatch(product_id=prod.id, batch_number="EARLY", expiration_date=date(2030, 1, 1))
+    db.add_all([late, early])
+    db.commit()
+
+    locs = []
+    for code in ("B-01", "B-02", "B-03"):
+        loc = StorageLocation(warehouse_id=wh.id, code=code, name=code, capacity=500)
+        db.add(loc)
+        locs.append(loc)
+    db.commit()
+
+    # B-01: 30 (late batch), B-02: 10 (early batch), B-03: 20 (late batch)
+    for loc, batch, qty in ((locs[0], late, 30), (locs[1], early, 10), (locs[2], late, 20)):
+        db.add(ProductLocationAssignment(
+            product_id=prod.id, batch_id=batch.id, location_id=loc.id, warehouse_id=wh.id, quantity=qty
+        ))
+        db.add(LedgerEntry(
+            movement_request_id=0, product_id=prod.id, batch_id=batch.id, warehouse_id=wh.id,
+            location_id=loc.id, entry_type=LedgerEntryType.INCREMENT, quantity=qty,
+            previous_balance=0, new_balance=qty, applied_by=user.id
+        ))
+    db.commit()
+    return {"user": user, "warehouse": wh, "product": prod, "locations": locs, "early": early}
+
+
+def plan_locations(plan):
+    return [(p["location_id"], p["quantity"]) for p in plan]
+
+
+def test_fewest_picks(db, alloc_data):
+    locs = alloc_data["locations"]
+    plan = StockService.allocate_stock(db, alloc_data["product"].id, alloc_data["warehouse"].id, 45, "fewest_picks")
+    assert plan_locations(plan) == [(locs[0].id, 30), (locs[2].id, 15)]
+
+
+def test_smallest_first(db, alloc_data):
+    locs = alloc_data["locations"]
+    plan = StockService.allocate_stock(db, alloc_data["product"].id, alloc_data["warehouse"].id, 25, "smallest_first")
+    assert plan_locations(plan) == [(locs[1].id, 10), (locs[2].id, 15)]
+
+
+def test_fefo(db, alloc_data):
+    locs = alloc_data["locations"]
+    plan = StockService.allocate_stock(db, alloc_data["product"].id, alloc_data["warehouse"].id, 15, "fefo")
+    assert plan[0] == {"location_id": locs[1].id, "batch_id": alloc_data["early"].id, "quantity": 10}
+    assert sum(p["quantity"] for p in plan) == 15
+
+
+def test_insufficient_total(db, alloc_data):
+    with pytest.raises(ValueError):
+        StockService.allocate_stock(db, alloc_data["product"].id, alloc_data["warehouse"].id, 61, "fifo")
+
+
+def test_unknown_policy(db, alloc_data):
+    with pytest.raises(ValueError):
+        StockService.allocate_stock(db, alloc_data["product"].id, alloc_data["warehouse"].id, 1, "random")
+
+
+def test_apply_out_splits_across_bins(db, alloc_data):
+    prod = alloc_data["product"]
+    wh = alloc_data["warehouse"]
+    request = MovementRequest(
+        type=MovementType.OUT, status=MovementStatus.APPROVED,
+        source_warehouse_id=wh.id, requested_by=alloc_data["user"].id, request_number="OUT-ALLOC-1"
+    )
+    db.add(request)
+    db.commit()
+    db.add(MovementRequestItem(request_id=request.id, product_id=prod.id, quantity=40))
+    db.commit()
+
+    asyncio.run(StockService.apply_movement(db, request.id, alloc_data["user"].id, allocation_policy="fewest_picks"))
+
+    entries = db.query(LedgerEntry).filter(LedgerEntry.movement_request_id == request.id).order_by(LedgerEntry.id).all()
+    assert [e.quantity for e in entries] == [30, 10]
+    assert all(e.entry_type == LedgerEntryType.DECREMENT for e in entries)
+    assert entries[-1].new_balance == 20
+    remaining = db.query(ProductLocationAssignment).filter(ProductLocationAssignment.product_id == prod.id).all()
+    assert sum(a.quantity for a in remaining) == 20
+
+
+def test_split_transfer_keeps_batches_at_destination(db, alloc_data):
+    user = alloc_data["user"]
+    source = Warehouse(code="WH-ALLOC-SRC", name="Transfer source", created_by=user.id)
+    dest = Warehouse(code="WH-ALLOC-DST", name="Transfer destination", created_by=user.id)
+    prod = Product(sku="ALLOC-002", name="Transfer Product", category_id=1, unit_id=1, has_batch=True)
+    db.add_all([source, dest, prod])
+    db.commit()
+    first = ProductBatch(product_id=prod.id, batch_number="T-FIRST", expiration_date=date(2030, 6, 1))
+    second = ProductBatch(product_id=prod.id, batch_number="T-SECOND", expiration_date=date(2030, 9, 1))
+    bins = [StorageLocation(warehouse_id=source.id, code=f"T-0{i}", name=f"T-0{i}", capacity=500) for i in range(2)]
+    dest_bin = StorageLocation(warehouse_id=dest.id, code="T-DST", name="T-DST", capacity=500)
+    db.add_all([first, second, *bins, dest_bin])
+    db.commit()
+    for loc, batch in ((bins[0], first), (bins[1], second)):
+        db.add(ProductLocationAssignment(
+            product_id=prod.id, batch_id=batch.id, location_id=loc.id, warehouse_id=source.id, quantity=10
+        ))
+        db.add(LedgerEntry(
+            movement_request_id=0, product_id=prod.id, batch_id=batch.id, warehouse_id=source.id,
+            location_id=loc.id, entry_type=LedgerEntryType.INCREMENT, quantity=10,
+            previous_balance=0, new_balance=10, applied_by=user.id
+        ))
+    request = MovementRequest(
+        type=MovementType.TRANSFER, status=MovementStatus.APPROVED, source_warehouse_id=source.id,
+        destination_warehouse_id=dest.id, requested_by=user.id, request_number="TR-ALLOC-1"
+    )
+    db.add(request)
+    db.commit()
+    db.add(MovementRequestItem(
+        request_id=request.id, product_id=prod.id, quantity=15, destination_location_id=dest_bin.id
+    ))
+    db.commit()
+
+    asyncio.run(StockService.apply_movement(db, request.id, user.id, allocation_policy="fefo"))
+
+    incoming = db.query(LedgerEntry).filter(
+        LedgerEntry.movement_request_id == request.id, LedgerEntry.entry_type == LedgerEntryType.INCREMENT
+    ).order_by(LedgerEntry.id).all()
+    assert [(e.batch_id, e.quantity, e.warehouse_id) for e in incoming] == [
+        (first.id, 10, dest.id), (second.id, 5, dest.id)
+    ]
+    at_dest = db.query(ProductLocationAssignment).filter(ProductLocationAssignment.location_id == dest_bin.id).all()
+    assert sorted((a.batch_id, a.quantity) for a in at_dest) == [(first.id, 10), (second.id, 5)]
+    plan = StockService.allocate_stock(db, prod.id, dest.id, 12, "fefo")
+    assert [(p["batch_id"], p["quantity"]) for p in plan] == [(first.id, 10), (second.id, 2)]
@@ -273,3 +273,176 @@ def test_delete_location(client, db):
     assert not any(l["id"] == loc_id for l in locs)
 
 
+
+def test_create_locations_batch_skips_collisions(client, db, admin_user, sample_warehouse):
+    override_auth(admin_user)
+    client.post(f"/warehouses/{sample_warehouse.id}/locations", json={
+        "code": "C-002",
+        "name": "Existing"
+    })
+    
+    response = client.post(f"/warehouses/{sample_warehouse.id}/locations/batch", json={
+        "prefix": "C-",
+        "start_number": 1,
+        "count": 4,
+        "name_template": "Contenedor {n:02d}",
+        "barcode_prefix": "BC-"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 3
+    assert [loc["code"] for loc in data["locations"]] == ["C-001", "C-003", "C-004"]
+    assert data["locations"][0]["name"] == "Contenedor 01"
+    assert data["locations"][0]["barcode"] == "BC-001"
+    assert data["locations"][0]["path"] == "/C-001"
+    assert data["errors"] == ["Code C-002 already exists, skipping"]
+
+def test_create_location_matrix_with_hierarchy(client, db, admin_user, sample_warehouse):
+    override_auth(admin_user)
+    matrix = {
+        "aisles": ["A01", "A02"],
+        "racks": ["R01", "R02", "R03"],
+        "shelves": ["S1", "S2"],
+        "positions": ["P1", "P2"],
+        "create_hierarchy": True,
+        "name_template": "Bin {aisle}/{rack}/{shelf}/{position}"
+    }
+    response = client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json=matrix)
+    assert response.status_code == 200
+    data = response.json()
+    # 2 aisles + 6 racks + 12 shelves + 24 bins
+    assert data["created"] == 44
+    bins = [loc for loc in data["locations"] if loc["location_type"] == "bin"]
+    assert len(bins) == 24
+    first = next(loc for loc in bins if loc["code"] == "A01-R02-S1-P2")
+    assert first["path"] == "/A01/A01-R02/A01-R02-S1/A01-R02-S1-P2"
+    assert first["name"] == "Bin A01/R02/S1/P2"
+    assert (first["aisle"], first["rack"], first["shelf"], first["position"]) == ("A01", "R02", "S1", "P2")
+    
+    # Re-running reuses the existing nodes and only reports the taken bins
+    matrix["positions"] = ["P1", "P2", "P3"]
+    response = client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json=matrix)
+    data = response.json()
+    assert data["created"] == 12
+    assert len(data["errors"]) == 24
+
+def test_create_location_matrix_too_large(client, db, admin_user, sample_warehouse):
+    override_auth(admin_user)
+    response = client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json={
+        "aisles": [str(i) for i in range(20)],
+        "racks": [str(i) for i in range(20)],
+        "shelves": [str(i) for i in range(5)],
+        "positions": [str(i) for i in range(5)]
+    })
+    assert response.status_code == 422
+
+def test_location_tree_and_children(client, db, admin_user, sample_warehouse):
+    override_auth(admin_user)
+    client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json={
+        "aisles": ["A01", "A02"],
+        "racks": ["R01"],
+        "shelves": ["S1"],
+        "positions": ["P1", "P2"],
+        "create_hierarchy": True
+    })
+    
+    response = client.get(f"/warehouses/{sample_warehouse.id}/locations/tree")
+    assert response.status_code == 200
+    tree = response.json()
+    assert [node["code"] for node in tree] == ["A01", "A02"]
+    shelf = tree[0]["children"][0]["children"][0]
+    assert [node["code"] for node in shelf["children"]] == ["A01-R01-S1-P1", "A01-R01-S1-P2"]
+    
+    children = client.get(
+        f"/warehouses/{sample_warehouse.id}/locations/children", params={"parent_id": shelf["id"]}
+    ).json()
+    assert [node["code"] for node in children] == ["A01-R01-S1-P1", "A01-R01-S1-P2"]
+    
+    # Writes invalidate the cached tree
+    client.post(f"/warehouses/{sample_warehouse.id}/locations", json={"code": "DOCK", "name": "Dock"})
+    tree = client.get(f"/warehouses/{sample_warehouse.id}/locations/tree").json()
+    assert [node["code"] for node in tree] == ["A01", "A02", "DOCK"]
+
+def test_location_code_change_rewrites_subtree_paths(client, db, admin_user, sample_warehouse):
+    override_auth(admin_user)
+    client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json={
+        "aisles": ["A_1"],
+        "racks": ["R01"],
+        "shelves": ["S1"],
+        "positions": ["P1"],
+        "create_hierarchy": True
+    })
+    tree = client.get(f"/warehouses/{sample_warehouse.id}/locations/tree").json()
+    aisle = tree[0]
+    
+    response = client.put(f"/warehouses/{sample_warehouse.id}/locations/{aisle['id']}", json={"code": "B_1"})
+    assert response.status_code == 200
+    assert response.json()["path"] == "/B_1"
+    
+    tree = client.get(f"/warehouses/{sample_warehouse.id}/locations/tree").json()
+    leaf = tree[0]["children"][0]["children"][0]["children"][0]
+    assert leaf["path"] == "/B_1/A_1-R01/A_1-R01-S1/A_1-R01-S1-P1"
+
+def test_location_hierarchy_values(client, db, admin_user, sample_warehouse):
+    override_auth(admin_user)
+    client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json={
+        "aisles": ["A02", "A01"],
+        "racks": ["R01", "R02"],
+        "shelves": ["S1"],
+        "positions": ["P1"]
+    })
+    
+    data = client.get(f"/warehouses/{sample_warehouse.id}/locations/hierarchy").json()
+    assert data["aisles"] == ["A01", "A02"]
+    assert data["racks"] == ["R01", "R02"]
+    
+    data = client.get(
+        f"/warehouses/{sample_warehouse.id}/locations/hierarchy", params={"aisle": "A01", "rack": "R02"}
+    ).json()
+    assert data["aisles"] == ["A01"]
+    assert data["racks"] == ["R02"]
+    assert data["positions"] == ["P1"]
+
+def test_location_stock_summary(client, db, admin_user, sample_warehouse):
+    from app.models.product import Product
+    from app.models.location_models import StorageLocation
+    from app.models.product_location_models import ProductLocationAssignment
+    
+    override_auth(admin_user)
+    client.post(f"/warehouses/{sample_warehouse.id}/locations/matrix", json={
+        "aisles": ["A1", "A10"],
+        "racks": ["R1"],
+        "shelves": ["S1"],
+        "positions": ["P1", "P2"],
+        "create_hierarchy": True,
+        "capacity": 50
+    })
+    products = [Product(sku=f"SUM-{i}", name=f"Summary {i}", category_id=1, unit_id=1) for i in range(2)]
+    db.add_all(products)
+    db.commit()
+    bins = {loc.code: loc for loc in db.query(StorageLocation).filter(StorageLocation.location_type == "bin")}
+    for code, product, qty in (("A1-R1-S1-P1", products[0], 20), ("A1-R1-S1-P2", products[1], 10), ("A10-R1-S1-P1", products[0], 5)):
+        db.add(ProductLocationAssignment(
+            product_id=product.id, location_id=bins[code].id, warehouse_id=sample_warehouse.id, quantity=qty
+        ))
+    db.commit()
+    
+    response = client.get(f"/warehouses/{sample_warehouse.id}/locations/stock-summary")
+    assert response.status_code == 200
+    aisles = {row["code"]: row for row in response.json()}
+    # /A1 must not pick up the /A10 subtree
+    assert aisles["A1"]["locations"] == 5
+    assert aisles["A1"]["capacity"] == 100
+    assert aisles["A1"]["quantity"] == 30
+    assert aisles["A1"]["sku_count"] == 2
+    assert aisles["A1"]["occupancy_percentage"] == 30.0
+    assert aisles["A10"]["quantity"] == 5
+    assert aisles["A10"]["sku_count"] == 1
+    
+    rack_id = db.query(StorageLocation).filter(StorageLocation.code == "A1-R1").first().id
+    response = client.get(f"/warehouses/{sample_warehouse.id}/locations/{rack_id}/stock-summary")
+    assert response.status_code == 200
+    assert response.json()["quantity"] == 30
+    
+    response = client.get(f"/warehouses/{sample_warehouse.id}/locations/999999/stock-summary")
+    assert response.status_code == 404